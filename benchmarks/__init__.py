@@ -0,0 +1,8 @@
+"""
+Benchmarks for the canvas core.
+
+The benchmarks are written in the `asv <https://asv.readthedocs.io/>`_
+format (see ``asv.conf.json``) and can also be run without asv with
+``python -m benchmarks.run`` (see :mod:`benchmarks.run`).
+
+"""
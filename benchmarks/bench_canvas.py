@@ -0,0 +1,86 @@
+"""
+Benchmarks for the canvas scene and the quick menu.
+
+"""
+# AnyQt must be imported first (it provides the `sip` module alias)
+import AnyQt.QtWidgets  # noqa: F401
+
+from orangecanvas.canvas.scene import CanvasScene
+from orangecanvas.registry.qt import QtWidgetRegistry
+from orangecanvas.document.quickmenu import SuggestMenuPage
+
+from . import workflows
+
+SIZES = [10, 50, 200]
+
+
+class _SceneBenchmark(object):
+    params = (workflows.SHAPES, SIZES)
+    param_names = ["shape", "size"]
+    number = 1
+
+    def setup(self, shape, size):
+        self.app = workflows.qapp()
+        reg = workflows.registry()
+        self.scheme = workflows.workflow(reg, shape, size)
+        self.scene = CanvasScene()
+        self.scene.set_registry(QtWidgetRegistry(reg))
+
+    def teardown(self, shape, size):
+        self.scene.clear_scene()
+        self.scene.deleteLater()
+        self.app.processEvents()
+
+
+class Scene(_SceneBenchmark):
+    """
+    `CanvasScene.set_scheme`.
+    """
+    def time_set_scheme(self, shape, size):
+        self.scene.set_scheme(self.scheme)
+        self.scene.flush_link_updates()
+
+
+class AnchorLayout(_SceneBenchmark):
+    """
+    `AnchorLayout.activate` after all the nodes' anchors are invalidated.
+    """
+    def setup(self, shape, size):
+        super(AnchorLayout, self).setup(shape, size)
+        self.scene.set_scheme(self.scheme)
+        self.scene.flush_link_updates()
+        self.layout = self.scene.anchor_layout()
+        self.layout.activate()
+
+    def time_activate(self, shape, size):
+        for item in self.scene.node_items():
+            self.layout.invalidateNode(item)
+        self.layout.activate()
+
+
+class QuickMenuSearch(object):
+    """
+    Quick menu (`SuggestMenuPage`) search filtering.
+    """
+    params = [[100, 1000]]
+    param_names = ["widgets"]
+    queries = ["d", "da", "dat", "data", "data p", "data pl", "netw",
+               "cluster 123", "xyz", ""]
+
+    def setup(self, nwidgets):
+        self.app = workflows.qapp()
+        self.registry = QtWidgetRegistry(workflows.registry(nwidgets))
+        self.page = SuggestMenuPage()
+        self.page.setModel(self.registry.model())
+
+    def teardown(self, nwidgets):
+        self.page.deleteLater()
+        self.app.processEvents()
+
+    def time_search_text(self, nwidgets):
+        for query in self.queries:
+            self.page.setSearchText(query)
+
+    def time_filter_fixed_string(self, nwidgets):
+        for query in self.queries:
+            self.page.setFilterFixedString(query)
@@ -0,0 +1,124 @@
+"""
+Benchmarks for the workflow model, serialization and signal propagation.
+
+"""
+import io
+
+from orangecanvas.scheme import Scheme
+from orangecanvas.scheme.readwrite import scheme_load, scheme_to_ows_stream
+from orangecanvas.scheme.signalmanager import SignalManager
+
+from . import workflows
+
+SIZES = [10, 50, 200]
+
+
+class Links(object):
+    """
+    `Scheme.add_link` and `Scheme.find_links`.
+    """
+    params = (workflows.SHAPES, SIZES)
+    param_names = ["shape", "size"]
+    number = 1
+
+    def setup(self, shape, size):
+        reg = workflows.registry()
+        self.scheme = Scheme()
+        if shape == "cycle":
+            self.scheme.set_loop_flags(Scheme.AllowLoops)
+        self.nodes = workflows.nodes(reg, shape, size)
+        for node in self.nodes:
+            self.scheme.add_node(node)
+        self.links = workflows.links(shape, size, self.nodes)
+        self.full = workflows.workflow(reg, shape, size)
+
+    def time_add_link(self, shape, size):
+        for link in self.links:
+            self.scheme.add_link(link)
+
+    def time_find_links(self, shape, size):
+        find_links = self.full.find_links
+        for node in self.full.nodes:
+            find_links(source_node=node)
+            find_links(sink_node=node)
+
+
+class ReadWrite(object):
+    """
+    `scheme_load` and `scheme_to_ows_stream`.
+    """
+    params = (workflows.SHAPES, SIZES)
+    param_names = ["shape", "size"]
+
+    def setup(self, shape, size):
+        self.registry = workflows.registry()
+        self.scheme = workflows.workflow(self.registry, shape, size)
+        self.data = workflows.ows_bytes(self.scheme)
+
+    def time_scheme_to_ows_stream(self, shape, size):
+        scheme_to_ows_stream(self.scheme, io.BytesIO())
+
+    def time_scheme_load(self, shape, size):
+        scheme = Scheme()
+        # (the loop flags are not stored in the .ows file)
+        scheme.set_loop_flags(self.scheme.loop_flags())
+        scheme_load(scheme, io.BytesIO(self.data), registry=self.registry)
+
+
+class ForwardSignalManager(SignalManager):
+    """
+    A signal manager forwarding the nodes' inputs to their outputs (a
+    node sends a value only if it changed so the cycles terminate).
+    """
+    def __init__(self, scheme):
+        super(ForwardSignalManager, self).__init__(scheme)
+        scheme.node_added.connect(self.on_node_added)
+        scheme.node_removed.connect(self.on_node_removed)
+        scheme.link_added.connect(self.link_added)
+        scheme.link_removed.connect(self.link_removed)
+        self.values = {}
+
+    def send_to_node(self, node, signals):
+        values = [sig.value for sig in signals if sig.value is not None]
+        value = max(values) if values else None
+        if value is not None and self.values.get(node) != value:
+            self.values[node] = value
+            self.send(node, node.output_channel("value"), value, None)
+
+
+class SignalPropagation(object):
+    """
+    `SignalManager` throughput: propagate a new source value through the
+    workflow.
+    """
+    # (the update front is recomputed for every processed node)
+    params = (workflows.SHAPES, [10, 25, 50])
+    param_names = ["shape", "size"]
+    number = 1
+
+    def setup(self, shape, size):
+        self.app = workflows.qapp()
+        self.scheme = Scheme()
+        if shape == "cycle":
+            self.scheme.set_loop_flags(Scheme.AllowLoops)
+        self.manager = ForwardSignalManager(self.scheme)
+        # The updates are processed explicitly (see `propagate`)
+        self.manager.pause()
+        reg = workflows.registry()
+        self.nodes = workflows.nodes(reg, shape, size)
+        for node in self.nodes:
+            self.scheme.add_node(node)
+        for link in workflows.links(shape, size, self.nodes):
+            self.scheme.add_link(link)
+        self.value = 0
+        self.propagate()
+
+    def propagate(self):
+        self.value += 1
+        manager, source = self.manager, self.nodes[0]
+        manager.send(source, source.output_channel("value"), self.value, None)
+        while manager.node_update_front():
+            manager.process_queued()
+
+    def time_propagate(self, shape, size):
+        self.propagate()
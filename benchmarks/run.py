@@ -0,0 +1,327 @@
+"""
+A minimal runner for the (asv format) benchmarks.
+
+Run all the benchmarks and store the results for the current commit::
+
+    python -m benchmarks.run
+
+Run only the benchmarks matching a regular expression::
+
+    python -m benchmarks.run -b "Links|ReadWrite"
+
+Compare the results of two commits (by default the two latest runs)::
+
+    python -m benchmarks.run --compare [COMMIT [COMMIT]]
+
+The results are stored in ``.benchmarks/<machine>/<commit>.json``. When
+comparing, the benchmarks which became slower by more than `--threshold`
+are reported as regressions (and the exit status is 1).
+
+"""
+import os
+import re
+import sys
+import json
+import time
+import math
+import glob
+import pkgutil
+import platform
+import argparse
+import importlib
+import itertools
+import subprocess
+
+from datetime import datetime
+
+#: The root of the repository
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+#: The default results directory
+RESULTS_DIR = os.path.join(ROOT, ".benchmarks")
+
+#: The minimum duration (seconds) of a sample if the benchmark does not
+#: specify the `number` of calls per sample
+SAMPLE_TIME = 0.05
+
+clock = time.perf_counter
+
+
+class Benchmark(object):
+    """
+    A timing benchmark (a `time_*` method of a benchmark class) for one
+    combination of the class's `params`.
+    """
+    def __init__(self, module, cls, method, params=()):
+        self.module = module
+        self.cls = cls
+        self.method = method
+        self.params = tuple(params)
+
+    @property
+    def name(self):
+        name = "{}.{}.{}".format(self.module.__name__.rsplit(".", 1)[-1],
+                                 self.cls.__name__, self.method)
+        if self.params:
+            name += "({})".format(", ".join(map(str, self.params)))
+        return name
+
+    def sample(self, number=None):
+        """
+        Run a single sample (setup, `number` calls, teardown) and return
+        the (number of calls, time per call).
+        """
+        instance = self.cls()
+        setup = getattr(instance, "setup", None)
+        teardown = getattr(instance, "teardown", None)
+        func = getattr(instance, self.method)
+        if setup is not None:
+            setup(*self.params)
+        try:
+            if number is None:
+                number = getattr(self.cls, "number", None)
+            if number is None:
+                # Calibrate on the first call
+                start = clock()
+                func(*self.params)
+                elapsed = clock() - start
+                number = int(min(max(math.ceil(SAMPLE_TIME / max(elapsed,
+                                                                  1e-9)),
+                                     1), 10000))
+            start = clock()
+            for _ in range(number):
+                func(*self.params)
+            elapsed = clock() - start
+        finally:
+            if teardown is not None:
+                teardown(*self.params)
+        return number, elapsed / number
+
+    def run(self, repeat=5, number=None):
+        """
+        Run `repeat` samples and return the results dict.
+        """
+        samples = []
+        for _ in range(repeat):
+            number_, t = self.sample(number)
+            samples.append(t)
+        samples.sort()
+        return {"min": samples[0],
+                "median": samples[len(samples) // 2],
+                "number": number_,
+                "samples": samples}
+
+
+def _param_combinations(cls):
+    params = getattr(cls, "params", None)
+    if params is None:
+        return [()]
+    if params and not isinstance(params[0], (list, tuple)):
+        # A single parameter list (asv allows both forms)
+        params = [params]
+    return list(itertools.product(*params))
+
+
+def discover(pattern=None, quick=False):
+    """
+    Return a list of all the :class:`Benchmark`\\s (with names matching
+    the `pattern` regular expression).
+
+    With `quick` only the first value of each parameter is used.
+    """
+    package = importlib.import_module(__package__ or "benchmarks")
+    benchmarks = []
+    for _, name, _ in pkgutil.iter_modules(package.__path__):
+        if not name.startswith("bench_"):
+            continue
+        module = importlib.import_module(package.__name__ + "." + name)
+        classes = [obj for objname, obj in sorted(vars(module).items())
+                   if isinstance(obj, type) and not objname.startswith("_")
+                   and obj.__module__ == module.__name__]
+        for cls in classes:
+            methods = sorted(m for m in dir(cls) if m.startswith("time_"))
+            combinations = _param_combinations(cls)
+            if quick:
+                combinations = combinations[:1]
+            for method in methods:
+                for params in combinations:
+                    bench = Benchmark(module, cls, method, params)
+                    if pattern is None or re.search(pattern, bench.name):
+                        benchmarks.append(bench)
+    return benchmarks
+
+
+def git_commit():
+    """
+    Return the (commit hash, dirty) of the repository's working tree or
+    ("unknown", False) if not available.
+    """
+    try:
+        commit = subprocess.check_output(
+            ["git", "rev-parse", "HEAD"], cwd=ROOT,
+            stderr=subprocess.DEVNULL, universal_newlines=True).strip()
+        status = subprocess.check_output(
+            ["git", "status", "--porcelain", "--untracked-files=no"],
+            cwd=ROOT, stderr=subprocess.DEVNULL, universal_newlines=True)
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown", False
+    return commit, bool(status.strip())
+
+
+def machine_name():
+    return re.sub(r"[^\w.-]", "_", platform.node() or "unknown")
+
+
+def save_results(results, results_dir=RESULTS_DIR):
+    """
+    Save the `results` (as returned by :func:`run`) and return the filename.
+    """
+    dirname = os.path.join(results_dir, results["machine"])
+    os.makedirs(dirname, exist_ok=True)
+    filename = os.path.join(
+        dirname, "{}{}.json".format(results["commit"][:12],
+                                    "-dirty" if results["dirty"] else ""))
+    with open(filename + ".tmp", "w") as f:
+        json.dump(results, f, indent=1)
+    os.replace(filename + ".tmp", filename)
+    return filename
+
+
+def load_results(results_dir=RESULTS_DIR, machine=None):
+    """
+    Return a list of all the stored results for `machine` (the current
+    machine by default) ordered by date.
+    """
+    if machine is None:
+        machine = machine_name()
+    results = []
+    for filename in glob.glob(os.path.join(results_dir, machine, "*.json")):
+        with open(filename) as f:
+            results.append(json.load(f))
+    results.sort(key=lambda r: r["date"])
+    return results
+
+
+def run(benchmarks, repeat=5, number=None, log=None):
+    """
+    Run the `benchmarks` and return the results dict.
+    """
+    commit, dirty = git_commit()
+    results = {
+        "commit": commit,
+        "dirty": dirty,
+        "date": datetime.now().isoformat(),
+        "machine": machine_name(),
+        "python": platform.python_version(),
+        "results": {},
+    }
+    for bench in benchmarks:
+        try:
+            res = bench.run(repeat=repeat, number=number)
+        except Exception as err:
+            res = {"error": "{}: {}".format(type(err).__name__, err)}
+        results["results"][bench.name] = res
+        if log is not None:
+            if "error" in res:
+                log("{:<70} failed ({})".format(bench.name, res["error"]))
+            else:
+                log("{:<70} {:>10}".format(bench.name,
+                                           format_time(res["median"])))
+    return results
+
+
+def format_time(seconds):
+    for unit, scale in [("s", 1), ("ms", 1e-3), ("us", 1e-6)]:
+        if seconds >= scale:
+            return "{:.3g} {}".format(seconds / scale, unit)
+    return "{:.3g} ns".format(seconds / 1e-9)
+
+
+def compare(old, new, threshold=1.1):
+    """
+    Compare the `old` and `new` results. Return a list of
+    ``(name, old time, new time, ratio, regressed)`` tuples.
+    """
+    rows = []
+    names = list(new["results"])
+    names += [name for name in old["results"] if name not in new["results"]]
+    for name in names:
+        a = old["results"].get(name, {}).get("median")
+        b = new["results"].get(name, {}).get("median")
+        ratio = b / a if a and b else None
+        rows.append((name, a, b, ratio,
+                     ratio is not None and ratio > threshold))
+    return rows
+
+
+def _find(results, commit):
+    matches = [r for r in results if r["commit"].startswith(commit)]
+    if not matches:
+        raise SystemExit("No results for commit {!r}".format(commit))
+    return matches[-1]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Run the canvas core benchmarks.")
+    parser.add_argument("-b", "--bench", metavar="REGEX",
+                        help="Run only the benchmarks matching REGEX")
+    parser.add_argument("--quick", action="store_true",
+                        help="Run each benchmark once with the first "
+                             "parameter values (a smoke test)")
+    parser.add_argument("--repeat", type=int, default=5,
+                        help="Number of samples (default: %(default)s)")
+    parser.add_argument("--results-dir", default=RESULTS_DIR,
+                        help="Results directory (default: %(default)s)")
+    parser.add_argument("--no-save", action="store_true",
+                        help="Do not store the results")
+    parser.add_argument("--compare", nargs="*", metavar="COMMIT",
+                        help="Compare the stored results of two commits "
+                             "(default: the two latest runs)")
+    parser.add_argument("--threshold", type=float, default=1.1,
+                        help="Slowdown ratio reported as a regression "
+                             "(default: %(default)s)")
+    args = parser.parse_args(argv)
+
+    if args.compare is not None:
+        stored = load_results(args.results_dir)
+        if len(args.compare) > 2:
+            parser.error("--compare takes at most two commits")
+        if len(args.compare) == 2:
+            old, new = [_find(stored, c) for c in args.compare]
+        elif len(args.compare) == 1:
+            if not stored:
+                parser.error("No stored results")
+            old, new = _find(stored, args.compare[0]), stored[-1]
+        elif len(stored) >= 2:
+            old, new = stored[-2], stored[-1]
+        else:
+            parser.error("At least two stored runs are required")
+        print("{} -> {}".format(old["commit"][:12], new["commit"][:12]))
+        rows = compare(old, new, args.threshold)
+        for name, a, b, ratio, regressed in rows:
+            print("{} {:<70} {:>10} {:>10} {:>7}".format(
+                "!" if regressed else " ", name,
+                format_time(a) if a else "-", format_time(b) if b else "-",
+                "{:.2f}".format(ratio) if ratio else "-"))
+        regressions = [row for row in rows if row[-1]]
+        if regressions:
+            print("{} benchmarks regressed by more than {:.0%}".format(
+                len(regressions), args.threshold - 1))
+            return 1
+        return 0
+
+    benchmarks = discover(args.bench, quick=args.quick)
+    if args.quick:
+        results = run(benchmarks, repeat=1, number=1, log=print)
+    else:
+        results = run(benchmarks, repeat=args.repeat, log=print)
+    if not args.no_save and not args.quick:
+        print("Results saved to", save_results(results, args.results_dir))
+    failed = [name for name, res in results["results"].items()
+              if "error" in res]
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
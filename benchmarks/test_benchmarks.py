@@ -0,0 +1,56 @@
+"""
+Smoke tests for the benchmarks and the runner.
+
+"""
+import shutil
+import tempfile
+import unittest
+
+from orangecanvas.gui import test
+
+from . import run, workflows
+
+
+class TestWorkflows(unittest.TestCase):
+    def test_shapes(self):
+        reg = workflows.registry()
+        for shape in workflows.SHAPES:
+            scheme = workflows.workflow(reg, shape, 5)
+            self.assertEqual(len(scheme.nodes), 6)
+            self.assertEqual(len(scheme.links),
+                             len(workflows.edges(shape, 5)))
+        with self.assertRaises(ValueError):
+            workflows.edges("star", 5)
+
+
+class TestBenchmarks(test.QAppTestCase):
+    def test_quick(self):
+        benchmarks = run.discover(quick=True)
+        names = [bench.name for bench in benchmarks]
+        self.assertIn("bench_scheme.Links.time_add_link(chain, 10)", names)
+        results = run.run(benchmarks, repeat=1, number=1)
+        errors = {name: res["error"]
+                  for name, res in results["results"].items()
+                  if "error" in res}
+        self.assertEqual(errors, {})
+
+    def test_results(self):
+        dirname = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, dirname)
+        benchmarks = run.discover("Links.time_find_links", quick=True)
+        self.assertEqual(len(benchmarks), 1)
+        old = run.run(benchmarks, repeat=2)
+        new = dict(old, commit="f" * 40, date="9999")
+        run.save_results(old, dirname)
+        run.save_results(new, dirname)
+        stored = run.load_results(dirname)
+        self.assertEqual([r["commit"] for r in stored],
+                         [old["commit"], new["commit"]])
+
+        name = benchmarks[0].name
+        slower = dict(new, results={name: {"median": 2 * old["results"][name]
+                                                                ["median"]}})
+        rows = run.compare(old, slower, threshold=1.5)
+        self.assertEqual([row[0] for row in rows], [name])
+        self.assertTrue(rows[0][-1])
+        self.assertFalse(run.compare(old, old)[0][-1])
@@ -0,0 +1,150 @@
+"""
+Synthetic workflow generators for the benchmarks.
+
+"""
+import os
+import io
+
+from orangecanvas.registry import WidgetRegistry
+from orangecanvas.registry.description import (
+    WidgetDescription, CategoryDescription, InputSignal, OutputSignal,
+    Single, Multiple
+)
+from orangecanvas.scheme import Scheme, SchemeNode, SchemeLink
+from orangecanvas.scheme.readwrite import scheme_to_ows_stream
+
+#: The workflow shapes (see :func:`workflow`)
+SHAPES = ["chain", "fanout", "diamond", "cycle"]
+
+
+def registry(nwidgets=2):
+    """
+    Return a :class:`WidgetRegistry` with a 'source' widget (one output),
+    a 'node' widget (a single and a multiple input and one output) and
+    `nwidgets` - 2 additional filler widgets (for the menu benchmarks).
+    """
+    reg = WidgetRegistry()
+    cat = CategoryDescription("Benchmark", background="light-orange")
+    reg.register_category(cat)
+    reg.register_widget(WidgetDescription(
+        "source", "source", "Benchmark", qualified_name="source",
+        package=__name__,
+        outputs=[OutputSignal("value", "int")]
+    ))
+    reg.register_widget(WidgetDescription(
+        "node", "node", "Benchmark", qualified_name="node",
+        package=__name__,
+        inputs=[InputSignal("value", "int", "set_value", flags=Single),
+                InputSignal("values", "int", "set_values", flags=Multiple)],
+        outputs=[OutputSignal("value", "int")]
+    ))
+    words = ["data", "plot", "model", "tree", "table", "select", "merge",
+             "score", "text", "image", "network", "time", "series"]
+    for i in range(max(nwidgets - 2, 0)):
+        name = "{} {} {}".format(words[i % len(words)],
+                                 words[(i // 7) % len(words)], i)
+        reg.register_widget(WidgetDescription(
+            name, "filler-{}".format(i), "Benchmark",
+            qualified_name="filler-{}".format(i), package=__name__,
+            keywords=[words[(i // 3) % len(words)]],
+            description=" ".join(words[(i + k) % len(words)]
+                                 for k in range(5)),
+            inputs=[InputSignal("value", "int", "set_value")],
+            outputs=[OutputSignal("value", "int")]
+        ))
+    return reg
+
+
+def edges(shape, size):
+    """
+    Return a list of ``(source index, sink index, sink channel)`` edges
+    of a workflow with `size` + 1 nodes (node 0 is the source) of `shape`.
+
+    * 'chain': 0 -> 1 -> 2 -> ... -> size
+    * 'fanout': 0 -> i for all i
+    * 'diamond': 0 -> i -> size for 0 < i < size
+    * 'cycle': a chain with a link from the last node back to node 1
+      (requires :attr:`Scheme.AllowLoops`)
+
+    """
+    if shape == "chain":
+        return [(i, i + 1, "value") for i in range(size)]
+    elif shape == "fanout":
+        return [(0, i, "value") for i in range(1, size + 1)]
+    elif shape == "diamond":
+        return [(0, i, "value") for i in range(1, size)] + \
+               [(i, size, "values") for i in range(1, size)]
+    elif shape == "cycle":
+        return [(i, i + 1, "value") for i in range(size)] + \
+               [(size, 1, "values")]
+    else:
+        raise ValueError("Unknown shape {!r}".format(shape))
+
+
+def _position(shape, index, size):
+    # Lay the nodes out on a grid (20 nodes per row)
+    if shape in ("fanout", "diamond") and 0 < index < size:
+        return 250, 80 * index
+    if shape in ("fanout", "diamond") and index:
+        return 500, 40 * size
+    return 150 * (index % 20), 150 * (index // 20)
+
+
+def nodes(reg, shape, size):
+    """
+    Return the (new) :class:`SchemeNode`\\s of a `shape` workflow.
+    """
+    source, node = reg.widget("source"), reg.widget("node")
+    return [SchemeNode(source if i == 0 else node, title="n{}".format(i),
+                       position=_position(shape, i, size))
+            for i in range(size + 1)]
+
+
+def links(shape, size, nodes):
+    """
+    Return the (new) :class:`SchemeLink`\\s between `nodes` of a `shape`
+    workflow.
+    """
+    return [SchemeLink(nodes[i], "value", nodes[j], channel)
+            for i, j, channel in edges(shape, size)]
+
+
+def workflow(reg, shape, size):
+    """
+    Return a new :class:`Scheme` of the given `shape` and `size` (see
+    :func:`edges`).
+    """
+    scheme = Scheme(title="{} {}".format(shape, size))
+    if shape == "cycle":
+        scheme.set_loop_flags(Scheme.AllowLoops)
+    nodes_ = nodes(reg, shape, size)
+    for node in nodes_:
+        scheme.add_node(node)
+    for link in links(shape, size, nodes_):
+        scheme.add_link(link)
+    return scheme
+
+
+def ows_bytes(scheme):
+    """
+    Return the `scheme` serialized in the .ows format.
+    """
+    stream = io.BytesIO()
+    scheme_to_ows_stream(scheme, stream)
+    return stream.getvalue()
+
+
+_app = None
+
+
+def qapp():
+    """
+    Return the (offscreen by default) QApplication instance.
+    """
+    global _app
+    from AnyQt.QtWidgets import QApplication
+    app = QApplication.instance()
+    if app is None:
+        os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+        app = _app = QApplication([])
+    return app
@@ -1,6 +1,10 @@
 import sys
 
-from orangecanvas.main import main
-
 if __name__ == "__main__":
-    sys.exit(main(sys.argv))
+    if len(sys.argv) > 1 and sys.argv[1] == "run":
+        # Headless workflow execution
+        from orangecanvas.run import main
+        sys.exit(main(sys.argv[:1] + sys.argv[2:]))
+    else:
+        from orangecanvas.main import main
+        sys.exit(main(sys.argv))
@@ -2,21 +2,26 @@ from __future__ import print_function
 
 import sys
 import os
-import errno
+import io
 import shlex
+import locale
 import subprocess
 import itertools
 import socket
+import json
+import time
+import threading
+import logging
+import concurrent.futures
 import xmlrpc.client
 
 from collections import namedtuple, deque
 from xml.sax.saxutils import escape
-from distutils import version
 
 import future.moves.urllib.request
 from future.moves import urllib
 
-import pkg_resources
+import six
 
 try:
     import docutils.core
@@ -35,7 +40,7 @@ from AnyQt.QtGui import (
 )
 from AnyQt.QtCore import (
     QSortFilterProxyModel, QItemSelectionModel,
-    Qt, QObject, QMetaObject, QEvent, QSize, QTimer, QThread, Q_ARG
+    Qt, QObject, QEvent, QSize, QTimer, QProcess, QProcessEnvironment
 )
 from AnyQt.QtCore import pyqtSignal as Signal, pyqtSlot as Slot
 
@@ -43,8 +48,12 @@ from ..gui.utils import message_warning, message_information, \
                         message_critical as message_error
 from ..help.manager import get_dist_meta, trim
 from ..utils.qtcompat import qunwrap
+from ..utils import entrypoints, version_key
+from ..utils.concurrent import method_queued
 from .. import config
 
+log = logging.getLogger(__name__)
+
 #: An installable distribution from PyPi
 Installable = namedtuple(
     "Installable",
@@ -86,16 +95,7 @@ def is_updatable(item):
         return False
     else:
         inst, dist = item
-        try:
-            v1 = version.StrictVersion(dist.version)
-            v2 = version.StrictVersion(inst.version)
-        except ValueError:
-            pass
-        else:
-            return v1 < v2
-
-        return (version.LooseVersion(dist.version) <
-                version.LooseVersion(inst.version))
+        return version_key(dist.version) < version_key(inst.version)
 
 
 class TristateCheckItemDelegate(QStyledItemDelegate):
@@ -361,18 +361,6 @@ class AddonManagerWidget(QWidget):
         return QSize(480, 420)
 
 
-def method_queued(method, sig, conntype=Qt.QueuedConnection):
-    name = method.__name__
-    obj = method.__self__
-    assert isinstance(obj, QObject)
-
-    def call(*args):
-        args = [Q_ARG(atype, arg) for atype, arg in zip(sig, args)]
-        return QMetaObject.invokeMethod(obj, name, conntype, *args)
-
-    return call
-
-
 class AddonManagerDialog(QDialog):
     def __init__(self, parent=None, **kwargs):
         super(AddonManagerDialog, self).__init__(parent, **kwargs)
@@ -392,15 +380,25 @@ class AddonManagerDialog(QDialog):
 
         self.__progress = None  # type: QProgressDialog
 
-        # The installer thread
-        self.__thread = None
         # The installer object
-        self.__installer = None
+        self.__installer = None  # type: Installer
+        # Extra arguments for pip install commands
+        self.__pip_args = []
 
     @Slot(object)
     def setItems(self, items):
         self.addonwidget.setItems(items)
 
+    def setPipArguments(self, args):
+        """
+        Set extra arguments for the `pip install` commands
+        (e.g. ``["--no-index", "--find-links", path]``)
+        """
+        self.__pip_args = list(args)
+
+    def pipArguments(self):
+        return list(self.__pip_args)
+
     def progressDialog(self):
         if self.__progress is None:
             self.__progress = QProgressDialog(
@@ -418,15 +416,13 @@ class AddonManagerDialog(QDialog):
 
     def done(self, retcode):
         super(AddonManagerDialog, self).done(retcode)
-        if self.__thread is not None:
-            self.__thread.quit()
-            self.__thread.wait(1000)
+        if self.__installer is not None and self.__installer.isRunning():
+            self.__installer.interupt()
 
     def closeEvent(self, event):
         super(AddonManagerDialog, self).closeEvent(event)
-        if self.__thread is not None:
-            self.__thread.quit()
-            self.__thread.wait(1000)
+        if self.__installer is not None and self.__installer.isRunning():
+            self.__installer.interupt()
 
     def __accepted(self):
         steps = self.addonwidget.itemState()
@@ -436,17 +432,15 @@ class AddonManagerDialog(QDialog):
             steps = sorted(
                 steps, key=lambda step: 0 if step[0] == Uninstall else 1
             )
-            self.__installer = Installer(steps=steps)
-            self.__thread = QThread(self)
-            self.__thread.start()
-
-            self.__installer.moveToThread(self.__thread)
+            self.__installer = Installer(self, steps=steps,
+                                         pip_args=self.__pip_args)
             self.__installer.finished.connect(self.__on_installer_finished)
             self.__installer.error.connect(self.__on_installer_error)
 
             progress = self.progressDialog()
 
             self.__installer.installStatusChanged.connect(progress.setLabelText)
+            self.__installer.outputLine.connect(self.__on_installer_output)
             progress.show()
             progress.setLabelText("Installing")
 
@@ -455,7 +449,15 @@ class AddonManagerDialog(QDialog):
         else:
             self.accept()
 
-    def __on_installer_error(self, command, pkg, retcode, output):
+    def __on_installer_output(self, line):
+        line = line.strip()
+        if line and self.__progress is not None:
+            status = self.__installer.statusMessage()
+            self.__progress.setLabelText(
+                "{}\n{}".format(status, line[:80]))
+
+    def __on_installer_error(self, command, steps, retcode, output):
+        installed_distributions_invalidate()
         message_error(
             "An error occurred while running a subprocess", title="Error",
             informative_text="{} exited with non zero status.".format(command),
@@ -465,12 +467,24 @@ class AddonManagerDialog(QDialog):
         self.reject()
 
     def __on_installer_finished(self):
+        installed_distributions_invalidate()
         message_information(
             "Please restart the application for changes to take effect.",
             parent=self)
         self.accept()
 
 
+class Transport(xmlrpc.client.Transport):
+    def __init__(self, use_datetime=0, timeout=socket._GLOBAL_DEFAULT_TIMEOUT):
+        super(Transport, self).__init__(use_datetime)
+        self._timeout = timeout
+
+    def make_connection(self, *args, **kwargs):
+        conn = super(Transport, self).make_connection(*args, **kwargs)
+        conn.timeout = self._timeout
+        return conn
+
+
 class SafeTransport(xmlrpc.client.SafeTransport):
     def __init__(self, use_datetime=0, timeout=socket._GLOBAL_DEFAULT_TIMEOUT):
         super(SafeTransport, self).__init__(use_datetime)
@@ -482,55 +496,254 @@ class SafeTransport(xmlrpc.client.SafeTransport):
         return conn
 
 
-def pypi_search(spec, timeout=socket._GLOBAL_DEFAULT_TIMEOUT):
+def _server_proxy(index_url, timeout=socket._GLOBAL_DEFAULT_TIMEOUT):
+    if index_url.startswith("https:"):
+        transport = SafeTransport(timeout=timeout)
+    else:
+        transport = Transport(timeout=timeout)
+    return xmlrpc.client.ServerProxy(index_url, transport=transport)
+
+
+def _release(release, urls):
+    if not (release and urls):
+        # ignore releases without actual source/wheel/egg files,
+        # or with empty metadata (deleted from PyPi?).
+        return None
+    urls = [ReleaseUrl(url["filename"], url["url"],
+                       url["size"], url["python_version"],
+                       url["packagetype"])
+            for url in urls]
+    return Installable(release["name"], release["version"],
+                       release["summary"], release["description"],
+                       release["package_url"],
+                       urls)
+
+
+def pypi_search(spec, timeout=socket._GLOBAL_DEFAULT_TIMEOUT,
+                index_url=None, max_workers=8):
     """
     Search package distributions available on PyPi using PyPiXMLRPC.
+
+    The release metadata for the found packages is fetched concurrently
+    (using at most `max_workers` connections).
+
+    Parameters
+    ----------
+    spec : dict
+        Search specification (see PyPi's xmlrpc `search`)
+    timeout : float
+        Socket timeout.
+    index_url : Optional[str]
+        The xmlrpc index url (`config.default.addon_pypi_index_url()` by
+        default).
+    max_workers : int
+        Max number of concurrent connections.
+
+    Returns
+    -------
+    packages : list of Installable
     """
-    pypi = xmlrpc.client.ServerProxy(
-        "https://pypi.python.org/pypi",
-        transport=SafeTransport(timeout=timeout)
-    )
-    addons = pypi.search(spec)
-
-    multicall = xmlrpc.client.MultiCall(pypi)
-    for addon in addons:
-        name, version = addon["name"], addon["version"]
-        multicall.release_data(name, version)
-        multicall.release_urls(name, version)
-
-    results = list(multicall())
-    release_data = results[::2]
-    release_urls = results[1::2]
-    packages = []
-    for release, urls in zip(release_data, release_urls):
-        if release and urls:
-            # ignore releases without actual source/wheel/egg files,
-            # or with empty metadata (deleted from PyPi?).
-            urls = [ReleaseUrl(url["filename"], url["url"],
-                               url["size"], url["python_version"],
-                               url["packagetype"])
-                    for url in urls]
-            packages.append(
-                Installable(release["name"], release["version"],
-                            release["summary"], release["description"],
-                            release["package_url"],
-                            urls)
-            )
+    if index_url is None:
+        index_url = config.default.addon_pypi_index_url()
+
+    addons = _server_proxy(index_url, timeout).search(spec)
+    if not addons:
+        return []
+
+    local = threading.local()
+
+    def fetch(name, version):
+        # One (persistent) connection per worker thread.
+        proxy = getattr(local, "proxy", None)
+        if proxy is None:
+            proxy = local.proxy = _server_proxy(index_url, timeout)
+        return _release(proxy.release_data(name, version),
+                        proxy.release_urls(name, version))
+
+    workers = max(1, min(max_workers, len(addons)))
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as pool:
+        releases = list(pool.map(
+            fetch,
+            [addon["name"] for addon in addons],
+            [addon["version"] for addon in addons]
+        ))
+    return [release for release in releases if release is not None]
+
+
+def _last_serial(index_url, timeout=socket._GLOBAL_DEFAULT_TIMEOUT):
+    """
+    Return the index's last changelog serial or None if not supported.
+    """
+    try:
+        return _server_proxy(index_url, timeout).changelog_last_serial()
+    except (xmlrpc.client.Fault, xmlrpc.client.ProtocolError):
+        return None
+
+
+class IndexCache(object):
+    """
+    An on disk cache of the add-on index search results.
+
+    A cached result is used for `ttl` seconds. After that the index is
+    queried for its last changelog serial and the (full) search is only
+    repeated if the serial has changed (or if the index does not
+    support it).
+
+    Parameters
+    ----------
+    filename : str
+        The cache filename.
+    ttl : float
+        Time to live in seconds.
+    """
+    #: Default time to live in seconds
+    TTL = 60 * 60
+    #: Cache format version
+    version = 1
+
+    def __init__(self, filename, ttl=TTL):
+        self.filename = filename
+        self.ttl = ttl
+
+    def load(self):
+        """
+        Load and return the cache contents (a dict) or None.
+        """
+        try:
+            with io.open(self.filename, "r", encoding="utf-8") as f:
+                state = json.load(f)
+        except (IOError, OSError, ValueError):
+            return None
+        if not isinstance(state, dict) or \
+                state.get("version") != self.version:
+            return None
+        return state
+
+    def store(self, state):
+        state = dict(state, version=self.version)
+        dirname = os.path.dirname(self.filename)
+        tmpname = self.filename + ".tmp"
+        try:
+            if dirname and not os.path.isdir(dirname):
+                os.makedirs(dirname)
+            with io.open(tmpname, "w", encoding="utf-8") as f:
+                f.write(six.text_type(json.dumps(state)))
+            os.replace(tmpname, self.filename)
+        except (IOError, OSError):
+            log.error("Could not store the add-on index cache in %r",
+                      self.filename, exc_info=True)
+
+    def clear(self):
+        try:
+            os.remove(self.filename)
+        except OSError:
+            pass
+
+    def search(self, spec, timeout=socket._GLOBAL_DEFAULT_TIMEOUT,
+               index_url=None, force_refresh=False):
+        """
+        Return the (cached) :func:`pypi_search` results.
+        """
+        if index_url is None:
+            index_url = config.default.addon_pypi_index_url()
+
+        state = self.load()
+        if state is not None and \
+                (state.get("index_url") != index_url or
+                 state.get("spec") != spec):
+            state = None
+
+        now = time.time()
+        try:
+            if state is not None and not force_refresh:
+                if now - state.get("timestamp", 0) < self.ttl:
+                    return _packages_from_json(state["packages"])
+
+                serial = _last_serial(index_url, timeout)
+                if serial is not None and serial == state.get("serial"):
+                    # Nothing changed; only refresh the timestamp.
+                    self.store(dict(state, timestamp=now))
+                    return _packages_from_json(state["packages"])
+            else:
+                serial = _last_serial(index_url, timeout)
+
+            packages = pypi_search(spec, timeout=timeout,
+                                   index_url=index_url)
+        except (OSError, IOError, xmlrpc.client.ProtocolError,
+                xmlrpc.client.Fault):
+            if state is None:
+                raise
+            log.warning("Could not refresh the add-on index. Using a "
+                        "stale cached copy.", exc_info=True)
+            return _packages_from_json(state["packages"])
+
+        self.store({"index_url": index_url,
+                    "spec": spec,
+                    "serial": serial,
+                    "timestamp": now,
+                    "packages": _packages_to_json(packages)})
+        return packages
 
-    return packages
 
+def _packages_to_json(packages):
+    return [dict(pkg._asdict(),
+                 release_urls=[url._asdict() for url in pkg.release_urls])
+            for pkg in packages]
 
-def list_pypi_addons():
+
+def _packages_from_json(packages):
+    return [Installable(**dict(pkg, release_urls=[ReleaseUrl(**url)
+                                                  for url in
+                                                  pkg["release_urls"]]))
+            for pkg in packages]
+
+
+def index_cache():
+    """
+    Return the default add-on :class:`IndexCache`.
+    """
+    return IndexCache(os.path.join(config.cache_dir(), "addon-index.json"))
+
+
+def list_pypi_addons(force_refresh=False):
     """
     List add-ons available on pypi.
     """
-    return pypi_search(config.default.addon_pypi_search_spec(), timeout=20)
+    return index_cache().search(
+        config.default.addon_pypi_search_spec(), timeout=20,
+        force_refresh=force_refresh
+    )
 
 
 def list_installed_addons():
     return [ep.dist for ep in config.default.addon_entry_points()]
 
 
+_installed_dists = None
+
+
+def installed_distributions():
+    """
+    Return a mapping of all installed distributions by their (lower case)
+    key.
+
+    The mapping is cached until the contents of any `sys.path` entry
+    change (or :func:`installed_distributions_invalidate` is called).
+    """
+    global _installed_dists
+    stamp = entrypoints.path_stamp(sys.path)
+    if _installed_dists is None or _installed_dists[0] != stamp:
+        dists = entrypoints.distributions()
+        _installed_dists = (stamp, {dist.key: dist for dist in dists})
+    return _installed_dists[1]
+
+
+def installed_distributions_invalidate():
+    global _installed_dists
+    _installed_dists = None
+    entrypoints.invalidate()
+
+
 def installable_items(pypipackages, installed=[]):
     """
     Return a list of installable items.
@@ -538,7 +751,7 @@ def installable_items(pypipackages, installed=[]):
     Parameters
     ----------
     pypipackages : list of Installable
-    installed : list of pkg_resources.Distribution
+    installed : list of Distribution
     """
 
     dists = {dist.project_name: dist for dist in installed}
@@ -546,18 +759,11 @@ def installable_items(pypipackages, installed=[]):
 
     # For every pypi available distribution not listed by
     # `installed`, check if it is actually already installed.
-    ws = pkg_resources.WorkingSet()
+    available = installed_distributions()
     for pkg_name in set(packages.keys()).difference(set(dists.keys())):
-        try:
-            d = ws.find(pkg_resources.Requirement.parse(pkg_name))
-        except pkg_resources.VersionConflict:
-            pass
-        except ValueError:
-            # Requirements.parse error ?
-            pass
-        else:
-            if d is not None:
-                dists[d.project_name] = d
+        d = available.get(entrypoints.safe_name(pkg_name).lower())
+        if d is not None:
+            dists[d.project_name] = d
 
     project_names = unique(
         itertools.chain(packages.keys(), dists.keys())
@@ -605,107 +811,192 @@ def _env_with_proxies():
 Install, Upgrade, Uninstall = 1, 2, 3
 
 
+def installer_commands(steps, pip_args=[]):
+    """
+    Group the (command, item) `steps` into as few pip invocations as
+    possible.
+
+    All uninstalls are done first in a single invocation. Upgraded
+    packages are then force upgraded without their dependencies, and
+    finally all new and upgraded packages are installed in one invocation
+    so pip can resolve (only the missing) dependencies together.
+
+    Parameters
+    ----------
+    steps : list of (int, Installed | Available)
+    pip_args : list of str
+        Extra arguments passed to the `pip install` invocations
+        (e.g. ``["--no-index", "--find-links", path]``).
+
+    Returns
+    -------
+    commands : list of (list of str, list of steps, str)
+        A list of (pip arguments, steps, status message) tuples.
+    """
+    uninstall = [step for step in steps if step[0] == Uninstall]
+    upgrade = [step for step in steps if step[0] == Upgrade]
+    install = [step for step in steps if step[0] == Install]
+
+    def names(steps):
+        return [pkg.local.project_name if cmd == Uninstall
+                else pkg.installable.name
+                for cmd, pkg in steps]
+
+    commands = []
+    if uninstall:
+        commands.append(
+            (["-m", "pip", "uninstall", "--yes"] + names(uninstall),
+             uninstall,
+             "Uninstalling {}".format(", ".join(names(uninstall))))
+        )
+    if upgrade:
+        commands.append(
+            (["-m", "pip", "install", "--upgrade", "--no-deps"] +
+             list(pip_args) + names(upgrade),
+             upgrade,
+             "Upgrading {}".format(", ".join(names(upgrade))))
+        )
+    if install or upgrade:
+        commands.append(
+            (["-m", "pip", "install"] + list(pip_args) +
+             names(install + upgrade),
+             install + upgrade,
+             "Installing {}".format(", ".join(names(install + upgrade))))
+        )
+    return commands
+
+
 class Installer(QObject):
+    """
+    Run the install/upgrade/uninstall `steps` in (asynchronous) pip
+    subprocesses.
+
+    The subprocess output is read as it becomes available (the event loop
+    is never blocked) and is reported line by line with `outputLine`.
+
+    .. note:: The steps are grouped into as few pip invocations as
+              possible (see :func:`installer_commands`), so the second
+              argument of the `error` signal is the list of (command, item)
+              steps run by the failed invocation and not a single package.
+    """
     installStatusChanged = Signal(str)
+    #: Emitted for each line of the subprocess output
+    outputLine = Signal(str)
     started = Signal()
     finished = Signal()
+    #: Emitted with (command, steps, exit code, output lines) when a pip
+    #: invocation fails; `steps` is a list of (command, item) tuples.
     error = Signal(str, object, int, list)
 
-    def __init__(self, parent=None, steps=[]):
+    def __init__(self, parent=None, steps=[], pip_args=[]):
         QObject.__init__(self, parent)
         self.__interupt = False
-        self.__queue = deque(steps)
+        self.__queue = deque(installer_commands(steps, pip_args))
         self.__statusMessage = ""
+        self.__process = None  # type: QProcess
+        self.__current = None
+        self.__output = []
+        self.__partial = ""
 
     def start(self):
+        self.started.emit()
         QTimer.singleShot(0, self._next)
 
     def interupt(self):
         self.__interupt = True
+        if self.__process is not None:
+            process, self.__process = self.__process, None
+            process.finished.disconnect(self.__on_finished)
+            process.readyReadStandardOutput.disconnect(self.__on_ready_read)
+            process.kill()
+            process.waitForFinished(1000)
+            process.deleteLater()
+
+    def isRunning(self):
+        """
+        Is there a subprocess running.
+        """
+        return self.__process is not None
 
     def setStatusMessage(self, message):
         if self.__statusMessage != message:
             self.__statusMessage = message
             self.installStatusChanged.emit(message)
 
+    def statusMessage(self):
+        return self.__statusMessage
+
     @Slot()
     def _next(self):
-        def fmt_cmd(cmd):
-            return "python " + (" ".join(map(shlex.quote, cmd)))
-
-        command, pkg = self.__queue.popleft()
-        if command == Install:
-            inst = pkg.installable
-            self.setStatusMessage("Installing {}".format(inst.name))
-            links = []
-
-            cmd = ["-m", "pip", "install"] + links + [inst.name]
-            process = python_process(cmd, bufsize=-1, universal_newlines=True,
-                                     env=_env_with_proxies())
-            retcode, output = self.__subprocessrun(process)
-
-            if retcode != 0:
-                self.error.emit(fmt_cmd(cmd), pkg, retcode, output)
-                return
-
-        elif command == Upgrade:
-            inst = pkg.installable
-            self.setStatusMessage("Upgrading {}".format(inst.name))
-
-            cmd = ["-m", "pip", "install", "--upgrade", "--no-deps", inst.name]
-            process = python_process(cmd, bufsize=-1, universal_newlines=True,
-                                     env=_env_with_proxies())
-            retcode, output = self.__subprocessrun(process)
-
-            if retcode != 0:
-                self.error.emit(fmt_cmd(cmd), pkg, retcode, output)
-                return
-
-            cmd = ["-m", "pip", "install", inst.name]
-            process = python_process(cmd, bufsize=-1, universal_newlines=True,
-                                     env=_env_with_proxies())
-            retcode, output = self.__subprocessrun(process)
-
-            if retcode != 0:
-                self.error.emit(fmt_cmd(cmd), pkg, retcode, output)
-                return
-
-        elif command == Uninstall:
-            dist = pkg.local
-            self.setStatusMessage("Uninstalling {}".format(dist.project_name))
-
-            cmd = ["-m", "pip", "uninstall", "--yes", dist.project_name]
-            process = python_process(cmd, bufsize=-1, universal_newlines=True,
-                                     env=_env_with_proxies())
-            retcode, output = self.__subprocessrun(process)
-
-            if retcode != 0:
-                self.error.emit(fmt_cmd(cmd), pkg, retcode, output)
-                return
-
-        if self.__queue:
-            QTimer.singleShot(0, self._next)
-        else:
-            self.finished.emit()
+        if self.__interupt:
+            return
 
-    def __subprocessrun(self, process):
-        output = []
-        while process.poll() is None:
-            try:
-                line = process.stdout.readline()
-            except IOError as ex:
-                if ex.errno != errno.EINTR:
-                    raise
-            else:
-                output.append(line)
-                print(line, end="")
-        # Read remaining output if any
-        line = process.stdout.read()
-        if line:
-            output.append(line)
+        if not self.__queue:
+            self.finished.emit()
+            return
+
+        args, steps, message = self.__current = self.__queue.popleft()
+        self.setStatusMessage(message)
+        self.__output = []
+        self.__partial = ""
+
+        process = QProcess(self)
+        process.setProcessChannelMode(QProcess.MergedChannels)
+        env = QProcessEnvironment()
+        for name, value in _env_with_proxies().items():
+            env.insert(name, value)
+        process.setProcessEnvironment(env)
+        process.readyReadStandardOutput.connect(self.__on_ready_read)
+        process.finished.connect(self.__on_finished)
+        process.errorOccurred.connect(self.__on_error_occurred)
+        self.__process = process
+        process.start(python_executable(), args)
+
+    def __on_ready_read(self):
+        self.__read_output(self.sender())
+
+    def __read_output(self, process, final=False):
+        data = bytes(process.readAllStandardOutput())
+        text = self.__partial + data.decode(_console_encoding(), "replace")
+        lines = text.splitlines(True)
+        if lines and not final and not lines[-1].endswith(("\n", "\r")):
+            # Keep an incomplete last line until more output arrives.
+            self.__partial = lines.pop(-1)
+        else:
+            self.__partial = ""
+        for line in lines:
+            self.__output.append(line)
             print(line, end="")
+            self.outputLine.emit(line)
+
+    def __on_error_occurred(self, error):
+        if error == QProcess.FailedToStart:
+            # finished is not emitted in this case
+            process, self.__process = self.__process, None
+            process.deleteLater()
+            args, steps, _ = self.__current
+            self.error.emit(fmt_cmd(args), steps, -1,
+                            [process.errorString()])
+
+    def __on_finished(self, exitcode, exitstatus):
+        process, self.__process = self.__process, None
+        self.__read_output(process, final=True)
+        process.deleteLater()
+
+        args, steps, _ = self.__current
+        if exitstatus != QProcess.NormalExit or exitcode != 0:
+            self.error.emit(fmt_cmd(args), steps, exitcode,
+                            list(self.__output))
+        else:
+            QTimer.singleShot(0, self._next)
+
+
+def fmt_cmd(cmd):
+    return "python " + (" ".join(map(shlex.quote, cmd)))
+
 
-        return process.returncode, output
+def _console_encoding():
+    return locale.getpreferredencoding(False) or "utf-8"
 
 
 def pip_install(args, **kwargs):
@@ -716,15 +1007,27 @@ def pip_uninstall(args, **kwargs):
     return python_process(["-m", "pip", "uninstall"] + args, **kwargs)
 
 
-def python_process(args, script_name=None, cwd=None, env=None, **kwargs):
+def python_executable():
     """
-    Run a `sys.executable` in a subprocess with `args`.
+    Return the python interpreter executable for running subprocesses.
+
+    On Windows the console (`python.exe`) is used in place of the
+    'gui' `pythonw.exe` interpreter.
     """
     executable = sys.executable
     if os.name == "nt" and os.path.basename(executable) == "pythonw.exe":
         # Don't run the script with a 'gui' (detached) process.
         dirname = os.path.dirname(executable)
         executable = os.path.join(dirname, "python.exe")
+    return executable
+
+
+def python_process(args, script_name=None, cwd=None, env=None, **kwargs):
+    """
+    Run a `sys.executable` in a subprocess with `args`.
+    """
+    executable = python_executable()
+    if os.name == "nt" and executable != sys.executable:
         # by default a new console window would show up when executing the
         # script
         startupinfo = subprocess.STARTUPINFO()
@@ -10,8 +10,6 @@ import io
 import concurrent.futures
 from functools import partial
 
-import pkg_resources
-
 import six
 
 from AnyQt.QtWidgets import (
@@ -26,15 +24,6 @@ from AnyQt.QtCore import (
     QT_VERSION
 )
 
-try:
-    from AnyQt.QtWebEngineWidgets import QWebEngineView
-    USE_WEB_ENGINE = True
-except ImportError:
-    from AnyQt.QtWebKitWidgets import QWebView
-    from AnyQt.QtNetwork import QNetworkDiskCache
-    USE_WEB_ENGINE = False
-
-
 from AnyQt.QtCore import (
     pyqtProperty as Property, pyqtSignal as Signal, pyqtSlot as Slot
 )
@@ -62,6 +51,7 @@ from ..gui.utils import message_critical, message_question, \
                         message_warning, message_information
 
 from ..help import HelpManager
+from ..registry.search import cached_search_index
 
 from .canvastooldock import CanvasToolDock, QuickCategoryToolbar, \
                             CategoryPopupMenu, popup_position_from_source
@@ -72,17 +62,24 @@ from .outputview import OutputView
 from .settings import UserSettingsDialog, category_state
 from ..document.schemeedit import SchemeEditWidget
 from ..document.quickmenu import SortFilterProxyModel
+from ..canvas.items import annotationitem
 
 from ..scheme.readwrite import scheme_load, sniff_version
-
-from . import welcomedialog
-from . import addons
-
-from ..preview import previewdialog, previewmodel
+from ..scheme.outputcache import OutputCache
+from ..scheme.link import invalidate_type_cache
 
 from .. import config
-
-from . import tutorials
+from ..utils.lazyimport import lazy_import
+from ..utils.concurrent import method_queued
+
+# Subsystems not needed before the main window is shown are imported on
+# first use.
+welcomedialog = lazy_import(".welcomedialog", __package__)
+addons = lazy_import(".addons", __package__)
+tutorials = lazy_import(".tutorials", __package__)
+previewdialog = lazy_import("..preview.previewdialog", __package__)
+previewmodel = lazy_import("..preview.previewmodel", __package__)
+preview_catalog = lazy_import("..preview.catalog", __package__)
 
 log = logging.getLogger(__name__)
 
@@ -110,10 +107,30 @@ def canvas_icons(name):
     if icon_file.exists():
         return QIcon("canvas_icons:" + name)
     else:
-        return QIcon(pkg_resources.resource_filename(
-                      config.__name__,
-                      os.path.join("icons", name))
-                     )
+        return QIcon(os.path.join(os.path.dirname(config.__file__),
+                                  "icons", name))
+
+
+def create_help_view():
+    """
+    Create and return a web view for displaying help pages.
+    """
+    try:
+        from AnyQt.QtWebEngineWidgets import QWebEngineView
+    except ImportError:
+        from AnyQt.QtWebKitWidgets import QWebView
+        from AnyQt.QtNetwork import QNetworkDiskCache
+    else:
+        return QWebEngineView()
+
+    view = QWebView()
+    manager = view.page().networkAccessManager()
+    cache = QNetworkDiskCache()
+    cache.setCacheDirectory(
+        os.path.join(config.cache_dir(), "help", "help-view-cache")
+    )
+    manager.setCache(cache)
+    return view
 
 
 class FakeToolBar(QToolBar):
@@ -197,15 +214,30 @@ class CanvasMainWindow(QMainWindow):
 
         self.last_scheme_dir = user_documents_path()
         try:
-            self.recent_schemes = config.recent_schemes()
+            # (the recent files are checked when browsed)
+            self.recent_schemes = config.recent_schemes(check_exists=False)
         except Exception:
             log.error("Failed to load recent scheme list.", exc_info=True)
             self.recent_schemes = []
 
         self.num_recent_schemes = 15
 
+        # The workflow catalog (created on first use)
+        self.__catalog = None
+
+        # Persist the rendered text annotations between sessions
+        annotationitem.render_cache.setDirectory(
+            os.path.join(config.cache_dir(), "annotations"))
+
+        # Persistent node output cache (shared by all workflows)
+        self.__output_cache = None
+
         self.open_in_external_browser = False
         self.help = HelpManager(self)
+        # Pending help url resolution (Future)
+        self.__f_help = None
+        # Pending quick menu search index (Future)
+        self.__f_search_index = None
 
         self.setup_actions()
         self.setup_ui()
@@ -378,17 +410,8 @@ class CanvasMainWindow(QMainWindow):
                                     allowedAreas=Qt.RightDockWidgetArea |
                                                  Qt.BottomDockWidgetArea)
         self.help_dock.setAllowedAreas(Qt.NoDockWidgetArea)
-        if USE_WEB_ENGINE:
-            self.help_view = QWebEngineView()
-        else:
-            self.help_view = QWebView()
-            manager = self.help_view.page().networkAccessManager()
-            cache = QNetworkDiskCache()
-            cache.setCacheDirectory(
-                os.path.join(config.cache_dir(), "help", "help-view-cache")
-            )
-            manager.setCache(cache)
-        self.help_dock.setWidget(self.help_view)
+        # The help view (web engine) is created when first needed
+        self.help_view = None
         self.addDockWidget(
             QSettings().value('help-dock/area', Qt.RightDockWidgetArea, type=int),
             self.help_dock)
@@ -505,6 +528,21 @@ class CanvasMainWindow(QMainWindow):
                     icon=canvas_icons("Recent.svg")
                     )
 
+        self.browse_catalog_action = \
+            QAction(self.tr("Browse Workflow Catalog"), self,
+                    objectName="browse-catalog-action",
+                    toolTip=self.tr("Browse and search the workflows in "
+                                    "the catalog folders."),
+                    triggered=self.browse_workflow_catalog,
+                    )
+
+        self.add_catalog_directory_action = \
+            QAction(self.tr("Add Folder to Catalog..."), self,
+                    objectName="add-catalog-directory-action",
+                    toolTip=self.tr("Index the workflows in a folder."),
+                    triggered=self.add_catalog_directory,
+                    )
+
         self.reload_last_action = \
             QAction(self.tr("Reload Last Workflow"), self,
                     objectName="reload-last-action",
@@ -623,6 +661,8 @@ class CanvasMainWindow(QMainWindow):
         file_menu.addAction(self.quit_action)
 
         self.recent_menu.addAction(self.recent_action)
+        self.recent_menu.addAction(self.browse_catalog_action)
+        self.recent_menu.addAction(self.add_catalog_directory_action)
 
         # Store the reference to separator for inserting recent
         # schemes into the menu in `add_recent_scheme`.
@@ -709,17 +749,9 @@ class CanvasMainWindow(QMainWindow):
             settings.value("canvasdock/expanded", True, type=bool)
         )
 
-        floatable = settings.value("toolbox-dock-floatable", False, type=bool)
-        if floatable:
-            self.dock_widget.setFeatures(self.dock_widget.features() | \
-                                         QDockWidget.DockWidgetFloatable)
-
-        self.widgets_tool_box.setExclusive(
-            settings.value("toolbox-dock-exclusive", True, type=bool)
-        )
-
+        # The toolbox dock features are set by __update_from_settings
         self.toogle_margins_action.setChecked(
-            settings.value("scheme-margins-enabled", False, type=bool)
+            config.settings()["mainwindow/scheme-margins-enabled"]
         )
         self.show_output_action.setChecked(
             settings.value("output-dock/is-visible", False, type=bool))
@@ -771,6 +803,8 @@ class CanvasMainWindow(QMainWindow):
             self.__proxy_model = None
 
         self.widget_registry = widget_registry
+        # The channel types resolved for existing links are stale
+        invalidate_type_cache()
 
         # Restore category hidden/sort order state
         proxy = SortFilterProxyModel(self)
@@ -784,6 +818,13 @@ class CanvasMainWindow(QMainWindow):
         self.scheme_widget.setRegistry(widget_registry)
         self.scheme_widget.quickMenu().setModel(proxy)
 
+        # Build (or update) the search index off the GUI thread
+        self.__f_search_index = f = self.__executor.submit(
+            cached_search_index, widget_registry)
+        f.add_done_callback(
+            method_queued(self.__on_search_index_ready, (object,))
+        )
+
         self.help.set_registry(widget_registry)
 
         # Restore possibly saved widget toolbox tab states
@@ -794,6 +835,18 @@ class CanvasMainWindow(QMainWindow):
         if state:
             self.widgets_tool_box.restoreState(state)
 
+    @Slot(object)
+    def __on_search_index_ready(self, f):
+        if f is not self.__f_search_index:
+            return
+        self.__f_search_index = None
+        try:
+            index = f.result()
+        except Exception:
+            log.error("Could not build the search index.", exc_info=True)
+        else:
+            self.scheme_widget.quickMenu().setSearchIndex(index)
+
     def set_quick_help_text(self, text):
         self.canvas_tool_dock.help.setText(text)
 
@@ -881,9 +934,7 @@ class CanvasMainWindow(QMainWindow):
 
         new_scheme = config.workflow_constructor(parent=self)
 
-        settings = QSettings()
-        show = settings.value("schemeinfo/show-at-new-scheme", True,
-                              type=bool)
+        show = config.settings()["schemeinfo/show-at-new-scheme"]
 
         if show:
             status = self.show_scheme_properties_for(
@@ -1044,6 +1095,13 @@ class CanvasMainWindow(QMainWindow):
         if self.freeze_action.isChecked() and manager is not None:
             manager.pause()
 
+        if manager is not None:
+            budget = config.settings()["schemeedit/output-memory-budget"]
+            store = manager.output_store()
+            store.set_directory(os.path.join(config.cache_dir(), "outputs"))
+            store.set_budget(max(budget, 0) * 2 ** 20)
+            manager.set_output_cache(self.__get_output_cache())
+
         scheme_doc.setScheme(new_scheme)
 
         # Send a close event to the Scheme, it is responsible for
@@ -1052,6 +1110,22 @@ class CanvasMainWindow(QMainWindow):
 
         old_scheme.deleteLater()
 
+    def __get_output_cache(self):
+        """
+        Return the persistent node output cache or None if disabled.
+        """
+        settings = config.settings()
+        enabled = settings["schemeedit/output-cache"]
+        max_size = settings["schemeedit/output-cache-size"] * 2 ** 20
+        if not enabled:
+            return None
+        if self.__output_cache is None:
+            self.__output_cache = OutputCache(
+                os.path.join(config.cache_dir(), "output-cache"), max_size)
+        else:
+            self.__output_cache.set_max_size(max_size)
+        return self.__output_cache
+
     def ask_save_changes(self):
         """Ask the user to save the changes to the current scheme.
         Return QDialog.Accepted if the scheme was successfully saved
@@ -1277,7 +1351,8 @@ class CanvasMainWindow(QMainWindow):
         """
         items = [previewmodel.PreviewItem(name=title, path=path)
                  for title, path in self.recent_schemes]
-        model = previewmodel.PreviewModel(items=items)
+        model = previewmodel.PreviewModel(
+            items=items, catalog=self.workflow_catalog())
 
         dialog = previewdialog.PreviewDialog(self)
         title = self.tr("Recent Workflows")
@@ -1310,6 +1385,94 @@ class CanvasMainWindow(QMainWindow):
 
         return status
 
+    def workflow_catalog(self):
+        """Return the :class:`WorkflowCatalog` (or None if it can not be
+        opened).
+
+        """
+        if self.__catalog is None:
+            try:
+                self.__catalog = preview_catalog.WorkflowCatalog(
+                    preview_catalog.default_catalog_filename())
+            except Exception:
+                log.error("Could not open the workflow catalog",
+                          exc_info=True)
+        return self.__catalog
+
+    def add_catalog_directory(self, *args):
+        """Ask for a folder and add it to the workflow catalog. Return
+        QDialog.Rejected if the user canceled the operation.
+
+        """
+        catalog = self.workflow_catalog()
+        if catalog is None:
+            return QDialog.Rejected
+        dirname = QFileDialog.getExistingDirectory(
+            self, self.tr("Add Folder to Catalog"), self.last_scheme_dir)
+        if not dirname:
+            return QDialog.Rejected
+        catalog.add_directory(six.text_type(dirname))
+        catalog.scan_async()
+        return QDialog.Accepted
+
+    def browse_workflow_catalog(self, *args):
+        """Browse (and search) the workflows in the catalog folders.
+        Return QDialog.Rejected if the user canceled the operation and
+        QDialog.Accepted otherwise.
+
+        """
+        catalog = self.workflow_catalog()
+        if catalog is None:
+            return QDialog.Rejected
+        if not catalog.directories():
+            if self.add_catalog_directory() == QDialog.Rejected:
+                return QDialog.Rejected
+
+        indexed = len(catalog) > 0
+        model = previewmodel.PreviewModel(
+            items=previewmodel.catalog_items(catalog) if indexed else None,
+            catalog=catalog)
+
+        dialog = previewdialog.PreviewDialog(self)
+        title = self.tr("Workflow Catalog")
+        dialog.setWindowTitle(title)
+        template = ('<h3 style="font-size: 26px">\n'
+                    '{0}\n'
+                    '</h3>')
+        dialog.setHeading(template.format(title))
+        dialog.setModel(model)
+
+        if indexed:
+            model.delayedScanUpdate()
+            # Update the index in the background (for the next time)
+            catalog.scan_async()
+        else:
+            # Nothing indexed yet; the items are added when the scan
+            # finishes
+            def select_first():
+                if dialog.currentIndex() == -1:
+                    dialog.setCurrentIndex(0)
+
+            model.rowsInserted.connect(select_first)
+            model.scanCatalog()
+
+        status = dialog.exec_()
+        index = dialog.currentIndex()
+
+        dialog.deleteLater()
+        model.deleteLater()
+
+        if status == QDialog.Accepted and index >= 0:
+            doc = self.current_document()
+            if doc.isModifiedStrict():
+                if self.ask_save_changes() == QDialog.Rejected:
+                    return QDialog.Rejected
+
+            selected = model.item(index)
+            return self.load_scheme(six.text_type(selected.path()))
+
+        return status
+
     def tutorial_scheme(self, *args):
         """Browse a collection of tutorial schemes. Returns QDialog.Rejected
         if the user canceled the dialog else loads the selected scheme into
@@ -1318,7 +1481,8 @@ class CanvasMainWindow(QMainWindow):
         """
         tutors = tutorials.tutorials()
         items = [previewmodel.PreviewItem(path=t.abspath()) for t in tutors]
-        model = previewmodel.PreviewModel(items=items)
+        model = previewmodel.PreviewModel(
+            items=items, catalog=self.workflow_catalog())
         dialog = previewdialog.PreviewDialog(self)
         title = self.tr("Tutorials")
         dialog.setWindowTitle(title)
@@ -1417,16 +1581,14 @@ class CanvasMainWindow(QMainWindow):
         dialog.addRow(top_row, background="light-grass")
         dialog.addRow(bottom_row, background="light-orange")
 
-        settings = QSettings()
+        settings = config.settings()
 
-        dialog.setShowAtStartup(
-            settings.value("startup/show-welcome-screen", True, type=bool)
-        )
+        dialog.setShowAtStartup(settings["startup/show-welcome-screen"])
 
         status = dialog.exec_()
 
-        settings.setValue("startup/show-welcome-screen",
-                          dialog.showAtStartup())
+        settings["startup/show-welcome-screen"] = \
+            bool(dialog.showAtStartup())
 
         dialog.deleteLater()
 
@@ -1435,16 +1597,13 @@ class CanvasMainWindow(QMainWindow):
     def scheme_properties_dialog(self):
         """Return an empty `SchemeInfo` dialog instance.
         """
-        settings = QSettings()
-        value_key = "schemeinfo/show-at-new-scheme"
-
         dialog = SchemeInfoDialog(self)
 
         dialog.setWindowTitle(self.tr("Workflow Info"))
         dialog.setFixedSize(725, 450)
 
         dialog.setShowAtNewScheme(
-            settings.value(value_key, True, type=bool)
+            config.settings()["schemeinfo/show-at-new-scheme"]
         )
 
         return dialog
@@ -1452,9 +1611,6 @@ class CanvasMainWindow(QMainWindow):
     def show_scheme_properties(self):
         """Show current scheme properties.
         """
-        settings = QSettings()
-        value_key = "schemeinfo/show-at-new-scheme"
-
         current_doc = self.current_document()
         scheme = current_doc.scheme()
         dlg = self.scheme_properties_dialog()
@@ -1471,7 +1627,8 @@ class CanvasMainWindow(QMainWindow):
             stack.endMacro()
 
             # Store the check state.
-            settings.setValue(value_key, dlg.showAtNewScheme())
+            config.settings()["schemeinfo/show-at-new-scheme"] = \
+                bool(dlg.showAtNewScheme())
         return status
 
     def show_scheme_properties_for(self, scheme, window_title=None):
@@ -1479,9 +1636,6 @@ class CanvasMainWindow(QMainWindow):
         a default 'Scheme Info' title will be used.
 
         """
-        settings = QSettings()
-        value_key = "schemeinfo/show-at-new-scheme"
-
         dialog = self.scheme_properties_dialog()
 
         if window_title is not None:
@@ -1492,7 +1646,8 @@ class CanvasMainWindow(QMainWindow):
         status = dialog.exec_()
         if status == QDialog.Accepted:
             # Store the check state.
-            settings.setValue(value_key, dialog.showAtNewScheme())
+            config.settings()["schemeinfo/show-at-new-scheme"] = \
+                bool(dialog.showAtNewScheme())
 
         dialog.deleteLater()
 
@@ -1555,9 +1710,7 @@ class CanvasMainWindow(QMainWindow):
         """
         if self.__f_pypi_addons is None:
             self.__f_pypi_addons = self.__executor.submit(
-                addons.pypi_search,
-                config.default.addon_pypi_search_spec(),
-                timeout=20,
+                addons.list_pypi_addons
             )
 
         dlg = addons.AddonManagerDialog(
@@ -1579,9 +1732,9 @@ class CanvasMainWindow(QMainWindow):
                 self.tr("Retrieving package list")
             )
             self.__f_pypi_addons.add_done_callback(
-                addons.method_queued(self.__on_pypi_search_done, (object,))
+                method_queued(self.__on_pypi_search_done, (object,))
             )
-            close_dialog = addons.method_queued(dlg.close, ())
+            close_dialog = method_queued(dlg.close, ())
 
             self.__f_pypi_addons.add_done_callback(
                 lambda f:
@@ -1752,6 +1905,10 @@ class CanvasMainWindow(QMainWindow):
 
         config.save_config()
 
+        if self.__catalog is not None:
+            self.__catalog.close()
+            self.__catalog = None
+
         geometry = self.saveGeometry()
         state = self.saveState(version=self.SETTINGS_VERSION)
         settings = QSettings()
@@ -1760,8 +1917,8 @@ class CanvasMainWindow(QMainWindow):
         settings.setValue("state", state)
         settings.setValue("canvasdock/expanded",
                           self.dock_widget.expanded())
-        settings.setValue("scheme-margins-enabled",
-                          self.scheme_margins_enabled)
+        config.settings()["mainwindow/scheme-margins-enabled"] = \
+            bool(self.scheme_margins_enabled)
 
         settings.setValue("last-scheme-dir", self.last_scheme_dir)
         settings.setValue("widgettoolbox/state",
@@ -1820,26 +1977,34 @@ class CanvasMainWindow(QMainWindow):
         elif event.type() == QEvent.WhatsThisClicked:
             ref = event.href()
             url = QUrl(ref)
-
-            if url.scheme() == "help" and url.authority() == "search":
-                try:
-                    url = self.help.search(url)
-                except KeyError:
-                    url = None
-                    log.info("No help topic found for %r", url)
-
-            if url:
-                self.show_help(url)
-            else:
-                message_information(
-                    self.tr("Sorry there is no documentation available for "
-                            "this widget."),
-                    parent=self)
-
+            # Only the most recent request is shown.
+            self.__f_help = f = self.help.get_help(url)
+            f.add_done_callback(
+                method_queued(self.__on_help_resolved, (object,))
+            )
             return True
 
         return QMainWindow.event(self, event)
 
+    @Slot(object)
+    def __on_help_resolved(self, f):
+        if f is not self.__f_help:
+            return
+        self.__f_help = None
+        try:
+            url = f.result()
+        except KeyError:
+            url = None
+            log.info("No help topic found")
+
+        if url:
+            self.show_help(url)
+        else:
+            message_information(
+                self.tr("Sorry there is no documentation available for "
+                        "this widget."),
+                parent=self)
+
     def show_help(self, url):
         """
         Show `url` in a help window.
@@ -1856,6 +2021,9 @@ class CanvasMainWindow(QMainWindow):
                 url = QUrl(url.toString())
                 QDesktopServices.openUrl(url)
         else:
+            if self.help_view is None:
+                self.help_view = create_help_view()
+                self.help_dock.setWidget(self.help_view)
             self.help_view.load(QUrl(url))
             self.help_dock.show()
             self.help_dock.raise_()
@@ -1897,76 +2065,49 @@ class CanvasMainWindow(QMainWindow):
         return six.text_type(QMainWindow.tr(self, sourceText, disambiguation, n))
 
     def __update_from_settings(self):
-        settings = QSettings()
-        settings.beginGroup("mainwindow")
-        toolbox_floatable = settings.value("toolbox-dock-floatable",
-                                           defaultValue=False,
-                                           type=bool)
+        settings = config.settings()
 
         features = self.dock_widget.features()
         features = updated_flags(features, QDockWidget.DockWidgetFloatable,
-                                 toolbox_floatable)
+                                 settings["mainwindow/toolbox-dock-floatable"])
         self.dock_widget.setFeatures(features)
 
-        toolbox_exclusive = settings.value("toolbox-dock-exclusive",
-                                           defaultValue=True,
-                                           type=bool)
-        self.widgets_tool_box.setExclusive(toolbox_exclusive)
-
-        self.num_recent_schemes = settings.value("num-recent-schemes",
-                                                 defaultValue=15,
-                                                 type=int)
+        self.widgets_tool_box.setExclusive(
+            settings["mainwindow/toolbox-dock-exclusive"])
 
-        settings.endGroup()
-        settings.beginGroup("quickmenu")
+        self.num_recent_schemes = \
+            settings["mainwindow/number-of-recent-schemes"]
 
         triggers = 0
-        dbl_click = settings.value("trigger-on-double-click",
-                                   defaultValue=True,
-                                   type=bool)
-        if dbl_click:
+        if settings["quickmenu/trigger-on-double-click"]:
             triggers |= SchemeEditWidget.DoubleClicked
 
-        right_click = settings.value("trigger-on-right-click",
-                                    defaultValue=True,
-                                    type=bool)
-        if right_click:
+        if settings["quickmenu/trigger-on-right-click"]:
             triggers |= SchemeEditWidget.RightClicked
 
-        space_press = settings.value("trigger-on-space-key",
-                                     defaultValue=True,
-                                     type=bool)
-        if space_press:
+        if settings["quickmenu/trigger-on-space-key"]:
             triggers |= SchemeEditWidget.SpaceKey
 
-        any_press = settings.value("trigger-on-any-key",
-                                   defaultValue=False,
-                                   type=bool)
-        if any_press:
+        if settings["quickmenu/trigger-on-any-key"]:
             triggers |= SchemeEditWidget.AnyKey
 
         self.scheme_widget.setQuickMenuTriggers(triggers)
 
-        settings.endGroup()
-        settings.beginGroup("schemeedit")
-        show_channel_names = settings.value("show-channel-names",
-                                            defaultValue=True,
-                                            type=bool)
-        self.scheme_widget.setChannelNamesVisible(show_channel_names)
-
-        node_animations = settings.value("enable-node-animations",
-                                         defaultValue=False,
-                                         type=bool)
-        self.scheme_widget.setNodeAnimationEnabled(node_animations)
-        settings.endGroup()
+        self.scheme_widget.setChannelNamesVisible(
+            settings["schemeedit/show-channel-names"])
+
+        self.scheme_widget.setNodeAnimationEnabled(
+            settings["schemeedit/enable-node-animations"])
+
+        undo_budget = settings["schemeedit/undo-memory-budget"]
+        self.scheme_widget.undoStack().setMemoryBudget(
+            max(undo_budget, 0) * 2 ** 20)
 
         self.open_in_external_browser = \
-            settings.value("open-in-external-browser", defaultValue=False,
-                           type=bool)
+            settings["help/open-in-external-browser"]
 
         self.use_popover = \
-            settings.value("toolbox-dock-use-popover-menu", defaultValue=True,
-                           type=bool)
+            settings["mainwindow/toolbox-dock-use-popover-menu"]
 
         self.__update_registry_filters()
 
@@ -1974,7 +2115,7 @@ class CanvasMainWindow(QMainWindow):
         if self.widget_registry is None:
             return
 
-        settings = QSettings()
+        settings = config.settings()
         visible_state = {}
         for cat in self.widget_registry.categories():
             visible, _ = category_state(cat, settings)
@@ -9,7 +9,7 @@ from collections import namedtuple
 
 from .. import config
 from ..utils.settings import SettingChangedEvent
-from ..utils.qtcompat import QSettings, qunwrap
+from ..utils.qtcompat import qunwrap
 
 from ..utils.propertybindings import (
     AbstractBoundProperty, PropertyBinding, BindingManager
@@ -380,7 +380,7 @@ class UserSettingsDialog(QMainWindow):
         from .. import registry
         reg = registry.global_registry()
         model = QStandardItemModel()
-        settings = QSettings()
+        settings = self.__settings
         for cat in reg.categories():
             item = QStandardItem()
             item.setText(cat.name)
@@ -475,6 +475,8 @@ class UserSettingsDialog(QMainWindow):
 
     def hideEvent(self, event):
         QMainWindow.hideEvent(self, event)
+        # Make the changes visible to other QSettings instances
+        self.__settings.flush()
         if self.__loop is not None:
             self.__loop.exit(0)
             self.__loop = None
@@ -485,6 +487,10 @@ class UserSettingsDialog(QMainWindow):
 
 
 def category_state(cat, settings):
+    """
+    Return the saved (visible, position) state of the category `cat`
+    in the :class:`Settings` instance `settings`.
+    """
     visible = settings.value(
         "mainwindow/categories/{0}/visible".format(cat.name),
         defaultValue=not cat.hidden,
@@ -499,12 +505,7 @@ def category_state(cat, settings):
 
 
 def save_category_state(cat, state, settings):
-    settings.setValue(
-        "mainwindow/categories/{0}/visible".format(cat.name),
+    settings["mainwindow/categories/{0}/visible".format(cat.name)] = \
         state.visible
-    )
-
-    settings.setValue(
-        "mainwindow/categories/{0}/position".format(cat.name),
+    settings["mainwindow/categories/{0}/position".format(cat.name)] = \
         state.position
-    )
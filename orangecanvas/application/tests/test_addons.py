@@ -0,0 +1,265 @@
+import os
+import tempfile
+import shutil
+import threading
+import time
+import zipfile
+import unittest
+import xmlrpc.client
+
+from xmlrpc.server import SimpleXMLRPCServer, SimpleXMLRPCRequestHandler
+
+from AnyQt.QtTest import QTest
+
+from ...gui.test import QAppTestCase
+
+from ..addons import (
+    Installer, Installable, Installed, Available, Install, Upgrade,
+    Uninstall, installer_commands, IndexCache, pypi_search,
+    installable_items, installed_distributions
+)
+
+
+class _Dist(object):
+    def __init__(self, project_name, version="1.0"):
+        self.project_name = project_name
+        self.version = version
+
+
+def installable(name, version="1.0"):
+    return Installable(name, version, "", "", "", [])
+
+
+def make_wheel(directory, name, version="1.0"):
+    """
+    Write a minimal pure python wheel (with a single `name` module) to
+    `directory` and return its path.
+    """
+    distinfo = "{}-{}.dist-info".format(name, version)
+    files = {
+        name + ".py": "VERSION = {!r}\n".format(version),
+        distinfo + "/METADATA":
+            "Metadata-Version: 2.1\nName: {}\nVersion: {}\n"
+            .format(name, version),
+        distinfo + "/WHEEL":
+            "Wheel-Version: 1.0\nGenerator: test\nRoot-Is-Purelib: true\n"
+            "Tag: py3-none-any\n",
+    }
+    record = "".join("{},,\n".format(path) for path in files)
+    files[distinfo + "/RECORD"] = record + distinfo + "/RECORD,,\n"
+    filename = os.path.join(
+        directory, "{}-{}-py3-none-any.whl".format(name, version))
+    with zipfile.ZipFile(filename, "w") as f:
+        for path, contents in files.items():
+            f.writestr(path, contents)
+    return filename
+
+
+class TestInstaller(QAppTestCase):
+    def setUp(self):
+        super(TestInstaller, self).setUp()
+        self.tmpdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+        super(TestInstaller, self).tearDown()
+
+    def test_installer_commands(self):
+        steps = [
+            (Install, Available(installable("aa"))),
+            (Uninstall, Installed(None, _Dist("bb"))),
+            (Upgrade, Installed(installable("cc", "2.0"), _Dist("cc"))),
+            (Install, Available(installable("dd"))),
+            (Uninstall, Installed(None, _Dist("ee"))),
+        ]
+        pip_args = ["--no-index", "--find-links", self.tmpdir]
+        commands = installer_commands(steps, pip_args)
+        args = [cmd[0] for cmd in commands]
+        self.assertEqual(
+            args,
+            [["-m", "pip", "uninstall", "--yes", "bb", "ee"],
+             ["-m", "pip", "install", "--upgrade", "--no-deps"] + pip_args +
+             ["cc"],
+             ["-m", "pip", "install"] + pip_args + ["aa", "dd", "cc"]]
+        )
+
+        commands = installer_commands(steps[:1])
+        self.assertEqual([cmd[0] for cmd in commands],
+                         [["-m", "pip", "install", "aa"]])
+        self.assertEqual(installer_commands([]), [])
+
+    def test_installer_error(self):
+        # Install from an empty local 'index'
+        steps = [(Install, Available(installable("not-an-orange-addon")))]
+        installer = Installer(
+            steps=steps,
+            pip_args=["--no-index", "--find-links", self.tmpdir]
+        )
+        errors = []
+        lines = []
+        finished = []
+        installer.error.connect(lambda *args: errors.append(args))
+        installer.finished.connect(lambda: finished.append(True))
+        installer.outputLine.connect(lines.append)
+        installer.start()
+        deadline = time.time() + 60
+        while not (errors or finished) and time.time() < deadline:
+            QTest.qWait(50)
+
+        self.assertFalse(finished)
+        self.assertEqual(len(errors), 1)
+        command, failed, retcode, output = errors[0]
+        self.assertIn("--no-index", command)
+        # The steps of the failed pip invocation
+        self.assertEqual(failed, steps)
+        self.assertNotEqual(retcode, 0)
+        self.assertEqual(output, lines)
+        self.assertFalse(installer.isRunning())
+
+    def test_installer_local_wheel(self):
+        make_wheel(self.tmpdir, "orange_canvas_test_addon")
+        target = os.path.join(self.tmpdir, "target")
+        steps = [(Install, Available(installable("orange_canvas_test_addon")))]
+        installer = Installer(
+            steps=steps,
+            pip_args=["--no-index", "--find-links", self.tmpdir,
+                      "--target", target, "--disable-pip-version-check"]
+        )
+        errors = []
+        finished = []
+        installer.error.connect(lambda *args: errors.append(args))
+        installer.finished.connect(lambda: finished.append(True))
+        installer.start()
+        deadline = time.time() + 60
+        while not (errors or finished) and time.time() < deadline:
+            QTest.qWait(50)
+
+        self.assertEqual(errors, [])
+        self.assertTrue(finished)
+        self.assertTrue(os.path.isfile(
+            os.path.join(target, "orange_canvas_test_addon.py")))
+        self.assertFalse(installer.isRunning())
+
+
+class _AnyPathRequestHandler(SimpleXMLRPCRequestHandler):
+    rpc_paths = ()
+
+
+class PyPiStandIn(object):
+    """
+    A minimal local stand-in for the PyPi xmlrpc index.
+    """
+    def __init__(self, packages):
+        self.packages = packages
+        self.serial = 1
+        self.fail = False
+        self.calls = []
+        self.server = SimpleXMLRPCServer(
+            ("127.0.0.1", 0), requestHandler=_AnyPathRequestHandler,
+            logRequests=False, allow_none=True)
+        self.server.register_function(self.search, "search")
+        self.server.register_function(self.release_data, "release_data")
+        self.server.register_function(self.release_urls, "release_urls")
+        self.server.register_function(self.changelog_last_serial,
+                                      "changelog_last_serial")
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.daemon = True
+        self.thread.start()
+        host, port = self.server.server_address
+        self.url = "http://{}:{}/pypi".format(host, port)
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.thread.join()
+
+    def search(self, spec):
+        self.calls.append("search")
+        if self.fail:
+            raise ValueError("unavailable")
+        return [{"name": name, "version": "1.0"} for name in self.packages]
+
+    def release_data(self, name, version):
+        self.calls.append("release_data")
+        return {"name": name, "version": version,
+                "summary": "A " + name, "description": "",
+                "package_url": ""}
+
+    def release_urls(self, name, version):
+        self.calls.append("release_urls")
+        return [{"filename": name + "-1.0.tar.gz", "url": "", "size": 10,
+                 "python_version": "source", "packagetype": "sdist"}]
+
+    def changelog_last_serial(self):
+        self.calls.append("changelog_last_serial")
+        return self.serial
+
+
+class TestIndexCache(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.index = PyPiStandIn(["Orange3-A", "Orange3-B", "Orange3-C"])
+
+    def tearDown(self):
+        self.index.close()
+        shutil.rmtree(self.tmpdir)
+
+    def test_pypi_search(self):
+        packages = pypi_search({}, timeout=5, index_url=self.index.url)
+        self.assertEqual([pkg.name for pkg in packages],
+                         ["Orange3-A", "Orange3-B", "Orange3-C"])
+        self.assertEqual(packages[0].release_urls[0].package_type, "sdist")
+
+    def test_index_cache(self):
+        cache = IndexCache(os.path.join(self.tmpdir, "index.json"), ttl=60)
+        calls = self.index.calls
+        packages = cache.search({}, timeout=5, index_url=self.index.url)
+        self.assertEqual(len(packages), 3)
+        self.assertEqual(calls.count("search"), 1)
+
+        # Fresh cache; the index is not queried
+        del calls[:]
+        self.assertEqual(
+            cache.search({}, timeout=5, index_url=self.index.url), packages)
+        self.assertEqual(calls, [])
+
+        # Expired cache but the index is unchanged
+        cache.ttl = 0
+        self.assertEqual(
+            cache.search({}, timeout=5, index_url=self.index.url), packages)
+        self.assertEqual(calls, ["changelog_last_serial"])
+
+        # Expired cache and a changed index
+        del calls[:]
+        self.index.serial += 1
+        self.index.packages = ["Orange3-A"]
+        packages = cache.search({}, timeout=5, index_url=self.index.url)
+        self.assertEqual([pkg.name for pkg in packages], ["Orange3-A"])
+        self.assertEqual(calls.count("search"), 1)
+
+        # An index error (an xmlrpc Fault) falls back to the stale cache
+        cache.ttl = 0
+        self.index.serial += 1
+        self.index.fail = True
+        packages = cache.search({}, timeout=5, index_url=self.index.url)
+        self.assertEqual([pkg.name for pkg in packages], ["Orange3-A"])
+        # ... but is raised without a cache
+        empty = IndexCache(os.path.join(self.tmpdir, "empty.json"))
+        with self.assertRaises(xmlrpc.client.Fault):
+            empty.search({}, timeout=5, index_url=self.index.url)
+        self.index.fail = False
+
+        # A different index url does not use the cached results
+        self.index.packages = ["Orange3-B"]
+        cache.ttl = 60
+        other = self.index.url.replace("/pypi", "/other")
+        packages = cache.search({}, timeout=5, index_url=other)
+        self.assertEqual([pkg.name for pkg in packages], ["Orange3-B"])
+
+    def test_installable_items(self):
+        pkg = Installable("setuptools", "1000.0", "", "", "", [])
+        items = installable_items([pkg], [])
+        self.assertEqual(len(items), 1)
+        self.assertIsInstance(items[0], Installed)
+        self.assertEqual(items[0].local.project_name, "setuptools")
+        self.assertIs(installed_distributions(), installed_distributions())
@@ -0,0 +1,90 @@
+"""
+Import time budget for the canvas startup.
+
+"""
+import os
+import sys
+import subprocess
+import unittest
+
+#: The startup import time budget (in seconds). Can be overridden with
+#: the ORANGECANVAS_IMPORT_BUDGET environment variable.
+IMPORT_BUDGET = float(os.environ.get("ORANGECANVAS_IMPORT_BUDGET", 2.5))
+
+#: Modules which must not be imported by `import orangecanvas.main`
+#: (they are imported on first use).
+LAZY_MODULES = [
+    "numpy",
+    "docutils",
+    "CommonMark",
+    "pkg_resources",
+    "distutils",
+    "importlib_metadata",
+    "orangecanvas.application.addons",
+    "orangecanvas.application.tutorials",
+    "orangecanvas.application.welcomedialog",
+    "orangecanvas.preview.previewdialog",
+    "orangecanvas.preview.previewmodel",
+]
+
+
+def parse_importtime(output):
+    """
+    Parse the `python -X importtime` output. Return a
+    `{module: (self time, cumulative time)}` dict (times in seconds).
+    """
+    times = {}
+    for line in output.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        parts = line[len("import time:"):].split("|")
+        if len(parts) != 3:
+            continue
+        try:
+            self_us, cumulative_us = int(parts[0]), int(parts[1])
+        except ValueError:
+            continue  # the header
+        times[parts[2].strip()] = (self_us / 1e6, cumulative_us / 1e6)
+    return times
+
+
+def import_times(module):
+    """
+    Import `module` in a new interpreter and return the parsed
+    `-X importtime` output.
+    """
+    env = dict(os.environ, QT_QPA_PLATFORM="offscreen")
+    env.pop("PYTHONPROFILEIMPORTTIME", None)
+    proc = subprocess.Popen(
+        [sys.executable, "-X", "importtime", "-c", "import " + module],
+        stdout=subprocess.PIPE, stderr=subprocess.PIPE, env=env,
+        universal_newlines=True
+    )
+    _, err = proc.communicate()
+    if proc.returncode != 0:
+        raise RuntimeError("Could not import {}:\n{}".format(module, err))
+    return parse_importtime(err)
+
+
+@unittest.skipIf(sys.version_info < (3, 7), "-X importtime requires 3.7")
+class TestImportTime(unittest.TestCase):
+    def test_parse(self):
+        times = parse_importtime(
+            "import time: self [us] | cumulative | imported package\n"
+            "import time:       100 |        100 |   a.b\n"
+            "import time:      1000 |       1100 | a\n"
+        )
+        self.assertEqual(times, {"a.b": (0.0001, 0.0001),
+                                 "a": (0.001, 0.0011)})
+
+    def test_main_import_time(self):
+        times = import_times("orangecanvas.main")
+        eager = [name for name in LAZY_MODULES if name in times]
+        self.assertEqual(eager, [],
+                         "Modules imported eagerly on startup")
+        _, total = times["orangecanvas.main"]
+        self.assertLess(
+            total, IMPORT_BUDGET,
+            "'import orangecanvas.main' took {:.3f} s (budget {:.3f} s)"
+            .format(total, IMPORT_BUDGET)
+        )
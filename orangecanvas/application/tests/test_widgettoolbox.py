@@ -2,7 +2,8 @@
 Tests for WidgetsToolBox.
 
 """
-from AnyQt.QtWidgets import QWidget, QHBoxLayout
+from AnyQt.QtWidgets import QWidget, QHBoxLayout, QToolButton, QAction
+from AnyQt.QtGui import QStandardItem
 from AnyQt.QtCore import QSize
 
 from ...registry import tests as registry_tests
@@ -92,3 +93,57 @@ class TestWidgetToolBox(test.QAppTestCase):
         box.setTabIconSize(QSize(30, 30))
 
         self.app.exec_()
+
+    def test_toolbox_deferred(self):
+        reg = registry_tests.small_testing_registry()
+        qt_reg = QtWidgetRegistry(reg)
+        model = qt_reg.model()
+
+        box = WidgetToolBox()
+        box.setExclusive(True)
+        box.setModel(model)
+        grids = [box.widget(i) for i in range(box.count())]
+        # Nothing is populated until shown
+        self.assertFalse(any(grid.isPopulated() for grid in grids))
+        self.assertEqual(grids[1].sizeHint().width(),
+                         min(model.rowCount(grids[1].rootIndex()),
+                             grids[1].columns()) *
+                         grids[1].buttonSize().width())
+        box.show()
+        self.app.processEvents()
+        self.assertTrue(grids[0].isPopulated())
+        self.assertFalse(any(grid.isPopulated() for grid in grids[1:]))
+
+        # Insert a category in front; the grids keep their root
+        model.insertRow(0, QStandardItem("New"))
+        self.assertEqual(box.count(), len(grids) + 1)
+        box.tabAction(2).trigger()
+        self.app.processEvents()
+        self.assertTrue(grids[1].isPopulated())
+        self.assertEqual(grids[1].rootIndex(), model.index(2, 0))
+        self.assertEqual(
+            [b.defaultAction() for b in grids[1].findChildren(QToolButton)],
+            [model.index(i, 0, model.index(2, 0)).data(
+                QtWidgetRegistry.WIDGET_ACTION_ROLE)
+             for i in range(model.rowCount(model.index(2, 0)))]
+        )
+        # Delete the box before the registry (and its actions) go away.
+        box.hide()
+        box.deleteLater()
+        self.app.processEvents()
+        del box, grids
+        del qt_reg
+
+    def test_toolgrid_unknown_action(self):
+        reg = registry_tests.small_testing_registry()
+        qt_reg = QtWidgetRegistry(reg)
+        model = qt_reg.model()
+        grid = WidgetToolGrid()
+        grid.setModel(model, model.index(0, 0))
+        grid.show()
+        self.app.processEvents()
+        self.assertIsNone(grid.buttonForAction(QAction(grid)))
+        # Removing an action the grid has no button for is a no-op
+        grid.removeAction(QAction(grid))
+        grid.deleteLater()
+        self.app.processEvents()
@@ -17,8 +17,8 @@ from AnyQt.QtWidgets import (
 from AnyQt.QtGui import QDrag, QPalette, QBrush, QIcon
 
 from AnyQt.QtCore import (
-    Qt, QObject, QModelIndex, QSize, QEvent, QMimeData, QByteArray,
-    QDataStream, QIODevice
+    Qt, QObject, QModelIndex, QPersistentModelIndex, QSize, QEvent,
+    QMimeData, QByteArray, QDataStream, QIODevice
 )
 
 from AnyQt.QtCore import pyqtSignal as Signal, pyqtProperty as Property
@@ -87,6 +87,9 @@ class WidgetToolGrid(ToolGrid):
     A Tool Grid with widget buttons. Populates the widget buttons
     from a item model. Also adds support for drag operations.
 
+    With deferred population enabled (see :func:`setDeferredPopulation`)
+    the buttons are not created until the grid is first shown.
+
     """
     def __init__(self, *args, **kwargs):
         ToolGrid.__init__(self, *args, **kwargs)
@@ -94,6 +97,8 @@ class WidgetToolGrid(ToolGrid):
         self.__model = None
         self.__rootIndex = None
         self.__actionRole = QtWidgetRegistry.WIDGET_ACTION_ROLE
+        self.__deferredPopulation = False
+        self.__populated = False
 
         self.__dragListener = DragStartEventListener(self)
         self.__dragListener.dragStartOperationRequested.connect(
@@ -116,13 +121,17 @@ class WidgetToolGrid(ToolGrid):
             self.__model = None
 
         self.__model = model
-        self.__rootIndex = rootIndex
+        # The root index must remain valid until the (deferred)
+        # population.
+        self.__rootIndex = QPersistentModelIndex(rootIndex)
 
         if self.__model is not None:
             self.__model.rowsInserted.connect(self.__on_rowsInserted)
             self.__model.rowsRemoved.connect(self.__on_rowsRemoved)
 
-        self.__initFromModel(model, rootIndex)
+        self.__populated = False
+        if not self.__deferredPopulation or self.isVisible():
+            self.__populate()
 
     def model(self):
         """
@@ -134,7 +143,50 @@ class WidgetToolGrid(ToolGrid):
         """
         Return the root index of the model.
         """
-        return self.__rootIndex
+        root = self.__rootIndex
+        if root is None or not root.isValid():
+            return QModelIndex()
+        return root.model().index(root.row(), root.column(), root.parent())
+
+    def setDeferredPopulation(self, state):
+        """
+        If `state` is True the widget buttons are created only when the
+        grid is first shown (e.g. when a tool box page is expanded).
+        """
+        self.__deferredPopulation = state
+
+    def deferredPopulation(self):
+        """
+        Is the population deferred until the grid is first shown.
+        """
+        return self.__deferredPopulation
+
+    def isPopulated(self):
+        """
+        Have the widget buttons been created.
+        """
+        return self.__populated
+
+    def sizeHint(self):
+        if not self.__populated and self.__model is not None:
+            # The size of the (fixed size) buttons grid once populated.
+            count = self.__model.rowCount(self.rootIndex())
+            columns = self.columns()
+            rows = (count + columns - 1) // columns
+            size = self.buttonSize()
+            return QSize(min(count, columns) * size.width(),
+                         rows * size.height())
+        return ToolGrid.sizeHint(self)
+
+    def minimumSizeHint(self):
+        if not self.__populated:
+            return self.sizeHint()
+        return ToolGrid.minimumSizeHint(self)
+
+    def showEvent(self, event):
+        if not self.__populated:
+            self.__populate()
+        ToolGrid.showEvent(self, event)
 
     def setActionRole(self, role):
         """
@@ -159,13 +211,17 @@ class WidgetToolGrid(ToolGrid):
             ToolGrid.actionEvent(self, event)
 
             button = self.buttonForAction(event.action())
-            button.installEventFilter(self.__dragListener)
-            button.installEventFilter(self.__statusTipPromoter)
+            if button is not None:
+                button.installEventFilter(self.__dragListener)
+                button.installEventFilter(self.__statusTipPromoter)
             return
         elif event.type() == QEvent.ActionRemoved:
+            # The action can already be gone from the grid (e.g. when it
+            # is being destroyed together with its registry).
             button = self.buttonForAction(event.action())
-            button.removeEventFilter(self.__dragListener)
-            button.removeEventFilter(self.__statusTipPromoter)
+            if button is not None:
+                button.removeEventFilter(self.__dragListener)
+                button.removeEventFilter(self.__statusTipPromoter)
 
             # Removes the button
             ToolGrid.actionEvent(self, event)
@@ -173,6 +229,11 @@ class WidgetToolGrid(ToolGrid):
         else:
             ToolGrid.actionEvent(self, event)
 
+    def __populate(self):
+        self.__populated = True
+        if self.__model is not None:
+            self.__initFromModel(self.__model, self.rootIndex())
+
     def __initFromModel(self, model, rootIndex):
         """
         Initialize the grid from the model with rootIndex as the root.
@@ -196,23 +257,25 @@ class WidgetToolGrid(ToolGrid):
 
     def __update(self):
         self.clear()
-        self.__initFromModel(self.__model, self.__rootIndex)
+        if self.__populated:
+            self.__initFromModel(self.__model, self.rootIndex())
 
     def __on_rowsInserted(self, parent, start, end):
         """
         Insert items from range start:end into the grid.
         """
-        if parent == self.__rootIndex:
+        # If not yet populated the rows are read on population
+        if self.__populated and parent == self.rootIndex():
             for i in range(start, end + 1):
-                item = self.__rootIndex.child(i, 0)
+                item = self.__model.index(i, 0, parent)
                 self.__insertItem(i, item)
 
     def __on_rowsRemoved(self, parent, start, end):
         """
         Remove items from range start:end from the grid.
         """
-        if parent == self.__rootIndex:
-            for i in reversed(range(start - 1, end)):
+        if self.__populated and parent == self.rootIndex():
+            for i in reversed(range(start, end + 1)):
                 action = self.actions()[i]
                 self.removeAction(action)
 
@@ -279,6 +342,9 @@ class WidgetToolBox(ToolBox):
     `WidgetToolBox` widget shows a tool box containing button grids of
     actions for a :class:`QtWidgetRegistry` item model.
 
+    The button grids of the categories are populated when they are
+    first expanded.
+
     """
 
     triggered = Signal(QAction)
@@ -395,6 +461,7 @@ class WidgetToolBox(ToolBox):
         Insert category item  (`QModelIndex`) at index.
         """
         grid = WidgetToolGrid()
+        grid.setDeferredPopulation(True)
         grid.setModel(item.model(), item)
         grid.actionTriggered.connect(self.triggered)
         grid.actionHovered.connect(self.hovered)
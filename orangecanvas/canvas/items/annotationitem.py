@@ -1,11 +1,15 @@
 
+import os
+import io
+import time
 import logging
+import hashlib
+import threading
+import concurrent.futures
 from collections import OrderedDict
 from xml.sax.saxutils import escape
 
 import six
-import docutils.core
-import CommonMark
 
 from AnyQt.QtWidgets import (
     QGraphicsItem, QGraphicsPathItem, QGraphicsWidget, QGraphicsTextItem,
@@ -15,12 +19,19 @@ from AnyQt.QtGui import (
     QPainterPath, QPainterPathStroker, QPolygonF, QColor, QPen, QBrush
 )
 from AnyQt.QtCore import (
-    Qt, QPointF, QSizeF, QRectF, QLineF, QEvent, QMetaObject, QT_VERSION
+    Qt, QPointF, QSizeF, QRectF, QLineF, QEvent, QMetaObject, QT_VERSION,
+    Q_ARG
 )
 from AnyQt.QtCore import (
     pyqtSignal as Signal, pyqtProperty as Property, pyqtSlot as Slot
 )
 
+from ...utils.lazyimport import lazy_import
+
+# The markup renderers are imported when first needed
+docutils_core = lazy_import("docutils.core")
+CommonMark = lazy_import("CommonMark")
+
 log = logging.getLogger(__name__)
 
 from .graphicspathobject import GraphicsPathObject
@@ -208,13 +219,218 @@ def render_rst(content):
         "report_level": 10,  # suppress errors from appearing in the html
         "output-encoding": "utf-8"
     }
-    html = docutils.core.publish_string(
+    html = docutils_core.publish_string(
         content, writer_name="html",
         settings_overrides=overrides
     )
     return html.decode("utf-8")
 
 
+class RenderCache(object):
+    """
+    A content hash keyed cache of rendered html fragments.
+
+    The cache keeps up to `maxsize` recently used fragments in memory and,
+    if `directory` is set, also persists them in that directory. The least
+    recently used files are removed when their total size exceeds
+    `maxdisksize` bytes.
+
+    This class is thread safe.
+    """
+    def __init__(self, maxsize=256, directory=None, maxdisksize=2 ** 25):
+        self.__maxsize = maxsize
+        self.__maxdisksize = maxdisksize
+        self.__directory = directory
+        self.__items = OrderedDict()
+        self.__lock = threading.Lock()
+        # {key: [size, last access time]} of the files in directory
+        # (built lazily)
+        self.__index = None
+        self.__disksize = 0
+
+    def setDirectory(self, directory):
+        """
+        Set the directory where the rendered content is persisted (None
+        disables the disk cache).
+        """
+        with self.__lock:
+            if self.__directory != directory:
+                self.__directory = directory
+                self.__index = None
+                self.__disksize = 0
+
+    def directory(self):
+        return self.__directory
+
+    def setMaxDiskSize(self, maxdisksize):
+        """
+        Set the maximum total size (in bytes) of the persisted content.
+        """
+        with self.__lock:
+            self.__maxdisksize = maxdisksize
+            self.__prune()
+
+    def maxDiskSize(self):
+        return self.__maxdisksize
+
+    def diskSize(self):
+        """
+        Return the total size (in bytes) of the persisted content.
+        """
+        with self.__lock:
+            self.__ensure_index()
+            return self.__disksize
+
+    @staticmethod
+    def key(content, contentType):
+        """
+        Return the cache key for `content` of `contentType`.
+        """
+        h = hashlib.sha1(contentType.encode("utf-8") + b"\0")
+        h.update(six.text_type(content).encode("utf-8"))
+        return h.hexdigest()
+
+    def __filename(self, key):
+        if self.__directory is None:
+            return None
+        return os.path.join(self.__directory, key + ".html")
+
+    def __ensure_index(self):
+        if self.__index is not None or self.__directory is None:
+            return
+        index = {}
+        try:
+            names = os.listdir(self.__directory)
+        except OSError:
+            names = []
+        for name in names:
+            if not name.endswith(".html"):
+                continue
+            try:
+                st = os.stat(os.path.join(self.__directory, name))
+            except OSError:
+                continue
+            index[name[:-5]] = [st.st_size, st.st_mtime]
+        self.__index = index
+        self.__disksize = sum(size for size, _ in index.values())
+
+    def __touch(self, key, size):
+        # Record the (size of the) file for `key` as the most recently used
+        self.__ensure_index()
+        if self.__index is None:
+            return
+        entry = self.__index.get(key)
+        if entry is not None:
+            self.__disksize -= entry[0]
+        self.__index[key] = [size, time.time()]
+        self.__disksize += size
+        self.__prune()
+
+    def __prune(self):
+        if self.__index is None or self.__disksize <= self.__maxdisksize:
+            return
+        by_access = sorted(self.__index.items(), key=lambda item: item[1][1])
+        for key, (size, _) in by_access:
+            if self.__disksize <= self.__maxdisksize:
+                break
+            del self.__index[key]
+            self.__disksize -= size
+            try:
+                os.remove(self.__filename(key))
+            except OSError:
+                pass
+
+    def get(self, key):
+        """
+        Return the cached html for `key` or None if not in cache.
+        """
+        with self.__lock:
+            html = self.__items.pop(key, None)
+            if html is not None:
+                self.__items[key] = html
+                entry = (self.__index or {}).get(key)
+                if entry is not None:
+                    entry[1] = time.time()
+                return html
+            filename = self.__filename(key)
+
+        if filename is None:
+            return None
+        try:
+            with io.open(filename, "r", encoding="utf-8") as f:
+                html = f.read()
+            os.utime(filename, None)
+            size = os.path.getsize(filename)
+        except (OSError, IOError):
+            return None
+        with self.__lock:
+            if self.__filename(key) == filename:
+                self.__touch(key, size)
+        self.__insert(key, html)
+        return html
+
+    def put(self, key, html):
+        """
+        Store the rendered `html` for `key`.
+        """
+        self.__insert(key, html)
+        with self.__lock:
+            filename = self.__filename(key)
+        if filename is not None:
+            try:
+                dirname = os.path.dirname(filename)
+                if not os.path.isdir(dirname):
+                    os.makedirs(dirname)
+                tmpname = "{}.{}.tmp".format(filename, threading.get_ident())
+                with io.open(tmpname, "w", encoding="utf-8") as f:
+                    f.write(html)
+                os.replace(tmpname, filename)
+                size = os.path.getsize(filename)
+            except (OSError, IOError):
+                log.warning("Could not store the rendered annotation",
+                            exc_info=True)
+            else:
+                with self.__lock:
+                    if self.__filename(key) == filename:
+                        self.__touch(key, size)
+
+    def __insert(self, key, html):
+        with self.__lock:
+            self.__items.pop(key, None)
+            self.__items[key] = html
+            while len(self.__items) > self.__maxsize:
+                self.__items.popitem(last=False)
+
+    def clear(self):
+        """
+        Clear the in memory cache.
+        """
+        with self.__lock:
+            self.__items.clear()
+
+
+#: The default render cache shared by all text annotations.
+render_cache = RenderCache()
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _render_executor():
+    # A single worker thread for rendering (docutils is not reentrant)
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+        return _executor
+
+
+def _render_cached(renderer, content, key, cache):
+    html = renderer(content)
+    cache.put(key, html)
+    return html
+
+
 class TextAnnotation(Annotation):
     """
     Text annotation item for the canvas scheme.
@@ -240,6 +456,10 @@ class TextAnnotation(Annotation):
         ("text/html", render_html),
     ])  # type: Dict[str, Callable[[str], [str]]]
 
+    #: Content types which are rendered in a worker thread (the plain
+    #: text is displayed until the rendered html is available).
+    AsyncContentTypes = {"text/rst", "text/markdown"}
+
     def __init__(self, parent=None, **kwargs):
         super(TextAnnotation, self).__init__(None, **kwargs)
         self.setFlag(QGraphicsItem.ItemIsMovable)
@@ -250,6 +470,9 @@ class TextAnnotation(Annotation):
         self.__contentType = "text/plain"
         self.__content = ""
         self.__renderer = render_plain
+        # Incremented on each render request, to discard stale results
+        self.__renderToken = 0
+        self.__renderPending = False
 
         self.__textMargins = (2, 2, 2, 2)
         self.__textInteractionFlags = Qt.NoTextInteraction
@@ -413,6 +636,9 @@ class TextAnnotation(Annotation):
     def startEdit(self):
         """Start the annotation text edit process.
         """
+        # Discard any pending rendered content
+        self.__renderToken += 1
+        self.__renderPending = False
         self.__textItem.setPlainText(self.__content)
         self.__textItem.setTextInteractionFlags(self.__textInteractionFlags)
         self.__textItem.setFocus(Qt.MouseFocusReason)
@@ -491,7 +717,55 @@ class TextAnnotation(Annotation):
             renderer = TextAnnotation.ContentRenderer[self.__contentType]
         except KeyError:
             renderer = render_plain
-        self.__textItem.setHtml(renderer(self.__content))
+
+        self.__renderToken += 1
+        self.__renderPending = False
+        content, contentType = self.__content, self.__contentType
+        if contentType not in TextAnnotation.AsyncContentTypes:
+            self.__textItem.setHtml(renderer(content))
+            return
+
+        key = RenderCache.key(content, contentType)
+        html = render_cache.get(key)
+        if html is not None:
+            self.__textItem.setHtml(html)
+            return
+
+        # Show the plain text until the rendered html is available.
+        self.__textItem.setHtml(render_plain(content))
+        self.__renderPending = True
+        token = self.__renderToken
+        f = _render_executor().submit(
+            _render_cached, renderer, content, key, render_cache)
+
+        def deliver(f):
+            try:
+                html = f.result()
+            except Exception:
+                log.exception("Error rendering %r annotation", contentType)
+                html = render_plain(content)
+            try:
+                QMetaObject.invokeMethod(
+                    self, "__setRenderedContent", Qt.QueuedConnection,
+                    Q_ARG(int, token), Q_ARG(str, html))
+            except RuntimeError:
+                # The annotation was already deleted
+                pass
+
+        f.add_done_callback(deliver)
+
+    @Slot(int, str)
+    def __setRenderedContent(self, token, html):
+        if token == self.__renderToken and self.__renderPending:
+            self.__renderPending = False
+            self.__textItem.setHtml(html)
+
+    def isRenderPending(self):
+        """
+        Is the rendered html content still being prepared (in the
+        meantime the content is shown as plain text).
+        """
+        return self.__renderPending
 
     def contextMenuEvent(self, event):
         if event.modifiers() & Qt.AltModifier:
@@ -18,6 +18,9 @@ from .nodeitem import SHADOW_COLOR
 from .utils import stroke_path
 
 from ...scheme import SchemeLink
+from ...utils.lazyimport import lazy_import
+
+numpy = lazy_import("numpy")
 
 
 class LinkCurveItem(QGraphicsPathItem):
@@ -40,8 +43,11 @@ class LinkCurveItem(QGraphicsPathItem):
         self.__hover = False
         self.__enabled = True
         self.__shape = None
+        # The stroke width for which the cached `__shape` was computed.
+        self.__shape_width = None
         self.__curvepath = QPainterPath()
         self.__curvepath_disabled = None
+        self.__shape_deferred = False
         self.__pen = self.pen()
         self.setPen(QPen(QBrush(QColor("#9CACB4")), 2.0))
 
@@ -57,14 +63,15 @@ class LinkCurveItem(QGraphicsPathItem):
         return QPainterPath(self.__curvepath)
 
     def setHoverState(self, state):
-        self.prepareGeometryChange()
-        self.__hover = state
-        self.__update()
+        if self.__hover != state:
+            self.prepareGeometryChange()
+            self.__hover = state
+            self.__update()
 
     def setLinkEnabled(self, state):
-        self.prepareGeometryChange()
-        self.__enabled = state
-        self.__update()
+        if self.__enabled != state:
+            self.__enabled = state
+            self.__update()
 
     def isLinkEnabled(self):
         return self.__enabled
@@ -73,22 +80,41 @@ class LinkCurveItem(QGraphicsPathItem):
         if self.__pen != pen:
             self.prepareGeometryChange()
             self.__pen = QPen(pen)
-            self.__shape = None
             super(LinkCurveItem, self).setPen(self.__pen)
 
+    def setShapeDeferred(self, deferred):
+        """
+        Defer (re)building the stroked shape.
+
+        While deferred (e.g. while the link's nodes are being dragged)
+        :func:`shape` returns the curve's (padded) bounding rect for any
+        path changed in the meantime. The exact shape is rebuilt lazily
+        after it is no longer deferred.
+        """
+        self.__shape_deferred = deferred
+
+    def isShapeDeferred(self):
+        return self.__shape_deferred
+
     def shape(self):
-        if self.__shape is None:
-            path = self.curvePath()
-            pen = QPen(self.pen())
-            pen.setWidthF(max(pen.widthF(), 7.0))
+        # The shape is stroked with a (minimum) fixed width and a solid
+        # line, so it only depends on the curve path and the effective
+        # width (i.e. hover, enabled state, color and pen style changes do
+        # not invalidate it).
+        width = max(self.__pen.widthF(), 7.0)
+        if self.__shape_deferred and self.__shape is None:
+            shape = QPainterPath()
+            shape.addRect(self.__curvepath.controlPointRect().adjusted(
+                -width / 2, -width / 2, width / 2, width / 2))
+            return shape
+        if self.__shape is None or self.__shape_width != width:
+            pen = QPen(self.__pen)
+            pen.setWidthF(width)
             pen.setStyle(Qt.SolidLine)
-            self.__shape = stroke_path(path, pen)
+            self.__shape = stroke_path(self.__curvepath, pen)
+            self.__shape_width = width
         return self.__shape
 
-    def setPath(self, path):
-        self.__shape = None
-        super(LinkCurveItem, self).setPath(path)
-
     def __update(self):
         shadow_enabled = self.__hover
         if self.shadow.isEnabled() != shadow_enabled:
@@ -102,7 +128,38 @@ class LinkCurveItem(QGraphicsPathItem):
                 self.__curvepath_disabled = path_link_disabled(basecurve)
             path = self.__curvepath_disabled
 
-        self.setPath(path)
+        if path != self.path():
+            self.setPath(path)
+
+
+def curve_control_points(source, sink):
+    """
+    Return the cubic bezier control points of link curves from `source`
+    to `sink` points.
+
+    Parameters
+    ----------
+    source : (N, 2) array
+        Curve start points.
+    sink : (N, 2) array
+        Curve end points.
+
+    Returns
+    -------
+    points : (N, 4, 2) array
+    """
+    source = numpy.asarray(source, dtype=float).reshape(-1, 2)
+    sink = numpy.asarray(sink, dtype=float).reshape(-1, 2)
+    # Adaptive offset for the curve control points to avoid a
+    # cusp when the two points have the same y coordinate
+    # and are close together
+    delta = source - sink
+    dist = numpy.hypot(delta[:, 0], delta[:, 1])
+    offset = numpy.minimum(dist / 2.0, 60.0)
+    c1, c2 = source.copy(), sink.copy()
+    c1[:, 0] += offset
+    c2[:, 0] -= offset
+    return numpy.stack([source, c1, c2, sink], axis=1)
 
 
 def bezier_subdivide(cp, t):
@@ -328,6 +385,7 @@ class LinkItem(QGraphicsObject):
         self.linkTextItem.setAcceptHoverEvents(False)
         self.__sourceName = ""
         self.__sinkName = ""
+        self.__textIdealWidth = 0
 
         self.__dynamic = False
         self.__dynamicEnabled = False
@@ -487,38 +545,67 @@ class LinkItem(QGraphicsObject):
         return self.__sinkName
 
     def _sinkPosChanged(self, *arg):
-        self.__updateCurve()
+        self.__scheduleCurveUpdate()
 
     def _sourcePosChanged(self, *arg):
-        self.__updateCurve()
+        self.__scheduleCurveUpdate()
+
+    def __scheduleCurveUpdate(self):
+        # Defer the curve update to the scene (if it supports it) so
+        # that it is updated only once even if both ends move.
+        scene = self.scene()
+        schedule = getattr(scene, "schedule_link_update", None)
+        if schedule is not None:
+            schedule(self)
+        else:
+            self.__updateCurve()
 
-    def __updateCurve(self):
-        self.prepareGeometryChange()
-        self.__boundingRect = None
+    def curveEndPoints(self):
+        """
+        Return the curve's start and end points (in `curveItem`
+        coordinates) or None if the link does not have both anchors.
+        """
         if self.sourceAnchor and self.sinkAnchor:
             source_pos = self.sourceAnchor.anchorScenePos()
             sink_pos = self.sinkAnchor.anchorScenePos()
-            source_pos = self.curveItem.mapFromScene(source_pos)
-            sink_pos = self.curveItem.mapFromScene(sink_pos)
+            return (self.curveItem.mapFromScene(source_pos),
+                    self.curveItem.mapFromScene(sink_pos))
+        else:
+            return None
 
-            # Adaptive offset for the curve control points to avoid a
-            # cusp when the two points have the same y coordinate
-            # and are close together
-            delta = source_pos - sink_pos
-            dist = math.sqrt(delta.x() ** 2 + delta.y() ** 2)
-            cp_offset = min(dist / 2.0, 60.0)
+    def updateCurve(self, controlPoints=None):
+        """
+        Update the link curve to the current anchor positions.
+
+        Parameters
+        ----------
+        controlPoints : Optional[(4, 2) array]
+            Precomputed bezier control points for the current
+            :func:`curveEndPoints` (see :func:`curve_control_points`).
+        """
+        self.__updateCurve(controlPoints)
+
+    def __updateCurve(self, controlPoints=None):
+        self.prepareGeometryChange()
+        self.__boundingRect = None
+        endpoints = self.curveEndPoints()
+        if endpoints is not None:
+            source_pos, sink_pos = endpoints
+            if controlPoints is None:
+                controlPoints = curve_control_points(
+                    [source_pos.x(), source_pos.y()],
+                    [sink_pos.x(), sink_pos.y()])[0]
+            _, c1, c2, _ = controlPoints
 
             # TODO: make the curve tangent orthogonal to the anchors path.
             path = QPainterPath()
             path.moveTo(source_pos)
-            path.cubicTo(source_pos + QPointF(cp_offset, 0),
-                         sink_pos - QPointF(cp_offset, 0),
-                         sink_pos)
+            path.cubicTo(QPointF(*c1), QPointF(*c2), sink_pos)
 
             self.curveItem.setCurvePath(path)
             self.sourceIndicator.setPos(source_pos)
             self.sinkIndicator.setPos(sink_pos)
-            self.__updateText()
+            self.__updateTextGeometry()
         else:
             self.setHoverState(False)
             self.curveItem.setPath(QPainterPath())
@@ -543,6 +630,17 @@ class LinkItem(QGraphicsObject):
 
         self.linkTextItem.setHtml('<div align="center">{0}</div>'
                                   .format(text))
+        # Get the ideal text width if it was unconstrained
+        doc = self.linkTextItem.document().clone(self)
+        doc.setTextWidth(-1)
+        self.__textIdealWidth = doc.idealWidth()
+        doc.deleteLater()
+        self.__updateTextGeometry()
+
+    def __updateTextGeometry(self):
+        # Update the text width and position for the current curve path
+        self.prepareGeometryChange()
+        self.__boundingRect = None
         path = self.curveItem.curvePath()
 
         # Constrain the text width if it is too long to fit on a single line
@@ -552,11 +650,7 @@ class LinkItem(QGraphicsObject):
             # available space
             diff = path.pointAtPercent(0.0) - path.pointAtPercent(1.0)
             available_width = math.sqrt(diff.x() ** 2 + diff.y() ** 2)
-            # Get the ideal text width if it was unconstrained
-            doc = self.linkTextItem.document().clone(self)
-            doc.setTextWidth(-1)
-            idealwidth = doc.idealWidth()
-            doc.deleteLater()
+            idealwidth = self.__textIdealWidth
 
             # Constrain the text width but not below a certain min width
             minwidth = 100
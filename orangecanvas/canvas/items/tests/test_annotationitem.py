@@ -1,9 +1,14 @@
+import os
 import math
 import time
+import shutil
+import tempfile
 
 from AnyQt.QtGui import QColor
 from AnyQt.QtCore import Qt, QRectF, QLineF, QTimer
+from AnyQt.QtTest import QTest
 
+from .. import annotationitem
 from ..annotationitem import TextAnnotation, ArrowAnnotation, ArrowItem
 
 from . import TestItems
@@ -65,3 +70,66 @@ class TestAnnotationItem(TestItems):
         timer.timeout.connect(advance)
         timer.start()
         self.app.exec_()
+
+    def test_render_async(self):
+        tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmpdir)
+        cache = annotationitem.render_cache
+        self.addCleanup(cache.setDirectory, cache.directory())
+        cache.setDirectory(tmpdir)
+        cache.clear()
+
+        content = "Heading\n=======\n\n*emphasis* {}".format(time.time())
+        annot = TextAnnotation()
+        self.scene.addItem(annot)
+        annot.setContent(content, "text/rst")
+        # The plain text is shown until the rst is rendered
+        self.assertTrue(annot.isRenderPending())
+        self.assertIn("*emphasis*", annot.toPlainText())
+
+        timeout = 5000
+        while annot.isRenderPending() and timeout > 0:
+            QTest.qWait(10)
+            timeout -= 10
+        self.assertFalse(annot.isRenderPending())
+        self.assertNotIn("*emphasis*", annot.toPlainText())
+        self.assertIn("emphasis", annot.toPlainText())
+
+        # Same content is rendered immediately from the cache ...
+        annot2 = TextAnnotation()
+        annot2.setContent(content, "text/rst")
+        self.assertFalse(annot2.isRenderPending())
+        self.assertEqual(annot2.toPlainText(), annot.toPlainText())
+
+        # ... also from the disk cache
+        key = annotationitem.RenderCache.key(content, "text/rst")
+        disk = annotationitem.RenderCache(directory=tmpdir)
+        self.assertIsNotNone(disk.get(key))
+        self.assertIsNone(annotationitem.RenderCache().get(key))
+
+        annot.setContent("plain", "text/plain")
+        self.assertFalse(annot.isRenderPending())
+        self.assertEqual(annot.toPlainText(), "plain")
+
+    def test_render_cache_prune(self):
+        tmpdir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmpdir)
+        html = "x" * 100
+        cache = annotationitem.RenderCache(directory=tmpdir, maxdisksize=250)
+        cache.put("a", html)
+        cache.put("b", html)
+        self.assertEqual(cache.diskSize(), 200)
+        # "a" is used more recently than "b" ...
+        self.assertEqual(cache.get("a"), html)
+        cache.put("c", html)
+        # ... so "b" is removed
+        self.assertEqual(sorted(os.listdir(tmpdir)), ["a.html", "c.html"])
+        self.assertEqual(cache.diskSize(), 200)
+
+        # The size of the existing files is accounted for
+        cache = annotationitem.RenderCache(directory=tmpdir, maxdisksize=250)
+        self.assertEqual(cache.diskSize(), 200)
+        self.assertIsNone(cache.get("b"))
+        cache.setMaxDiskSize(100)
+        self.assertEqual(len(os.listdir(tmpdir)), 1)
+        self.assertEqual(cache.diskSize(), 100)
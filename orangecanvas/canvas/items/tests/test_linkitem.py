@@ -1,8 +1,12 @@
 import time
 
-from AnyQt.QtCore import QTimer
+import numpy
+import numpy.testing
 
-from ..linkitem import LinkItem
+from AnyQt.QtGui import QPainterPath
+from AnyQt.QtCore import QTimer, QPointF
+
+from ..linkitem import LinkItem, LinkCurveItem, curve_control_points
 
 from .. import NodeItem, AnchorPoint
 
@@ -122,3 +126,58 @@ class TestLinkItem(TestItems):
         timer.timeout.connect(advance)
         timer.start()
         self.app.exec_()
+
+    def test_curve_shape_cache(self):
+        link = LinkItem()
+        anchor1 = AnchorPoint()
+        anchor2 = AnchorPoint()
+        self.scene.addItem(link)
+        self.scene.addItem(anchor1)
+        self.scene.addItem(anchor2)
+        anchor2.setPos(100, 100)
+        link.setSourceItem(None, anchor1)
+        link.setSinkItem(None, anchor2)
+
+        shape = link.shape()
+        self.assertFalse(shape.isEmpty())
+        # Hover, enabled state and style changes do not change the shape.
+        link.setEnabled(False)
+        self.assertIs(link.shape(), shape)
+        link.setEnabled(True)
+        self.assertIs(link.shape(), shape)
+        link.setHoverState(True)
+        self.assertIs(link.shape(), shape)
+        link.setDynamic(True)
+        self.assertIs(link.shape(), shape)
+        link.setHoverState(False)
+        self.assertIs(link.shape(), shape)
+
+        anchor2.setPos(150, 100)
+        self.assertIsNot(link.shape(), shape)
+        self.assertTrue(link.shape().contains(QPointF(150, 100)))
+
+    def test_curve_control_points(self):
+        source = numpy.array([[0, 0], [0, 0], [0, 0]])
+        sink = numpy.array([[200, 0], [20, 0], [-100, 40]])
+        cp = curve_control_points(source, sink)
+        self.assertEqual(cp.shape, (3, 4, 2))
+        numpy.testing.assert_array_equal(cp[:, 0], source)
+        numpy.testing.assert_array_equal(cp[:, 3], sink)
+        # offset is half the distance, but at most 60
+        numpy.testing.assert_array_almost_equal(
+            cp[:, 1, 0], [60, 10, numpy.hypot(100, 40) / 2])
+        numpy.testing.assert_array_almost_equal(
+            cp[:, 2, 0], [140, 10, -100 - numpy.hypot(100, 40) / 2])
+
+    def test_curve_shape_deferred(self):
+        item = LinkCurveItem(None)
+        path = QPainterPath(QPointF(0, 0))
+        path.cubicTo(QPointF(60, 0), QPointF(40, 100), QPointF(100, 100))
+        item.setShapeDeferred(True)
+        item.setCurvePath(path)
+        # The bounding rect is used while the shape is deferred ...
+        self.assertTrue(item.shape().contains(QPointF(95, 5)))
+        item.setShapeDeferred(False)
+        # ... and the exact shape is computed after
+        self.assertFalse(item.shape().contains(QPointF(95, 5)))
+        self.assertTrue(item.shape().contains(QPointF(50, 50)))
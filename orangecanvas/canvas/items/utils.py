@@ -1,7 +1,9 @@
-import numpy
-
 from AnyQt.QtGui import QColor, QRadialGradient, QPainterPathStroker
 
+from ...utils.lazyimport import lazy_import
+
+numpy = lazy_import("numpy")
+
 
 def saturated(color, factor=150):
     """Return a saturated color.
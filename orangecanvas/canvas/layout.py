@@ -4,8 +4,6 @@ Node/Link layout.
 """
 from operator import attrgetter, add
 
-import numpy
-
 import sip
 
 from AnyQt.QtWidgets import QGraphicsObject, QApplication
@@ -13,8 +11,11 @@ from AnyQt.QtCore import QRectF, QLineF, QEvent
 
 from .items import NodeItem, LinkItem, SourceAnchorItem, SinkAnchorItem
 from .items.utils import invert_permutation_indices, linspace
+from ..utils.lazyimport import lazy_import
 from functools import reduce
 
+numpy = lazy_import("numpy")
+
 
 def composition(f, g):
     """Return a composition of two functions
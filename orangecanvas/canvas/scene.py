@@ -8,15 +8,20 @@ Canvas Graphics Scene
 import logging
 import itertools
 
+from collections import OrderedDict
+
 from operator import attrgetter
 
 from xml.sax.saxutils import escape
 
 import six
 
+import sip
 
-from AnyQt.QtWidgets import QGraphicsScene, QGraphicsItem, QGraphicsObject
-from AnyQt.QtGui import QPainter, QBrush, QColor, QFont
+from AnyQt.QtWidgets import (
+    QGraphicsScene, QGraphicsItem, QGraphicsObject, QApplication
+)
+from AnyQt.QtGui import QPainter, QPainterPath, QBrush, QColor, QFont
 from AnyQt.QtCore import Qt, QPointF, QRectF, QSizeF, QLineF, QBuffer, \
                          QEvent, QObject, QSignalMapper, QT_VERSION
 from AnyQt.QtSvg import QSvgGenerator
@@ -32,9 +37,15 @@ from .. import scheme
 from . import items
 from .layout import AnchorLayout
 from .items.utils import toGraphicsObjectIfPossible
+from ..utils.lazyimport import lazy_import
+
+numpy = lazy_import("numpy")
 
 log = logging.getLogger(__name__)
 
+#: Event type posted to the scene to update the scheduled link curves
+LinkUpdateRequest = QEvent.Type(QEvent.registerEventType())
+
 
 class CanvasScene(QGraphicsScene):
     """
@@ -96,6 +107,13 @@ class CanvasScene(QGraphicsScene):
         # Mapping from SchemeAnnotations to canvas items.
         self.__item_for_annotation = {}
 
+        # Link items whose curves need to be updated (in insertion order)
+        self.__dirty_links = OrderedDict()
+        self.__link_update_pending = False
+        # Links whose exact shape is deferred until the mouse is released
+        self.__shape_deferred_links = set()
+        self.__mouse_pressed = False
+
         # Is the scene editable
         self.editable = True
 
@@ -708,6 +726,62 @@ class CanvasScene(QGraphicsScene):
                              self.node_output_links(node_item)))
         return neighbors
 
+    def schedule_link_update(self, item):
+        """
+        Schedule an update of the link `item`'s curve.
+
+        The updates are coalesced, so the curve is computed only once per
+        event loop iteration (or mouse move) regardless of how many of its
+        anchors moved.
+
+        """
+        self.__dirty_links[item] = None
+        if not self.__link_update_pending:
+            self.__link_update_pending = True
+            QApplication.postEvent(self, QEvent(LinkUpdateRequest))
+
+    def flush_link_updates(self):
+        """
+        Update the curves of all links scheduled with
+        :func:`schedule_link_update`.
+        """
+        self.__link_update_pending = False
+        if not self.__dirty_links:
+            return
+        dirty, self.__dirty_links = self.__dirty_links, OrderedDict()
+        links, points = [], []
+        for link in dirty:
+            if sip.isdeleted(link) or link.scene() is not self:
+                continue
+            endpoints = link.curveEndPoints()
+            if endpoints is None:
+                link.updateCurve()
+                continue
+            source, sink = endpoints
+            links.append(link)
+            points.append((source.x(), source.y(), sink.x(), sink.y()))
+
+        if not links:
+            return
+
+        points = numpy.array(points, dtype=float)
+        controlpoints = items.linkitem.curve_control_points(
+            points[:, :2], points[:, 2:])
+
+        defer_shape = self.__mouse_pressed
+        for link, cp in zip(links, controlpoints):
+            if defer_shape:
+                link.curveItem.setShapeDeferred(True)
+                self.__shape_deferred_links.add(link)
+            link.updateCurve(cp)
+
+    def __end_deferred_shapes(self):
+        links, self.__shape_deferred_links = \
+            self.__shape_deferred_links, set()
+        for link in links:
+            if not sip.isdeleted(link):
+                link.curveItem.setShapeDeferred(False)
+
     def _on_position_change(self, item):
         # Invalidate the anchor point layout and schedule a layout.
         self.__anchor_layout.invalidateNode(item)
@@ -753,6 +827,33 @@ class CanvasScene(QGraphicsScene):
 
         return items[0] if items else None
 
+    def selectable_items_in(self, rect):
+        """Return all selectable items whose shape intersects `rect`.
+
+        The scene index is queried only by bounding rects. The (expensive)
+        exact shape test is performed only for selectable items that
+        straddle the edge of `rect`; items fully contained in it are
+        accepted as is.
+
+        """
+        rect = rect.normalized()
+        path = None
+        selected = []
+        for item in self.items(rect, Qt.IntersectsItemBoundingRect,
+                               Qt.AscendingOrder):
+            if not item.flags() & QGraphicsItem.ItemIsSelectable:
+                continue
+            if rect.contains(item.sceneBoundingRect()):
+                selected.append(item)
+                continue
+            if path is None:
+                path = QPainterPath()
+                path.addRect(rect)
+            if item.collidesWithPath(item.mapFromScene(path),
+                                     Qt.IntersectsItemShape):
+                selected.append(item)
+        return selected
+
     if USE_PYQT and PYQT_VERSION < 0x040900:
         # For QGraphicsObject subclasses items, itemAt ... return a
         # QGraphicsItem wrapper instance and not the actual class instance.
@@ -781,6 +882,7 @@ class CanvasScene(QGraphicsScene):
             return toGraphicsObjectIfPossible(item)
 
     def mousePressEvent(self, event):
+        self.__mouse_pressed = True
         if self.user_interaction_handler and \
                 self.user_interaction_handler.mousePressEvent(event):
             return
@@ -799,17 +901,28 @@ class CanvasScene(QGraphicsScene):
         return QGraphicsScene.mousePressEvent(self, event)
 
     def mouseMoveEvent(self, event):
-        if self.user_interaction_handler and \
-                self.user_interaction_handler.mouseMoveEvent(event):
-            return
+        try:
+            if self.user_interaction_handler and \
+                    self.user_interaction_handler.mouseMoveEvent(event):
+                return
 
-        return QGraphicsScene.mouseMoveEvent(self, event)
+            return QGraphicsScene.mouseMoveEvent(self, event)
+        finally:
+            # Update the links of the (possibly) moved items once, before
+            # the next paint.
+            self.flush_link_updates()
 
     def mouseReleaseEvent(self, event):
-        if self.user_interaction_handler and \
-                self.user_interaction_handler.mouseReleaseEvent(event):
-            return
-        return QGraphicsScene.mouseReleaseEvent(self, event)
+        try:
+            if self.user_interaction_handler and \
+                    self.user_interaction_handler.mouseReleaseEvent(event):
+                return
+            return QGraphicsScene.mouseReleaseEvent(self, event)
+        finally:
+            if not event.buttons():
+                self.__mouse_pressed = False
+                self.flush_link_updates()
+                self.__end_deferred_shapes()
 
     def mouseDoubleClickEvent(self, event):
         if self.user_interaction_handler and \
@@ -852,6 +965,9 @@ class CanvasScene(QGraphicsScene):
         # It already handles font changes.
         if event.type() == QEvent.FontChange:
             self.__update_font()
+        elif event.type() == LinkUpdateRequest:
+            self.flush_link_updates()
+            return True
 
         return QGraphicsScene.event(self, event)
 
@@ -1,5 +1,6 @@
-from AnyQt.QtWidgets import QGraphicsView
+from AnyQt.QtWidgets import QGraphicsView, QGraphicsItem
 from AnyQt.QtGui import QPainter
+from AnyQt.QtCore import QPointF, QRectF, QSizeF
 
 from ..scene import CanvasScene
 from .. import items
@@ -226,6 +227,63 @@ class TestScene(QAppTestCase):
 
         self.app.exec_()
 
+    def test_selectable_items_in(self):
+        one_desc, negate_desc, cons_desc = self.widget_desc()
+        one_item = self.scene.add_node_item(items.NodeItem(one_desc))
+        negate_item = self.scene.add_node_item(items.NodeItem(negate_desc))
+        one_item.setPos(0, 0)
+        negate_item.setPos(300, 0)
+        link = self.scene.add_link_item(
+            self.scene.new_link_item(one_item, "value", negate_item, "value")
+        )
+        self.assertFalse(link.flags() & QGraphicsItem.ItemIsSelectable)
+
+        rect = one_item.sceneBoundingRect()
+        self.assertSequenceEqual(
+            self.scene.selectable_items_in(rect), [one_item])
+        # Partially covered (the rect only touches the node's bounding
+        # rect corner, not its shape)
+        corner = QRectF(rect.topLeft() - QPointF(5, 5), QSizeF(6, 6))
+        self.assertSequenceEqual(self.scene.selectable_items_in(corner), [])
+
+        rect = rect.united(negate_item.sceneBoundingRect())
+        self.assertSetEqual(set(self.scene.selectable_items_in(rect)),
+                            {one_item, negate_item})
+
+    def test_link_updates_coalesced(self):
+        one_desc, negate_desc, cons_desc = self.widget_desc()
+        one_item = self.scene.add_node_item(items.NodeItem(one_desc))
+        negate_item = self.scene.add_node_item(items.NodeItem(negate_desc))
+        one_item.setPos(0, 0)
+        negate_item.setPos(300, 0)
+        link = self.scene.add_link_item(
+            self.scene.new_link_item(one_item, "value", negate_item, "value")
+        )
+        self.scene.anchor_layout().activate()
+        self.scene.flush_link_updates()
+
+        updates = []
+        update = link.updateCurve
+        link.updateCurve = lambda *args: (updates.append(args),
+                                          update(*args))
+        # Move both nodes; the link is updated only once
+        one_item.setPos(10, 20)
+        negate_item.setPos(310, 50)
+        self.assertEqual(updates, [])
+        self.scene.flush_link_updates()
+        self.assertEqual(len(updates), 1)
+
+        path = link.curveItem.curvePath()
+        self.assertEqual(
+            path.pointAtPercent(0),
+            link.curveItem.mapFromScene(link.sourceAnchor.anchorScenePos()))
+        self.assertEqual(
+            path.pointAtPercent(1),
+            link.curveItem.mapFromScene(link.sinkAnchor.anchorScenePos()))
+
+        self.scene.flush_link_updates()
+        self.assertEqual(len(updates), 1)
+
     def widget_desc(self):
         reg = small_testing_registry()
         one_desc = reg.widget("one")
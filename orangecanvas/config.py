@@ -7,9 +7,7 @@ import os
 import sys
 import logging
 import pickle
-from distutils.version import LooseVersion
 
-import pkg_resources
 import six
 
 from AnyQt.QtGui import (
@@ -24,6 +22,7 @@ else:
     from AnyQt.QtCore import QStandardPaths
 
 from .utils.settings import Settings, config_slot
+from .utils import entrypoints, version_parts
 
 # Import QSettings from qtcompat module (compatibility with PyQt < 4.8.3
 from .utils.qtcompat import QSettings
@@ -36,10 +35,12 @@ __version__ = "0.0"
 
 #: Entry point by which widgets are registered.
 WIDGETS_ENTRY = "orangecanvas.widgets"
-#: Entry point by which add-ons register with pkg_resources.
+#: Entry point by which add-ons register with setuptools.
 ADDONS_ENTRY = "orangecanvas.addon"
 #: Parameters for searching add-on packages in PyPi using xmlrpc api.
 ADDON_PYPI_SEARCH_SPEC = {"keywords": "orange add-on"}
+#: The PyPi (compatible) xmlrpc index url used for the add-on search.
+ADDON_PYPI_INDEX_URL = "https://pypi.python.org/pypi"
 
 TUTORIALS_ENTRY = "orangecanvas.tutorials"
 
@@ -75,21 +76,20 @@ class default(object):
         """
         Return the main application icon.
         """
-        path = pkg_resources.resource_filename(
-            __name__, "icons/orange-canvas.svg"
+        path = os.path.join(
+            os.path.dirname(__file__), "icons", "orange-canvas.svg"
         )
         return QIcon(path)
 
     @staticmethod
     def splash_screen():
-        path = pkg_resources.resource_filename(
-            __name__, "icons/orange-splash-screen.png")
+        path = os.path.join(
+            os.path.dirname(__file__), "icons", "orange-splash-screen.png")
         pm = QPixmap(path)
 
         version = QCoreApplication.applicationVersion()
         if version:
-            version_parsed = LooseVersion(version)
-            version_comp = version_parsed.version
+            version_comp = version_parts(version)
             version = ".".join(map(str, version_comp[:2]))
         size = 21 if len(version) < 5 else 16
         font = QFont("Helvetica")
@@ -112,19 +112,23 @@ class default(object):
 
     @staticmethod
     def widgets_entry_points():
-        return pkg_resources.iter_entry_points(WIDGETS_ENTRY)
+        return entrypoints.iter_entry_points(WIDGETS_ENTRY)
 
     @staticmethod
     def addon_entry_points():
-        return pkg_resources.iter_entry_points(ADDONS_ENTRY)
+        return entrypoints.iter_entry_points(ADDONS_ENTRY)
 
     @staticmethod
     def addon_pypi_search_spec():
         return dict(ADDON_PYPI_SEARCH_SPEC)
 
+    @staticmethod
+    def addon_pypi_index_url():
+        return ADDON_PYPI_INDEX_URL
+
     @staticmethod
     def tutorials_entry_points():
-        return pkg_resources.iter_entry_points(TUTORIALS_ENTRY)
+        return entrypoints.iter_entry_points(TUTORIALS_ENTRY)
 
     @staticmethod
     def widget_discovery(*args, **kwargs):
@@ -202,6 +206,19 @@ spec = \
      ("schemeedit/freeze-on-load", bool, False,
       "Freeze signal propagation when loading a workflow."),
 
+     ("schemeedit/undo-memory-budget", int, 64,
+      "Memory budget (in MB) for the undo history (0 for no limit)."),
+
+     ("schemeedit/output-memory-budget", int, 0,
+      "Memory budget (in MB) for the retained node outputs; the least "
+      "recently used outputs are spilled to disk (0 for no limit)."),
+
+     ("schemeedit/output-cache", bool, False,
+      "Cache the node outputs between sessions (for nodes supporting it)."),
+
+     ("schemeedit/output-cache-size", int, 1024,
+      "Maximum size (in MB) of the persistent node output cache."),
+
      ("quickmenu/trigger-on-double-click", bool, True,
       "Show quick menu on double click."),
 
@@ -220,6 +237,10 @@ spec = \
 
      ("logging/dockable", bool, True, "Allow log window to be docked"),
 
+     ("logging/detect-stalls", bool, False,
+      "Report GUI event loop stalls (with sampled stacks) to the log "
+      "directory"),
+
      ("help/open-in-external-browser", bool, False,
       "Open help in an external browser")
      ]
@@ -227,11 +248,31 @@ spec = \
 spec = [config_slot(*t) for t in spec]
 
 
+_settings = None
+
+
 def settings():
+    """
+    Return the application's :class:`Settings` instance.
+
+    The instance (and its value cache) is shared by all the callers in the
+    application.
+    """
+    global _settings
     init()
-    store = QSettings()
-    settings = Settings(defaults=spec, store=store)
-    return settings
+    app = QCoreApplication.instance()
+    if _settings is not None and _settings.parent() is not app:
+        _settings.destroyed.disconnect(_clear_settings)
+        _settings = None
+    if _settings is None:
+        _settings = Settings(app, defaults=spec, store=QSettings())
+        _settings.destroyed.connect(_clear_settings)
+    return _settings
+
+
+def _clear_settings():
+    global _settings
+    _settings = None
 
 
 def data_dir():
@@ -304,8 +345,11 @@ def save_config():
         pickle.dump(rc, f)
 
 
-def recent_schemes():
+def recent_schemes(check_exists=True):
     """Return a list of recently accessed schemes.
+
+    If `check_exists` is False the files are not checked for existence
+    (which can be slow on network storage).
     """
     app_dir = data_dir()
     recent_filename = os.path.join(app_dir, "recent.pck")
@@ -314,9 +358,10 @@ def recent_schemes():
         with open(recent_filename, "rb") as f:
             recent = pickle.load(f)
 
-    # Filter out files not found on the file system
-    recent = [(title, path) for title, path in recent \
-              if os.path.exists(path)]
+    if check_exists:
+        # Filter out files not found on the file system
+        recent = [(title, path) for title, path in recent \
+                  if os.path.exists(path)]
     return recent
 
 
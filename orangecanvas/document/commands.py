@@ -2,8 +2,42 @@
 Undo/Redo Commands
 
 """
+import sys
+import zlib
+import itertools
 
-from AnyQt.QtWidgets import QUndoCommand
+import sip
+
+from AnyQt.QtWidgets import QUndoCommand, QUndoStack, QAction
+from AnyQt.QtCore import pyqtSignal as Signal, pyqtSlot as Slot
+
+from ..scheme import SchemeNode, SchemeLink, BaseSchemeAnnotation, readwrite
+
+
+#: Command ids used for merging (see `QUndoCommand.id`)
+MoveNodeId, AnnotationGeometryId, TextChangeId, SetAttrId, MoveItemsId = \
+    range(1, 6)
+
+_gesture_ids = itertools.count(1)
+
+
+def new_gesture():
+    """
+    Return a new unique gesture id.
+
+    Consecutive mergeable commands pushed with the same (not None)
+    `gesture` id (i.e. by the same user interaction) are merged into
+    a single undo step.
+    """
+    return next(_gesture_ids)
+
+
+def _can_merge(first, second):
+    """
+    Can the `second` command (pushed after `first`) be merged into `first`.
+    """
+    gesture = getattr(first, "gesture", None)
+    return gesture is not None and gesture == second.gesture
 
 
 class AddNodeCommand(QUndoCommand):
@@ -31,16 +65,44 @@ class RemoveNodeCommand(QUndoCommand):
         for link in links:
             RemoveLinkCommand(scheme, link, parent=self)
 
+        self.__compressed = None
+
     def redo(self):
         # redo child commands
         QUndoCommand.redo(self)
         self.scheme.remove_node(self.node)
 
     def undo(self):
+        self.__decompress()
         self.scheme.add_node(self.node)
         # Undo child commands
         QUndoCommand.undo(self)
 
+    def compress(self):
+        """
+        Store a compressed copy of the (removed) node's properties.
+
+        The node itself is not modified (it can still be referenced
+        elsewhere); the copy is what :func:`undo` restores.
+        """
+        if self.__compressed is not None or self.node in self.scheme.nodes:
+            return
+        properties = dict(self.node.properties)
+        if not properties:
+            return
+        try:
+            string, fmt = readwrite.dumps(properties, pickle_fallback=True)
+        except Exception:
+            return
+        self.__compressed = (zlib.compress(string.encode("utf-8")), fmt)
+
+    def __decompress(self):
+        if self.__compressed is not None:
+            data, fmt = self.__compressed
+            self.__compressed = None
+            self.node.properties = readwrite.loads(
+                zlib.decompress(data).decode("utf-8"), fmt)
+
 
 class AddLinkCommand(QUndoCommand):
     def __init__(self, scheme, link, parent=None):
@@ -95,12 +157,13 @@ class RemoveAnnotationCommand(QUndoCommand):
 
 
 class MoveNodeCommand(QUndoCommand):
-    def __init__(self, scheme, node, old, new, parent=None):
+    def __init__(self, scheme, node, old, new, parent=None, gesture=None):
         QUndoCommand.__init__(self, "Move", parent)
         self.scheme = scheme
         self.node = node
         self.old = old
         self.new = new
+        self.gesture = gesture
 
     def redo(self):
         self.node.position = self.new
@@ -108,6 +171,68 @@ class MoveNodeCommand(QUndoCommand):
     def undo(self):
         self.node.position = self.old
 
+    def id(self):
+        return MoveNodeId
+
+    def mergeWith(self, other):
+        if not _can_merge(self, other) or other.node is not self.node:
+            return False
+        self.new = other.new
+        return True
+
+
+class MoveItemsCommand(QUndoCommand):
+    """
+    Move (change the geometry of) several items at once.
+
+    Consecutive moves in the same gesture are merged (the items moved only
+    by the later command are added to the merged command).
+    """
+    def __init__(self, scheme, moves, parent=None, gesture=None):
+        """
+        `moves` is a sequence of (item, old, new) tuples where item is
+        a `SchemeNode` or a `BaseSchemeAnnotation`.
+        """
+        QUndoCommand.__init__(self, "Move", parent)
+        self.scheme = scheme
+        self.gesture = gesture
+        for item, old, new in moves:
+            if isinstance(item, BaseSchemeAnnotation):
+                AnnotationGeometryChange(scheme, item, old, new, parent=self)
+            else:
+                MoveNodeCommand(scheme, item, old, new, parent=self)
+
+    def moves(self):
+        """
+        Return the child MoveNodeCommand/AnnotationGeometryChange commands.
+        """
+        return [self.child(i) for i in range(self.childCount())]
+
+    def id(self):
+        return MoveItemsId
+
+    def mergeWith(self, other):
+        if not _can_merge(self, other):
+            return False
+
+        def target(command):
+            if isinstance(command, MoveNodeCommand):
+                return command.node
+            else:
+                return command.annotation
+
+        items = {id(target(c)): c for c in self.moves()}
+        for c in other.moves():
+            item = target(c)
+            if id(item) in items:
+                items[id(item)].new = c.new
+            elif isinstance(c, MoveNodeCommand):
+                MoveNodeCommand(self.scheme, item, c.old, c.new, parent=self)
+            else:
+                AnnotationGeometryChange(self.scheme, item, c.old, c.new,
+                                         parent=self)
+        return True
+
 
 class ResizeCommand(QUndoCommand):
     def __init__(self, scheme, item, new_geom, parent=None):
@@ -140,12 +265,14 @@ class ArrowChangeCommand(QUndoCommand):
 
 
 class AnnotationGeometryChange(QUndoCommand):
-    def __init__(self, scheme, annotation, old, new, parent=None):
+    def __init__(self, scheme, annotation, old, new, parent=None,
+                 gesture=None):
         QUndoCommand.__init__(self, "Change Annotation Geometry", parent)
         self.scheme = scheme
         self.annotation = annotation
         self.old = old
         self.new = new
+        self.gesture = gesture
 
     def redo(self):
         self.annotation.geometry = self.new
@@ -153,6 +280,16 @@ class AnnotationGeometryChange(QUndoCommand):
     def undo(self):
         self.annotation.geometry = self.old
 
+    def id(self):
+        return AnnotationGeometryId
+
+    def mergeWith(self, other):
+        if not _can_merge(self, other) or \
+                other.annotation is not self.annotation:
+            return False
+        self.new = other.new
+        return True
+
 
 class RenameNodeCommand(QUndoCommand):
     def __init__(self, scheme, node, old_name, new_name, parent=None):
@@ -172,7 +309,7 @@ class RenameNodeCommand(QUndoCommand):
 class TextChangeCommand(QUndoCommand):
     def __init__(self, scheme, annotation,
                  old_content, old_content_type,
-                 new_content, new_content_type, parent=None):
+                 new_content, new_content_type, parent=None, gesture=None):
         QUndoCommand.__init__(self, "Change text", parent)
         self.scheme = scheme
         self.annotation = annotation
@@ -180,16 +317,38 @@ class TextChangeCommand(QUndoCommand):
         self.old_content_type = old_content_type
         self.new_content = new_content
         self.new_content_type = new_content_type
+        self.gesture = gesture
 
     def redo(self):
-        self.annotation.set_content(self.new_content, self.new_content_type)
+        self.annotation.set_content(_decompressed(self.new_content),
+                                    self.new_content_type)
 
     def undo(self):
-        self.annotation.set_content(self.old_content, self.old_content_type)
+        self.annotation.set_content(_decompressed(self.old_content),
+                                    self.old_content_type)
+
+    def id(self):
+        return TextChangeId
+
+    def mergeWith(self, other):
+        if not _can_merge(self, other) or \
+                other.annotation is not self.annotation:
+            return False
+        self.new_content = other.new_content
+        self.new_content_type = other.new_content_type
+        return True
+
+    def compress(self):
+        """
+        Compress large old/new content strings.
+        """
+        self.old_content = _compressed(self.old_content)
+        self.new_content = _compressed(self.new_content)
 
 
 class SetAttrCommand(QUndoCommand):
-    def __init__(self, obj, attrname, newvalue, name=None, parent=None):
+    def __init__(self, obj, attrname, newvalue, name=None, parent=None,
+                 gesture=None):
         if name is None:
             name = "Set %r" % attrname
         QUndoCommand.__init__(self, name, parent)
@@ -197,9 +356,334 @@ class SetAttrCommand(QUndoCommand):
         self.attrname = attrname
         self.newvalue = newvalue
         self.oldvalue = getattr(obj, attrname)
+        self.gesture = gesture
 
     def redo(self):
         setattr(self.obj, self.attrname, self.newvalue)
 
     def undo(self):
         setattr(self.obj, self.attrname, self.oldvalue)
+
+    def id(self):
+        return SetAttrId
+
+    def mergeWith(self, other):
+        if not _can_merge(self, other) or other.obj is not self.obj or \
+                other.attrname != self.attrname or \
+                other.text() != self.text():
+            return False
+        self.newvalue = other.newvalue
+        return True
+
+
+class _Compressed(object):
+    """
+    A zlib compressed text string.
+    """
+    __slots__ = ("data",)
+
+    #: Strings shorter then this are not compressed.
+    Threshold = 1024
+
+    def __init__(self, text):
+        self.data = zlib.compress(text.encode("utf-8"))
+
+    def text(self):
+        return zlib.decompress(self.data).decode("utf-8")
+
+
+def _compressed(text):
+    if isinstance(text, _Compressed) or len(text) < _Compressed.Threshold:
+        return text
+    return _Compressed(text)
+
+
+def _decompressed(text):
+    if isinstance(text, _Compressed):
+        return text.text()
+    return text
+
+
+def estimate_size(obj, _seen=None):
+    """
+    Estimate the memory (in bytes) retained by a (possibly nested)
+    builtin container `obj`.
+
+    Only builtin containers are traversed, other objects are counted
+    by their `sys.getsizeof`.
+    """
+    if _seen is None:
+        _seen = set()
+    if id(obj) in _seen:
+        return 0
+    _seen.add(id(obj))
+    try:
+        size = sys.getsizeof(obj)
+    except TypeError:
+        size = 0
+
+    if isinstance(obj, dict):
+        size += sum(estimate_size(k, _seen) + estimate_size(v, _seen)
+                    for k, v in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(estimate_size(el, _seen) for el in obj)
+    elif isinstance(obj, _Compressed):
+        size += sys.getsizeof(obj.data)
+    elif hasattr(obj, "nbytes") and not isinstance(obj, type):
+        # numpy arrays (and similar) report their buffer size
+        try:
+            size += int(obj.nbytes)
+        except (TypeError, ValueError):
+            pass
+    return size
+
+
+def retained_size(command, scheme=None):
+    """
+    Estimate the memory (in bytes) retained by an undo `command` (including
+    its child commands).
+
+    The workflow the command is applied to (`scheme` or the command's
+    `scheme` attribute) and the nodes, links and annotations in it are not
+    counted, but the removed ones the command references are (as the
+    command may be their only owner).
+
+    """
+    size = sys.getsizeof(command)
+    seen = set()
+    state = getattr(command, "__dict__", {})
+    scheme = state.get("scheme", scheme)
+    for name, value in state.items():
+        if name == "scheme":
+            continue
+        size += _item_size(value, seen, scheme)
+
+    for i in range(command.childCount()):
+        size += retained_size(command.child(i), scheme)
+    return size
+
+
+def _item_size(value, seen, scheme):
+    if isinstance(value, SchemeNode):
+        if id(value) in seen or \
+                scheme is not None and value in scheme.nodes:
+            return 0
+        seen.add(id(value))
+        return (sys.getsizeof(value) + estimate_size(value.title, seen) +
+                estimate_size(value.properties, seen))
+    elif isinstance(value, SchemeLink):
+        if scheme is not None and value in scheme.links:
+            return 0
+        return sys.getsizeof(value)
+    elif isinstance(value, BaseSchemeAnnotation):
+        if id(value) in seen or \
+                scheme is not None and value in scheme.annotations:
+            return 0
+        seen.add(id(value))
+        return (sys.getsizeof(value) +
+                estimate_size(getattr(value, "content", None), seen))
+    else:
+        return estimate_size(value, seen)
+
+
+def compress(command):
+    """
+    Compress the `command` (and its children) state if supported.
+    """
+    if hasattr(command, "compress"):
+        command.compress()
+    for i in range(command.childCount()):
+        compress(command.child(i))
+
+
+def _inert():
+    pass
+
+
+def release(command):
+    """
+    Release all the state held by `command` (and its children).
+
+    The command is turned into an inert placeholder: a `QUndoStack` can
+    not remove its oldest commands (`setUndoLimit` only applies to an
+    empty stack), so the command's undo/redo are replaced (on the
+    instance) with no-ops. It is marked obsolete, so `QUndoStack` removes
+    it from the stack if it ever reaches it (e.g. with `setIndex`).
+    """
+    for i in range(command.childCount()):
+        release(command.child(i))
+    state = getattr(command, "__dict__", None)
+    if state is not None:
+        state.clear()
+        # sip looks up the reimplemented virtuals on the instance first
+        command.undo = command.redo = _inert
+    command.setObsolete(True)
+
+
+def is_released(command):
+    """
+    Was the `command` released (see :func:`release`).
+    """
+    return command.isObsolete() and \
+        getattr(command, "__dict__", {}).get("undo") is _inert
+
+
+class UndoStack(QUndoStack):
+    """
+    An undo stack with a memory budget.
+
+    When the estimated memory retained by the commands on the stack exceeds
+    the `memoryBudget`, the oldest commands are first compressed and then
+    dropped (released, see :func:`release`; they can no longer be undone).
+    The dropped commands are the released commands at the bottom of the
+    stack (`QUndoStack` removes them if it ever undoes past them).
+
+    .. note::
+        Use :func:`createUndoAction` or the :func:`undo` slot of this class
+        (not the `QUndoStack.undo`) to respect the dropped commands.
+
+    """
+    #: Emitted when the oldest commands are dropped from the history.
+    historyDropped = Signal(int)
+
+    def __init__(self, parent=None, memoryBudget=0):
+        QUndoStack.__init__(self, parent)
+        self.__budget = memoryBudget
+        # Cached {command: size} of the top level commands
+        self.__sizes = {}
+        self.__macroDepth = 0
+
+    def setMemoryBudget(self, budget):
+        """
+        Set the memory budget (in bytes). Zero means no limit.
+        """
+        if self.__budget != budget:
+            self.__budget = budget
+            self.__enforceBudget()
+
+    def memoryBudget(self):
+        """
+        Return the memory budget (in bytes).
+        """
+        return self.__budget
+
+    def retainedSize(self):
+        """
+        Return the estimated memory (in bytes) retained by the commands.
+        """
+        return sum(self.__commandSizes())
+
+    def droppedCount(self):
+        """
+        Return the number of (oldest) commands on the stack that were
+        dropped from the history.
+        """
+        return self.__floor()
+
+    def __floor(self):
+        # Index of the oldest command that can still be undone.
+        floor, count = 0, self.count()
+        while floor < count and is_released(self.command(floor)):
+            floor += 1
+        return floor
+
+    def push(self, command):
+        QUndoStack.push(self, command)
+        if not self.__macroDepth:
+            self.__topChanged()
+            self.__enforceBudget()
+
+    def __topChanged(self):
+        # The top command changed (merged or new)
+        if self.index() > 0:
+            self.__sizes.pop(self.command(self.index() - 1), None)
+
+    def beginMacro(self, text):
+        QUndoStack.beginMacro(self, text)
+        self.__macroDepth += 1
+
+    def endMacro(self):
+        QUndoStack.endMacro(self)
+        self.__macroDepth -= 1
+        if not self.__macroDepth:
+            self.__topChanged()
+            self.__enforceBudget()
+
+    def clear(self):
+        QUndoStack.clear(self)
+        self.__sizes = {}
+
+    def canUndo(self):
+        return QUndoStack.canUndo(self) and self.index() > self.__floor()
+
+    @Slot()
+    def undo(self):
+        if self.canUndo():
+            QUndoStack.undo(self)
+
+    @Slot(int)
+    def setIndex(self, index):
+        QUndoStack.setIndex(self, max(index, self.__floor()))
+
+    def createUndoAction(self, parent, prefix=""):
+        prefix = prefix or self.tr("Undo")
+        action = QAction(parent)
+
+        def update(*_):
+            # indexChanged is also emitted from the QUndoStack destructor
+            if sip.isdeleted(self) or sip.isdeleted(action):
+                return
+            action.setEnabled(self.canUndo())
+            text = self.undoText()
+            action.setText("%s %s" % (prefix, text) if text else prefix)
+
+        action.triggered.connect(self.undo)
+        self.indexChanged.connect(update)
+        self.historyDropped.connect(update)
+        update()
+        return action
+
+    def __commandSizes(self):
+        # Return the sizes of the commands currently on the stack (the
+        # cache entries of the commands no longer on it are discarded).
+        cached, sizes = self.__sizes, {}
+        for command in map(self.command, range(self.count())):
+            size = cached.get(command)
+            sizes[command] = retained_size(command) if size is None else size
+        self.__sizes = sizes
+        return list(sizes.values())
+
+    def __enforceBudget(self):
+        budget = self.__budget
+        if not budget or self.__macroDepth:
+            return
+        total = sum(self.__commandSizes())
+        if total <= budget:
+            return
+        sizes = self.__sizes
+
+        # Keep the most recent command undoable.
+        commands = [self.command(i)
+                    for i in range(self.__floor(), self.index() - 1)]
+        # First compress the oldest commands ...
+        for command in commands:
+            if total <= budget:
+                return
+            compress(command)
+            size = retained_size(command)
+            total += size - sizes[command]
+            sizes[command] = size
+
+        # ... then drop them.
+        dropped = 0
+        for command in commands:
+            if total <= budget:
+                break
+            release(command)
+            size = retained_size(command)
+            total += size - sizes[command]
+            sizes[command] = size
+            dropped += 1
+
+        if dropped:
+            self.historyDropped.emit(dropped)
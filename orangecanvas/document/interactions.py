@@ -884,12 +884,9 @@ class RectangleSelectionAction(UserInteraction):
 
         self.rect_item.setRect(rect.adjusted(pw, pw, -pw, -pw))
 
-        selected = self.scene.items(self.selection_rect.normalized(),
-                                    Qt.IntersectsItemShape,
-                                    Qt.AscendingOrder)
-
-        selected = set([item for item in selected if \
-                        item.flags() & Qt.ItemIsSelectable])
+        selected = set(
+            self.scene.selectable_items_in(self.selection_rect.normalized())
+        )
 
         if self.modifiers & Qt.ControlModifier:
             for item in selected | self.last_selection | \
@@ -1271,6 +1268,7 @@ class ResizeTextAnnotation(UserInteraction):
         self.control = None
         self.savedFramePen = None
         self.savedRect = None
+        self.gesture = None
 
     def mousePressEvent(self, event):
         pos = event.scenePos()
@@ -1290,6 +1288,8 @@ class ResizeTextAnnotation(UserInteraction):
 
         self.savedFramePen = item.framePen()
         self.savedRect = rect
+        # All the geometry edits in this session merge into one command
+        self.gesture = commands.new_gesture()
 
         control.rectEdited.connect(item.setGeometry)
         control.setFocusProxy(item)
@@ -1311,7 +1311,7 @@ class ResizeTextAnnotation(UserInteraction):
             command = commands.SetAttrCommand(
                 self.annotation, "rect",
                 (rect.x(), rect.y(), rect.width(), rect.height()),
-                name="Edit text geometry"
+                name="Edit text geometry", gesture=self.gesture
             )
             self.document.undoStack().push(command)
             self.savedRect = rect
@@ -1359,6 +1359,7 @@ class ResizeArrowAnnotation(UserInteraction):
         self.annotation = None
         self.control = None
         self.savedLine = None
+        self.gesture = None
 
     def mousePressEvent(self, event):
         pos = event.scenePos()
@@ -1377,6 +1378,7 @@ class ResizeArrowAnnotation(UserInteraction):
 
         line = item.line()
         self.savedLine = line
+        self.gesture = commands.new_gesture()
 
         p1, p2 = map(item.mapToScene, (line.p1(), line.p2()))
 
@@ -1404,7 +1406,7 @@ class ResizeArrowAnnotation(UserInteraction):
                 self.annotation,
                 "geometry",
                 ((p1.x(), p1.y()), (p2.x(), p2.y())),
-                name="Edit arrow geometry",
+                name="Edit arrow geometry", gesture=self.gesture
             )
             self.document.undoStack().push(command)
             self.savedLine = self.item.line()
@@ -15,8 +15,6 @@ from collections import namedtuple, Callable
 
 import six
 
-import numpy
-
 from AnyQt.QtWidgets import (
     QWidget, QFrame, QToolButton, QAbstractButton, QAction, QTreeView,
     QButtonGroup, QStackedWidget, QHBoxLayout, QVBoxLayout, QSizePolicy,
@@ -27,7 +25,7 @@ from AnyQt.QtWidgets import (
 from AnyQt.QtGui import QIcon, QStandardItemModel, QPolygon, QRegion, QBrush
 from AnyQt.QtCore import (
     Qt, QObject, QPoint, QSize, QRect, QEventLoop, QEvent, QModelIndex,
-    QTimer, QRegExp, QSortFilterProxyModel, QItemSelectionModel
+    QTimer, QSortFilterProxyModel, QItemSelectionModel
 )
 from AnyQt.QtCore import pyqtSignal as Signal, pyqtProperty as Property
 
@@ -37,8 +35,13 @@ from ..gui.tooltree import ToolTree, FlattenedTreeItemModel
 from ..gui.utils import StyledWidget_paintEvent, create_css_gradient
 from ..utils import qtcompat
 from ..registry.qt import QtWidgetRegistry
+from ..registry.description import WidgetDescription
+from ..registry.search import SearchIndex, tokenize
 
 from ..resources import icon_loader
+from ..utils.lazyimport import lazy_import
+
+numpy = lazy_import("numpy")
 
 log = logging.getLogger(__name__)
 
@@ -247,22 +250,117 @@ class SuggestMenuPage(MenuPage):
 
     """
     def __init__(self, *args, **kwargs):
+        self.__index = SearchIndex()
+        self.__sourceModel = None
         MenuPage.__init__(self, *args, **kwargs)
 
     def setModel(self, model):
         """
         Reimplmemented from :ref:`MenuPage.setModel`.
         """
+        if self.__sourceModel is not None:
+            self.__sourceModel.rowsInserted.disconnect(self.__onRowsInserted)
+            self.__sourceModel.rowsAboutToBeRemoved.disconnect(
+                self.__onRowsAboutToBeRemoved)
+            self.__sourceModel.dataChanged.disconnect(self.__onDataChanged)
+            self.__sourceModel.modelReset.disconnect(self.__updateIndex)
+
         flat = FlattenedTreeItemModel(self)
         flat.setSourceModel(model)
         flat.setFlatteningMode(flat.InternalNodesDisabled)
         flat.setFlatteningMode(flat.LeavesOnly)
-        proxy = SortFilterProxyModel(self)
+        proxy = SearchFilterProxyModel(self)
         proxy.setFilterCaseSensitivity(False)
         proxy.setSourceModel(flat)
+        proxy.setSearchIndex(self.__index)
         ToolTree.setModel(self, proxy)
+
+        self.__sourceModel = model
+        if model is not None:
+            model.rowsInserted.connect(self.__onRowsInserted)
+            model.rowsAboutToBeRemoved.connect(self.__onRowsAboutToBeRemoved)
+            model.dataChanged.connect(self.__onDataChanged)
+            model.modelReset.connect(self.__updateIndex)
+        self.__updateIndex()
+        self.ensureCurrent()
+
+    def setSearchIndex(self, index):
+        """
+        Set the :class:`~.registry.search.SearchIndex` used for
+        :func:`setSearchText`.
+
+        The index is kept up to date with the widget descriptions in the
+        model.
+        """
+        if self.__index is not index:
+            self.__index = index
+            self.__updateIndex()
+            proxy = self.view().model()
+            if isinstance(proxy, SearchFilterProxyModel):
+                proxy.setSearchIndex(index)
+            self.ensureCurrent()
+
+    def searchIndex(self):
+        """
+        Return the search index.
+        """
+        return self.__index
+
+    def setSearchText(self, text):
+        """
+        Show only the widgets matching the search `text` ranked by
+        relevance (see :func:`SearchIndex.search`). An empty `text`
+        shows all items.
+        """
+        proxy = self.view().model()
+        proxy.setSearchText(text)
         self.ensureCurrent()
 
+    def __descriptions(self, parent, start, end):
+        # Widget descriptions in rows start..end (and their children)
+        model = self.__sourceModel
+        for row in range(start, end + 1):
+            index = model.index(row, 0, parent)
+            desc = qtcompat.qunwrap(
+                index.data(QtWidgetRegistry.WIDGET_DESC_ROLE))
+            if isinstance(desc, WidgetDescription):
+                yield desc
+            count = model.rowCount(index)
+            if count:
+                for desc in self.__descriptions(index, 0, count - 1):
+                    yield desc
+
+    def __allDescriptions(self):
+        model = self.__sourceModel
+        if model is None or not model.rowCount():
+            return []
+        return list(self.__descriptions(QModelIndex(), 0,
+                                        model.rowCount() - 1))
+
+    def __invalidate(self):
+        proxy = self.view().model()
+        if isinstance(proxy, SearchFilterProxyModel):
+            proxy.invalidate()
+
+    def __updateIndex(self):
+        self.__index.update(self.__allDescriptions())
+        self.__invalidate()
+
+    def __onRowsInserted(self, parent, start, end):
+        for desc in self.__descriptions(parent, start, end):
+            self.__index.add(desc)
+        self.__invalidate()
+
+    def __onRowsAboutToBeRemoved(self, parent, start, end):
+        for desc in self.__descriptions(parent, start, end):
+            self.__index.remove(desc.qualified_name)
+
+    def __onDataChanged(self, topLeft, bottomRight):
+        for desc in self.__descriptions(topLeft.parent(), topLeft.row(),
+                                        bottomRight.row()):
+            self.__index.add(desc)
+        self.__invalidate()
+
     def setFilterFixedString(self, pattern):
         """
         Set the fixed string filtering pattern. Only items which contain the
@@ -334,6 +432,97 @@ class SortFilterProxyModel(QSortFilterProxyModel):
             return accepted
 
 
+class SearchFilterProxyModel(SortFilterProxyModel):
+    """
+    A filter proxy model showing only the widgets matching a search text
+    (using a :class:`~.registry.search.SearchIndex`), sorted by relevance.
+
+    """
+    def __init__(self, parent=None):
+        SortFilterProxyModel.__init__(self, parent)
+        self.__index = None
+        self.__text = ""
+        self.__words = []
+        # qualified name -> rank of the current search results
+        self.__ranks = None
+        # source row -> rank (computed once per row in the filter pass and
+        # used as the sort key)
+        self.__rowRanks = {}
+
+    def setSearchIndex(self, index):
+        self.__index = index
+        self.__search()
+
+    def searchIndex(self):
+        return self.__index
+
+    def setSearchText(self, text):
+        text = six.text_type(text)
+        if text != self.__text:
+            self.__text = text
+            self.__search()
+
+    def searchText(self):
+        return self.__text
+
+    def __search(self):
+        self.__words = tokenize(self.__text)
+        self.__updateRanks()
+        column = 0 if self.__ranks is not None else -1
+        if self.sortColumn() != column:
+            # Sort by rank (or restore the source model order)
+            self.sort(column)
+        # Filter and sort the rows in a single pass
+        SortFilterProxyModel.invalidate(self)
+
+    def __updateRanks(self):
+        if self.__words and self.__index is not None:
+            results = self.__index.search(self.__text)
+            self.__ranks = {doc_id: rank
+                            for rank, (doc_id, _) in enumerate(results)}
+        else:
+            self.__ranks = None
+        self.__rowRanks = {}
+
+    def invalidate(self):
+        # Results could have changed with the index
+        if self.__ranks is not None:
+            self.__updateRanks()
+        SortFilterProxyModel.invalidate(self)
+
+    def __rank(self, index):
+        desc = qtcompat.qunwrap(index.data(QtWidgetRegistry.WIDGET_DESC_ROLE))
+        if isinstance(desc, WidgetDescription):
+            return self.__ranks.get(desc.qualified_name)
+        # Items without a description match on the display text
+        text = qtcompat.qunwrap(index.data(Qt.DisplayRole))
+        terms = tokenize(text)
+        if all(any(term.startswith(word) for term in terms)
+               for word in self.__words):
+            return len(self.__ranks)
+        return None
+
+    def __rowRank(self, row, parent=QModelIndex()):
+        rank = self.__rowRanks.get(row)
+        if rank is None:
+            index = self.sourceModel().index(row, 0, parent)
+            rank = self.__rowRanks[row] = self.__rank(index)
+        return rank
+
+    def filterAcceptsRow(self, row, parent=QModelIndex()):
+        if self.__ranks is not None:
+            rank = self.__rank(self.sourceModel().index(row, 0, parent))
+            self.__rowRanks[row] = rank
+            if rank is None:
+                return False
+        return SortFilterProxyModel.filterAcceptsRow(self, row, parent)
+
+    def lessThan(self, left, right):
+        if self.__ranks is not None:
+            return self.__rowRank(left.row()) < self.__rowRank(right.row())
+        return left.row() < right.row()
+
+
 class SearchWidget(LineEdit):
     def __init__(self, parent=None, **kwargs):
         LineEdit.__init__(self, parent, **kwargs)
@@ -1089,6 +1278,19 @@ class QuickMenu(FramelessWindow):
         page.view().removeEventFilter(self)
         self.__pages.removePage(row)
 
+    def setSearchIndex(self, index):
+        """
+        Set the :class:`~.registry.search.SearchIndex` used by the
+        'Quick Search' page.
+        """
+        self.__suggestPage.setSearchIndex(index)
+
+    def searchIndex(self):
+        """
+        Return the search index used by the 'Quick Search' page.
+        """
+        return self.__suggestPage.searchIndex()
+
     def setFilterFunc(self, func):
         """
         Set a filter function.
@@ -1110,9 +1312,7 @@ class QuickMenu(FramelessWindow):
         self.__clearCurrentItems()
 
         self.__search.setText(searchText)
-        patt = QRegExp("(^|\W)"+searchText)
-        patt.setCaseSensitivity(False)
-        self.__suggestPage.setFilterRegExp(patt)
+        self.__suggestPage.setSearchText(searchText)
 
         self.ensurePolished()
 
@@ -1215,9 +1415,7 @@ class QuickMenu(FramelessWindow):
         self.triggered.emit(action)
 
     def __on_textEdited(self, text):
-        patt = QRegExp("(^|\W)" + text)
-        patt.setCaseSensitivity(False)
-        self.__suggestPage.setFilterRegExp(patt)
+        self.__suggestPage.setSearchText(text)
         self.__pages.setCurrentPage(self.__suggestPage)
 
     def triggerSearch(self):
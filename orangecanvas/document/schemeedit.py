@@ -28,12 +28,12 @@ import six
 
 from AnyQt.QtWidgets import (
     QWidget, QVBoxLayout, QInputDialog, QMenu, QAction, QActionGroup,
-    QUndoStack, QUndoCommand, QGraphicsItem, QGraphicsObject,
+    QUndoCommand, QGraphicsItem, QGraphicsObject,
     QGraphicsTextItem
 )
 from AnyQt.QtGui import (
     QKeySequence, QCursor, QFont, QPainter, QPixmap, QColor, QBrush, QIcon,
-    QWhatsThisClickedEvent
+    QWhatsThisClickedEvent, QStatusTipEvent
 )
 
 from AnyQt.QtCore import (
@@ -138,11 +138,13 @@ class SchemeEditWidget(QWidget):
         self.__possibleSelectionHandler = None
         self.__possibleMouseItemsMove = False
         self.__itemsMoving = {}
+        # The gesture id of the current items drag (see commands.new_gesture)
+        self.__moveGesture = None
         self.__contextMenuTarget = None
         self.__quickMenu = None
         self.__quickTip = ""
 
-        self.__undoStack = QUndoStack(self)
+        self.__undoStack = commands.UndoStack(self)
         self.__undoStack.cleanChanged[bool].connect(self.__onCleanChanged)
 
         # scheme node properties when set to a clean state
@@ -175,6 +177,8 @@ class SchemeEditWidget(QWidget):
         self.__widgetMenu.addAction(self.__removeSelectedAction)
         self.__widgetMenu.addAction(self.__duplicateSelectedAction)
         self.__widgetMenu.addSeparator()
+        self.__widgetMenu.addAction(self.__rerunAction)
+        self.__widgetMenu.addSeparator()
         self.__widgetMenu.addAction(self.__helpAction)
 
         # Widget menu for a main window menu bar.
@@ -184,6 +188,8 @@ class SchemeEditWidget(QWidget):
         self.__menuBarWidgetMenu.addAction(self.__renameAction)
         self.__menuBarWidgetMenu.addAction(self.__removeSelectedAction)
         self.__menuBarWidgetMenu.addSeparator()
+        self.__menuBarWidgetMenu.addAction(self.__rerunAction)
+        self.__menuBarWidgetMenu.addSeparator()
         self.__menuBarWidgetMenu.addAction(self.__helpAction)
 
         self.__linkMenu = QMenu(self.tr("Link"), self)
@@ -337,6 +343,15 @@ class SchemeEditWidget(QWidget):
                     enabled=False,
                     )
 
+        self.__rerunAction = \
+            QAction(self.tr("Run From Here"), self,
+                    objectName="rerun-action",
+                    toolTip=self.tr("Recompute the selected widget and the "
+                                    "widgets depending on it"),
+                    triggered=self.__onRerunAction,
+                    enabled=False,
+                    )
+
         self.__linkEnableAction = \
             QAction(self.tr("Enabled"), self,
                     objectName="link-enable-action",
@@ -634,6 +649,7 @@ class SchemeEditWidget(QWidget):
                 if sm:
                     sm.stateChanged.disconnect(
                         self.__signalManagerStateChanged)
+                    sm.rerunFinished.disconnect(self.__onRerunFinished)
 
             self.__scheme = scheme
 
@@ -646,6 +662,7 @@ class SchemeEditWidget(QWidget):
                 sm = scheme.findChild(signalmanager.SignalManager)
                 if sm:
                     sm.stateChanged.connect(self.__signalManagerStateChanged)
+                    sm.rerunFinished.connect(self.__onRerunFinished)
             else:
                 self.__cleanProperties = []
 
@@ -1073,6 +1090,7 @@ class SchemeEditWidget(QWidget):
         if any_item and event.button() == Qt.LeftButton:
             self.__possibleMouseItemsMove = True
             self.__itemsMoving.clear()
+            self.__moveGesture = commands.new_gesture()
             self.__scene.node_item_position_changed.connect(
                 self.__onNodePositionChanged
             )
@@ -1099,6 +1117,11 @@ class SchemeEditWidget(QWidget):
             self.__possibleSelectionHandler = None
             return handler.mouseMoveEvent(event)
 
+        if self.__possibleMouseItemsMove and self.__itemsMoving:
+            # Commit the previous step of the drag (merged into one undo
+            # command by the gesture)
+            self.__pushItemsMove()
+
         return False
 
     def sceneMouseReleaseEvent(self, event):
@@ -1119,25 +1142,10 @@ class SchemeEditWidget(QWidget):
 
             if self.__itemsMoving:
                 self.__scene.mouseReleaseEvent(event)
-                stack = self.undoStack()
-                stack.beginMacro(self.tr("Move"))
-                for scheme_item, (old, new) in self.__itemsMoving.items():
-                    if isinstance(scheme_item, SchemeNode):
-                        command = commands.MoveNodeCommand(
-                            self.scheme(), scheme_item, old, new
-                        )
-                    elif isinstance(scheme_item, BaseSchemeAnnotation):
-                        command = commands.AnnotationGeometryChange(
-                            self.scheme(), scheme_item, old, new
-                        )
-                    else:
-                        continue
-
-                    stack.push(command)
-                stack.endMacro()
-
-                self.__itemsMoving.clear()
+                self.__pushItemsMove()
+                self.__moveGesture = None
                 return True
+            self.__moveGesture = None
         elif event.button() == Qt.LeftButton:
             self.__possibleSelectionHandler = None
 
@@ -1307,6 +1315,8 @@ class SchemeEditWidget(QWidget):
         )
 
         self.__helpAction.setEnabled(len(nodes) == 1)
+        self.__rerunAction.setEnabled(
+            len(nodes) == 1 and self.__signalManager() is not None)
         self.__renameAction.setEnabled(len(nodes) == 1)
         self.__duplicateSelectedAction.setEnabled(bool(nodes))
 
@@ -1343,6 +1353,17 @@ class SchemeEditWidget(QWidget):
         QCoreApplication.sendEvent(
             node, WorkflowEvent(WorkflowEvent.NodeActivateRequest))
 
+    def __pushItemsMove(self):
+        moves = [(item, old, new) for item, (old, new)
+                 in self.__itemsMoving.items()
+                 if isinstance(item, (SchemeNode, BaseSchemeAnnotation))]
+        self.__itemsMoving.clear()
+        if moves:
+            command = commands.MoveItemsCommand(
+                self.scheme(), moves, gesture=self.__moveGesture)
+            command.setText(self.tr("Move"))
+            self.undoStack().push(command)
+
     def __onNodePositionChanged(self, item, pos):
         node = self.__scene.node_for_item(item)
         new = (pos.x(), pos.y())
@@ -1526,6 +1547,26 @@ class SchemeEditWidget(QWidget):
             help_url = "help://search?" + urlencode({"id": desc.qualified_name})
             self.__showHelpFor(help_url)
 
+    def __signalManager(self):
+        if self.__scheme is not None:
+            return self.__scheme.findChild(signalmanager.SignalManager)
+        else:
+            return None
+
+    def __onRerunAction(self):
+        """
+        Run from here was requested for the selected widget.
+        """
+        nodes = self.selectedNodes()
+        sm = self.__signalManager()
+        if len(nodes) == 1 and sm is not None:
+            sm.rerun_from(nodes[0])
+
+    def __onRerunFinished(self, report):
+        message = self.tr("Updated {} of {} dependent widgets").format(
+            len(report.processed), len(report.dependents))
+        QCoreApplication.sendEvent(self, QStatusTipEvent(message))
+
     def __showHelpFor(self, help_url):
         """
         Show help for an "help" url.
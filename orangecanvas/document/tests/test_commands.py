@@ -0,0 +1,170 @@
+"""
+Tests for undo commands and the undo stack.
+"""
+from AnyQt.QtWidgets import QUndoStack
+
+from ..commands import (
+    UndoStack, MoveNodeCommand, MoveItemsCommand, RemoveNodeCommand,
+    TextChangeCommand, SetAttrCommand, retained_size, new_gesture
+)
+from ...scheme import Scheme, SchemeNode, SchemeTextAnnotation
+from ...registry.tests import small_testing_registry
+
+from ...gui.test import QAppTestCase
+
+
+class TestUndoStack(QAppTestCase):
+    def setUp(self):
+        super(TestUndoStack, self).setUp()
+        self.reg = small_testing_registry()
+        self.scheme = Scheme()
+
+    def _node(self, position=(0, 0)):
+        node = SchemeNode(self.reg.widget("one"), position=position)
+        self.scheme.add_node(node)
+        return node
+
+    def test_merge_moves(self):
+        stack = UndoStack()
+        node = self._node()
+        gesture = new_gesture()
+        for i in range(1, 10):
+            stack.push(MoveNodeCommand(self.scheme, node, (i - 1, 0), (i, 0),
+                                       gesture=gesture))
+        self.assertEqual(stack.count(), 1)
+        self.assertEqual(node.position, (9, 0))
+        stack.undo()
+        self.assertEqual(node.position, (0, 0))
+        stack.redo()
+
+        # Not merged with a command from a different gesture (or none)
+        stack.push(MoveNodeCommand(self.scheme, node, (9, 0), (10, 0),
+                                   gesture=new_gesture()))
+        self.assertEqual(stack.count(), 2)
+        stack.push(MoveNodeCommand(self.scheme, node, (10, 0), (11, 0)))
+        stack.push(MoveNodeCommand(self.scheme, node, (11, 0), (12, 0)))
+        self.assertEqual(stack.count(), 4)
+        stack.undo()
+        stack.undo()
+
+        other = self._node()
+        annot = SchemeTextAnnotation((0, 0, 10, 10), "a")
+        self.scheme.add_annotation(annot)
+
+        gesture = new_gesture()
+
+        def move(dx):
+            return MoveItemsCommand(
+                self.scheme,
+                [(other, other.position, (other.position[0] + dx, 0)),
+                 (annot, annot.geometry, (dx, 0, 10, 10))],
+                gesture=gesture)
+
+        stack.push(move(1))
+        stack.push(move(2))
+        self.assertEqual(stack.count(), 3)
+        self.assertEqual(other.position, (3, 0))
+        self.assertEqual(annot.geometry, (2, 0, 10, 10))
+        stack.undo()
+        self.assertEqual(other.position, (0, 0))
+        self.assertEqual(annot.geometry, (0, 0, 10, 10))
+
+        # Items moved only by a later step of the gesture are added
+        stack.push(MoveItemsCommand(self.scheme, [(node, (10, 0), (13, 0))],
+                                    gesture=gesture))
+        stack.push(move(1))
+        self.assertEqual(stack.count(), 3)
+        stack.undo()
+        self.assertEqual(node.position, (10, 0))
+        self.assertEqual(other.position, (0, 0))
+        self.assertEqual(annot.geometry, (0, 0, 10, 10))
+
+    def test_memory_budget(self):
+        stack = UndoStack()
+        text = "a" * 50000
+        annot = SchemeTextAnnotation((0, 0, 10, 10), "")
+        self.scheme.add_annotation(annot)
+        nodes = []
+        for i in range(4):
+            node = self._node()
+            node.properties = {"data": list(range(1000)), "name": str(i)}
+            nodes.append(node)
+            stack.push(RemoveNodeCommand(self.scheme, node))
+        command = TextChangeCommand(self.scheme, annot, "", "text/plain",
+                                    text, "text/plain")
+        stack.push(command)
+        stack.push(SetAttrCommand(annot, "font", {"size": 12}))
+        size = stack.retainedSize()
+        self.assertGreater(size, 50000)
+        self.assertEqual(size, sum(retained_size(stack.command(i))
+                                   for i in range(stack.count())))
+
+        # Compress the oldest commands; nothing is dropped
+        stack.setMemoryBudget(size - 1000)
+        self.assertLess(stack.retainedSize(), size - 1000)
+        self.assertEqual(stack.droppedCount(), 0)
+        # The removed nodes are not modified
+        self.assertEqual(nodes[0].properties,
+                         {"data": list(range(1000)), "name": "0"})
+
+        stack.undo()
+        stack.undo()
+        self.assertEqual(annot.content, "")
+        for i in reversed(range(4)):
+            stack.undo()
+            self.assertIn(nodes[i], self.scheme.nodes)
+            self.assertEqual(nodes[i].properties,
+                             {"data": list(range(1000)), "name": str(i)})
+        self.assertFalse(stack.canUndo())
+        for _ in range(6):
+            stack.redo()
+        self.assertEqual(annot.content, text)
+
+        # Drop the oldest commands
+        dropped = []
+        stack.historyDropped.connect(dropped.append)
+        stack.setMemoryBudget(1000)
+        self.assertTrue(dropped)
+        self.assertEqual(stack.droppedCount(), 5)
+        undo = stack.createUndoAction(None)
+        self.assertTrue(undo.isEnabled())
+        undo.trigger()
+        self.assertFalse(stack.canUndo())
+        self.assertFalse(undo.isEnabled())
+        stack.undo()
+        self.assertEqual(stack.index(), 5)
+        stack.setIndex(0)
+        self.assertEqual(stack.index(), 5)
+        self.assertEqual(stack.retainedSize(),
+                         sum(retained_size(stack.command(i))
+                             for i in range(stack.count())))
+
+        # The dropped commands are inert if reached by QUndoStack (e.g.
+        # a QUndoView), which removes them
+        QUndoStack.setIndex(stack, 0)
+        self.assertEqual(annot.font, {})
+        self.assertEqual(annot.content, text)
+        self.assertEqual(stack.count(), 1)
+        self.assertEqual(stack.droppedCount(), 0)
+        self.assertEqual(stack.retainedSize(), retained_size(stack.command(0)))
+        self.assertFalse(stack.canUndo())
+        stack.redo()
+        self.assertEqual(annot.font, {"size": 12})
+        self.assertTrue(stack.canUndo())
+        stack.undo()
+        self.assertEqual(annot.font, {})
+
+        stack.clear()
+        self.assertEqual(stack.droppedCount(), 0)
+        self.assertEqual(stack.retainedSize(), 0)
+
+    def test_retained_size(self):
+        node = self._node()
+        node.properties = {"data": list(range(10000))}
+        command = MoveNodeCommand(self.scheme, node, (0, 0), (1, 0))
+        # The node is owned by the workflow
+        self.assertLess(retained_size(command), 1000)
+        remove = RemoveNodeCommand(self.scheme, node)
+        remove.redo()
+        self.assertGreater(retained_size(command), 10000)
+        self.assertGreater(retained_size(remove), 10000)
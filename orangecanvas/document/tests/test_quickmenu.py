@@ -92,3 +92,36 @@ class TestMenu(QAppTestCase):
         self.assertEqual(get(3), "3")
         self.assertEqual(flat.rowCount(), model.rowCount())
         self.assertEqual(flat.columnCount(), 1)
+
+    def test_search_ranking(self):
+        registry = QtWidgetRegistry(small_testing_registry())
+
+        menu = SuggestMenuPage()
+        menu.setModel(registry.model())
+        index = menu.searchIndex()
+        self.assertIn("zero", index)
+
+        def shown():
+            model = menu.view().model()
+            return [qtcompat.qunwrap(model.index(i, 0).data())
+                    for i in range(model.rowCount())]
+
+        all_items = shown()
+        menu.setSearchText("mult")
+        self.assertEqual(shown(), ["mult"])
+        # channel names are indexed
+        menu.setSearchText("res")
+        self.assertLessEqual({"add", "sub", "mult"}, set(shown()))
+        self.assertNotIn("zero", shown())
+
+        # The results are shown in the index's rank order as the text is
+        # typed in
+        names = {desc.qualified_name: desc.name
+                 for desc in small_testing_registry().widgets()}
+        for text in ["s", "su", "sub", "n", "ne"]:
+            menu.setSearchText(text)
+            expected = [names[doc_id] for doc_id, _ in index.search(text)]
+            self.assertEqual(shown(), expected)
+
+        menu.setSearchText("")
+        self.assertEqual(shown(), all_items)
@@ -1,6 +1,10 @@
 """
 Tests for scheme document.
 """
+from AnyQt.QtGui import QMouseEvent
+from AnyQt.QtCore import Qt, QEvent, QPoint
+from AnyQt.QtWidgets import QApplication
+from AnyQt.QtTest import QTest
 
 from ..schemeedit import SchemeEditWidget
 from ...scheme import Scheme, SchemeNode, SchemeLink, SchemeTextAnnotation, \
@@ -113,3 +117,46 @@ class TestSchemeEdit(QAppTestCase):
 
         w.resize(600, 400)
         self.app.exec_()
+
+    def test_drag_merges_moves(self):
+        reg = small_testing_registry()
+        w = SchemeEditWidget()
+        scheme = Scheme()
+        w.setScheme(scheme)
+        w.resize(600, 400)
+        w.show()
+        node = SchemeNode(reg.widget("one"), title="one", position=(100, 100))
+        w.addNode(node)
+        stack = w.undoStack()
+        count = stack.count()
+        self.app.processEvents()
+
+        view = w.view()
+        viewport = view.viewport()
+        item = w.scene().item_for_node(node)
+
+        def drag(start, *steps):
+            QTest.mousePress(viewport, Qt.LeftButton, Qt.NoModifier, start)
+            for step in steps:
+                # QTest.mouseMove does not set the pressed buttons
+                QApplication.sendEvent(
+                    viewport,
+                    QMouseEvent(QEvent.MouseMove, start + step, Qt.NoButton,
+                                Qt.LeftButton, Qt.NoModifier))
+            QTest.mouseRelease(viewport, Qt.LeftButton, Qt.NoModifier,
+                               start + steps[-1])
+
+        # A two step drag
+        drag(view.mapFromScene(item.scenePos()), QPoint(20, 0), QPoint(40, 0))
+
+        self.assertEqual(stack.count(), count + 1)
+        self.assertEqual(node.position, (140, 100))
+        stack.undo()
+        self.assertEqual(node.position, (100, 100))
+        stack.redo()
+        self.assertEqual(node.position, (140, 100))
+
+        # A new drag is a new undo step
+        drag(view.mapFromScene(item.scenePos()), QPoint(0, 20))
+        self.assertEqual(stack.count(), count + 2)
+        self.assertEqual(node.position, (140, 120))
@@ -97,3 +97,20 @@ class TestToolGrid(test.QAppTestCase):
 
         w.show()
         self.app.exec_()
+
+    def test_tool_grid_batched(self):
+        w = ToolGrid(columns=3)
+        actions = [QAction(str(i), w) for i in range(10)]
+        for action in actions:
+            # insert in front (reversed order)
+            w.insertAction(0, action)
+        w.show()
+        self.app.processEvents()
+        layout = w.layout()
+        for i, action in enumerate(reversed(actions)):
+            item = layout.itemAtPosition(i // 3, i % 3)
+            self.assertIs(item.widget().defaultAction(), action)
+        w.removeAction(actions[-1])
+        self.app.processEvents()
+        self.assertIs(layout.itemAtPosition(0, 0).widget().defaultAction(),
+                      actions[-2])
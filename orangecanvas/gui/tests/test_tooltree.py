@@ -4,9 +4,13 @@ Test for tooltree
 """
 from __future__ import print_function
 
+import random
+
 from AnyQt.QtWidgets import QAction
 from AnyQt.QtGui import QStandardItemModel, QStandardItem
-from AnyQt.QtCore import Qt
+from AnyQt.QtCore import (
+    Qt, QPersistentModelIndex, QStringListModel, QModelIndex
+)
 
 from ..tooltree import ToolTree, FlattenedTreeItemModel
 
@@ -102,3 +106,73 @@ class TestToolTree(QAppTestCase):
         tree.triggered.connect(p)
 
         self.app.exec_()
+
+    def test_flattened_incremental(self):
+        modes = [FlattenedTreeItemModel.Default,
+                 FlattenedTreeItemModel.InternalNodesDisabled,
+                 FlattenedTreeItemModel.LeavesOnly]
+        for mode in modes:
+            source = QStandardItemModel()
+            model = FlattenedTreeItemModel()
+            model.setSourceModel(source)
+            model.setFlatteningMode(mode)
+            resets = []
+            model.modelReset.connect(lambda: resets.append(True))
+
+            def check():
+                expected = FlattenedTreeItemModel()
+                expected.setSourceModel(source)
+                expected.setFlatteningMode(mode)
+                self.assertEqual(model._source_key, expected._source_key)
+                for row in range(model.rowCount()):
+                    index = model.index(row)
+                    self.assertEqual(model.mapFromSource(
+                                         model.mapToSource(index)), index)
+                    self.assertEqual(bool(index.flags() & Qt.ItemIsEnabled),
+                                     bool(expected.index(row).flags() &
+                                          Qt.ItemIsEnabled))
+
+            rng = random.Random(mode)
+            categories = []
+            for i in range(4):
+                cat = QStandardItem("C{}".format(i))
+                source.insertRow(rng.randint(0, source.rowCount()), cat)
+                categories.append(cat)
+                check()
+
+            for i in range(40):
+                cat = rng.choice(categories)
+                op = rng.random()
+                if op < 0.6 or not cat.rowCount():
+                    cat.insertRow(rng.randint(0, cat.rowCount()),
+                                  QStandardItem("W{}".format(i)))
+                else:
+                    cat.removeRow(rng.randrange(cat.rowCount()))
+                check()
+
+            # Persistent indexes (selection) are preserved
+            cat = categories[0]
+            cat.appendRow(QStandardItem("Last"))
+            persistent = QPersistentModelIndex(
+                model.mapFromSource(cat.child(cat.rowCount() - 1).index()))
+            cat.insertRow(0, QStandardItem("First"))
+            self.assertEqual(persistent.data(Qt.DisplayRole), "Last")
+            source.removeRow(categories[-1].row())
+            check()
+            self.assertEqual(persistent.data(Qt.DisplayRole), "Last")
+            self.assertEqual(resets, [])
+
+    def test_flattened_move(self):
+        source = QStringListModel(["a", "b", "c", "d"])
+        model = FlattenedTreeItemModel()
+        model.setSourceModel(source)
+        moved = []
+        model.rowsMoved.connect(lambda *args: moved.append(args[1:3]))
+        persistent = QPersistentModelIndex(model.index(0))
+        if not source.moveRows(QModelIndex(), 0, 1, QModelIndex(), 3):
+            self.skipTest("moveRows is not supported")
+        self.assertEqual(moved, [(0, 0)])
+        self.assertEqual([model.index(i).data() for i in range(4)],
+                         ["b", "c", "a", "d"])
+        self.assertEqual(persistent.row(), 2)
+        self.assertEqual(persistent.data(), "a")
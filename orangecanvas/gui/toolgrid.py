@@ -11,7 +11,9 @@ from AnyQt.QtWidgets import (
     QStyleOptionToolButton, QStylePainter, QStyle
 )
 from AnyQt.QtGui import QFontMetrics
-from AnyQt.QtCore import Qt, QObject, QSize, QEvent, QSignalMapper
+from AnyQt.QtCore import (
+    Qt, QObject, QSize, QEvent, QSignalMapper, QCoreApplication
+)
 from AnyQt.QtCore import pyqtSignal as Signal
 
 from . import utils
@@ -26,6 +28,10 @@ _ToolGridSlot = namedtuple(
      ]
     )
 
+#: Posted to the ToolGrid to relayout the buttons after insertions
+#: and removals.
+RelayoutRequest = QEvent.Type(QEvent.registerEventType())
+
 
 class _ToolGridButton(QToolButton):
     def __init__(self, *args, **kwargs):
@@ -115,6 +121,11 @@ class ToolGrid(QFrame):
     Actions can be added using standard :func:`QWidget.addAction(QAction)`
     and :func:`QWidget.insertAction(int, QAction)` methods.
 
+    Inserting or removing buttons in front of existing ones relayouts
+    the grid in a single pass. While the grid is hidden the relayout is
+    delayed, so many insertions in a row (e.g. while the registry is
+    being populated) are laid out only once.
+
     Parameters
     ----------
     parent : :class:`QWidget`
@@ -149,6 +160,7 @@ class ToolGrid(QFrame):
         self.__toolButtonStyle = toolButtonStyle
 
         self.__gridSlots = []
+        self.__relayoutPending = False
         self.__mapper = QSignalMapper()
         self.__mapper.mapped[QObject].connect(self.__onClicked)
 
@@ -263,11 +275,15 @@ class ToolGrid(QFrame):
 
     def buttonForAction(self, action):
         """
-        Return the :class:`QToolButton` instance button for `action`.
+        Return the :class:`QToolButton` instance button for `action`
+        (or None if the `action` has no button in this grid).
         """
-        actions = [slot.action for slot in self.__gridSlots]
-        index = actions.index(action)
-        return self.__gridSlots[index].button
+        if self.__gridSlots and self.__gridSlots[-1].action is action:
+            return self.__gridSlots[-1].button
+        for slot in self.__gridSlots:
+            if slot.action is action:
+                return slot.button
+        return None
 
     def createButtonForAction(self, action):
         """
@@ -296,33 +312,51 @@ class ToolGrid(QFrame):
 
         if event.type() == QEvent.ActionAdded:
             # Note: the action is already in the self.actions() list.
-            actions = list(self.actions())
-            index = actions.index(event.action())
+            actions = self.actions()
+            if actions[-1] is event.action():
+                index = len(actions) - 1
+            else:
+                index = actions.index(event.action())
             self.__insertActionButton(index, event.action())
 
         elif event.type() == QEvent.ActionRemoved:
             self.__removeActionButton(event.action())
 
+    def event(self, event):
+        if event.type() == RelayoutRequest:
+            self.__flushRelayout()
+            return True
+        return QFrame.event(self, event)
+
+    def showEvent(self, event):
+        # Place the buttons before they are shown.
+        self.__flushRelayout()
+        QFrame.showEvent(self, event)
+
     def __insertActionButton(self, index, action):
         """Create a button for the action and add it to the layout
         at index.
 
         """
-        self.__shiftGrid(index, 1)
         button = self.createButtonForAction(action)
 
         row = index // self.__columns
         column = index % self.__columns
 
-        self.layout().addWidget(
-            button, row, column,
-            Qt.AlignLeft | Qt.AlignTop
-        )
-
         self.__gridSlots.insert(
             index, _ToolGridSlot(button, action, row, column)
         )
 
+        if index == len(self.__gridSlots) - 1 and \
+                not self.__relayoutPending:
+            # Appending does not move any existing buttons.
+            self.layout().addWidget(
+                button, row, column,
+                Qt.AlignLeft | Qt.AlignTop
+            )
+        else:
+            self.__scheduleRelayout()
+
         self.__mapper.setMapping(button, action)
         button.clicked.connect(self.__mapper.map)
         button.installEventFilter(self)
@@ -331,6 +365,8 @@ class ToolGrid(QFrame):
         """Remove the button for the action from the layout and delete it.
         """
         actions = [slot.action for slot in self.__gridSlots]
+        if action not in actions:
+            return
         index = actions.index(action)
         slot = self.__gridSlots.pop(index)
 
@@ -338,29 +374,28 @@ class ToolGrid(QFrame):
         self.__mapper.removeMappings(slot.button)
 
         self.layout().removeWidget(slot.button)
-        self.__shiftGrid(index + 1, -1)
+        if index < len(self.__gridSlots):
+            self.__scheduleRelayout()
 
         slot.button.deleteLater()
 
-    def __shiftGrid(self, start, count=1):
-        """Shift all buttons starting at index `start` by `count` cells.
+    def __scheduleRelayout(self):
+        """Relayout the buttons. If the grid is hidden the relayout is
+        delayed (until shown or control returns to the event loop).
         """
-        button_count = self.layout().count()
-        direction = 1 if count >= 0 else -1
-        if direction == 1:
-            start, end = button_count - 1, start - 1
-        else:
-            start, end = start, button_count
-
-        for index in range(start, end, -direction):
-            item = self.layout().itemAtPosition(index / self.__columns,
-                                                index % self.__columns)
-            if item:
-                button = item.widget()
-                new_index = index + count
-                self.layout().addWidget(button, new_index / self.__columns,
-                                        new_index % self.__columns,
-                                        Qt.AlignLeft | Qt.AlignTop)
+        if self.isVisible():
+            self.__relayoutPending = False
+            self.__relayout()
+        elif not self.__relayoutPending:
+            self.__relayoutPending = True
+            QCoreApplication.postEvent(self, QEvent(RelayoutRequest))
+
+    def __flushRelayout(self):
+        """Relayout the buttons if a relayout is pending.
+        """
+        if self.__relayoutPending:
+            self.__relayoutPending = False
+            self.__relayout()
 
     def __relayout(self):
         """Relayout the buttons.
@@ -369,13 +404,19 @@ class ToolGrid(QFrame):
             self.layout().takeAt(i)
 
         self.__gridSlots = [_ToolGridSlot(slot.button, slot.action,
-                                          i / self.__columns,
+                                          i // self.__columns,
                                           i % self.__columns)
                             for i, slot in enumerate(self.__gridSlots)]
 
         for slot in self.__gridSlots:
             self.layout().addWidget(slot.button, slot.row, slot.column,
                                     Qt.AlignLeft | Qt.AlignTop)
+            # The layout shows new buttons only later (in a queued
+            # call) and ignores hidden widgets until then.
+            button = slot.button
+            if button.isHidden() and \
+                    not button.testAttribute(Qt.WA_WState_ExplicitShowHide):
+                button.show()
 
     def __indexOf(self, button):
         """Return the index of button widget.
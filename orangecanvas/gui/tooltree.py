@@ -9,6 +9,7 @@ organized in a tree structure.
 """
 
 import logging
+from bisect import bisect_left
 
 from AnyQt.QtWidgets import (
     QTreeView, QWidget, QVBoxLayout, QSizePolicy, QStyledItemDelegate,
@@ -189,6 +190,12 @@ class FlattenedTreeItemModel(QAbstractProxyModel):
     """An Proxy Item model containing a flattened view of a column in a tree
     like item model.
 
+    The source rows are kept in a pre-order list of key paths (tuples of
+    row indices), which is also sorted lexicographically, so the mapping
+    is searched by bisection and updated incrementally (with the proper
+    row insert/remove/move notifications) when rows are inserted, removed
+    or moved in the source.
+
     """
     Default = 1
     InternalNodesDisabled = 2
@@ -200,8 +207,8 @@ class FlattenedTreeItemModel(QAbstractProxyModel):
         self.__flatteningMode = 1
         self.__sourceRootIndex = QModelIndex()
 
-        self._source_key = {}
-        self._source_offset = {}
+        # Pre-order (sorted) list of source key paths
+        self._source_key = []
 
     def setSourceModel(self, model):
         self.beginResetModel()
@@ -213,6 +220,7 @@ class FlattenedTreeItemModel(QAbstractProxyModel):
             curr_model.rowsInserted.disconnect(self._sourceRowsInserted)
             curr_model.rowsRemoved.disconnect(self._sourceRowsRemoved)
             curr_model.rowsMoved.disconnect(self._sourceRowsMoved)
+            curr_model.modelReset.disconnect(self._sourceModelReset)
 
         QAbstractProxyModel.setSourceModel(self, model)
         self._updateRowMapping()
@@ -221,6 +229,7 @@ class FlattenedTreeItemModel(QAbstractProxyModel):
         model.rowsInserted.connect(self._sourceRowsInserted)
         model.rowsRemoved.connect(self._sourceRowsRemoved)
         model.rowsMoved.connect(self._sourceRowsMoved)
+        model.modelReset.connect(self._sourceModelReset)
 
         self.endResetModel()
 
@@ -264,9 +273,10 @@ class FlattenedTreeItemModel(QAbstractProxyModel):
 
     def mapFromSource(self, sourceIndex):
         if sourceIndex.isValid():
-            key = self._indexKey(sourceIndex)
-            offset = self._source_offset[key]
-            row = offset + sourceIndex.row()
+            row = self._keyRow(self._indexKey(sourceIndex))
+            if row is None:
+                # Not mapped (an internal node in LeavesOnly mode)
+                return QModelIndex()
             return self.index(row, 0)
         else:
             return sourceIndex
@@ -313,7 +323,7 @@ class FlattenedTreeItemModel(QAbstractProxyModel):
 
     def _indexKey(self, index):
         """Return a key for `index` from the source model into
-        the _source_offset map. The key is a tuple of row indices on
+        the flattened mapping. The key is a tuple of row indices on
         the path from the top if the model to the `index`.
 
         """
@@ -332,30 +342,78 @@ class FlattenedTreeItemModel(QAbstractProxyModel):
             index = index.child(row, 0)
         return index
 
-    def _updateRowMapping(self):
-        source = self.sourceModel()
+    def _keyRow(self, key_path):
+        """Return the row of `key_path` in the flattened model or None
+        if it is not mapped.
+        """
+        keys = self._source_key
+        row = bisect_left(keys, key_path)
+        if row < len(keys) and keys[row] == key_path:
+            return row
+        else:
+            return None
 
-        source_key = []
-        source_offset_map = {}
+    def _subtreeEnd(self, key_path, lo=0):
+        """Return the row one past the last descendant of `key_path`.
+        """
+        if not key_path:
+            return len(self._source_key)
+        next_key = key_path[:-1] + (key_path[-1] + 1,)
+        return bisect_left(self._source_key, next_key, lo)
+
+    def _subtreeKeys(self, index, key_path):
+        """Return the (pre-order) list of keys for the source `index`
+        and its descendants.
+        """
+        source = self.sourceModel()
+        keys = []
 
         def create_mapping(index, key_path):
-            if source.rowCount(index) > 0:
+            count = source.rowCount(index)
+            if count > 0:
                 if self.__flatteningMode != self.LeavesOnly:
-                    source_offset_map[key_path] = len(source_offset_map)
-                    source_key.append(key_path)
-
-                for i in range(source.rowCount(index)):
-                    create_mapping(index.child(i, 0), key_path + (i, ))
+                    keys.append(key_path)
 
+                for i in range(count):
+                    create_mapping(source.index(i, 0, index), key_path + (i, ))
             else:
-                source_offset_map[key_path] = len(source_offset_map)
-                source_key.append(key_path)
+                keys.append(key_path)
 
-        for i in range(source.rowCount()):
-            create_mapping(source.index(i, 0), (i,))
+        create_mapping(index, key_path)
+        return keys
 
-        self._source_key = source_key
-        self._source_offset = source_offset_map
+    def _childKeys(self, parent, key_path):
+        """Return the keys for all the descendants of source `parent`.
+        """
+        source = self.sourceModel()
+        keys = []
+        for i in range(source.rowCount(parent)):
+            keys.extend(self._subtreeKeys(source.index(i, 0, parent),
+                                          key_path + (i,)))
+        return keys
+
+    def _shiftKeys(self, start, end, depth, delta):
+        """Shift the row at `depth` of keys in the [start, end) range
+        by `delta`.
+        """
+        keys = self._source_key
+        keys[start:end] = [k[:depth] + (k[depth] + delta,) + k[depth + 1:]
+                           for k in keys[start:end]]
+
+    def _updateRowMapping(self):
+        source = self.sourceModel()
+        if source is None:
+            self._source_key = []
+        else:
+            self._source_key = self._childKeys(QModelIndex(), ())
+
+    def _parentChanged(self, key_path):
+        # The parent's flags depend on its child count
+        if self.__flatteningMode == self.InternalNodesDisabled:
+            row = self._keyRow(key_path)
+            if row is not None:
+                index = self.index(row, 0)
+                self.dataChanged.emit(index, index)
 
     def _sourceDataChanged(self, top, bottom):
         changed_indexes = []
@@ -367,17 +425,93 @@ class FlattenedTreeItemModel(QAbstractProxyModel):
             self.dataChanged.emit(ind, ind)
 
     def _sourceRowsInserted(self, parent, start, end):
-        self.beginResetModel()
-        self._updateRowMapping()
-        self.endResetModel()
+        source = self.sourceModel()
+        key = self._indexKey(parent)
+        keys = self._source_key
+        count = end - start + 1
+        became_internal = parent.isValid() and \
+            source.rowCount(parent) == count
+
+        if became_internal and self.__flatteningMode == self.LeavesOnly:
+            # The parent was a leaf, it is replaced by its children
+            row = self._keyRow(key)
+            if row is not None:
+                self.beginRemoveRows(QModelIndex(), row, row)
+                del keys[row]
+                self.endRemoveRows()
+
+        first = bisect_left(keys, key + (start,))
+        # Renumber the following siblings (and their descendants)
+        self._shiftKeys(first, self._subtreeEnd(key, first), len(key), count)
+
+        new_keys = []
+        for i in range(start, end + 1):
+            new_keys.extend(
+                self._subtreeKeys(source.index(i, 0, parent), key + (i,)))
+        if new_keys:
+            self.beginInsertRows(QModelIndex(), first,
+                                 first + len(new_keys) - 1)
+            keys[first:first] = new_keys
+            self.endInsertRows()
+
+        if became_internal:
+            self._parentChanged(key)
 
     def _sourceRowsRemoved(self, parent, start, end):
-        self.beginResetModel()
-        self._updateRowMapping()
-        self.endResetModel()
+        source = self.sourceModel()
+        key = self._indexKey(parent)
+        keys = self._source_key
+        count = end - start + 1
+
+        first = bisect_left(keys, key + (start,))
+        last = bisect_left(keys, key + (end + 1,), first)
+        if last > first:
+            self.beginRemoveRows(QModelIndex(), first, last - 1)
+            del keys[first:last]
+            self._shiftKeys(first, self._subtreeEnd(key, first),
+                            len(key), -count)
+            self.endRemoveRows()
+        else:
+            self._shiftKeys(first, self._subtreeEnd(key, first),
+                            len(key), -count)
+
+        if parent.isValid() and source.rowCount(parent) == 0:
+            if self.__flatteningMode == self.LeavesOnly:
+                # The parent is a leaf now
+                row = bisect_left(keys, key)
+                self.beginInsertRows(QModelIndex(), row, row)
+                keys.insert(row, key)
+                self.endInsertRows()
+            else:
+                self._parentChanged(key)
 
     def _sourceRowsMoved(self, sourceParent, sourceStart, sourceEnd,
                          destParent, destRow):
+        if sourceParent != destParent:
+            self.beginResetModel()
+            self._updateRowMapping()
+            self.endResetModel()
+            return
+
+        key = self._indexKey(sourceParent)
+        keys = self._source_key
+        first = bisect_left(keys, key + (sourceStart,))
+        last = bisect_left(keys, key + (sourceEnd + 1,), first)
+        dest = bisect_left(keys, key + (destRow,))
+        # The range of all the parent's descendants
+        child_start = bisect_left(keys, key + (0,))
+        child_end = self._subtreeEnd(key, child_start)
+        child_keys = self._childKeys(sourceParent, key)
+
+        if last > first and \
+                self.beginMoveRows(QModelIndex(), first, last - 1,
+                                   QModelIndex(), dest):
+            keys[child_start:child_end] = child_keys
+            self.endMoveRows()
+        else:
+            keys[child_start:child_end] = child_keys
+
+    def _sourceModelReset(self):
         self.beginResetModel()
         self._updateRowMapping()
         self.endResetModel()
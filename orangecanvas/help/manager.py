@@ -8,19 +8,16 @@ import itertools
 import logging
 import email
 
-from distutils.version import StrictVersion
+from concurrent.futures import Future
 
 from operator import itemgetter
 from sysconfig import get_path
 
-import pkg_resources
-
-import future.moves.urllib.parse
-from future.moves import urllib
-
 import six
+from six.moves import urllib
 
 from . import provider
+from ..utils import entrypoints, version_key
 
 from AnyQt.QtCore import QObject, QUrl, QDir, QT_VERSION
 
@@ -52,69 +49,104 @@ class HelpManager(QObject):
         return self._registry
 
     def initialize(self):
+        """
+        Initialize the manager.
+
+        The help providers are created lazily on first use (see
+        :func:`provider_for_project`) so this does not fetch anything.
+        """
         if self._initialized:
             return
+        self._initialized = True
 
-        reg = self._registry
-        all_projects = set(desc.project_name for desc in reg.widgets()
-                           if desc.project_name is not None)
+    def provider_for_project(self, project):
+        """
+        Return the help provider for `project` (create it if necessary).
 
-        providers = []
-        for project in set(all_projects) - set(self._providers.keys()):
-            provider = None
-            try:
-                dist = pkg_resources.get_distribution(project)
-            except pkg_resources.ResolutionError:
-                log.exception("Could not get distribution for '%s'", project)
-            else:
-                try:
-                    provider = get_help_provider_for_distribution(dist)
-                except Exception:
-                    log.exception("Error while initializing help "
-                                  "provider for %r", project)
+        Return None if no help provider is available.
+        """
+        self.initialize()
+        if project in self._providers:
+            return self._providers[project]
 
-            if provider:
-                providers.append((project, provider))
-                provider.setParent(self)
+        provider = None
+        dist = entrypoints.get_distribution(project)
+        if dist is None:
+            log.error("Could not get distribution for '%s'", project)
+        else:
+            try:
+                provider = get_help_provider_for_distribution(dist)
+            except Exception:
+                log.exception("Error while initializing help "
+                              "provider for %r", project)
 
-        self._providers.update(dict(providers))
-        self._initialized = True
+        if provider:
+            provider.setParent(self)
+        self._providers[project] = provider
+        return provider
 
     def get_help(self, url):
         """
+        Resolve the help `url`.
+
+        Return a :class:`concurrent.futures.Future` with the resolved
+        :class:`QUrl` (`help://search?...` urls are resolved with
+        :func:`search`, all others are returned as they are).
         """
         self.initialize()
         if url.scheme() == "help" and url.authority() == "search":
             return self.search(qurl_query_items(url))
         else:
-            return url
+            f = Future()
+            f.set_result(url)
+            return f
 
     def description_by_id(self, desc_id):
         reg = self._registry
         return get_by_id(reg, desc_id)
 
     def search(self, query):
+        """
+        Search for the help page of a widget description.
+
+        `query` is a `help://search?id=...` url or a list of (key, value)
+        query items. Return a :class:`concurrent.futures.Future` with the
+        help url. If no help is available the future's exception is a
+        :class:`KeyError`.
+
+        .. note:: The future may complete only after control returns to
+                  the event loop (the help inventory is fetched
+                  asynchronously).
+        """
         self.initialize()
 
         if isinstance(query, QUrl):
             query = qurl_query_items(query)
 
         query = dict(query)
-        desc_id = query["id"]
-        desc = self.description_by_id(desc_id)
+        desc_id = query.get("id")
+        try:
+            desc = self.description_by_id(desc_id)
+        except KeyError as ex:
+            f = Future()
+            f.set_exception(ex)
+            return f
 
         provider = None
         if desc.project_name:
-            provider = self._providers.get(desc.project_name)
+            provider = self.provider_for_project(desc.project_name)
 
-        # TODO: Ensure initialization of the provider
         if provider:
-            return provider.search(desc)
+            return provider.search_async(desc)
         else:
-            raise KeyError(desc_id)
+            f = Future()
+            f.set_exception(KeyError(desc_id))
+            return f
 
 
 def get_by_id(registry, descriptor_id):
+    if registry is None:
+        raise KeyError(descriptor_id)
     for desc in registry.widgets():
         if desc.qualified_name == descriptor_id:
             return desc
@@ -146,18 +178,21 @@ else:
 
 def get_help_provider_for_description(desc):
     if desc.project_name:
-        dist = pkg_resources.get_distribution(desc.project_name)
-        return get_help_provider_for_distribution(dist)
+        dist = entrypoints.get_distribution(desc.project_name)
+        if dist is not None:
+            return get_help_provider_for_distribution(dist)
 
 
 def is_develop_egg(dist):
     """
     Is the distribution installed in development mode (setup.py develop)
     """
-    meta_provider = dist._provider
-    egg_info_dir = os.path.dirname(meta_provider.egg_info)
-    egg_name = pkg_resources.to_filename(dist.project_name)
-    return meta_provider.egg_info.endswith(egg_name + ".egg-info") \
+    egg_info = getattr(dist, "egg_info", None)
+    if not egg_info:
+        return False
+    egg_info_dir = os.path.dirname(egg_info)
+    egg_name = dist.project_name.replace("-", "_")
+    return egg_info.endswith(egg_name + ".egg-info") \
            and os.path.exists(os.path.join(egg_info_dir, "setup.py"))
 
 
@@ -222,9 +257,9 @@ def parse_meta(contents):
         else:
             meta[key] = message.get(key)
 
-    version = StrictVersion(meta["Metadata-Version"])
+    version = version_key(meta["Metadata-Version"])
 
-    if version >= StrictVersion("1.3") and "Description" not in meta:
+    if version >= version_key("1.3") and "Description" not in meta:
         desc = message.get_payload()
         if desc:
             meta["Description"] = desc
@@ -419,8 +454,8 @@ def get_help_provider_for_distribution(dist):
         if create:
             try:
                 provider = create(entry_point)
-            except pkg_resources.DistributionNotFound as err:
-                log.warning("Unsatisfied dependencies (%r)", err)
+            except ImportError as err:
+                log.warning("Could not load %s (%r)", entry_point, err)
                 continue
             except Exception as ex:
                 log.exception("Exception {}".format(ex))
@@ -5,6 +5,10 @@ import sys
 import os
 import logging
 import io
+import json
+import hashlib
+
+from concurrent.futures import Future
 
 from xml.etree.ElementTree import TreeBuilder, Element
 
@@ -41,29 +45,66 @@ class HelpProvider(QObject):
     def search(self, description):
         raise NotImplementedError
 
+    def search_async(self, description):
+        """
+        Search for the help url for `description`.
+
+        Return a :class:`concurrent.futures.Future` with the result. The
+        default implementation calls :func:`search` and returns a completed
+        future.
+        """
+        f = Future()
+        try:
+            f.set_result(self.search(description))
+        except Exception as ex:
+            f.set_exception(ex)
+        return f
+
 
 class BaseInventoryProvider(HelpProvider):
-    def __init__(self, inventory, parent=None):
+    """
+    A help provider with an inventory fetched from a (possibly remote) url.
+
+    The parsed inventory is persisted in the cache directory, so it is
+    available immediately in later sessions. Remote inventories are
+    still refetched in the background, but are only reparsed when their
+    contents change.
+    """
+    #: Version of the persisted parsed inventory format
+    CACHE_VERSION = 1
+
+    def __init__(self, inventory, parent=None, cache_dir=None):
         super(BaseInventoryProvider, self).__init__(parent)
         self.inventory = QUrl(inventory)
 
         if not self.inventory.scheme() and not self.inventory.isEmpty():
             self.inventory.setScheme("file")
 
+        if cache_dir is None:
+            cache_dir = os.path.join(
+                config.cache_dir(), "help", type(self).__qualname__)
+        self.cache_dir = cache_dir
+
         self._error = None
+        self._reply = None
+        self._finished = False
+        self._pending = []
         self._fetch_inventory(self.inventory)
 
     def _fetch_inventory(self, url):
-        cache_dir = config.cache_dir()
-        cache_dir = os.path.join(cache_dir, "help", type(self).__qualname__)
-
+        cache_dir = self.cache_dir
         try:
             os.makedirs(cache_dir)
         except OSError:
             pass
 
         url = QUrl(self.inventory)
+        cached = self._load_cached()
+
         if not url.isLocalFile():
+            if cached is not None:
+                # Use the persisted items while the inventory is refetched.
+                self._set_items(cached["items"])
             # fetch and cache the inventory file.
             manager = QNetworkAccessManager(self)
             cache = QNetworkDiskCache()
@@ -74,8 +115,21 @@ class BaseInventoryProvider(HelpProvider):
             self._reply = manager.get(req)
             manager.finished.connect(self._on_finished)
         else:
-            with open(six.text_type(url.toLocalFile()), "rb") as f:
-                self._load_inventory(f)
+            path = six.text_type(url.toLocalFile())
+            try:
+                st = os.stat(path)
+            except OSError:
+                log.error("Could not read help inventory '%s'", path)
+                self._error = (OSError, "{0} does not exist".format(path))
+            else:
+                stamp = [st.st_mtime, st.st_size]
+                if cached is not None and cached.get("stamp") == stamp:
+                    self._set_items(cached["items"])
+                else:
+                    with open(path, "rb") as f:
+                        self._load_inventory(f)
+                    self._store_cached(stamp=stamp)
+            self._set_finished()
 
     def _on_finished(self, reply):
         if reply.error() != QNetworkReply.NoError:
@@ -85,17 +139,110 @@ class BaseInventoryProvider(HelpProvider):
 
         else:
             contents = bytes(reply.readAll())
-            self._load_inventory(io.BytesIO(contents))
+            digest = hashlib.sha1(contents).hexdigest()
+            cached = self._load_cached()
+            if cached is None or cached.get("digest") != digest:
+                self._load_inventory(io.BytesIO(contents))
+                self._store_cached(digest=digest)
+        reply.deleteLater()
+        self._set_finished()
+
+    def _set_finished(self):
+        self._finished = True
+        pending, self._pending = self._pending, []
+        for f, description in pending:
+            try:
+                f.set_result(self.search(description))
+            except Exception as ex:
+                f.set_exception(ex)
+
+    def _has_items(self):
+        return bool(self.items)
+
+    def search_async(self, description):
+        """
+        Reimplemented.
+
+        The returned future is resolved once the inventory is available
+        (the persisted one or the one fetched from the network).
+        """
+        if self._finished or self._has_items():
+            return super(BaseInventoryProvider, self).search_async(description)
+        f = Future()
+        self._pending.append((f, description))
+        return f
+
+    def _cache_key(self):
+        """
+        Return a list of json serializable values identifying the parsed
+        inventory (the default is the inventory url).
+        """
+        return [self.inventory.toString()]
+
+    def _cache_filename(self):
+        key = json.dumps(self._cache_key())
+        key = hashlib.sha1(key.encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, "inventories", key + ".json")
+
+    def _load_cached(self):
+        """
+        Load the persisted parsed inventory if it exists and is valid.
+        """
+        filename = self._cache_filename()
+        try:
+            with io.open(filename, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, IOError, ValueError):
+            return None
+
+        if not isinstance(data, dict) or \
+                data.get("version") != self.CACHE_VERSION or \
+                data.get("key") != self._cache_key() or \
+                data.get("items") is None:
+            return None
+        return data
+
+    def _store_cached(self, **stamps):
+        """
+        Persist the parsed inventory items.
+        """
+        items = self._get_items()
+        if items is None:
+            return
+        data = dict(stamps, version=self.CACHE_VERSION,
+                    key=self._cache_key(), items=items)
+        filename = self._cache_filename()
+        tmpname = filename + ".tmp"
+        try:
+            dirname = os.path.dirname(filename)
+            if not os.path.isdir(dirname):
+                os.makedirs(dirname)
+            with io.open(tmpname, "w", encoding="utf-8") as f:
+                f.write(six.text_type(json.dumps(data)))
+            os.replace(tmpname, filename)
+        except (OSError, IOError):
+            log.warning("Could not store the parsed help inventory",
+                        exc_info=True)
+
+    def _get_items(self):
+        return self.items
+
+    def _set_items(self, items):
+        self.items = items
 
     def _load_inventory(self, stream):
         raise NotImplementedError()
 
 
 class IntersphinxHelpProvider(BaseInventoryProvider):
-    def __init__(self, inventory, target=None, parent=None):
+    def __init__(self, inventory, target=None, parent=None, cache_dir=None):
         self.target = target
         self.items = None
-        super(IntersphinxHelpProvider, self).__init__(inventory, parent)
+        super(IntersphinxHelpProvider, self).__init__(
+            inventory, parent, cache_dir=cache_dir)
+
+    def _cache_key(self):
+        return [self.inventory.toString(), self.target]
 
     def search(self, description):
         if description.help_ref:
@@ -103,9 +250,6 @@ class IntersphinxHelpProvider(BaseInventoryProvider):
         else:
             ref = description.name
 
-        if not self.inventory.isLocalFile() and not self._reply.isFinished():
-            self._reply.waitForReadyRead(2000)
-
         if self.items is None:
             labels = {}
         else:
@@ -140,7 +284,7 @@ class IntersphinxHelpProvider(BaseInventoryProvider):
 
 class SimpleHelpProvider(HelpProvider):
     def __init__(self, parent=None, baseurl=None):
-        super(SimpleHelpProvider).__init__(parent)
+        super(SimpleHelpProvider, self).__init__(parent)
         self.baseurl = baseurl
 
     def search(self, description):
@@ -193,12 +337,17 @@ class HtmlIndexProvider(BaseInventoryProvider):
         def handle_data(self, data):
             self.builder.data(data)
 
-    def __init__(self, inventory, parent=None, xpathquery=None):
+    def __init__(self, inventory, parent=None, xpathquery=None,
+                 cache_dir=None):
         self.root = None
         self.items = {}
         self.xpathquery = xpathquery
 
-        super(HtmlIndexProvider, self).__init__(inventory, parent)
+        super(HtmlIndexProvider, self).__init__(
+            inventory, parent, cache_dir=cache_dir)
+
+    def _cache_key(self):
+        return [self.inventory.toString(), self.xpathquery]
 
     def _load_inventory(self, stream):
         try:
@@ -224,9 +373,6 @@ class HtmlIndexProvider(BaseInventoryProvider):
         return items
 
     def search(self, desc):
-        if not self.inventory.isLocalFile() and not self._reply.isFinished():
-            self._reply.waitForReadyRead(2000)
-
         if self.items is None:
             labels = {}
         else:
@@ -0,0 +1,199 @@
+import os
+import io
+import zlib
+import shutil
+import tempfile
+import threading
+
+from http.server import HTTPServer, SimpleHTTPRequestHandler
+
+from AnyQt.QtCore import QUrl
+from AnyQt.QtTest import QTest
+
+from ...gui.test import QAppTestCase
+from ...registry.tests import small_testing_registry
+
+from ..provider import IntersphinxHelpProvider, HtmlIndexProvider
+from ..manager import HelpManager
+
+
+def intersphinx_inventory(names):
+    header = (b"# Sphinx inventory version 2\n"
+              b"# Project: Test\n"
+              b"# Version: 1.0\n"
+              b"# The remainder of this file is compressed using zlib.\n")
+    lines = ["{0} std:label -1 widgets/{1}.html {0}\n"
+             .format(name, name.replace(" ", "-"))
+             for name in names]
+    return header + zlib.compress("".join(lines).encode("utf-8"))
+
+
+class _QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+class HTTPStandIn(object):
+    """
+    Serve the files in `root` over http in a separate thread.
+    """
+    def __init__(self, root):
+        root = os.path.abspath(root)
+
+        class Handler(_QuietHandler):
+            def translate_path(self, path):
+                path = path.split("?", 1)[0].lstrip("/")
+                return os.path.join(root, *path.split("/"))
+
+        self.requests = 0
+        standin = self
+
+        class CountingServer(HTTPServer):
+            def finish_request(self, *args):
+                standin.requests += 1
+                HTTPServer.finish_request(self, *args)
+
+        self.server = CountingServer(("127.0.0.1", 0), Handler)
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.daemon = True
+        self.thread.start()
+
+    def url(self, path=""):
+        host, port = self.server.server_address
+        return "http://{}:{}/{}".format(host, port, path)
+
+    def shutdown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.thread.join()
+
+
+class _Desc(object):
+    def __init__(self, name, help_ref=None, project_name=None):
+        self.name = name
+        self.help_ref = help_ref
+        self.project_name = project_name
+
+
+def wait_for(future, timeout=5000):
+    while not future.done() and timeout > 0:
+        QTest.qWait(10)
+        timeout -= 10
+    return future.done()
+
+
+class TestHelpProvider(QAppTestCase):
+    def setUp(self):
+        super(TestHelpProvider, self).setUp()
+        self.tmpdir = tempfile.mkdtemp()
+        self.docroot = os.path.join(self.tmpdir, "docs")
+        self.cachedir = os.path.join(self.tmpdir, "cache")
+        os.makedirs(self.docroot)
+        with open(os.path.join(self.docroot, "objects.inv"), "wb") as f:
+            f.write(intersphinx_inventory(["file", "scatter plot"]))
+        with io.open(os.path.join(self.docroot, "index.html"), "w",
+                     encoding="utf-8") as f:
+            f.write(u'<html><body><div id="widgets"><ul>'
+                    u'<li><a href="widgets/file.html">File</a></li>'
+                    u'</ul></div></body></html>')
+        self.server = HTTPStandIn(self.docroot)
+
+    def tearDown(self):
+        self.server.shutdown()
+        shutil.rmtree(self.tmpdir)
+        super(TestHelpProvider, self).tearDown()
+
+    def test_intersphinx_remote(self):
+        target = self.server.url()
+        provider = IntersphinxHelpProvider(
+            inventory=self.server.url("objects.inv"), target=target,
+            cache_dir=self.cachedir)
+        f = provider.search_async(_Desc("Scatter Plot"))
+        # The inventory is fetched in the background.
+        self.assertFalse(f.done())
+        self.assertTrue(wait_for(f))
+        self.assertEqual(f.result(), target + "widgets/scatter-plot.html")
+
+        f = provider.search_async(_Desc("Nope"))
+        self.assertTrue(f.done())
+        self.assertIsInstance(f.exception(), KeyError)
+
+        # A new provider (session) can resolve from the persisted
+        # inventory without waiting for the network.
+        provider = IntersphinxHelpProvider(
+            inventory=self.server.url("objects.inv"), target=target,
+            cache_dir=self.cachedir)
+        f = provider.search_async(_Desc("File"))
+        self.assertTrue(f.done())
+        self.assertEqual(f.result(), target + "widgets/file.html")
+
+    def test_remote_error(self):
+        provider = IntersphinxHelpProvider(
+            inventory=self.server.url("missing.inv"),
+            target=self.server.url(), cache_dir=self.cachedir)
+        f = provider.search_async(_Desc("File"))
+        self.assertTrue(wait_for(f))
+        self.assertIsInstance(f.exception(), KeyError)
+
+    def test_local_inventory_reparse(self):
+        path = os.path.join(self.docroot, "objects.inv")
+        provider = IntersphinxHelpProvider(
+            inventory=path, target=self.docroot, cache_dir=self.cachedir)
+        f = provider.search_async(_Desc("file"))
+        self.assertTrue(f.done())
+        self.assertEqual(f.result(),
+                         os.path.join(self.docroot, "widgets/file.html"))
+
+        # Cached parsed inventory is used if the file did not change ...
+        provider = IntersphinxHelpProvider(
+            inventory=path, target=self.docroot, cache_dir=self.cachedir)
+        self.assertIn("file", provider.items["std:label"])
+
+        # ... and is invalidated when it does.
+        with open(path, "wb") as f:
+            f.write(intersphinx_inventory(["box plot"]))
+        st = os.stat(path)
+        os.utime(path, (st.st_atime, st.st_mtime + 10))
+        provider = IntersphinxHelpProvider(
+            inventory=path, target=self.docroot, cache_dir=self.cachedir)
+        self.assertNotIn("file", provider.items["std:label"])
+        self.assertIn("box plot", provider.items["std:label"])
+
+    def test_html_index(self):
+        url = self.server.url("index.html")
+        provider = HtmlIndexProvider(inventory=url, cache_dir=self.cachedir)
+        f = provider.search_async(_Desc("File"))
+        self.assertTrue(wait_for(f))
+        self.assertEqual(f.result(), QUrl(self.server.url("widgets/file.html")))
+
+        provider = HtmlIndexProvider(inventory=url, cache_dir=self.cachedir)
+        f = provider.search_async(_Desc("File"))
+        self.assertTrue(f.done())
+        self.assertEqual(f.result(), QUrl(self.server.url("widgets/file.html")))
+
+    def test_manager(self):
+        manager = HelpManager()
+        reg = small_testing_registry()
+        manager.set_registry(reg)
+
+        f = manager.get_help(QUrl("help://search?id=no-such-widget"))
+        self.assertIsInstance(f.exception(), KeyError)
+
+        # widgets without a project have no help
+        f = manager.get_help(QUrl("help://search?id=add"))
+        self.assertIsInstance(f.exception(), KeyError)
+
+        url = QUrl("http://example.com/")
+        self.assertEqual(manager.get_help(url).result(), url)
+
+        desc = reg.widget("add")
+        desc.project_name = "test-project"
+        target = self.server.url()
+        with open(os.path.join(self.docroot, "objects.inv"), "wb") as f:
+            f.write(intersphinx_inventory(["add"]))
+        manager._providers["test-project"] = IntersphinxHelpProvider(
+            inventory=self.server.url("objects.inv"), target=target,
+            cache_dir=self.cachedir, parent=manager)
+        f = manager.search([("id", "add")])
+        self.assertTrue(wait_for(f))
+        self.assertEqual(f.result(), target + "widgets/add.html")
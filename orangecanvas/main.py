@@ -20,8 +20,6 @@ if sys.version_info < (3, 3):
 else:
     from contextlib import ExitStack
 
-import pkg_resources
-
 from AnyQt.QtGui import QFont, QColor
 from AnyQt.QtCore import Qt, QDir, QT_VERSION
 
@@ -39,6 +37,7 @@ from . import utils, config
 from .gui.splashscreen import SplashScreen
 from .utils.redirect import redirect_stdout, redirect_stderr
 from .utils.qtcompat import QSettings
+from .utils.stalldetector import StallDetector, default_report_filename
 
 from .registry import qt
 from .registry import WidgetRegistry, set_global_registry
@@ -122,6 +121,13 @@ def main(argv=None):
     parser.add_option("--config",
                       help="Configuration namespace",
                       type="str", default="orangecanvas.example")
+    parser.add_option("--detect-stalls",
+                      action="store_true",
+                      help="Report GUI event loop stalls (with sampled "
+                           "stacks) to 'stalls.jsonl' in the log directory")
+    parser.add_option("--stall-threshold",
+                      help="Event loop stall threshold (in milliseconds)",
+                      type="int", default=500)
 
     # -m canvas orange.widgets
     # -m canvas --config orange.widgets
@@ -225,14 +231,12 @@ def main(argv=None):
                 # no extension
                 stylesheet = os.path.extsep.join([stylesheet, "qss"])
 
-            pkg_name = __package__
-            resource = "styles/" + stylesheet
-
-            if pkg_resources.resource_exists(pkg_name, resource):
-                stylesheet_string = \
-                    pkg_resources.resource_string(pkg_name, resource).decode("utf-8")
+            base = os.path.join(os.path.dirname(__file__), "styles")
+            path = os.path.join(base, stylesheet)
 
-                base = pkg_resources.resource_filename(pkg_name, "styles")
+            if os.path.isfile(path):
+                with io.open(path, "r", encoding="utf-8") as f:
+                    stylesheet_string = f.read()
 
                 pattern = re.compile(
                     r"^\s@([a-zA-Z0-9_]+?)\s*:\s*([a-zA-Z0-9_/]+?);\s*$",
@@ -351,6 +355,17 @@ def main(argv=None):
         stderr.flushed.connect(sys.stderr.flush)
     sys.excepthook = ExceptHook(stream=stderr)
 
+    detect_stalls = options.detect_stalls or \
+        settings.value("logging/detect-stalls", False, type=bool)
+    if detect_stalls:
+        stall_detector = StallDetector(
+            threshold=options.stall_threshold / 1000.0,
+            filename=default_report_filename()
+        )
+        stall_detector.start()
+    else:
+        stall_detector = None
+
     with ExitStack() as stack:
         stack.enter_context(redirect_stdout(stdout))
         stack.enter_context(redirect_stderr(stderr))
@@ -360,6 +375,9 @@ def main(argv=None):
         except BaseException:
             log.error("Error in main event loop.", exc_info=True)
 
+    if stall_detector is not None:
+        stall_detector.stop()
+
     canvas_window.deleteLater()
     app.processEvents()
     app.flush()
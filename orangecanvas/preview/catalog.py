@@ -0,0 +1,434 @@
+"""
+Workflow Catalog
+================
+
+An incrementally updated index of workflow (.ows) files.
+
+The catalog stores the title, description, names of the used widgets,
+thumbnail and size of workflow files in a local SQLite database. Files
+are only (re)parsed when their modification time or size changes, so
+directories with thousands of workflows (e.g. on shared storage) can be
+browsed and searched without rescanning them.
+
+Example::
+
+    catalog = WorkflowCatalog(default_catalog_filename())
+    catalog.add_directory("/shared/workflows")
+    catalog.scan_async()  # parse new/changed files in the background
+    ...
+    catalog.search("iris widget:Scatter")
+
+"""
+import os
+import stat
+import sqlite3
+import logging
+import threading
+
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from xml.etree import ElementTree
+
+log = logging.getLogger(__name__)
+
+#: The catalog database schema version.
+SCHEMA_VERSION = 1
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS directories (
+    path TEXT PRIMARY KEY
+);
+CREATE TABLE IF NOT EXISTS workflows (
+    path TEXT PRIMARY KEY,
+    directory TEXT,
+    mtime REAL,
+    size INTEGER,
+    title TEXT,
+    description TEXT,
+    widgets TEXT,
+    thumbnail TEXT
+);
+CREATE INDEX IF NOT EXISTS workflows_directory ON workflows (directory);
+CREATE TABLE IF NOT EXISTS widget_usage (
+    path TEXT,
+    widget TEXT
+);
+CREATE INDEX IF NOT EXISTS widget_usage_path ON widget_usage (path);
+CREATE INDEX IF NOT EXISTS widget_usage_widget
+    ON widget_usage (widget COLLATE NOCASE);
+"""
+
+#: Workflow file extensions.
+EXTENSIONS = (".ows",)
+
+
+class WorkflowInfo(
+        namedtuple("WorkflowInfo",
+                   ["path", "title", "description", "widgets", "thumbnail",
+                    "size", "mtime"])):
+    """
+    Indexed workflow file metadata.
+
+    Attributes
+    ----------
+    path : str
+        The workflow file path.
+    title : str
+        The workflow title.
+    description : str
+        The workflow description.
+    widgets : Tuple[str, ...]
+        Names of the widgets (nodes) used in the workflow.
+    thumbnail : str
+        The thumbnail SVG contents (empty if not available).
+    size : int
+        The file size.
+    mtime : float
+        The file modification time.
+
+    """
+    __slots__ = ()
+
+
+def parse_workflow(path, st=None):
+    """
+    Parse the workflow file at `path` and return a :class:`WorkflowInfo`.
+
+    The file is parsed incrementally and the (possibly large) node
+    properties are discarded.
+    """
+    if st is None:
+        st = os.stat(path)
+    title = description = thumbnail = u""
+    widgets = []
+    for event, el in ElementTree.iterparse(path, events=("start", "end")):
+        if event == "start":
+            if el.tag == "scheme" and el.get("version", "1.0") >= "2.0":
+                title = el.get("title", u"")
+                description = el.get("description", u"")
+            continue
+        if el.tag == "node":
+            widgets.append(el.get("name") or el.get("qualified_name") or "")
+        elif el.tag == "widget":
+            # 1.0 format
+            widgets.append(el.get("widgetName") or "")
+        elif el.tag == "thumbnail":
+            thumbnail = el.text or u""
+        if el.tag != "scheme":
+            el.clear()
+    return WorkflowInfo(path, title, description,
+                        tuple(w for w in widgets if w), thumbnail,
+                        st.st_size, st.st_mtime)
+
+
+def iter_workflow_files(directory):
+    """
+    Yield `(path, stat_result)` for all workflow files in `directory`
+    (recursively).
+    """
+    for dirpath, dirnames, filenames in os.walk(directory):
+        dirnames[:] = [d for d in dirnames if not d.startswith(".")]
+        for name in filenames:
+            if os.path.splitext(name)[1].lower() in EXTENSIONS:
+                path = os.path.join(dirpath, name)
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    continue
+                if stat.S_ISREG(st.st_mode):
+                    yield path, st
+
+
+class WorkflowCatalog(object):
+    """
+    A SQLite backed catalog of workflow files.
+
+    This class is thread safe.
+
+    Parameters
+    ----------
+    filename : str
+        The database filename (":memory:" for an in memory catalog).
+    max_workers : int
+        The number of threads used for parsing the workflow files.
+
+    """
+    def __init__(self, filename=":memory:", max_workers=4):
+        self.__filename = filename
+        self.__max_workers = max_workers
+        self.__lock = threading.RLock()
+        self.__db = sqlite3.connect(filename, check_same_thread=False)
+        self.__executor = None
+        self.__init_schema()
+
+    def __init_schema(self):
+        db = self.__db
+        with self.__lock, db:
+            version = db.execute("PRAGMA user_version").fetchone()[0]
+            if version != SCHEMA_VERSION:
+                for table in ("directories", "workflows", "widget_usage"):
+                    db.execute("DROP TABLE IF EXISTS " + table)
+            db.executescript(SCHEMA)
+            db.execute("PRAGMA user_version = %i" % SCHEMA_VERSION)
+
+    def filename(self):
+        return self.__filename
+
+    def close(self):
+        """
+        Close the catalog (waits for any pending background scans).
+        """
+        if self.__executor is not None:
+            self.__executor.shutdown(wait=True)
+            self.__executor = None
+        with self.__lock:
+            self.__db.close()
+
+    # Directories
+    def add_directory(self, directory):
+        """
+        Add `directory` to the indexed directories (the files are indexed
+        by the next :func:`scan`).
+        """
+        directory = os.path.abspath(directory)
+        with self.__lock, self.__db:
+            self.__db.execute(
+                "INSERT OR IGNORE INTO directories VALUES (?)", (directory,))
+
+    def remove_directory(self, directory):
+        """
+        Remove `directory` and all its workflows from the catalog.
+        """
+        directory = os.path.abspath(directory)
+        with self.__lock, self.__db:
+            self.__db.execute(
+                "DELETE FROM directories WHERE path = ?", (directory,))
+            paths = [row[0] for row in self.__db.execute(
+                "SELECT path FROM workflows WHERE directory = ?",
+                (directory,))]
+            self.__delete(paths)
+
+    def directories(self):
+        """
+        Return a list of the indexed directories.
+        """
+        with self.__lock:
+            return [row[0] for row in self.__db.execute(
+                "SELECT path FROM directories ORDER BY path")]
+
+    # Indexing
+    def scan(self, directories=None):
+        """
+        Update the index of `directories` (all indexed directories by
+        default). Return the number of (re)parsed and removed files.
+        """
+        if directories is None:
+            directories = self.directories()
+        updated = removed = 0
+        for directory in directories:
+            directory = os.path.abspath(directory)
+            files = list(iter_workflow_files(directory))
+            updated += self.__update(files, directory)
+            with self.__lock:
+                known = set(row[0] for row in self.__db.execute(
+                    "SELECT path FROM workflows WHERE directory = ?",
+                    (directory,)))
+            missing = known.difference(path for path, _ in files)
+            if missing:
+                with self.__lock, self.__db:
+                    self.__delete(missing)
+                removed += len(missing)
+        return updated, removed
+
+    def scan_async(self, directories=None):
+        """
+        Run :func:`scan` in a background thread. Return a
+        :class:`concurrent.futures.Future`.
+        """
+        return self.__background().submit(self.scan, directories)
+
+    def index_files(self, paths):
+        """
+        Index the workflow files in `paths` (e.g. the recent files list).
+
+        Return a list with a :class:`WorkflowInfo` (or None if the file
+        does not exist or could not be parsed) for each path.
+        """
+        files, missing = [], []
+        for path in paths:
+            try:
+                files.append((path, os.stat(path)))
+            except OSError:
+                missing.append(path)
+        if missing:
+            with self.__lock, self.__db:
+                self.__delete(missing)
+        self.__update(files, None)
+        return [self.get(path) for path in paths]
+
+    def index_files_async(self, paths):
+        """
+        Run :func:`index_files` in a background thread. Return a
+        :class:`concurrent.futures.Future`.
+        """
+        return self.__background().submit(self.index_files, list(paths))
+
+    def lookup(self, path):
+        """
+        Return the :class:`WorkflowInfo` for `path`, (re)indexing the
+        file if it is not yet indexed or has changed (return None if it
+        does not exist or could not be parsed).
+        """
+        return self.index_files([path])[0]
+
+    def get(self, path):
+        """
+        Return the stored :class:`WorkflowInfo` for `path` (or None).
+        """
+        with self.__lock:
+            row = self.__db.execute(
+                "SELECT path, title, description, widgets, thumbnail, size, "
+                "mtime FROM workflows WHERE path = ?", (path,)).fetchone()
+        return _info(row) if row is not None else None
+
+    def set_thumbnail(self, path, thumbnail):
+        """
+        Store a (rendered) `thumbnail` for an indexed workflow.
+        """
+        with self.__lock, self.__db:
+            self.__db.execute(
+                "UPDATE workflows SET thumbnail = ? WHERE path = ?",
+                (thumbnail, path))
+
+    def __len__(self):
+        with self.__lock:
+            return self.__db.execute(
+                "SELECT COUNT(*) FROM workflows").fetchone()[0]
+
+    def __background(self):
+        if self.__executor is None:
+            self.__executor = ThreadPoolExecutor(max_workers=1)
+        return self.__executor
+
+    def __update(self, files, directory):
+        # (Re)parse the new or modified `files` (a list of (path, stat))
+        with self.__lock:
+            stored = {}
+            for path, _ in files:
+                row = self.__db.execute(
+                    "SELECT mtime, size FROM workflows WHERE path = ?",
+                    (path,)).fetchone()
+                if row is not None:
+                    stored[path] = row
+        changed = [(path, st) for path, st in files
+                   if stored.get(path) != (st.st_mtime, st.st_size)]
+        if not changed:
+            return 0
+
+        def parse(item):
+            path, st = item
+            try:
+                return parse_workflow(path, st)
+            except Exception:
+                log.warning("Could not parse %r", path, exc_info=True)
+                return WorkflowInfo(path, u"", u"", (), u"",
+                                    st.st_size, st.st_mtime)
+
+        if len(changed) > 1 and self.__max_workers > 1:
+            with ThreadPoolExecutor(max_workers=self.__max_workers) as pool:
+                infos = list(pool.map(parse, changed))
+        else:
+            infos = [parse(item) for item in changed]
+
+        with self.__lock, self.__db:
+            for info in infos:
+                self.__store(info, directory)
+        return len(infos)
+
+    def __store(self, info, directory):
+        db = self.__db
+        if directory is None:
+            # keep the directory of files already indexed by a scan
+            row = db.execute("SELECT directory FROM workflows WHERE path = ?",
+                             (info.path,)).fetchone()
+            directory = row[0] if row is not None else None
+        db.execute(
+            "INSERT OR REPLACE INTO workflows VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (info.path, directory, info.mtime, info.size, info.title,
+             info.description, u"\n".join(info.widgets), info.thumbnail))
+        db.execute("DELETE FROM widget_usage WHERE path = ?", (info.path,))
+        db.executemany("INSERT INTO widget_usage VALUES (?, ?)",
+                       [(info.path, w) for w in sorted(set(info.widgets))])
+
+    def __delete(self, paths):
+        paths = [(path,) for path in paths]
+        self.__db.executemany("DELETE FROM workflows WHERE path = ?", paths)
+        self.__db.executemany("DELETE FROM widget_usage WHERE path = ?",
+                              paths)
+
+    # Search
+    def search(self, query=u"", limit=None):
+        """
+        Search the catalog. Return a list of matching :class:`WorkflowInfo`
+        ordered by title.
+
+        All whitespace separated terms in `query` must match (case
+        insensitive substring match of the title, description or widget
+        names). Terms prefixed with `widget:` only match the names of
+        the used widgets.
+        """
+        where, params = [], []
+        for term in query.split():
+            if term.lower().startswith("widget:"):
+                name = term[len("widget:"):]
+                if not name:
+                    continue
+                where.append(
+                    "path IN (SELECT path FROM widget_usage "
+                    "WHERE widget LIKE ? ESCAPE '\\')")
+                params.append(_like(name))
+            else:
+                where.append(
+                    "(title LIKE ? ESCAPE '\\' OR "
+                    "description LIKE ? ESCAPE '\\' OR "
+                    "widgets LIKE ? ESCAPE '\\')")
+                params.extend([_like(term)] * 3)
+        sql = ("SELECT path, title, description, widgets, thumbnail, size, "
+               "mtime FROM workflows")
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY title COLLATE NOCASE, path"
+        if limit is not None:
+            sql += " LIMIT %i" % int(limit)
+        with self.__lock:
+            return [_info(row) for row in self.__db.execute(sql, params)]
+
+    def widget_usage(self):
+        """
+        Return a list of `(widget name, number of workflows)` tuples
+        ordered by usage.
+        """
+        with self.__lock:
+            return self.__db.execute(
+                "SELECT widget, COUNT(*) AS n FROM widget_usage "
+                "GROUP BY widget ORDER BY n DESC, widget").fetchall()
+
+
+def _like(term):
+    term = term.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return u"%" + term + u"%"
+
+
+def _info(row):
+    path, title, description, widgets, thumbnail, size, mtime = row
+    widgets = tuple(widgets.split(u"\n")) if widgets else ()
+    return WorkflowInfo(path, title or u"", description or u"", widgets,
+                        thumbnail or u"", size, mtime)
+
+
+def default_catalog_filename():
+    """
+    Return the default catalog database filename (in `config.cache_dir()`).
+    """
+    from .. import config
+    return os.path.join(config.cache_dir(), "workflow-catalog.sqlite")
@@ -266,6 +266,14 @@ class PreviewBrowser(QWidget):
         """
         return self.__model
 
+    def setRowHidden(self, row, hidden):
+        """Hide/show the `row` in the preview list.
+        """
+        self.__previewList.setRowHidden(row, hidden)
+
+    def isRowHidden(self, row):
+        return self.__previewList.isRowHidden(row)
+
     def setPreviewDelegate(self, delegate):
         """Set the delegate to render the preview images.
         """
@@ -2,13 +2,17 @@
 A dialog widget for selecting an item.
 """
 
+import six
+
 from AnyQt.QtWidgets import (
-    QDialog, QWidget, QVBoxLayout, QDialogButtonBox, QLabel, QSizePolicy
+    QDialog, QWidget, QVBoxLayout, QHBoxLayout, QDialogButtonBox, QLabel,
+    QLineEdit, QSizePolicy
 )
 from AnyQt.QtCore import Qt, QStringListModel
 from AnyQt.QtCore import pyqtSignal as Signal
 
 from . import previewbrowser
+from ..utils import qtcompat
 
 
 class PreviewDialog(QDialog):
@@ -36,6 +40,16 @@ class PreviewDialog(QDialog):
 
         self.__heading.setContentsMargins(12, 12, 12, 0)
 
+        self.__search = QLineEdit(
+            self, objectName="search-line",
+            placeholderText=self.tr("Search (use 'widget:Name' to search "
+                                    "by the used widgets)"),
+        )
+        self.__search.textChanged.connect(self.__on_searchTextChanged)
+        search_l = QHBoxLayout()
+        search_l.setContentsMargins(12, 0, 12, 0)
+        search_l.addWidget(self.__search)
+
         self.__browser = previewbrowser.PreviewBrowser(self)
 
         self.__buttons = QDialogButtonBox(QDialogButtonBox.Open | \
@@ -57,6 +71,7 @@ class PreviewDialog(QDialog):
         buttons_l.addWidget(self.__buttons)
 
         layout.addWidget(self.__heading)
+        layout.addLayout(search_l)
         layout.addWidget(self.__browser)
 
         layout.addWidget(buttons)
@@ -106,6 +121,49 @@ class PreviewDialog(QDialog):
     def heading(self):
         """Return the heading string.
         """
+        return self.__heading.text()
+
+    def setSearchText(self, text):
+        """Set the search text filtering the shown items.
+        """
+        self.__search.setText(text)
+
+    def searchText(self):
+        return six.text_type(self.__search.text())
+
+    def __on_searchTextChanged(self, text):
+        text = six.text_type(text)
+        model = self.model()
+        if model is None:
+            return
+        catalog = getattr(model, "catalog", lambda: None)()
+        if catalog is not None and text.strip():
+            matches = set(info.path for info in catalog.search(text))
+
+            def match(index):
+                path = qtcompat.qunwrap(index.data(Qt.StatusTipRole))
+                return path in matches
+        else:
+            terms = text.lower().split()
+
+            def match(index):
+                contents = u" ".join(
+                    six.text_type(qtcompat.qunwrap(index.data(role)) or u"")
+                    for role in (Qt.DisplayRole, Qt.WhatsThisRole)
+                ).lower()
+                return all(term in contents for term in terms)
+
+        first = -1
+        for row in range(model.rowCount()):
+            hidden = not match(model.index(row, 0))
+            self.__browser.setRowHidden(row, hidden)
+            if not hidden and first == -1:
+                first = row
+
+        current = self.currentIndex()
+        if current == -1 or self.__browser.isRowHidden(current):
+            self.setCurrentIndex(first)
+
     def __on_currentIndexChanged(self, index):
         button = self.__buttons.button(QDialogButtonBox.Open)
         button.setEnabled(index >= 0)
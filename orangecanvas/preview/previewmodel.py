@@ -2,6 +2,7 @@
 Preview item model.
 """
 
+import os
 import logging
 import six
 
@@ -13,6 +14,7 @@ from AnyQt.QtGui import (
 from AnyQt.QtSvg import QSvgRenderer
 # pylint: disable=unused-import
 from AnyQt.QtCore import Qt, QTimer, QRectF, QRect, QSize
+from AnyQt.QtCore import pyqtSignal as Signal
 
 from . import scanner
 from ..utils.qtcompat import qunwrap
@@ -46,19 +48,44 @@ UNKNOWN_SVG = \
 
 class PreviewModel(QStandardItemModel):
     """A model for preview items.
+
+    If a :class:`~.catalog.WorkflowCatalog` is set, the items are
+    updated from (and indexed into) the catalog in a background thread.
     """
+    # Emitted (from a worker thread) when the catalog indexing of the
+    # items finishes
+    _indexed = Signal(object)
+    # Emitted (from a worker thread) when the catalog scan finishes
+    _scanned = Signal(object)
 
-    def __init__(self, parent=None, items=None):
+    def __init__(self, parent=None, items=None, catalog=None):
         QStandardItemModel.__init__(self, parent)
 
         if items is not None:
             self.insertColumn(0, items)
 
         self.__timer = QTimer(self)
+        self.__catalog = catalog
+        self._indexed.connect(self.__onIndexed)
+        self._scanned.connect(self.__onScanned)
+
+    def setCatalog(self, catalog):
+        """Set the workflow catalog backing the items.
+        """
+        self.__catalog = catalog
+
+    def catalog(self):
+        """Return the workflow catalog (or None).
+        """
+        return self.__catalog
 
     def delayedScanUpdate(self, delay=10):
         """Run a delayed preview item scan update.
         """
+        if self.__catalog is not None:
+            self.__catalogScanUpdate(delay)
+            return
+
         def iter_update(items):
             for item in items:
                 try:
@@ -84,6 +111,90 @@ class PreviewModel(QStandardItemModel):
         self.__timer.timeout.connect(process_one)
         self.__timer.start(delay)
 
+    def scanCatalog(self, delay=10):
+        """Scan the catalog directories in a background thread and then
+        fill the model with the catalog's workflows.
+        """
+        future = self.__catalog.scan_async()
+
+        def done(f):
+            try:
+                self._scanned.emit((f, delay))
+            except RuntimeError:
+                # The model was already deleted
+                pass
+
+        future.add_done_callback(done)
+
+    def __onScanned(self, args):
+        future, delay = args
+        try:
+            future.result()
+        except Exception:
+            log.error("Could not scan the workflow catalog", exc_info=True)
+        items = catalog_items(self.__catalog)
+        for item in items:
+            self.appendRow(item)
+        if items:
+            self.__catalogScanUpdate(delay)
+
+    def __catalogScanUpdate(self, delay):
+        items = [self.item(i) for i in range(self.rowCount())]
+        paths = [item.path() for item in items]
+        future = self.__catalog.index_files_async(paths)
+
+        def done(f):
+            try:
+                self._indexed.emit((f, items, delay))
+            except RuntimeError:
+                # The model was already deleted
+                pass
+
+        future.add_done_callback(done)
+
+    def __onIndexed(self, args):
+        future, items, delay = args
+        try:
+            infos = future.result()
+        except Exception:
+            log.error("Could not index the workflows", exc_info=True)
+            return
+        for item, info in zip(items, infos):
+            scanner.update_from_info(item, info)
+
+        # Thumbnails not embedded in the files are rendered in the GUI
+        # thread (and stored in the catalog)
+        pending = iter([item for item, info in zip(items, infos)
+                        if info is not None and not info.thumbnail])
+        catalog = self.__catalog
+
+        def process_one():
+            item = next(pending, None)
+            if item is None:
+                self.__timer.timeout.disconnect(process_one)
+                self.__timer.stop()
+            else:
+                scanner.render_thumbnail(item, catalog)
+
+        self.__timer.timeout.connect(process_one)
+        self.__timer.start(delay)
+
+
+def catalog_items(catalog):
+    """Return a list of :class:`PreviewItem` for all the workflows
+    indexed in the `catalog`.
+    """
+    items = []
+    for info in catalog.search():
+        item = PreviewItem(
+            name=info.title or os.path.basename(info.path),
+            description=info.description or None,
+            path=info.path)
+        if info.thumbnail:
+            item.setThumbnail(info.thumbnail)
+        items.append(item)
+    return items
+
 
 class PreviewItem(QStandardItem):
     """A preview item.
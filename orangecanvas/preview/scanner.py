@@ -176,3 +176,42 @@ def scan_update(item):
 
     if svg:
         item.setThumbnail(svg)
+
+
+def update_from_info(item, info):
+    """Update the preview item's contents from a catalog `info`
+    (a :class:`~.catalog.WorkflowInfo` or None if the file is not
+    available).
+
+    """
+    if info is None:
+        item.setEnabled(False)
+        item.setSelectable(False)
+        return
+
+    if info.title and item.name() != info.title:
+        item.setName(info.title)
+
+    if item.description() != info.description:
+        item.setDescription(info.description)
+
+    if info.thumbnail:
+        item.setThumbnail(info.thumbnail)
+
+
+def render_thumbnail(item, catalog=None):
+    """Render the thumbnail of the item's scheme file, set it on the item
+    and store it in the `catalog`.
+
+    """
+    path = item.path()
+    try:
+        svg = scheme_svg_thumbnail(path)
+    except Exception:
+        log.error("Could not render scheme preview for %r", path,
+                  exc_info=True)
+        return
+    if svg:
+        item.setThumbnail(svg)
+        if catalog is not None:
+            catalog.set_thumbnail(path, svg)
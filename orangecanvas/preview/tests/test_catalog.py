@@ -0,0 +1,173 @@
+"""
+Tests for the workflow catalog.
+
+"""
+import os
+import shutil
+import tempfile
+import unittest
+
+from AnyQt.QtCore import QCoreApplication
+
+from ...gui import test
+from ..catalog import WorkflowCatalog, parse_workflow
+from ..previewmodel import PreviewModel, PreviewItem
+from ..previewdialog import PreviewDialog
+
+OWS = u"""\
+<?xml version="1.0" encoding="utf-8"?>
+<scheme title="{title}" description="{description}" version="2.0" >
+ <nodes>
+{nodes}
+ </nodes>
+ <links />
+ <node_properties>
+  <properties format="literal" node_id="0">{{'garbage': 1}}</properties>
+ </node_properties>
+ {thumbnail}
+</scheme>
+"""
+
+
+def write_ows(path, title, description="", widgets=(), thumbnail=""):
+    nodes = "\n".join(
+        '  <node id="{0}" name="{1}" qualified_name="a.{1}" />'
+        .format(i, name) for i, name in enumerate(widgets))
+    if thumbnail:
+        thumbnail = "<thumbnail>{}</thumbnail>".format(thumbnail)
+    with open(path, "w") as f:
+        f.write(OWS.format(title=title, description=description,
+                           nodes=nodes, thumbnail=thumbnail))
+
+
+class TestWorkflowCatalog(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.sub = os.path.join(self.dir, "sub")
+        os.makedirs(self.sub)
+        self.a = os.path.join(self.dir, "a.ows")
+        self.b = os.path.join(self.sub, "b.ows")
+        write_ows(self.a, "Iris", "Explore the iris data",
+                  ["File", "Scatter Plot"])
+        write_ows(self.b, "Housing", "Regression 100%",
+                  ["File", "Linear Regression"], thumbnail="svg")
+        with open(os.path.join(self.dir, "notes.txt"), "w") as f:
+            f.write("not a workflow")
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def test_parse(self):
+        info = parse_workflow(self.b)
+        self.assertEqual(info.title, "Housing")
+        self.assertEqual(info.widgets, ("File", "Linear Regression"))
+        self.assertEqual(info.thumbnail, "svg")
+        self.assertEqual(info.size, os.path.getsize(self.b))
+
+    def test_scan_and_search(self):
+        catalog = WorkflowCatalog(max_workers=2)
+        self.addCleanup(catalog.close)
+        catalog.add_directory(self.dir)
+        self.assertEqual(catalog.scan(), (2, 0))
+        self.assertEqual(len(catalog), 2)
+        # Nothing changed
+        self.assertEqual(catalog.scan(), (0, 0))
+
+        titles = lambda infos: [info.title for info in infos]
+        self.assertEqual(titles(catalog.search()), ["Housing", "Iris"])
+        self.assertEqual(titles(catalog.search("iris")), ["Iris"])
+        self.assertEqual(titles(catalog.search("scatter")), ["Iris"])
+        self.assertEqual(titles(catalog.search("widget:file")),
+                         ["Housing", "Iris"])
+        self.assertEqual(titles(catalog.search("widget:regression data")),
+                         [])
+        self.assertEqual(titles(catalog.search("100%")), ["Housing"])
+        self.assertEqual(titles(catalog.search("0%")), ["Housing"])
+        self.assertEqual(titles(catalog.search("_")), [])
+        self.assertEqual(dict(catalog.widget_usage())["File"], 2)
+
+        # Modify, remove and add files
+        write_ows(self.a, "Iris flowers", widgets=["File"])
+        os.remove(self.b)
+        write_ows(os.path.join(self.sub, "c.ows"), "Zoo")
+        self.assertEqual(catalog.scan(), (2, 1))
+        self.assertEqual(titles(catalog.search()), ["Iris flowers", "Zoo"])
+        self.assertEqual(titles(catalog.search("widget:scatter")), [])
+        self.assertIsNone(catalog.get(self.b))
+
+        catalog.remove_directory(self.dir)
+        self.assertEqual(len(catalog), 0)
+
+    def test_index_files(self):
+        filename = os.path.join(self.dir, "catalog.sqlite")
+        catalog = WorkflowCatalog(filename)
+        missing = os.path.join(self.dir, "missing.ows")
+        infos = catalog.index_files([self.a, missing])
+        self.assertEqual(infos[0].title, "Iris")
+        self.assertIsNone(infos[1])
+        catalog.set_thumbnail(self.a, "<svg/>")
+        catalog.close()
+
+        # persistent
+        catalog = WorkflowCatalog(filename)
+        self.addCleanup(catalog.close)
+        self.assertEqual(catalog.get(self.a).thumbnail, "<svg/>")
+        # a.ows is already indexed and unchanged
+        self.assertEqual(catalog.scan_async([self.dir]).result(), (1, 0))
+        self.assertEqual(catalog.index_files_async([self.a]).result()[0],
+                         catalog.lookup(self.a))
+
+
+class TestCatalogPreview(test.QAppTestCase):
+    def setUp(self):
+        super(TestCatalogPreview, self).setUp()
+        self.dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+        super(TestCatalogPreview, self).tearDown()
+
+    def test_preview_model(self):
+        a, b = os.path.join(self.dir, "a.ows"), os.path.join(self.dir, "b.ows")
+        write_ows(a, "Iris", widgets=["File"], thumbnail="<svg/>")
+        write_ows(b, "Zoo", widgets=["Table"], thumbnail="<svg/>")
+        catalog = WorkflowCatalog()
+        self.addCleanup(catalog.close)
+        items = [PreviewItem(path=a), PreviewItem(path=b),
+                 PreviewItem(path=os.path.join(self.dir, "missing.ows"))]
+        model = PreviewModel(items=items, catalog=catalog)
+        model.delayedScanUpdate(delay=0)
+        for _ in range(100):
+            if items[0].name() == "Iris":
+                break
+            catalog.index_files_async([]).result()
+            QCoreApplication.processEvents()
+        self.assertEqual([item.name() for item in items[:2]], ["Iris", "Zoo"])
+        self.assertFalse(items[2].isEnabled())
+
+        dialog = PreviewDialog()
+        dialog.setModel(model)
+        dialog.setSearchText("widget:table")
+        self.assertEqual(dialog.currentIndex(), 1)
+        dialog.setSearchText("")
+        dialog.setCurrentIndex(0)
+        self.assertEqual(dialog.currentIndex(), 0)
+        dialog.deleteLater()
+
+    def test_preview_model_scan(self):
+        write_ows(os.path.join(self.dir, "a.ows"), "Iris",
+                  thumbnail="<svg/>")
+        catalog = WorkflowCatalog()
+        self.addCleanup(catalog.close)
+        catalog.add_directory(self.dir)
+        model = PreviewModel(catalog=catalog)
+        model.scanCatalog(delay=0)
+        # The scan runs in the background
+        self.assertEqual(model.rowCount(), 0)
+        for _ in range(100):
+            if model.rowCount():
+                break
+            catalog.index_files_async([]).result()
+            QCoreApplication.processEvents()
+        self.assertEqual(model.rowCount(), 1)
+        self.assertEqual(model.item(0).name(), "Iris")
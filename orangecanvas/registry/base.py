@@ -54,6 +54,8 @@ class WidgetRegistry(object):
         # WidgetDecriptions by qualified name
         self._widgets_dict = {}
 
+        self._init_indexes()
+
         if other is not None:
             if not isinstance(other, WidgetRegistry):
                 raise TypeError("Expected a 'WidgetRegistry' got %r." \
@@ -62,6 +64,57 @@ class WidgetRegistry(object):
             self.registry = list(other.registry)
             self._categories_dict = dict(other._categories_dict)
             self._widgets_dict = dict(other._widgets_dict)
+            for desc in self._widgets_dict.values():
+                self._index_widget(desc)
+
+    def _init_indexes(self):
+        # Indexes derived from the widget descriptions (maintained on
+        # widget insertion)
+        # {replaced qualified name: qualified name}
+        self._replaced_by = {}
+        # {qualified name: ({replaced input name: input name},
+        #                   {replaced output name: output name})}
+        self._channel_replacements = {}
+        # {qualified_name.rsplit(".", 1)[-1]: WidgetDescription}
+        self._short_names = {}
+        # {qualified name: ({input name: InputSignal},
+        #                   {output name: OutputSignal})}
+        self._channels = {}
+        # {type name: type} (resolved lazily)
+        self._types = {}
+
+    def _index_widget(self, desc):
+        qname = desc.qualified_name
+        for replaced in desc.replaces or []:
+            self._replaced_by[replaced] = qname
+
+        inputs, outputs = {}, {}
+        input_repl, output_repl = {}, {}
+        for idesc in desc.inputs or []:
+            inputs.setdefault(idesc.name, idesc)
+            for replaced in idesc.replaces or []:
+                input_repl[replaced] = idesc.name
+        for odesc in desc.outputs or []:
+            outputs.setdefault(odesc.name, odesc)
+            for replaced in odesc.replaces or []:
+                output_repl[replaced] = odesc.name
+        self._channels[qname] = (inputs, outputs)
+        self._channel_replacements[qname] = (input_repl, output_repl)
+        self._short_names[qname.rsplit(".", 1)[-1]] = desc
+
+    def __getstate__(self):
+        state = dict(self.__dict__)
+        # resolved types need not be picklable
+        state["_types"] = {}
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        if "_channels" not in state:
+            # Unpickled from an older version
+            self._init_indexes()
+            for desc in self._widgets_dict.values():
+                self._index_widget(desc)
 
     def categories(self):
         """
@@ -147,6 +200,73 @@ class WidgetRegistry(object):
         """
         return qualified_name in self._widgets_dict
 
+    def widget_by_short_name(self, name):
+        """
+        Return a :class:`WidgetDescription` whose last `qualified_name`
+        component (i.e. the class name) is `name`.
+
+        Raise :class:`KeyError` if the description does not exist.
+
+        """
+        return self._short_names[name]
+
+    def replaced_by(self, qualified_name):
+        """
+        Return the qualified name of a registered widget which replaces
+        (see `WidgetDescription.replaces`) the `qualified_name` or None.
+
+        """
+        return self._replaced_by.get(qualified_name)
+
+    def channel_replacements(self, qualified_name):
+        """
+        Return the input and output channel replacement mappings
+        (`{replaced name: name}` dicts) for the widget with
+        `qualified_name`.
+
+        """
+        return self._channel_replacements.get(qualified_name, ({}, {}))
+
+    def input_channel(self, qualified_name, name):
+        """
+        Return the input channel `name` of the widget with
+        `qualified_name`. Raise :class:`KeyError` if it does not exist.
+
+        """
+        return self._channels[qualified_name][0][name]
+
+    def output_channel(self, qualified_name, name):
+        """
+        Return the output channel `name` of the widget with
+        `qualified_name`. Raise :class:`KeyError` if it does not exist.
+
+        """
+        return self._channels[qualified_name][1][name]
+
+    def channel_type(self, channel):
+        """
+        Return the (resolved) type of the `channel` (an
+        :class:`InputSignal` or :class:`OutputSignal`).
+
+        """
+        try:
+            return self._types[channel.type]
+        except KeyError:
+            from ..utils import name_lookup
+            type_ = self._types[channel.type] = name_lookup(channel.type)
+            return type_
+
+    def compatible_channels(self, source_channel, sink_channel):
+        """
+        Can the `source_channel` be connected to `sink_channel` based
+        on their (resolved) types.
+
+        """
+        source_type = self.channel_type(source_channel)
+        sink_type = self.channel_type(sink_channel)
+        return issubclass(source_type, sink_type) or \
+            (source_channel.dynamic and issubclass(sink_type, source_type))
+
     def register_widget(self, desc):
         """
         Register a :class:`WidgetDescription` instance.
@@ -219,3 +339,4 @@ class WidgetRegistry(object):
         insertion_i = bisect.bisect_right(priorities, priority)
         widgets.insert(insertion_i, desc)
         self._widgets_dict[desc.qualified_name] = desc
+        self._index_widget(desc)
@@ -15,7 +15,6 @@ import logging
 import types
 import pkgutil
 from collections import namedtuple
-import pkg_resources
 
 import six
 
@@ -27,6 +26,7 @@ from .description import (
 from . import VERSION_HEX
 from . import cache, WidgetRegistry
 from . import utils
+from ..utils import entrypoints
 
 log = logging.getLogger(__name__)
 
@@ -75,23 +75,20 @@ class WidgetDiscovery(object):
     def run(self, entry_points_iter):
         """
         Run the widget discovery process from an entry point iterator
-        (yielding :class:`pkg_resources.EntryPoint` instances).
+        (yielding :class:`~orangecanvas.utils.entrypoints.EntryPoint` or
+        :class:`pkg_resources.EntryPoint` instances).
 
         As a convenience, if `entry_points_iter` is a string it will be used
-        to retrieve the iterator using `pkg_resources.iter_entry_points`.
+        to retrieve the iterator using `entrypoints.iter_entry_points`.
 
         """
         if isinstance(entry_points_iter, six.string_types):
             entry_points_iter = \
-                pkg_resources.iter_entry_points(entry_points_iter)
+                entrypoints.iter_entry_points(entry_points_iter)
 
         for entry_point in entry_points_iter:
             try:
                 point = entry_point.resolve()
-            except pkg_resources.DistributionNotFound:
-                log.error("Could not load '%s' (unsatisfied dependencies).",
-                          entry_point, exc_info=True)
-                continue
             except ImportError:
                 log.error("An ImportError occurred while loading "
                           "entry point '%s'", entry_point, exc_info=True)
@@ -480,16 +477,14 @@ def module_modified_time(module):
 
     """
     module = asmodule(module)
-    name = module.__name__
     module_filename = module.__file__
 
-    provider = pkg_resources.get_provider(name)
-    if provider.loader:
-        m_time = os.stat(provider.loader.archive)[stat.ST_MTIME]
+    archive = getattr(getattr(module, "__loader__", None), "archive", None)
+    if archive is not None:
+        # zipimport
+        m_time = os.stat(archive)[stat.ST_MTIME]
     else:
-        basename = os.path.basename(module_filename)
-        path = pkg_resources.resource_filename(name, basename)
-        m_time = os.stat(path)[stat.ST_MTIME]
+        m_time = os.stat(module_filename)[stat.ST_MTIME]
     return (module_filename, m_time)
 
 
@@ -0,0 +1,479 @@
+"""
+Widget description search index.
+
+An inverted index over the widget descriptions (names, keywords, channel
+names, descriptions and optionally the contents of locally available help
+pages) used for the quick menu search.
+
+"""
+import os
+import io
+import re
+import json
+import bisect
+import hashlib
+import logging
+
+from collections import defaultdict, namedtuple
+
+import six
+
+from six.moves import html_parser
+from six.moves.urllib.parse import urlparse
+
+from .. import config
+from ..utils.lazyimport import lazy_import
+
+numpy = lazy_import("numpy")
+
+log = logging.getLogger(__name__)
+
+
+#: Field weights (a match in the widget's name ranks higher then a match
+#: in its description)
+FIELD_WEIGHTS = [
+    ("name", 10.0),
+    ("keywords", 5.0),
+    ("channels", 2.0),
+    ("description", 1.0),
+    ("help", 0.5),
+]
+
+#: Score multipliers for exact term, term prefix and term substring matches
+EXACT, PREFIX, SUBSTRING = 1.0, 0.8, 0.4
+
+_word_re = re.compile(r"\w+", re.UNICODE)
+
+
+def tokenize(text):
+    """
+    Split `text` into a list of lower case words.
+    """
+    if not text:
+        return []
+    return _word_re.findall(six.text_type(text).lower())
+
+
+def trigrams(term):
+    """
+    Return the set of all 3 character substrings of `term`.
+    """
+    return set(term[i: i + 3] for i in range(len(term) - 2))
+
+
+def description_fields(desc):
+    """
+    Return a list of (field, text) tuples to index for a widget description.
+    """
+    keywords = desc.keywords or []
+    if isinstance(keywords, six.string_types):
+        keywords = [keywords]
+    channels = [ch.name for ch in list(desc.inputs or []) +
+                list(desc.outputs or [])]
+    return [("name", desc.name or ""),
+            ("keywords", " ".join(keywords)),
+            ("channels", " ".join(channels)),
+            ("description", desc.description or "")]
+
+
+def description_signature(desc, *extra):
+    """
+    Return a signature (hash) of the indexed contents of a description.
+    """
+    contents = json.dumps([description_fields(desc), list(extra)],
+                          sort_keys=True)
+    return hashlib.sha1(contents.encode("utf-8")).hexdigest()
+
+
+_Compiled = namedtuple(
+    "_Compiled",
+    ["terms", "term_index", "offsets", "docs", "weights", "doc_ids"]
+)
+
+
+class SearchIndex(object):
+    """
+    An inverted index with prefix and trigram (substring) lookup over
+    widget descriptions.
+
+    Documents are identified by the description's `qualified_name`.
+
+    Parameters
+    ----------
+    help : bool
+        Also index the contents of locally available help pages
+        (see :func:`local_help_path`).
+    """
+    #: Version of the persisted format
+    VERSION = 1
+
+    def __init__(self, help=False):
+        # index the contents of local help pages
+        self.__help = help
+        # doc id -> (signature, {term: weight})
+        self.__docs = {}
+        # term -> {doc id: weight}
+        self.__postings = {}
+        # trigram -> set of terms
+        self.__trigrams = defaultdict(set)
+        # compiled term postings (for prefix lookup, built lazily)
+        self.__terms = None
+        self.__modified = False
+
+    def __len__(self):
+        return len(self.__docs)
+
+    def __contains__(self, doc_id):
+        return doc_id in self.__docs
+
+    def helpEnabled(self):
+        """
+        Are the local help pages indexed.
+        """
+        return self.__help
+
+    def isModified(self):
+        """
+        Was the index modified since it was last loaded/saved.
+        """
+        return self.__modified
+
+    def signature(self, doc_id):
+        """
+        Return the stored signature for `doc_id` (or None if not indexed).
+        """
+        doc = self.__docs.get(doc_id)
+        return doc[0] if doc is not None else None
+
+    def add(self, desc):
+        """
+        Add (or update) a widget description to the index.
+
+        The description is reindexed only if its contents (or the contents
+        of its local help page if help indexing is enabled) changed.
+
+        Return True if the index was changed.
+        """
+        path = local_help_path(desc) if self.__help else None
+        stamp = None
+        if path is not None:
+            try:
+                st = os.stat(path)
+            except OSError:
+                path = None
+            else:
+                stamp = [path, st.st_mtime, st.st_size]
+
+        signature = description_signature(desc, stamp)
+        doc_id = desc.qualified_name
+        if self.signature(doc_id) == signature:
+            return False
+
+        text = help_text(path) if path is not None else None
+        weights = {}
+        fields = description_fields(desc) + [("help", text or "")]
+        field_weights = dict(FIELD_WEIGHTS)
+        for field, value in fields:
+            weight = field_weights[field]
+            for term in tokenize(value):
+                if weights.get(term, 0) < weight:
+                    weights[term] = weight
+
+        self.__insert(doc_id, signature, weights)
+        return True
+
+    def remove(self, doc_id):
+        """
+        Remove the document `doc_id` from the index.
+        """
+        doc = self.__docs.pop(doc_id, None)
+        if doc is None:
+            return False
+
+        _, weights = doc
+        for term in weights:
+            postings = self.__postings[term]
+            del postings[doc_id]
+            if not postings:
+                del self.__postings[term]
+                for trigram in trigrams(term):
+                    terms = self.__trigrams[trigram]
+                    terms.discard(term)
+                    if not terms:
+                        del self.__trigrams[trigram]
+        self.__terms = None
+        self.__modified = True
+        return True
+
+    def update(self, descriptions):
+        """
+        Update the index to contain exactly `descriptions`.
+
+        Only the descriptions whose contents changed are reindexed.
+
+        Return True if the index was changed.
+        """
+        changed = False
+        ids = set()
+        for desc in descriptions:
+            ids.add(desc.qualified_name)
+            changed |= self.add(desc)
+
+        for doc_id in set(self.__docs) - ids:
+            changed |= self.remove(doc_id)
+        return changed
+
+    def clear(self):
+        self.__docs.clear()
+        self.__postings.clear()
+        self.__trigrams.clear()
+        self.__terms = None
+        self.__modified = True
+
+    def __insert(self, doc_id, signature, weights):
+        self.remove(doc_id)
+        self.__docs[doc_id] = (signature, weights)
+        for term, weight in weights.items():
+            postings = self.__postings.get(term)
+            if postings is None:
+                postings = self.__postings[term] = {}
+                for trigram in trigrams(term):
+                    self.__trigrams[trigram].add(term)
+            postings[doc_id] = weight
+        self.__terms = None
+        self.__modified = True
+
+    def __compiled(self):
+        # Return the index 'compiled' into flat arrays: sorted terms, their
+        # (doc, weight) postings concatenated in term order and the offsets
+        # into them (so a range of terms with a common prefix is a single
+        # slice).
+        if self.__terms is None:
+            terms = sorted(self.__postings)
+            doc_ids = sorted(self.__docs)
+            doc_index = {doc_id: i for i, doc_id in enumerate(doc_ids)}
+            offsets = numpy.zeros(len(terms) + 1, dtype=int)
+            docs, weights = [], []
+            for i, term in enumerate(terms):
+                postings = self.__postings[term]
+                docs.extend(doc_index[doc_id] for doc_id in postings)
+                weights.extend(postings.values())
+                offsets[i + 1] = len(docs)
+            self.__terms = _Compiled(
+                terms, {term: i for i, term in enumerate(terms)}, offsets,
+                numpy.array(docs, dtype=int),
+                numpy.array(weights, dtype=float),
+                doc_ids)
+        return self.__terms
+
+    def __match_word(self, word, scores):
+        # Fill `scores` (indexed by document) with the best score of
+        # a term matching `word`
+        c = self.__compiled()
+        terms, offsets = c.terms, c.offsets
+
+        def accumulate(start, end, multiplier):
+            start, end = offsets[start], offsets[end]
+            if start < end:
+                docs = c.docs[start: end]
+                weights = c.weights[start: end] * multiplier
+                if end - start > 1:
+                    # Sort by weight so the max weight is assigned last
+                    # for any document repeated in the range
+                    order = numpy.argsort(weights, kind="mergesort")
+                    docs, weights = docs[order], weights[order]
+                scores[docs] = numpy.maximum(scores[docs], weights)
+
+        i = bisect.bisect_left(terms, word)
+        if i < len(terms) and terms[i] == word:
+            accumulate(i, i + 1, EXACT)
+            i += 1
+        # all terms starting with word are in a contiguous range
+        j = bisect.bisect_left(terms, word + u"\U0010ffff", lo=i)
+        accumulate(i, j, PREFIX)
+
+        grams = trigrams(word)
+        if grams:
+            candidates = None
+            for gram in grams:
+                terms_ = self.__trigrams.get(gram)
+                if not terms_:
+                    candidates = None
+                    break
+                candidates = set(terms_) if candidates is None \
+                             else candidates & terms_
+                if not candidates:
+                    break
+            for term in candidates or ():
+                if word in term and not term.startswith(word):
+                    k = c.term_index[term]
+                    accumulate(k, k + 1, SUBSTRING)
+
+    def search(self, query, limit=None):
+        """
+        Search the index.
+
+        All words in the `query` must match (as a whole term, term prefix
+        or a term substring of at least 3 characters).
+
+        Return a list of (doc id, score) tuples sorted by decreasing score.
+        """
+        words = tokenize(query)
+        if not words or not self.__docs:
+            return []
+
+        c = self.__compiled()
+        total = None
+        # Match the longest (most selective) words first
+        for word in sorted(set(words), key=len, reverse=True):
+            scores = numpy.zeros(len(c.doc_ids))
+            self.__match_word(word, scores)
+            if total is None:
+                total = scores
+            else:
+                total = numpy.where((scores > 0) & (total > 0), total + scores, 0)
+            if not total.any():
+                return []
+
+        matched = numpy.flatnonzero(total)
+        # sort by decreasing score (and doc id, as doc_ids are sorted)
+        matched = matched[numpy.lexsort((matched, -total[matched]))]
+        if limit is not None:
+            matched = matched[:limit]
+        return [(c.doc_ids[i], float(total[i])) for i in matched]
+
+    def to_dict(self):
+        """
+        Return a json serializable representation of the index.
+        """
+        docs = {doc_id: [signature, weights]
+                for doc_id, (signature, weights) in self.__docs.items()}
+        return {"version": self.VERSION, "help": self.__help, "docs": docs}
+
+    @classmethod
+    def from_dict(cls, data):
+        """
+        Create the index from a :func:`to_dict` representation.
+        """
+        if data.get("version") != cls.VERSION:
+            raise ValueError("Unsupported index version")
+        index = cls(help=data.get("help", False))
+        for doc_id, (signature, weights) in data["docs"].items():
+            index.__insert(doc_id, signature, weights)
+        index.__modified = False
+        return index
+
+    @classmethod
+    def load(cls, filename):
+        """
+        Load a previously saved index from `filename`.
+        """
+        with io.open(filename, "r", encoding="utf-8") as f:
+            return cls.from_dict(json.load(f))
+
+    def save(self, filename):
+        """
+        Save the index to `filename`.
+        """
+        tmpname = filename + ".tmp"
+        with io.open(tmpname, "w", encoding="utf-8") as f:
+            f.write(six.text_type(json.dumps(self.to_dict())))
+        os.replace(tmpname, filename)
+        self.__modified = False
+
+
+def local_help_path(desc):
+    """
+    Return the local filesystem path of the description's help page or
+    None if the help is not available locally.
+    """
+    helpref = desc.help
+    if not helpref or not isinstance(helpref, six.string_types):
+        return None
+    parsed = urlparse(helpref)
+    if parsed.scheme == "file":
+        # (urllib.request is slow to import)
+        from six.moves.urllib.request import url2pathname
+        path = url2pathname(parsed.path)
+    elif os.path.isabs(helpref):
+        path = helpref
+    else:
+        return None
+    return path if os.path.isfile(path) else None
+
+
+class _TextExtractor(html_parser.HTMLParser):
+    # Collect the text contents of an html document
+    def __init__(self):
+        html_parser.HTMLParser.__init__(self)
+        self.text = []
+        self.__skip = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in ("script", "style"):
+            self.__skip += 1
+
+    def handle_endtag(self, tag):
+        if tag in ("script", "style") and self.__skip:
+            self.__skip -= 1
+
+    def handle_data(self, data):
+        if not self.__skip:
+            self.text.append(data)
+
+
+def html_text(contents):
+    """
+    Return the text contents of the html document `contents`.
+    """
+    parser = _TextExtractor()
+    parser.feed(contents)
+    parser.close()
+    return " ".join(parser.text)
+
+
+def help_text(path):
+    """
+    Return the text contents of the html help page at `path`.
+    """
+    try:
+        with io.open(path, "r", encoding="utf-8", errors="replace") as f:
+            return html_text(f.read())
+    except (OSError, IOError):
+        log.warning("Could not read help page %r", path, exc_info=True)
+        return None
+
+
+def search_index_filename():
+    """Return the search index cache filename.
+    """
+    default = os.path.join(config.cache_dir(), "search-index.json")
+    return config.rc.get("registry.search-index", default)
+
+
+def cached_search_index(registry, help=True):
+    """
+    Return a :class:`SearchIndex` for the widgets in `registry`.
+
+    The index is loaded from (and the updated index saved to) the
+    application's cache directory so only changed descriptions need
+    to be reindexed.
+    """
+    filename = search_index_filename()
+    index = None
+    if os.path.exists(filename):
+        try:
+            index = SearchIndex.load(filename)
+        except Exception:
+            log.error("Could not load the search index.", exc_info=True)
+    if index is None or index.helpEnabled() != help:
+        index = SearchIndex(help=help)
+
+    index.update(registry.widgets())
+
+    if index.isModified():
+        try:
+            index.save(filename)
+        except (OSError, IOError):
+            log.error("Could not save the search index.", exc_info=True)
+    return index
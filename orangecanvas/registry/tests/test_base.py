@@ -104,3 +104,44 @@ class TestRegistry(unittest.TestCase):
                             for desc in [one_desc, zero_desc, sub_desc,
                                          add_desc])
                         )
+
+    def test_registry_indexes(self):
+        from . import small_testing_registry
+        import pickle
+
+        reg = small_testing_registry()
+        negate = description.WidgetDescription(
+            "negate", "negate", "Operators",
+            qualified_name="orangecanvas.tests.negate",
+            replaces=["orangecanvas.tests.minus"],
+            inputs=[description.InputSignal(
+                "value", "int", "set_value", replaces=["x"])],
+            outputs=[description.OutputSignal(
+                "value", "int", replaces=["y"])]
+        )
+        reg.register_widget(negate)
+
+        def check(reg):
+            self.assertIs(reg.widget_by_short_name("negate"),
+                          reg.widget("orangecanvas.tests.negate"))
+            with self.assertRaises(KeyError):
+                reg.widget_by_short_name("minus")
+            self.assertEqual(reg.replaced_by("orangecanvas.tests.minus"),
+                             "orangecanvas.tests.negate")
+            self.assertIsNone(reg.replaced_by("minus"))
+            self.assertEqual(
+                reg.channel_replacements("orangecanvas.tests.negate"),
+                ({"x": "value"}, {"y": "value"}))
+            self.assertEqual(reg.channel_replacements("zero"), ({}, {}))
+
+            source = reg.output_channel("zero", "value")
+            sink = reg.input_channel("orangecanvas.tests.negate", "value")
+            self.assertIs(source, reg.widget("zero").outputs[0])
+            with self.assertRaises(KeyError):
+                reg.input_channel("zero", "value")
+            self.assertIs(reg.channel_type(source), int)
+            self.assertTrue(reg.compatible_channels(source, sink))
+
+        check(reg)
+        check(WidgetRegistry(reg))
+        check(pickle.loads(pickle.dumps(reg)))
@@ -0,0 +1,150 @@
+"""
+Test the widget description search index.
+"""
+import os
+import io
+import time
+import shutil
+import logging
+import tempfile
+import unittest
+
+from ..description import WidgetDescription, InputSignal, OutputSignal
+from ..search import SearchIndex, tokenize, html_text
+
+from . import small_testing_registry
+
+log = logging.getLogger(__name__)
+
+
+def widget(name, keywords=None, description=None, inputs=(), outputs=(),
+           help=None):
+    return WidgetDescription(
+        name, name.lower(), qualified_name="test." + name.replace(" ", ""),
+        keywords=keywords, description=description, help=help,
+        inputs=[InputSignal(n, "object", "set_" + n) for n in inputs],
+        outputs=[OutputSignal(n, "object") for n in outputs])
+
+
+class TestSearchIndex(unittest.TestCase):
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def ids(self, index, query):
+        return [doc_id for doc_id, _ in index.search(query)]
+
+    def test_tokenize(self):
+        self.assertEqual(tokenize(u"Scatter-Plot (2D)"),
+                         [u"scatter", u"plot", u"2d"])
+        self.assertEqual(tokenize(None), [])
+
+    def test_search(self):
+        index = SearchIndex()
+        index.update([
+            widget("Scatter Plot", keywords=["scatterplot"],
+                   description="Interactive 2D visualization",
+                   inputs=["Data"]),
+            widget("Box Plot", description="Distribution of values"),
+            widget("File", description="Read data from a file",
+                   outputs=["Data"]),
+            widget("Distributions", keywords=["histogram"]),
+        ])
+        self.assertEqual(len(index), 4)
+
+        # exact name match ranks above a description/channel match
+        self.assertEqual(self.ids(index, "file")[0], "test.File")
+        # prefix
+        self.assertEqual(self.ids(index, "scat"), ["test.ScatterPlot"])
+        self.assertEqual(set(self.ids(index, "plot")),
+                         {"test.ScatterPlot", "test.BoxPlot"})
+        # substring (trigram)
+        self.assertEqual(self.ids(index, "togra"), ["test.Distributions"])
+        # name before description
+        self.assertEqual(self.ids(index, "distribution"),
+                         ["test.Distributions", "test.BoxPlot"])
+        # all words must match
+        self.assertEqual(self.ids(index, "box dist"), ["test.BoxPlot"])
+        self.assertEqual(self.ids(index, "box file"), [])
+        self.assertEqual(self.ids(index, ""), [])
+        # channel names
+        self.assertEqual(set(self.ids(index, "data")),
+                         {"test.ScatterPlot", "test.File"})
+
+    def test_incremental_update(self):
+        index = SearchIndex()
+        box = widget("Box Plot")
+        self.assertTrue(index.update([box, widget("File")]))
+        self.assertFalse(index.update([box, widget("File")]))
+
+        box.description = "Quartiles"
+        self.assertTrue(index.add(box))
+        self.assertEqual(self.ids(index, "quart"), ["test.BoxPlot"])
+
+        self.assertTrue(index.update([box]))
+        self.assertEqual(self.ids(index, "file"), [])
+        self.assertTrue(index.remove("test.BoxPlot"))
+        self.assertEqual(self.ids(index, "box"), [])
+        self.assertEqual(len(index), 0)
+
+    def test_persist(self):
+        filename = os.path.join(self.tmpdir, "index.json")
+        index = SearchIndex()
+        index.update(small_testing_registry().widgets())
+        self.assertTrue(index.isModified())
+        index.save(filename)
+        self.assertFalse(index.isModified())
+
+        loaded = SearchIndex.load(filename)
+        self.assertFalse(loaded.isModified())
+        self.assertEqual(loaded.search("zero"), index.search("zero"))
+        self.assertFalse(loaded.update(small_testing_registry().widgets()))
+
+    def test_help(self):
+        path = os.path.join(self.tmpdir, "file.html")
+        with io.open(path, "w", encoding="utf-8") as f:
+            f.write(u"<html><head><style>.spreadsheet {}</style></head>"
+                    u"<body><p>Reads a <b>spreadsheet</b></p></body></html>")
+        desc = widget("File", help=path)
+
+        index = SearchIndex()
+        index.add(desc)
+        self.assertEqual(self.ids(index, "spreadsheet"), [])
+
+        index = SearchIndex(help=True)
+        index.add(desc)
+        self.assertEqual(self.ids(index, "spreadsheet"), ["test.File"])
+        self.assertFalse(index.add(desc))
+        self.assertEqual(html_text(u"<p>a <i>b</i><script>c</script></p>")
+                         .split(), ["a", "b"])
+
+    def test_benchmark(self):
+        words = ["data", "plot", "model", "tree", "table", "select", "merge",
+                 "score", "text", "image", "network", "time", "series",
+                 "learner", "cluster", "distance", "matrix", "rank"]
+        widgets = []
+        for i in range(5000):
+            name = "{} {} {}".format(words[i % len(words)],
+                                     words[(i // 7) % len(words)], i)
+            widgets.append(widget(
+                name, keywords=[words[(i // 3) % len(words)]],
+                description=" ".join(words[(i + k) % len(words)]
+                                     for k in range(6)),
+                inputs=["Data"], outputs=["Model"]))
+
+        index = SearchIndex()
+        start = time.perf_counter()
+        index.update(widgets)
+        log.info("Indexed %i widgets in %.1f ms", len(widgets),
+                 (time.perf_counter() - start) * 1000)
+
+        queries = ["d", "da", "dat", "data", "data p", "data pl", "ner",
+                   "netw", "cluster 1234", "xyz"]
+        index.search("warm up")
+        start = time.perf_counter()
+        for query in queries:
+            index.search(query, limit=50)
+        per_query = (time.perf_counter() - start) / len(queries)
+        log.info("Search: %.3f ms per query", per_query * 1000)
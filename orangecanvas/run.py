@@ -0,0 +1,289 @@
+"""
+Orange Canvas headless workflow runner
+
+Run (execute) workflows without the canvas main window and report the
+per node execution statistics as JSON::
+
+    python -m orangecanvas run [options] workflow.ows [workflow.ows ...]
+
+"""
+import os
+import sys
+import io
+import gc
+import json
+import time
+import pickle
+import logging
+import optparse
+
+from AnyQt.QtCore import QCoreApplication, QEvent
+
+from . import utils, config
+from .registry import WidgetRegistry, set_global_registry
+from .registry import cache
+from .scheme import readwrite
+from .scheme.signalmanager import SignalManager
+from .scheme.runner import WorkflowRunner
+from .scheme.tracing import SignalTracer
+from .scheme.outputcache import OutputCache
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+log = logging.getLogger(__name__)
+
+#: The default maximum run time (in seconds) of a single workflow
+DEFAULT_TIMEOUT = 600
+
+NO_SIGNAL_MANAGER_ERROR = (
+    "The configuration cannot execute workflows (its workflow_constructor "
+    "does not create a signal manager)"
+)
+
+
+def max_rss():
+    """
+    Return the peak resident set size of the process (in bytes) or None
+    if not available.
+    """
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform != "darwin":
+        # Linux reports the size in kilobytes
+        rss *= 1024
+    return rss
+
+
+def widget_registry(force_discovery=False):
+    """
+    Return the widget registry.
+
+    The pickled registry stored by the canvas is used if available,
+    otherwise the widget discovery is run (using the cached descriptions
+    unless `force_discovery` is True).
+    """
+    cache_filename = os.path.join(config.cache_dir(), "widget-registry.pck")
+    if not force_discovery and os.path.exists(cache_filename):
+        try:
+            with open(cache_filename, "rb") as f:
+                return pickle.load(f)
+        except Exception:
+            log.error("Could not load the widget registry from %r",
+                      cache_filename, exc_info=True)
+
+    reg_cache = None if force_discovery else cache.registry_cache()
+    registry = WidgetRegistry()
+    discovery = config.widget_discovery(
+        registry, cached_descriptions=reg_cache)
+    discovery.run(config.widgets_entry_points())
+    cache.save_registry_cache(discovery.cached_descriptions)
+    with open(cache_filename, "wb") as f:
+        pickle.dump(registry, f)
+    return registry
+
+
+def signal_manager(scheme):
+    """
+    Return the :class:`SignalManager` of the `scheme` (or None).
+    """
+    manager = getattr(scheme, "signal_manager", None)
+    if manager is None:
+        manager = scheme.findChild(SignalManager)
+    return manager
+
+
+def can_execute_workflows():
+    """
+    Can the current configuration execute workflows (i.e. does its
+    `workflow_constructor` create a scheme with a :class:`SignalManager`)?
+    """
+    scheme = config.workflow_constructor()
+    try:
+        return signal_manager(scheme) is not None
+    finally:
+        scheme.deleteLater()
+
+
+def run_workflow(filename, registry, timeout=DEFAULT_TIMEOUT,
+                 trace_memory=False, trace_dir=None, output_budget=0,
+                 output_cache=None):
+    """
+    Load and run the workflow from `filename`. Return a JSON serializable
+    report dict.
+
+    The run is stopped after `timeout` seconds (None for no limit). If
+    `trace_memory` is True the nodes' peak memory is traced (this slows
+    down the execution considerably).
+    If `trace_dir` is not None the signal manager's events are saved
+    there in the Chrome Trace Event format and their aggregate
+    statistics are included in the report. `output_budget` is the memory
+    budget (in bytes) for the retained node outputs (0 for no limit).
+    `output_cache` is an optional persistent :class:`OutputCache`.
+    """
+    report = {"workflow": filename, "status": None, "errors": []}
+
+    def error_handler(exc):
+        report["errors"].append(str(exc))
+
+    scheme = config.workflow_constructor()
+    manager = signal_manager(scheme)
+    if manager is None:
+        # Do not bother loading a workflow that cannot be executed
+        report.update(status=WorkflowRunner.Error,
+                      errors=[NO_SIGNAL_MANAGER_ERROR])
+        scheme.deleteLater()
+        return report
+
+    start = time.time()
+    try:
+        with io.open(filename, "rb") as f:
+            readwrite.scheme_load(scheme, f, registry=registry,
+                                  error_handler=error_handler)
+    except Exception as ex:
+        log.error("Could not load %r", filename, exc_info=True)
+        report.update(status=WorkflowRunner.Error, errors=[str(ex)])
+        scheme.deleteLater()
+        return report
+    report["load_time"] = time.time() - start
+
+    store = manager.output_store()
+    store.set_directory(os.path.join(config.cache_dir(), "outputs"))
+    store.set_budget(output_budget)
+    manager.set_output_cache(output_cache)
+    cache_hits = []
+    manager.cacheHit.connect(cache_hits.append)
+    if trace_dir is not None:
+        tracer = SignalTracer()
+        manager.set_tracer(tracer)
+    runner = WorkflowRunner(scheme, manager, trace_memory=trace_memory)
+    runner.run(timeout=timeout)
+    report.update(runner.report())
+    report["spilled_outputs"] = store.spilled_count()
+    report["cache_hits"] = len(cache_hits)
+    if trace_dir is not None:
+        manager.set_tracer(None)
+        basename = os.path.splitext(os.path.basename(filename))[0]
+        trace_filename = os.path.join(trace_dir, basename + ".trace.json")
+        tracer.save_chrome_trace(trace_filename)
+        report["trace"] = trace_filename
+        report["signals"] = tracer.statistics()
+
+    # The scheme is responsible for closing/clearing all its resources
+    QCoreApplication.sendEvent(scheme, QEvent(QEvent.Close))
+    scheme.deleteLater()
+    QCoreApplication.sendPostedEvents(None, QEvent.DeferredDelete)
+    gc.collect()
+    report["max_rss"] = max_rss()
+    return report
+
+
+def main(argv=None):
+    if argv is None:
+        argv = sys.argv
+
+    usage = "usage: %prog run [options] workflow_file [workflow_file ...]"
+    parser = optparse.OptionParser(usage=usage)
+    parser.add_option("--force-discovery",
+                      action="store_true",
+                      help="Force full widget discovery "
+                           "(invalidate cache)")
+    parser.add_option("--timeout",
+                      help="Maximum run time for a single workflow "
+                           "(in seconds, 0 for no limit; default %default)",
+                      type="float", default=DEFAULT_TIMEOUT)
+    parser.add_option("--trace-memory",
+                      action="store_true",
+                      help="Trace the nodes' peak memory "
+                           "(memory tracing slows down the execution)")
+    parser.add_option("--trace-dir",
+                      help="Save the signal manager traces (in Chrome "
+                           "Trace Event format) to this directory",
+                      type="str", default=None)
+    parser.add_option("--output-memory-budget",
+                      help="Memory budget (in MB) for the retained node "
+                           "outputs (0 for no limit)",
+                      type="int", default=0)
+    parser.add_option("--output-cache",
+                      action="store_true",
+                      help="Use the persistent node output cache")
+    parser.add_option("-o", "--output",
+                      help="Write the JSON report to a file instead of "
+                           "the standard output",
+                      type="str", default=None)
+    parser.add_option("-l", "--log-level",
+                      help="Logging level (0, 1, 2, 3, 4)",
+                      type="int", default=1)
+    parser.add_option("--config",
+                      help="Configuration namespace",
+                      type="str", default="orangecanvas.example")
+
+    (options, args) = parser.parse_args(argv[1:])
+    if not args:
+        parser.error("No workflow file specified")
+
+    levels = [logging.CRITICAL,
+              logging.ERROR,
+              logging.WARN,
+              logging.INFO,
+              logging.DEBUG]
+
+    logging.basicConfig(level=levels[options.log_level])
+
+    if options.config is not None:
+        try:
+            cfg = utils.name_lookup(options.config)
+        except (ImportError, AttributeError):
+            pass
+        else:
+            config.set_default(cfg)
+
+    # Run without a display
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    from AnyQt.QtWidgets import QApplication
+    app = QApplication(argv[:1])
+
+    # NOTE: config.init() must be called after the QApplication constructor
+    config.init()
+
+    if not can_execute_workflows():
+        parser.error("%s: %s" % (options.config, NO_SIGNAL_MANAGER_ERROR))
+
+    registry = widget_registry(options.force_discovery)
+    set_global_registry(registry)
+
+    if options.output_cache:
+        output_cache = OutputCache(
+            os.path.join(config.cache_dir(), "output-cache"))
+    else:
+        output_cache = None
+
+    reports = []
+    for filename in args:
+        log.info("Running %r", filename)
+        reports.append(
+            run_workflow(filename, registry, timeout=options.timeout or None,
+                         trace_memory=options.trace_memory,
+                         trace_dir=options.trace_dir,
+                         output_budget=options.output_memory_budget * 2 ** 20,
+                         output_cache=output_cache)
+        )
+
+    if options.output is not None:
+        with io.open(options.output, "w", encoding="utf-8") as f:
+            json.dump(reports, f, indent=1)
+    else:
+        json.dump(reports, sys.stdout, indent=1)
+        sys.stdout.write("\n")
+
+    app.processEvents()
+    del app
+    ok = all(r["status"] == WorkflowRunner.Finished for r in reports)
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -14,7 +14,10 @@ inserted into the scheme.
 """
 
 from .node import SchemeNode
-from .link import SchemeLink, compatible_channels, can_connect, possible_links
+from .link import (
+    SchemeLink, compatible_channels, can_connect, possible_links,
+    invalidate_type_cache
+)
 from .scheme import Scheme
 
 from .annotations import (
@@ -0,0 +1,565 @@
+"""
+Node Execution
+==============
+
+Execution backends computing nodes outside of the
+:class:`~.signalmanager.SignalManager`'s :func:`send_to_node` (see
+:func:`SignalManager.set_execution_backend`).
+
+A node designated for isolated execution (:func:`SignalManager.set_isolated`)
+is computed by a *task*: a picklable (module level) function, or the
+qualified name of one, called as ``task(inputs)`` with an
+``{input channel name: value}`` dict and returning an
+``{output channel name: value}`` dict. While it runs the task can use
+:func:`current_context` to access the node's properties and, where the
+backend supports it, report progress and send outputs before it returns.
+
+:class:`ProcessBackend` runs the tasks in a pool of supervised worker
+processes, so a misbehaving computation can neither stall nor crash the
+canvas and CPU bound nodes run in parallel. A crash of a worker fails only
+the task it was running and the worker is restarted for the next task.
+
+Values larger than `min_shared_size` are not streamed through the worker's
+pipe. They are dumped to a file on a shared memory file system
+(``/dev/shm`` where available) which the receiving process memory maps and
+unlinks; with pickle protocol 5 the out-of-band buffers (e.g. numpy array
+data) are used directly from the mapping without a copy.
+
+"""
+import os
+import sys
+import errno
+import shutil
+import logging
+import tempfile
+import threading
+import traceback
+import multiprocessing
+
+from concurrent.futures import Future
+
+import six
+from six.moves import queue
+
+from ..utils import name_lookup
+from .outputstore import dump, load, approx_sizeof
+
+log = logging.getLogger(__name__)
+
+
+class TaskError(Exception):
+    """
+    The task raised an exception in the worker process.
+
+    Attributes
+    ----------
+    type_name : str
+        The name of the exception type.
+    traceback : str
+        The formatted traceback (in the worker).
+    """
+    def __init__(self, message, type_name="", traceback=""):
+        super(TaskError, self).__init__(message)
+        self.type_name = type_name
+        self.traceback = traceback
+
+    def __str__(self):
+        message = super(TaskError, self).__str__()
+        if self.type_name:
+            return "{}: {}".format(self.type_name, message)
+        return message
+
+
+class WorkerCrashedError(Exception):
+    """
+    The worker process exited while running the task.
+    """
+    def __init__(self, message, exitcode=None):
+        super(WorkerCrashedError, self).__init__(message)
+        self.exitcode = exitcode
+
+
+class TaskContext(object):
+    """
+    The context of a running task (see :func:`current_context`).
+
+    Parameters
+    ----------
+    node : dict
+        The node's description (see :func:`node_info`).
+    properties : dict
+        The node's properties.
+    callback : Optional[Callable[[str, Any], None]]
+        Called with ``("progress", value)`` and
+        ``("output", (channel name, value))`` events.
+
+    """
+    def __init__(self, node=None, properties=None, callback=None):
+        self.node = dict(node or {})
+        self.properties = dict(properties or {})
+        self.__callback = callback
+
+    def progress(self, value):
+        """
+        Report the task's progress (a float in the [0, 100] range).
+        """
+        if self.__callback is not None:
+            self.__callback("progress", value)
+
+    def send(self, name, value):
+        """
+        Send the output `value` on channel `name` before the task returns.
+        """
+        if self.__callback is not None:
+            self.__callback("output", (name, value))
+        else:
+            raise RuntimeError("Outputs can not be streamed in this context")
+
+
+_local = threading.local()
+
+
+def current_context():
+    """
+    Return the :class:`TaskContext` of the task running in this thread
+    (or None).
+    """
+    return getattr(_local, "context", None)
+
+
+def node_info(node):
+    """
+    Return a (picklable) dict describing the :class:`SchemeNode` `node`.
+    """
+    desc = node.description
+    return {"title": node.title,
+            "id": desc.id,
+            "name": desc.name,
+            "qualified_name": desc.qualified_name,
+            "version": desc.version,
+            "project_name": desc.project_name}
+
+
+def run_task(task, inputs, context=None):
+    """
+    Run the `task` (a function or its qualified name) with `inputs` and
+    return the outputs dict.
+    """
+    if isinstance(task, six.string_types):
+        task = name_lookup(task)
+    saved = current_context()
+    _local.context = context
+    try:
+        outputs = task(inputs)
+    finally:
+        _local.context = saved
+    return dict(outputs) if outputs is not None else {}
+
+
+def default_shared_directory():
+    """
+    Return the directory in which the large values are exchanged with
+    the worker processes or None if they should be sent through the pipe.
+    """
+    if sys.platform == "win32":
+        # Files can not be removed while they are mapped.
+        return None
+    if os.path.isdir("/dev/shm") and os.access("/dev/shm", os.W_OK):
+        return "/dev/shm"
+    return tempfile.gettempdir()
+
+
+class _Shared(object):
+    """
+    A value transferred in a file (see :func:`encode`).
+    """
+    __slots__ = ("filename",)
+
+    def __init__(self, filename):
+        self.filename = filename
+
+    def __getstate__(self):
+        return self.filename
+
+    def __setstate__(self, state):
+        self.filename = state
+
+
+def _remove(filename):
+    try:
+        os.remove(filename)
+    except OSError as err:
+        if err.errno != errno.ENOENT:
+            log.warning("Could not remove %r", filename, exc_info=True)
+
+
+def encode(values, directory, min_shared_size):
+    """
+    Return a copy of the `values` dict where the values larger than
+    `min_shared_size` are dumped to files in `directory` (if not None).
+    """
+    encoded = {}
+    for name, value in values.items():
+        if directory is not None and value is not None and \
+                approx_sizeof(value) >= min_shared_size:
+            fd, filename = tempfile.mkstemp(suffix=".pck", dir=directory)
+            os.close(fd)
+            try:
+                dump(value, filename)
+            except BaseException:
+                _remove(filename)
+                raise
+            value = _Shared(filename)
+        encoded[name] = value
+    return encoded
+
+
+def decode(values):
+    """
+    Inverse of :func:`encode`. The files are removed.
+    """
+    decoded = {}
+    try:
+        for name, value in values.items():
+            if isinstance(value, _Shared):
+                value = load(value.filename)
+            decoded[name] = value
+    finally:
+        discard(values)
+    return decoded
+
+
+def discard(values):
+    """
+    Remove the files of an :func:`encode`-ed values dict.
+    """
+    for value in values.values():
+        if isinstance(value, _Shared):
+            _remove(value.filename)
+
+
+def _worker_main(conn, directory, min_shared_size):
+    """
+    The worker process main loop.
+    """
+    while True:
+        try:
+            message = conn.recv()
+        except (EOFError, OSError):
+            break
+        if message is None:
+            break
+        task, inputs, node, properties, events = message
+
+        def emit(kind, value):
+            if kind == "output":
+                name, value = value
+                value = (name, encode({name: value}, directory,
+                                      min_shared_size)[name])
+            conn.send(("event", (kind, value)))
+
+        context = TaskContext(node, properties, emit if events else None)
+        try:
+            outputs = run_task(task, decode(inputs), context)
+            reply = ("ok", encode(outputs, directory, min_shared_size))
+        except Exception as err:
+            reply = ("error", (str(err), type(err).__name__,
+                               traceback.format_exc()))
+        try:
+            conn.send(reply)
+        except Exception as err:
+            # e.g. the outputs can not be pickled
+            if reply[0] == "ok":
+                discard(reply[1])
+            conn.send(("error", (str(err), type(err).__name__,
+                                 traceback.format_exc())))
+    conn.close()
+
+
+class ExecutionBackend(object):
+    """
+    An abstract node execution backend.
+    """
+    def submit(self, task, inputs):
+        """
+        Schedule the `task` to run with `inputs` and return a
+        :class:`concurrent.futures.Future` with its outputs dict.
+        """
+        raise NotImplementedError
+
+    def submit_node(self, node, task, inputs, callback=None):
+        """
+        Schedule the `task` computing the :class:`SchemeNode` `node`.
+
+        `callback` is called (from any thread) with the events reported
+        through the task's :class:`TaskContext` if the backend supports
+        them. The default implementation calls :func:`submit`.
+        """
+        return self.submit(task, inputs)
+
+    def shutdown(self, wait=True):
+        """
+        Shutdown the backend, releasing its resources.
+        """
+        pass
+
+
+class InProcessBackend(ExecutionBackend):
+    """
+    Run the tasks synchronously in the calling thread.
+    """
+    def submit(self, task, inputs):
+        return self.__run(task, inputs)
+
+    def submit_node(self, node, task, inputs, callback=None):
+        context = TaskContext(node_info(node), node.properties, callback)
+        return self.__run(task, inputs, context)
+
+    def __run(self, task, inputs, context=None):
+        future = Future()
+        future.set_running_or_notify_cancel()
+        try:
+            outputs = run_task(task, inputs, context)
+        except Exception as err:
+            future.set_exception(err)
+        else:
+            future.set_result(outputs)
+        return future
+
+
+class ProcessBackend(ExecutionBackend):
+    """
+    Run the tasks in supervised worker processes.
+
+    Parameters
+    ----------
+    max_workers : int
+        The number of worker processes.
+    min_shared_size : int
+        The (approximate) size in bytes from which the values are
+        exchanged through (shared memory) files instead of the pipe.
+    directory : Optional[str]
+        The directory for the exchanged files (by default
+        :func:`default_shared_directory`).
+    mp_context : Optional[multiprocessing.context.BaseContext]
+        The multiprocessing context (`spawn` by default). The workers are
+        started on first use.
+
+    """
+    def __init__(self, max_workers=2, min_shared_size=2 ** 20,
+                 directory=None, mp_context=None):
+        if max_workers < 1:
+            raise ValueError("max_workers must be at least 1")
+        if mp_context is None:
+            mp_context = multiprocessing.get_context("spawn")
+        if directory is None:
+            directory = default_shared_directory()
+        if directory is not None:
+            directory = tempfile.mkdtemp(prefix="orangecanvas-exec-",
+                                         dir=directory)
+        self.__context = mp_context
+        self.__directory = directory
+        self.__min_shared_size = min_shared_size
+        self.__max_workers = max_workers
+        self.__queue = queue.Queue()
+        self.__lock = threading.Lock()
+        self.__supervisors = []
+        self.__restarts = 0
+        self.__shutdown = False
+
+    def submit(self, task, inputs):
+        return self.__submit(task, inputs, {}, {}, None)
+
+    def submit_node(self, node, task, inputs, callback=None):
+        return self.__submit(task, inputs, node_info(node),
+                             dict(node.properties), callback)
+
+    def __submit(self, task, inputs, node, properties, callback):
+        with self.__lock:
+            if self.__shutdown:
+                raise RuntimeError("Cannot submit after shutdown")
+            if not self.__supervisors:
+                self.__supervisors = [
+                    _Supervisor(self, self.__queue, self.__context,
+                                self.__directory, self.__min_shared_size)
+                    for _ in range(self.__max_workers)
+                ]
+                for supervisor in self.__supervisors:
+                    supervisor.start()
+        future = Future()
+        self.__queue.put(
+            (future, task, dict(inputs), node, properties, callback))
+        return future
+
+    def restart_count(self):
+        """
+        Return the number of worker processes restarted after a crash.
+        """
+        with self.__lock:
+            return self.__restarts
+
+    def worker_pids(self):
+        """
+        Return the process ids of the running workers.
+        """
+        return [pid for pid in (s.pid() for s in self.__supervisors)
+                if pid is not None]
+
+    def _crashed(self):
+        with self.__lock:
+            self.__restarts += 1
+
+    def shutdown(self, wait=True):
+        with self.__lock:
+            if self.__shutdown:
+                return
+            self.__shutdown = True
+            supervisors = list(self.__supervisors)
+        for _ in supervisors:
+            self.__queue.put(None)
+        if wait:
+            for supervisor in supervisors:
+                supervisor.join()
+            if self.__directory is not None:
+                shutil.rmtree(self.__directory, ignore_errors=True)
+
+
+class _Supervisor(threading.Thread):
+    """
+    A thread running the tasks from `queue` in a worker process (started,
+    and restarted after a crash, on demand).
+    """
+    #: The interval (seconds) at which the worker's liveness is checked
+    POLL_INTERVAL = 0.1
+
+    def __init__(self, backend, queue, context, directory, min_shared_size):
+        super(_Supervisor, self).__init__(name="ProcessBackend-supervisor")
+        self.daemon = True
+        self.__backend = backend
+        self.__queue = queue
+        self.__context = context
+        self.__directory = directory
+        self.__min_shared_size = min_shared_size
+        self.__process = None
+        self.__conn = None
+
+    def pid(self):
+        process = self.__process
+        return process.pid if process is not None else None
+
+    def run(self):
+        try:
+            while True:
+                job = self.__queue.get()
+                if job is None:
+                    break
+                future, task, inputs, node, properties, callback = job
+                if not future.set_running_or_notify_cancel():
+                    continue
+                try:
+                    outputs = self.__execute(
+                        task, inputs, node, properties, callback)
+                except BaseException as err:
+                    future.set_exception(err)
+                else:
+                    future.set_result(outputs)
+        finally:
+            self.__stop()
+
+    def __start(self):
+        conn, child_conn = self.__context.Pipe()
+        process = self.__context.Process(
+            target=_worker_main,
+            args=(child_conn, self.__directory, self.__min_shared_size),
+            name="orangecanvas-worker"
+        )
+        process.daemon = True
+        process.start()
+        child_conn.close()
+        self.__process, self.__conn = process, conn
+
+    def __stop(self):
+        process, conn = self.__process, self.__conn
+        self.__process = self.__conn = None
+        if process is None:
+            return
+        try:
+            conn.send(None)
+        except (OSError, EOFError):
+            pass
+        process.join(5)
+        if process.is_alive():
+            process.terminate()
+            process.join()
+        conn.close()
+
+    def __reap(self):
+        # Clean up after a dead (or unresponsive) worker process and
+        # return it
+        process, conn = self.__process, self.__conn
+        self.__process = self.__conn = None
+        process.join(5)
+        if process.is_alive():
+            process.terminate()
+            process.join()
+        conn.close()
+        self.__backend._crashed()
+        log.error("Worker process %i exited with code %s; restarting",
+                  process.pid, process.exitcode)
+        return process
+
+    def __crashed(self):
+        process = self.__reap()
+        return WorkerCrashedError(
+            "The worker process exited unexpectedly (exit code {})"
+            .format(process.exitcode), process.exitcode)
+
+    def __send(self, message):
+        # Send the task to a live worker (restarting the worker if it
+        # died while idle).
+        if self.__process is not None and not self.__process.is_alive():
+            self.__reap()
+        if self.__process is None:
+            self.__start()
+        try:
+            self.__conn.send(message)
+        except (EOFError, OSError):
+            # Died (while idle) just before the send; the task was not
+            # started.
+            self.__reap()
+            self.__start()
+            self.__conn.send(message)
+
+    def __execute(self, task, inputs, node, properties, callback):
+        inputs = encode(inputs, self.__directory, self.__min_shared_size)
+        try:
+            # Pickling errors are raised before anything is written
+            self.__send((task, inputs, node, properties,
+                         callback is not None))
+            while True:
+                while not self.__conn.poll(self.POLL_INTERVAL):
+                    if not self.__process.is_alive():
+                        raise self.__crashed()
+                status, payload = self.__conn.recv()
+                if status != "event":
+                    break
+                self.__event(callback, *payload)
+        except (EOFError, OSError):
+            raise self.__crashed()
+        finally:
+            # The inputs not consumed by a crashed worker
+            discard(inputs)
+        if status == "ok":
+            return decode(payload)
+        else:
+            raise TaskError(*payload)
+
+    @staticmethod
+    def __event(callback, kind, value):
+        if kind == "output":
+            name, value = value
+            value = (name, decode({name: value})[name])
+        try:
+            callback(kind, value)
+        except Exception:
+            log.exception("Error in an event callback")
@@ -15,6 +15,24 @@ from ..utils import name_lookup
 from .errors import IncompatibleChannelTypeError
 
 
+#: The resolved channel types cached on :class:`SchemeLink` instances are
+#: valid only for the current generation (see `invalidate_type_cache`).
+_type_cache_generation = 0
+
+
+def invalidate_type_cache():
+    """
+    Invalidate the resolved channel types (and the dynamic enable
+    decisions) cached on all :class:`SchemeLink` instances.
+
+    Should be called when the widget registry is reloaded (the channel
+    types can refer to reloaded modules).
+
+    """
+    global _type_cache_generation
+    _type_cache_generation += 1
+
+
 def compatible_channels(source_channel, sink_channel):
     """
     Do the channels in link have compatible types, i.e. can they be
@@ -69,6 +87,10 @@ class SchemeLink(QObject):
         The sink widget's input signal.
     properties : `dict`
         Additional link properties.
+    compatible : Optional[Callable[[OutputSignal, InputSignal], bool]]
+        The channel type compatibility check (:func:`compatible_channels`
+        by default), e.g. :func:`WidgetRegistry.compatible_channels`
+        which uses the registry's resolved channel types.
 
     """
 
@@ -99,7 +121,7 @@ class SchemeLink(QObject):
 
     def __init__(self, source_node, source_channel,
                  sink_node, sink_channel, enabled=True, properties=None,
-                 parent=None):
+                 parent=None, compatible=None):
         QObject.__init__(self, parent)
         self.source_node = source_node
 
@@ -121,37 +143,84 @@ class SchemeLink(QObject):
 
         self.sink_channel = sink_channel
 
-        if not compatible_channels(source_channel, sink_channel):
+        if compatible is None:
+            compatible = compatible_channels
+
+        if not compatible(source_channel, sink_channel):
             raise IncompatibleChannelTypeError(
                     "Cannot connect %r to %r" \
                     % (source_channel.type, sink_channel.type)
                 )
 
+        self.__compatible = compatible
         self.__enabled = enabled
         self.__dynamic_enabled = False
+        # (generation, source type, sink type, is dynamic)
+        self.__types = None
+        # {value type: bool} dynamic enable decisions
+        self.__dynamic_memo = {}
         self.__state = SchemeLink.NoState
         self.__tool_tip = ""
         self.properties = properties or {}
 
+    def __resolved_types(self):
+        """
+        Return the cached (generation, source type, sink type, is dynamic)
+        tuple, resolving the types if needed.
+        """
+        types = self.__types
+        if types is None or types[0] != _type_cache_generation:
+            source_type = name_lookup(self.source_channel.type)
+            sink_type = name_lookup(self.sink_channel.type)
+            dynamic = bool(self.source_channel.dynamic) and \
+                issubclass(sink_type, source_type) and \
+                not (sink_type is source_type)
+            types = (_type_cache_generation, source_type, sink_type, dynamic)
+            self.__types = types
+            self.__dynamic_memo = {}
+        return types
+
+    def compatible_channels(self):
+        """
+        Do the link's channels have compatible types (using the
+        `compatible` check passed to the constructor).
+        """
+        return self.__compatible(self.source_channel, self.sink_channel)
+
     def source_type(self):
         """
         Return the type of the source channel.
         """
-        return name_lookup(self.source_channel.type)
+        return self.__resolved_types()[1]
 
     def sink_type(self):
         """
         Return the type of the sink channel.
         """
-        return name_lookup(self.sink_channel.type)
+        return self.__resolved_types()[2]
 
     def is_dynamic(self):
         """
         Is this link dynamic.
         """
-        return self.source_channel.dynamic and \
-            issubclass(self.sink_type(), self.source_type()) and \
-            not (self.sink_type() is self.source_type())
+        return self.__resolved_types()[3]
+
+    def can_enable_dynamic(self, value):
+        """
+        Can the (dynamic) link be enabled for `value`, i.e. is `value`
+        an instance of the sink channel's type.
+
+        The decision is memoized for the type of `value`.
+
+        """
+        sink_type = self.__resolved_types()[2]
+        value_type = type(value)
+        try:
+            return self.__dynamic_memo[value_type]
+        except KeyError:
+            enable = self.__dynamic_memo[value_type] = \
+                isinstance(value, sink_type)
+            return enable
 
     def set_enabled(self, enabled):
         """
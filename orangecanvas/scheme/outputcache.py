@@ -0,0 +1,279 @@
+"""
+Output Cache
+============
+
+A persistent (cross session), content addressed cache of node outputs.
+
+Node outputs are keyed by the node's :func:`node_key` which is computed
+from the widget's `qualified_name` and version, a hash of the node's
+properties and the keys of its current input values. A node whose key is
+in the cache need not be recomputed (see
+:func:`SignalManager.set_output_cache`).
+
+The cache is stored in a directory (e.g. in `config.cache_dir()`) and
+the least recently used values are evicted when its size exceeds
+`max_size`.
+
+"""
+import os
+import io
+import json
+import time
+import errno
+import hashlib
+import logging
+import threading
+
+from . import readwrite
+from .outputstore import dump, load
+
+log = logging.getLogger(__name__)
+
+
+def _hash(*parts):
+    h = hashlib.sha1()
+    for part in parts:
+        h.update(part.encode("utf-8"))
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+def properties_hash(properties):
+    """
+    Return a hash of the node `properties` (or None if they can not be
+    serialized).
+    """
+    try:
+        string, fmt = readwrite.dumps(properties, pickle_fallback=True)
+    except Exception:
+        return None
+    return _hash(fmt, string)
+
+
+def node_key(description, properties_key, input_keys):
+    """
+    Return the cache key of a node.
+
+    Parameters
+    ----------
+    description : WidgetDescription
+        The node's widget description.
+    properties_key : str
+        A hash of the node's state (see :func:`properties_hash`).
+    input_keys : List[Tuple[str, str]]
+        A list of `(input channel name, value key)` tuples for all the
+        node's current inputs.
+    """
+    parts = [description.qualified_name, str(description.version or ""),
+             properties_key]
+    for channel, key in sorted(input_keys):
+        parts.extend([channel, key])
+    return _hash(*parts)
+
+
+def value_key(node_key, channel, id):
+    """
+    Return the cache key of an output value sent on `channel` (name)
+    with the signal `id` by a node with the `node_key`.
+    """
+    return _hash(node_key, channel, repr(id))
+
+
+class OutputCache(object):
+    """
+    A persistent output value cache.
+
+    Parameters
+    ----------
+    directory : str
+        The cache directory.
+    max_size : int
+        The maximum size of the cached values (in bytes).
+
+    """
+    def __init__(self, directory, max_size=2 ** 30):
+        self.__directory = directory
+        self.__max_size = max_size
+        self.__lock = threading.RLock()
+        # {key: [size, last access time]} (built lazily)
+        self.__index = None
+        self.__total = 0
+
+    def directory(self):
+        return self.__directory
+
+    def max_size(self):
+        return self.__max_size
+
+    def set_max_size(self, max_size):
+        self.__max_size = max_size
+        with self.__lock:
+            self.__evict()
+
+    def total_size(self):
+        """
+        Return the total size of the cached values (in bytes).
+        """
+        with self.__lock:
+            self.__ensure_index()
+            return self.__total
+
+    def __value_path(self, key):
+        return os.path.join(self.__directory, "values", key[:2], key + ".out")
+
+    def __manifest_path(self, key):
+        return os.path.join(self.__directory, "nodes", key[:2], key + ".json")
+
+    def __ensure_index(self):
+        if self.__index is not None:
+            return
+        index = {}
+        root = os.path.join(self.__directory, "values")
+        if os.path.isdir(root):
+            for dirpath, _, filenames in os.walk(root):
+                for name in filenames:
+                    if not name.endswith(".out"):
+                        continue
+                    try:
+                        st = os.stat(os.path.join(dirpath, name))
+                    except OSError:
+                        continue
+                    index[name[:-4]] = [st.st_size, st.st_mtime]
+        self.__index = index
+        self.__total = sum(size for size, _ in index.values())
+
+    def __contains__(self, key):
+        with self.__lock:
+            self.__ensure_index()
+            return key in self.__index
+
+    def get(self, key):
+        """
+        Return the value for `key`. Raise KeyError if not in the cache.
+        """
+        with self.__lock:
+            self.__ensure_index()
+            entry = self.__index.get(key)
+            if entry is None:
+                raise KeyError(key)
+            path = self.__value_path(key)
+            try:
+                value = load(path)
+            except (OSError, IOError, EOFError, ValueError):
+                log.warning("Could not load cached value %r", path,
+                            exc_info=True)
+                self.__remove(key)
+                raise KeyError(key)
+            entry[1] = time.time()
+            try:
+                os.utime(path, None)
+            except OSError:
+                pass
+            return value
+
+    def put(self, key, value):
+        """
+        Store the `value` for `key`. Return True on success.
+        """
+        with self.__lock:
+            self.__ensure_index()
+            if key in self.__index:
+                return True
+            path = self.__value_path(key)
+            try:
+                _makedirs(os.path.dirname(path))
+                dump(value, path + ".tmp")
+                os.replace(path + ".tmp", path)
+                size = os.path.getsize(path)
+            except Exception:
+                log.warning("Could not cache a %s", type(value),
+                            exc_info=True)
+                try:
+                    os.remove(path + ".tmp")
+                except OSError:
+                    pass
+                return False
+            self.__index[key] = [size, time.time()]
+            self.__total += size
+            self.__evict()
+            return key in self.__index
+
+    def get_outputs(self, node_key):
+        """
+        Return the recorded outputs of a node with `node_key` as a list of
+        `(channel name, id, value key)` tuples (or None if not recorded).
+        """
+        path = self.__manifest_path(node_key)
+        try:
+            with io.open(path, "r", encoding="utf-8") as f:
+                outputs = json.load(f)
+        except (OSError, IOError, ValueError):
+            return None
+        return [(channel, _id_from_json(id), key)
+                for channel, id, key in outputs]
+
+    def set_outputs(self, node_key, outputs):
+        """
+        Record the outputs (a list of `(channel name, id, value key)`) of
+        a node with `node_key`.
+        """
+        path = self.__manifest_path(node_key)
+        try:
+            _makedirs(os.path.dirname(path))
+            with io.open(path + ".tmp", "w", encoding="utf-8") as f:
+                f.write(json.dumps([(channel, _id_to_json(id), key)
+                                    for channel, id, key in outputs]))
+            os.replace(path + ".tmp", path)
+        except (OSError, IOError, TypeError):
+            log.warning("Could not store the outputs of %r", node_key,
+                        exc_info=True)
+
+    def clear(self):
+        """
+        Remove all cached values.
+        """
+        with self.__lock:
+            self.__ensure_index()
+            for key in list(self.__index):
+                self.__remove(key)
+
+    def __remove(self, key):
+        size, _ = self.__index.pop(key)
+        self.__total -= size
+        try:
+            os.remove(self.__value_path(key))
+        except OSError:
+            pass
+
+    def __evict(self):
+        if self.__total <= self.__max_size:
+            return
+        by_access = sorted(self.__index.items(), key=lambda item: item[1][1])
+        for key, _ in by_access:
+            if self.__total <= self.__max_size:
+                break
+            self.__remove(key)
+
+
+def _makedirs(path):
+    try:
+        os.makedirs(path)
+    except OSError as err:
+        if err.errno != errno.EEXIST:
+            raise
+
+
+def _id_to_json(id):
+    # Signal ids are usually None, ints or strings (or tuples thereof).
+    if isinstance(id, tuple):
+        return {"tuple": [_id_to_json(el) for el in id]}
+    elif id is None or isinstance(id, (int, float, str)):
+        return id
+    else:
+        raise TypeError("Unsupported signal id: {!r}".format(id))
+
+
+def _id_from_json(id):
+    if isinstance(id, dict):
+        return tuple(_id_from_json(el) for el in id["tuple"])
+    return id
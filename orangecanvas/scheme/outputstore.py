@@ -0,0 +1,362 @@
+"""
+Output Store
+============
+
+Size bounded retention of node output values for the
+:class:`~.signalmanager.SignalManager`.
+
+The signal manager retains the last value sent on each output channel
+(and signal id) to be able to deliver it to links connected later. An
+:class:`OutputStore` tracks the (approximate) sizes of these values and,
+when they exceed the memory budget, spills the least recently used ones
+to files on disk. Spilled values are transparently reloaded when they are
+accessed again.
+
+.. note::
+    Spilling a value only releases the memory if nothing else (e.g. the
+    node that produced it or a pending signal) holds a reference to it.
+
+"""
+import os
+import sys
+import mmap
+import struct
+import pickle
+import shutil
+import logging
+import tempfile
+import itertools
+
+from collections import OrderedDict
+
+log = logging.getLogger(__name__)
+
+#: Use the out-of-band buffers (zero-copy reload of e.g. numpy arrays) if
+#: available.
+PICKLE_PROTOCOL = max(min(pickle.HIGHEST_PROTOCOL, 5), 2)
+
+_HEADER = struct.Struct("<4sQQ")
+_MAGIC = b"OCOS"
+_ALIGN = 64
+
+
+def approx_sizeof(value):
+    """
+    Return the approximate size (in bytes) of `value`.
+
+    Objects exposing `nbytes` (e.g. numpy arrays) report that, other
+    objects their `sys.getsizeof` plus the `nbytes` of their (direct)
+    attributes.
+    """
+    nbytes = getattr(value, "nbytes", None)
+    if isinstance(nbytes, int):
+        return nbytes
+    try:
+        size = sys.getsizeof(value)
+    except TypeError:
+        size = 0
+    state = getattr(value, "__dict__", None)
+    if state:
+        for attr in state.values():
+            nbytes = getattr(attr, "nbytes", None)
+            if isinstance(nbytes, int):
+                size += nbytes
+    return size
+
+
+def dump(value, filename):
+    """
+    Pickle `value` to `filename`.
+
+    With pickle protocol 5 the out-of-band buffers are written (aligned)
+    after the pickle stream so they can be memory mapped on load.
+    """
+    buffers = []
+    if PICKLE_PROTOCOL >= 5:
+        data = pickle.dumps(value, protocol=PICKLE_PROTOCOL,
+                            buffer_callback=buffers.append)
+    else:
+        data = pickle.dumps(value, protocol=PICKLE_PROTOCOL)
+    buffers = [buf.raw() for buf in buffers]
+    with open(filename, "wb") as f:
+        f.write(_HEADER.pack(_MAGIC, len(data), len(buffers)))
+        for buf in buffers:
+            f.write(struct.pack("<Q", buf.nbytes))
+        f.write(data)
+        for buf in buffers:
+            f.write(b"\0" * (-f.tell() % _ALIGN))
+            f.write(buf)
+
+
+def load(filename):
+    """
+    Load a value stored with :func:`dump`.
+
+    The out-of-band buffers reference a (copy-on-write) memory mapping of
+    the file.
+    """
+    with open(filename, "rb") as f:
+        magic, size, nbuffers = _HEADER.unpack(f.read(_HEADER.size))
+        if magic != _MAGIC:
+            raise ValueError("{!r} is not an output file".format(filename))
+        sizes = struct.unpack("<%iQ" % nbuffers, f.read(8 * nbuffers))
+        data = f.read(size)
+        if not nbuffers:
+            return pickle.loads(data)
+        offset = f.tell()
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_COPY)
+    view = memoryview(mapped)
+    buffers = []
+    for nbytes in sizes:
+        offset += -offset % _ALIGN
+        buffers.append(view[offset: offset + nbytes])
+        offset += nbytes
+    return pickle.loads(data, buffers=buffers)
+
+
+class Spilled(object):
+    """
+    A placeholder for a value spilled to a file.
+    """
+    __slots__ = ("filename", "size")
+
+    def __init__(self, filename, size):
+        self.filename = filename
+        self.size = size
+
+    def load(self):
+        return load(self.filename)
+
+    def __repr__(self):
+        return "Spilled({!r}, {})".format(self.filename, self.size)
+
+
+class ChannelOutputs(dict):
+    """
+    A `{id: value}` dict of the current values on an output channel.
+
+    Values can be spilled to disk by the `store` and are reloaded when
+    accessed.
+    """
+    def __init__(self, store):
+        dict.__init__(self)
+        self.__store = store
+        # id -> file of a spilled value, kept while the value (reloaded
+        # or not) is current so it can be spilled again without a write.
+        self.__files = {}
+
+    def __getitem__(self, key):
+        value = dict.__getitem__(self, key)
+        if isinstance(value, Spilled):
+            log.debug("Reloading spilled output from %r", value.filename)
+            spilled, value = value, value.load()
+            dict.__setitem__(self, key, value)
+            self.__store._resident(self, key, spilled.size)
+        else:
+            self.__store._touch(self, key)
+        return value
+
+    def __setitem__(self, key, value):
+        if key in self:
+            self.__discard(key)
+        dict.__setitem__(self, key, value)
+        self.__store._resident(self, key, approx_sizeof(value))
+
+    def __delitem__(self, key):
+        dict.__delitem__(self, key)
+        self.__discard(key)
+
+    def get(self, key, default=None):
+        if key in self:
+            return self[key]
+        return default
+
+    def pop(self, key, *default):
+        if key in self:
+            value = self[key]
+            del self[key]
+            return value
+        return dict.pop(self, key, *default)
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self[key] = default
+        return self[key]
+
+    def update(self, *args, **kwargs):
+        for key, value in dict(*args, **kwargs).items():
+            self[key] = value
+
+    def popitem(self):
+        key = next(iter(self))
+        return key, self.pop(key)
+
+    def clear(self):
+        for key in list(self.keys()):
+            del self[key]
+
+    def values(self):
+        return [self[key] for key in self]
+
+    def items(self):
+        return [(key, self[key]) for key in self]
+
+    def copy(self):
+        return dict(self.items())
+
+    def is_spilled(self, key):
+        """
+        Is the value for `key` currently spilled to disk.
+        """
+        return isinstance(dict.__getitem__(self, key), Spilled)
+
+    def _spill(self, key, size):
+        """
+        Spill the value for `key` to disk. Return True on success.
+        """
+        value = dict.__getitem__(self, key)
+        filename = self.__files.get(key)
+        if filename is None:
+            filename = self.__store._new_filename()
+            try:
+                dump(value, filename)
+            except Exception:
+                log.warning("Could not spill %s to disk", type(value),
+                            exc_info=True)
+                _remove(filename)
+                return False
+            self.__files[key] = filename
+        dict.__setitem__(self, key, Spilled(filename, size))
+        return True
+
+    def __discard(self, key):
+        self.__store._discard(self, key)
+        filename = self.__files.pop(key, None)
+        if filename is not None:
+            _remove(filename)
+
+
+def _remove(filename):
+    try:
+        os.remove(filename)
+    except (OSError, IOError):
+        # (Windows) the file might still be mapped
+        pass
+
+
+class OutputStore(object):
+    """
+    Track the sizes of :class:`ChannelOutputs` values and spill the least
+    recently used ones when their total size exceeds the `budget`.
+
+    Parameters
+    ----------
+    budget : int
+        Memory budget in bytes (0 means no limit).
+    directory : Optional[str]
+        Directory where values are spilled. If None a temporary directory
+        is created (on first use).
+    min_size : int
+        Values smaller then this are never spilled.
+
+    """
+    def __init__(self, budget=0, directory=None, min_size=2 ** 16):
+        self.__budget = budget
+        self.__directory = directory
+        self.__tempdir = None
+        self.__min_size = min_size
+        # (id(outputs), key) -> (outputs, key, size) in LRU order
+        self.__resident = OrderedDict()
+        self.__total = 0
+        self.__spilled = 0
+        self.__counter = itertools.count()
+
+    def set_budget(self, budget):
+        """
+        Set the memory budget (in bytes, 0 means no limit).
+        """
+        self.__budget = budget
+        self.__enforce()
+
+    def budget(self):
+        return self.__budget
+
+    def set_directory(self, directory):
+        """
+        Set the directory where the values are spilled.
+        """
+        self.__directory = directory
+
+    def directory(self):
+        return self.__directory
+
+    def resident_size(self):
+        """
+        Return the total (approximate) size of the resident values.
+        """
+        return self.__total
+
+    def spilled_count(self):
+        """
+        Return the number of times a value was spilled to disk.
+        """
+        return self.__spilled
+
+    def new_outputs(self):
+        """
+        Return a new :class:`ChannelOutputs` dict tracked by this store.
+        """
+        return ChannelOutputs(self)
+
+    def cleanup(self):
+        """
+        Remove the temporary directory (if one was created).
+        """
+        if self.__tempdir is not None:
+            shutil.rmtree(self.__tempdir, ignore_errors=True)
+            self.__tempdir = None
+
+    def _new_filename(self):
+        directory = self.__directory
+        if directory is None:
+            if self.__tempdir is None:
+                self.__tempdir = tempfile.mkdtemp(
+                    prefix="orangecanvas-outputs-")
+            directory = self.__tempdir
+        elif not os.path.isdir(directory):
+            os.makedirs(directory)
+        return os.path.join(
+            directory, "{}-{}.out".format(os.getpid(), next(self.__counter)))
+
+    def _resident(self, outputs, key, size):
+        self._discard(outputs, key)
+        self.__resident[(id(outputs), key)] = (outputs, key, size)
+        self.__total += size
+        self.__enforce()
+
+    def _touch(self, outputs, key):
+        entry_key = (id(outputs), key)
+        entry = self.__resident.pop(entry_key, None)
+        if entry is not None:
+            self.__resident[entry_key] = entry
+
+    def _discard(self, outputs, key):
+        entry = self.__resident.pop((id(outputs), key), None)
+        if entry is not None:
+            self.__total -= entry[2]
+
+    def __enforce(self):
+        budget = self.__budget
+        if not budget or self.__total <= budget:
+            return
+        for entry_key, (outputs, key, size) in list(self.__resident.items()):
+            if self.__total <= budget:
+                break
+            if size < self.__min_size:
+                continue
+            if dict.__getitem__(outputs, key) is None:
+                continue
+            if outputs._spill(key, size):
+                del self.__resident[entry_key]
+                self.__total -= size
+                self.__spilled += 1
@@ -326,11 +326,6 @@ def parse_scheme_v_1_0(etree, scheme, error_handler, widget_registry=None,
 
     widgets_not_found = []
 
-    widgets = widget_registry.widgets()
-    widgets_by_name = [(d.qualified_name.rsplit(".", 1)[-1], d)
-                       for d in widgets]
-    widgets_by_name = dict(widgets_by_name)
-
     nodes_by_caption = {}
     nodes = []
     links = []
@@ -340,9 +335,9 @@ def parse_scheme_v_1_0(etree, scheme, error_handler, widget_registry=None,
         x_pos = widget_el.get("xPos")
         y_pos = widget_el.get("yPos")
 
-        if name in widgets_by_name:
-            desc = widgets_by_name[name]
-        else:
+        try:
+            desc = widget_registry.widget_by_short_name(name)
+        except KeyError:
             error_handler(UnknownWidgetDefinition(name))
             widgets_not_found.append(caption)
             continue
@@ -591,16 +586,16 @@ def parse_ows_stream(stream):
 
 
 def resolve_1_0(scheme_desc, registry):
-    widgets = registry.widgets()
-    widgets_by_name = dict((d.qualified_name.rsplit(".", 1)[-1], d)
-                           for d in widgets)
     nodes = scheme_desc.nodes
     for i, node in list(enumerate(nodes)):
         # 1.0's qualified name is the class name only, need to replace it
         # with the full qualified import name
         qname = node.qualified_name
-        if qname in widgets_by_name:
-            desc = widgets_by_name[qname]
+        try:
+            desc = registry.widget_by_short_name(qname)
+        except KeyError:
+            pass
+        else:
             nodes[i] = node._replace(qualified_name=desc.qualified_name,
                                      project_name=desc.project_name)
 
@@ -608,35 +603,18 @@ def resolve_1_0(scheme_desc, registry):
 
 
 def resolve_replaced(scheme_desc, registry):
-    widgets = registry.widgets()
+    # The replacement mappings are maintained by the registry
     nodes_by_id = {}  # type: Dict[str, _node]
-    replacements = {}
-    replacements_channels = {}  # type: Dict[str, Tuple[dict, dict]]
-    # collect all the replacement mappings
-    for desc in widgets:  # type: WidgetDescription
-        if desc.replaces:
-            for repl_qname in desc.replaces:
-                replacements[repl_qname] = desc.qualified_name
-
-        input_repl = {}
-        for idesc in desc.inputs or []:  # type: InputSignal
-            for repl_qname in idesc.replaces or []:  # type: str
-                input_repl[repl_qname] = idesc.name
-        output_repl = {}
-        for odesc in desc.outputs:  # type: OutputSignal
-            for repl_qname in odesc.replaces or []:  # type: str
-                output_repl[repl_qname] = odesc.name
-        replacements_channels[desc.qualified_name] = (input_repl, output_repl)
 
     # replace the nodes
     nodes = scheme_desc.nodes
     for i, node in list(enumerate(nodes)):
-        if not registry.has_widget(node.qualified_name) and \
-                node.qualified_name in replacements:
-            qname = replacements[node.qualified_name]
-            desc = registry.widget(qname)
-            nodes[i] = node._replace(qualified_name=desc.qualified_name,
-                                     project_name=desc.project_name)
+        if not registry.has_widget(node.qualified_name):
+            qname = registry.replaced_by(node.qualified_name)
+            if qname is not None:
+                desc = registry.widget(qname)
+                nodes[i] = node._replace(qualified_name=desc.qualified_name,
+                                         project_name=desc.project_name)
         nodes_by_id[node.id] = nodes[i]
 
     # replace links
@@ -645,10 +623,8 @@ def resolve_replaced(scheme_desc, registry):
         nsource = nodes_by_id[link.source_node_id]
         nsink = nodes_by_id[link.sink_node_id]
 
-        _, source_rep = replacements_channels.get(
-            nsource.qualified_name, ({}, {}))
-        sink_rep, _ = replacements_channels.get(
-            nsink.qualified_name, ({}, {}))
+        _, source_rep = registry.channel_replacements(nsource.qualified_name)
+        sink_rep, _ = registry.channel_replacements(nsink.qualified_name)
 
         if link.source_channel in source_rep:
             link = link._replace(
@@ -661,6 +637,36 @@ def resolve_replaced(scheme_desc, registry):
     return scheme_desc._replace(nodes=nodes, links=links)
 
 
+def _resolve_link_channels(registry, source, source_channel,
+                           sink, sink_channel):
+    """
+    Resolve the link channel names using the `registry`'s indexes.
+
+    Channels of nodes whose description is not from the registry are
+    left as names (resolved by `SchemeLink`).
+    """
+    source_desc, sink_desc = source.description, sink.description
+    if registry.has_widget(source_desc.qualified_name) and \
+            registry.widget(source_desc.qualified_name) is source_desc:
+        try:
+            source_channel = registry.output_channel(
+                source_desc.qualified_name, source_channel)
+        except KeyError:
+            raise ValueError(
+                "%r is not a valid output channel name for %r." %
+                (source_channel, source_desc.name))
+    if registry.has_widget(sink_desc.qualified_name) and \
+            registry.widget(sink_desc.qualified_name) is sink_desc:
+        try:
+            sink_channel = registry.input_channel(
+                sink_desc.qualified_name, sink_channel)
+        except KeyError:
+            raise ValueError(
+                "%r is not a valid input channel name for %r." %
+                (sink_channel, sink_desc.name))
+    return source_channel, sink_channel
+
+
 def scheme_load(scheme, stream, registry=None, error_handler=None):
     desc = parse_ows_stream(stream)
 
@@ -717,9 +723,13 @@ def scheme_load(scheme, stream, registry=None, error_handler=None):
         source = nodes_by_id[source_id]
         sink = nodes_by_id[sink_id]
         try:
-            link = SchemeLink(source, link_d.source_channel,
-                              sink, link_d.sink_channel,
-                              enabled=link_d.enabled)
+            source_channel, sink_channel = _resolve_link_channels(
+                registry, source, link_d.source_channel,
+                sink, link_d.sink_channel)
+            link = SchemeLink(source, source_channel,
+                              sink, sink_channel,
+                              enabled=link_d.enabled,
+                              compatible=registry.compatible_channels)
         except (ValueError, IncompatibleChannelTypeError) as ex:
             error_handler(ex)
         else:
@@ -0,0 +1,751 @@
+"""
+Remote Execution
+================
+
+An :class:`~.execution.ExecutionBackend` computing the isolated nodes (see
+:func:`SignalManager.set_isolated`) on a worker server, and a reference
+:class:`WorkerServer` implementation.
+
+Protocol
+--------
+
+The client and the server exchange messages over a TCP or a Unix domain
+socket. Each message is a ``(kind, request id, payload)`` tuple sent as
+a frame::
+
+    header:   pickle size (uint64), number of buffers (uint32)
+    sizes:    buffer sizes (uint64 each)
+    data:     the pickled message
+    buffers:  the pickle protocol 5 out-of-band buffers
+
+(all integers in network byte order). Large array data is thus sent and
+received without intermediate copies where pickle protocol 5 is
+available.
+
+On connecting, the peers first authenticate each other with an HMAC
+challenge/response on a shared secret `authkey` (the same scheme as
+:mod:`multiprocessing.connection`). The authentication messages are plain
+length prefixed byte strings; nothing is unpickled before it succeeds.
+Then the client sends ``("hello", 0, PROTOCOL_VERSION)`` and the server
+replies with the same message (or an ``"error"`` if the version is not
+supported). Then the client sends
+
+* ``("run", id, {"task", "node", "properties", "inputs"})``
+
+and the server replies with any number of
+
+* ``("progress", id, value)``,
+* ``("output", id, (channel name, value))``
+
+(reported by the task through its :class:`~.execution.TaskContext`)
+followed by one of
+
+* ``("done", id, outputs)``,
+* ``("error", id, (message, exception type name, traceback))``.
+
+Many requests can be in flight on one connection. The replies are matched
+to the requests by their ids. Frames larger than `max_message_size` are
+rejected before they are read.
+
+.. warning::
+    The messages are pickled. The server executes arbitrary code sent by
+    any client knowing the `authkey`; keep it secret.
+
+"""
+import os
+import sys
+import hmac
+import binascii
+import socket
+import struct
+import pickle
+import logging
+import argparse
+import multiprocessing
+import itertools
+import threading
+import traceback
+
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from six.moves import queue, socketserver
+
+from .execution import (
+    ExecutionBackend, TaskContext, TaskError, node_info, run_task
+)
+from .outputstore import PICKLE_PROTOCOL
+
+log = logging.getLogger(__name__)
+
+#: The protocol version
+PROTOCOL_VERSION = 1
+
+#: The environment variable :func:`main` reads the server's authkey from
+AUTHKEY_ENV = "ORANGE_CANVAS_WORKER_AUTHKEY"
+
+#: The default maximum size of a received message (the pickle and all its
+#: buffers) in bytes
+MAX_MESSAGE_SIZE = 2 ** 32
+
+#: The maximum number of out-of-band buffers in one message
+_MAX_BUFFERS = 2 ** 16
+
+_FRAME = struct.Struct(">QI")
+
+_AUTH_SIZE = struct.Struct(">I")
+_AUTH_MAX_SIZE = 256
+_CHALLENGE = b"#CHALLENGE#"
+_WELCOME = b"#WELCOME#"
+_FAILURE = b"#FAILURE#"
+_DIGEST = "sha256"
+
+
+class RemoteError(Exception):
+    """
+    The connection to the worker server failed or was lost.
+    """
+
+
+def send_message(sock, message):
+    """
+    Send the `message` to `sock` as a single frame.
+    """
+    buffers = []
+    if PICKLE_PROTOCOL >= 5:
+        data = pickle.dumps(message, protocol=PICKLE_PROTOCOL,
+                            buffer_callback=buffers.append)
+    else:
+        data = pickle.dumps(message, protocol=PICKLE_PROTOCOL)
+    buffers = [buf.raw() for buf in buffers]
+    sizes = [buf.nbytes for buf in buffers]
+    sock.sendall(_FRAME.pack(len(data), len(buffers)) +
+                 struct.pack(">%iQ" % len(sizes), *sizes))
+    sock.sendall(data)
+    for buf in buffers:
+        sock.sendall(buf)
+
+
+def _recv_exact(sock, size):
+    buffer = bytearray(size)
+    view = memoryview(buffer)
+    received = 0
+    while received < size:
+        n = sock.recv_into(view[received:], size - received)
+        if n == 0:
+            raise EOFError("Connection closed")
+        received += n
+    return buffer
+
+
+def recv_message(sock, max_size=MAX_MESSAGE_SIZE):
+    """
+    Receive a message sent with :func:`send_message` from `sock`.
+
+    Raise :class:`EOFError` if the connection was closed and
+    :class:`RemoteError` if the message is larger than `max_size` bytes
+    (nothing is allocated for it).
+    """
+    size, nbuffers = _FRAME.unpack(bytes(_recv_exact(sock, _FRAME.size)))
+    if nbuffers > _MAX_BUFFERS:
+        raise RemoteError("Too many buffers ({})".format(nbuffers))
+    sizes = struct.unpack(">%iQ" % nbuffers,
+                          bytes(_recv_exact(sock, 8 * nbuffers)))
+    if size + sum(sizes) > max_size:
+        raise RemoteError("Message too large ({} bytes)"
+                          .format(size + sum(sizes)))
+    data = bytes(_recv_exact(sock, size))
+    if not nbuffers:
+        return pickle.loads(data)
+    buffers = [_recv_exact(sock, nbytes) for nbytes in sizes]
+    return pickle.loads(data, buffers=buffers)
+
+
+def _send_bytes(sock, data):
+    sock.sendall(_AUTH_SIZE.pack(len(data)) + data)
+
+
+def _recv_bytes(sock):
+    size, = _AUTH_SIZE.unpack(bytes(_recv_exact(sock, _AUTH_SIZE.size)))
+    if size > _AUTH_MAX_SIZE:
+        raise RemoteError("Authentication message too large")
+    return bytes(_recv_exact(sock, size))
+
+
+def deliver_challenge(sock, authkey):
+    """
+    Send a random challenge to the peer and check its response.
+
+    Raise :class:`RemoteError` if the peer does not know the `authkey`.
+    """
+    message = os.urandom(32)
+    _send_bytes(sock, _CHALLENGE + message)
+    digest = hmac.new(authkey, message, _DIGEST).digest()
+    response = _recv_bytes(sock)
+    if hmac.compare_digest(response, digest):
+        _send_bytes(sock, _WELCOME)
+    else:
+        _send_bytes(sock, _FAILURE)
+        raise RemoteError("Authentication failed (digest received was "
+                          "wrong)")
+
+
+def answer_challenge(sock, authkey):
+    """
+    Answer the peer's challenge (see :func:`deliver_challenge`).
+    """
+    message = _recv_bytes(sock)
+    if not message.startswith(_CHALLENGE):
+        raise RemoteError("Authentication failed (invalid challenge)")
+    message = message[len(_CHALLENGE):]
+    _send_bytes(sock, hmac.new(authkey, message, _DIGEST).digest())
+    if _recv_bytes(sock) != _WELCOME:
+        raise RemoteError("Authentication failed (digest sent was "
+                          "rejected)")
+
+
+def _check_authkey(authkey):
+    if not isinstance(authkey, bytes) or not authkey:
+        raise TypeError("authkey must be a non empty bytes string")
+    return authkey
+
+
+def _socket_family(address):
+    if isinstance(address, tuple):
+        return socket.AF_INET6 if ":" in address[0] else socket.AF_INET
+    else:
+        return socket.AF_UNIX
+
+
+def connect(address, authkey, timeout=10, max_message_size=MAX_MESSAGE_SIZE):
+    """
+    Connect to the worker server at `address` (a ``(host, port)`` tuple or
+    a Unix socket path), authenticate with `authkey` and perform the
+    protocol handshake.
+    """
+    _check_authkey(authkey)
+    sock = socket.socket(_socket_family(address), socket.SOCK_STREAM)
+    try:
+        sock.settimeout(timeout)
+        sock.connect(address)
+        if isinstance(address, tuple):
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        answer_challenge(sock, authkey)
+        deliver_challenge(sock, authkey)
+        send_message(sock, ("hello", 0, PROTOCOL_VERSION))
+        kind, _, payload = recv_message(sock, max_message_size)
+        if kind != "hello":
+            raise RemoteError("Handshake failed: {}".format(payload[0]))
+        sock.settimeout(None)
+    except (OSError, EOFError) as err:
+        sock.close()
+        raise RemoteError("Could not connect to {!r}: {}"
+                          .format(address, err))
+    except BaseException:
+        sock.close()
+        raise
+    return sock
+
+
+class _Connection(object):
+    """
+    A pooled connection with a writer and a reader thread.
+    """
+    def __init__(self, sock, backend):
+        self.sock = sock
+        self.backend = backend
+        # {request id: (future, callback)}
+        self.pending = {}
+        self.__outbox = queue.Queue()
+        self.__writer = threading.Thread(
+            target=self.__write, name="RemoteBackend-writer")
+        self.__writer.daemon = True
+        self.__reader = threading.Thread(
+            target=self.__read, name="RemoteBackend-reader")
+        self.__reader.daemon = True
+        self.__writer.start()
+        self.__reader.start()
+
+    def send(self, message):
+        self.__outbox.put(message)
+
+    def close(self):
+        self.__outbox.put(None)
+        try:
+            self.sock.shutdown(socket.SHUT_RDWR)
+        except OSError:
+            pass
+
+    def join(self):
+        self.__writer.join()
+        self.__reader.join()
+        self.sock.close()
+
+    def __write(self):
+        while True:
+            message = self.__outbox.get()
+            if message is None:
+                break
+            try:
+                send_message(self.sock, message)
+            except (OSError, EOFError):
+                break
+            except Exception as err:
+                # The inputs can not be pickled
+                self.backend._finished(self, message[1], error=err)
+
+    def __read(self):
+        error = RemoteError("Connection closed")
+        while True:
+            try:
+                kind, rid, payload = recv_message(
+                    self.sock, self.backend.max_message_size())
+            except Exception as err:
+                # A closed connection or a corrupted (unreadable) stream
+                error = RemoteError("Connection lost: {}".format(err))
+                break
+            if kind in ("progress", "output"):
+                self.backend._event(self, rid, kind, payload)
+            elif kind == "done":
+                self.backend._finished(self, rid, result=payload)
+            elif kind == "error":
+                self.backend._finished(self, rid, error=TaskError(*payload))
+            else:
+                log.warning("Unknown message %r", kind)
+        self.__outbox.put(None)
+        self.backend._lost(self, error)
+
+
+class RemoteBackend(ExecutionBackend):
+    """
+    Run the tasks on the worker server at `address`.
+
+    The tasks (and their inputs and outputs) must be importable (picklable)
+    on the server.
+
+    Parameters
+    ----------
+    address : Union[Tuple[str, int], str]
+        The server's ``(host, port)`` address or Unix socket path.
+    authkey : bytes
+        The secret shared with the server (see :func:`WorkerServer.authkey`).
+    max_connections : int
+        The maximum number of (pooled) connections to the server.
+    max_in_flight : int
+        The maximum number of requests in flight on one connection.
+        The requests exceeding the capacity of the pool are queued and
+        sent as the previous ones finish.
+    timeout : float
+        The connect timeout in seconds. The connections are opened in
+        background threads; :func:`submit` never blocks and the requests
+        wait in the queue meanwhile (or fail if no connection can be
+        opened).
+    max_message_size : int
+        The maximum size of a received message in bytes.
+
+    """
+    def __init__(self, address, authkey, max_connections=2, max_in_flight=4,
+                 timeout=10, max_message_size=MAX_MESSAGE_SIZE):
+        if max_connections < 1 or max_in_flight < 1:
+            raise ValueError("max_connections and max_in_flight must be "
+                             "at least 1")
+        self.__address = address
+        self.__authkey = _check_authkey(authkey)
+        self.__max_message_size = max_message_size
+        self.__max_connections = max_connections
+        self.__max_in_flight = max_in_flight
+        self.__timeout = timeout
+        self.__lock = threading.RLock()
+        self.__connections = []
+        # The threads opening new connections
+        self.__connecting = []
+        # Requests waiting for a free connection slot
+        # (future, callback, payload)
+        self.__queue = deque()
+        self.__ids = itertools.count(1)
+        self.__shutdown = False
+
+    def address(self):
+        return self.__address
+
+    def max_message_size(self):
+        return self.__max_message_size
+
+    def submit(self, task, inputs):
+        return self.__submit(
+            {"task": task, "node": {}, "properties": {},
+             "inputs": dict(inputs)})
+
+    def submit_node(self, node, task, inputs, callback=None):
+        return self.__submit(
+            {"task": task, "node": node_info(node),
+             "properties": dict(node.properties), "inputs": dict(inputs)},
+            callback)
+
+    def __submit(self, payload, callback=None):
+        future = Future()
+        with self.__lock:
+            if self.__shutdown:
+                raise RuntimeError("Cannot submit after shutdown")
+            self.__queue.append((future, callback, payload))
+            self.__dispatch()
+        return future
+
+    def connection_count(self):
+        """
+        Return the number of open connections.
+        """
+        with self.__lock:
+            return len(self.__connections)
+
+    def in_flight_count(self):
+        """
+        Return the number of requests sent and not yet finished.
+        """
+        with self.__lock:
+            return sum(len(c.pending) for c in self.__connections)
+
+    def queued_count(self):
+        """
+        Return the number of requests waiting for a free connection slot.
+        """
+        with self.__lock:
+            return len(self.__queue)
+
+    def __slot(self):
+        # Return a connection with a free request slot (or None).
+        free = [c for c in self.__connections
+                if len(c.pending) < self.__max_in_flight]
+        if free:
+            return min(free, key=lambda c: len(c.pending))
+        return None
+
+    def __dispatch(self):
+        while self.__queue and not self.__shutdown:
+            future, callback, payload = self.__queue[0]
+            if future.cancelled():
+                self.__queue.popleft()
+                continue
+            conn = self.__slot()
+            if conn is None:
+                # All slots are taken (back-pressure); open more
+                # connections if the pool is not full
+                self.__open_connections()
+                return
+            self.__queue.popleft()
+            if not future.set_running_or_notify_cancel():
+                continue
+            rid = next(self.__ids)
+            conn.pending[rid] = (future, callback)
+            conn.send(("run", rid, payload))
+
+    def __open_connections(self):
+        # Start connecting (in the background; connecting can block for
+        # up to `timeout`) while the waiting requests exceed the capacity
+        # of the pool and the connections being opened.
+        while len(self.__connections) + len(self.__connecting) < \
+                self.__max_connections and \
+                len(self.__queue) > \
+                len(self.__connecting) * self.__max_in_flight:
+            thread = threading.Thread(
+                target=self.__connect, name="RemoteBackend-connect")
+            thread.daemon = True
+            self.__connecting.append(thread)
+            thread.start()
+
+    def __connect(self):
+        failed = []
+        try:
+            sock = connect(self.__address, self.__authkey, self.__timeout,
+                           self.__max_message_size)
+        except RemoteError as err:
+            with self.__lock:
+                self.__connecting.remove(threading.current_thread())
+                if self.__connections:
+                    # Wait for a free slot on the open connections
+                    log.warning("%s", err)
+                elif not self.__connecting:
+                    # Fail all the waiting requests
+                    failed = list(self.__queue)
+                    self.__queue.clear()
+            for future, _, _ in failed:
+                if future.set_running_or_notify_cancel():
+                    future.set_exception(err)
+            return
+        with self.__lock:
+            self.__connecting.remove(threading.current_thread())
+            if self.__shutdown:
+                sock.close()
+                return
+            self.__connections.append(_Connection(sock, self))
+            self.__dispatch()
+
+    def _event(self, conn, rid, kind, payload):
+        with self.__lock:
+            _, callback = conn.pending.get(rid, (None, None))
+        if callback is not None:
+            try:
+                callback(kind, payload)
+            except Exception:
+                log.exception("Error in an event callback")
+
+    def _finished(self, conn, rid, result=None, error=None):
+        with self.__lock:
+            future, _ = conn.pending.pop(rid, (None, None))
+            self.__dispatch()
+        if future is None:
+            return
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    def _lost(self, conn, error):
+        with self.__lock:
+            if conn in self.__connections:
+                self.__connections.remove(conn)
+            pending = list(conn.pending.values())
+            conn.pending.clear()
+            self.__dispatch()
+        for future, _ in pending:
+            future.set_exception(error)
+        if not self.__shutdown:
+            log.warning("%s (%i requests failed)", error, len(pending))
+
+    def shutdown(self, wait=True):
+        with self.__lock:
+            if self.__shutdown:
+                return
+            self.__shutdown = True
+            queued = list(self.__queue)
+            self.__queue.clear()
+            connections = list(self.__connections)
+            connecting = list(self.__connecting)
+        for future, _, _ in queued:
+            future.cancel()
+        for conn in connections:
+            conn.close()
+        if wait:
+            for thread in connecting:
+                thread.join()
+            for conn in connections:
+                conn.join()
+
+
+class _Handler(socketserver.BaseRequestHandler):
+    def handle(self):
+        sock = self.request
+        worker = self.server.worker
+        try:
+            # Nothing is unpickled before the client is authenticated
+            sock.settimeout(worker.timeout)
+            deliver_challenge(sock, worker.authkey())
+            answer_challenge(sock, worker.authkey())
+            kind, _, version = recv_message(sock, worker.max_message_size)
+            sock.settimeout(None)
+        except RemoteError as err:
+            log.warning("Rejected a connection from %r: %s",
+                        self.client_address, err)
+            return
+        except (OSError, EOFError, ValueError):
+            return
+        if kind != "hello" or version != PROTOCOL_VERSION:
+            send_message(sock, ("error", 0, (
+                "Unsupported protocol version {!r}".format(version),
+                "RemoteError", "")))
+            return
+        send_message(sock, ("hello", 0, PROTOCOL_VERSION))
+
+        lock = threading.Lock()
+        # Stop reading requests (and let the TCP flow control push back
+        # on the client) while `max_in_flight` are running
+        slots = threading.Semaphore(worker.max_in_flight)
+        while True:
+            try:
+                kind, rid, payload = recv_message(
+                    sock, worker.max_message_size)
+            except (OSError, EOFError):
+                break
+            except Exception:
+                # e.g. the task is not importable on the server
+                log.exception("Could not read a request")
+                break
+            if kind == "run":
+                slots.acquire()
+                worker._executor.submit(
+                    _run_request, sock, lock, slots, rid, payload)
+            else:
+                log.warning("Unknown message %r", kind)
+
+
+def _run_request(sock, lock, slots, rid, payload):
+    def send(message):
+        with lock:
+            send_message(sock, message)
+
+    def emit(kind, value):
+        send((kind, rid, value))
+
+    try:
+        context = TaskContext(payload["node"], payload["properties"], emit)
+        try:
+            outputs = run_task(payload["task"], payload["inputs"], context)
+            reply = ("done", rid, outputs)
+        except Exception as err:
+            reply = ("error", rid, (str(err), type(err).__name__,
+                                    traceback.format_exc()))
+        try:
+            send(reply)
+        except (OSError, EOFError):
+            raise
+        except Exception as err:
+            # The outputs can not be pickled
+            send(("error", rid, (str(err), type(err).__name__,
+                                 traceback.format_exc())))
+    except (OSError, EOFError):
+        log.info("Connection lost while running request %i", rid)
+    finally:
+        slots.release()
+
+
+class _TCPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+if hasattr(socketserver, "ThreadingUnixStreamServer"):
+    class _UnixServer(socketserver.ThreadingUnixStreamServer):
+        daemon_threads = True
+else:
+    _UnixServer = None
+
+
+class WorkerServer(object):
+    """
+    A reference worker server running the tasks in a thread pool.
+
+    Parameters
+    ----------
+    address : Union[Tuple[str, int], str]
+        The ``(host, port)`` (port 0 selects a free port) or the Unix
+        socket path to listen on.
+    authkey : Optional[bytes]
+        The secret the clients must know. If None a random key is
+        generated (see :func:`authkey`).
+    max_workers : int
+        The number of tasks run concurrently.
+    max_in_flight : int
+        The maximum number of running requests per connection.
+    max_message_size : int
+        The maximum size of a received message in bytes.
+    timeout : float
+        The time in seconds a client has to authenticate.
+
+    """
+    def __init__(self, address=("127.0.0.1", 0), authkey=None, max_workers=2,
+                 max_in_flight=4, max_message_size=MAX_MESSAGE_SIZE,
+                 timeout=10):
+        if authkey is None:
+            authkey = os.urandom(32)
+        self.__authkey = _check_authkey(authkey)
+        self.max_in_flight = max_in_flight
+        self.max_message_size = max_message_size
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(max_workers=max_workers)
+        if isinstance(address, tuple):
+            server_class = _TCPServer
+            if _socket_family(address) == socket.AF_INET6:
+                server_class = type("_TCPServer6", (_TCPServer,),
+                                    {"address_family": socket.AF_INET6})
+        else:
+            if _UnixServer is None:
+                raise ValueError("Unix sockets are not supported")
+            server_class = _UnixServer
+        self.__server = server_class(address, _Handler)
+        self.__server.worker = self
+        self.__thread = None
+
+    def address(self):
+        """
+        Return the address the server is listening on.
+        """
+        return self.__server.server_address
+
+    def authkey(self):
+        """
+        Return the secret the clients authenticate with.
+        """
+        return self.__authkey
+
+    def serve_forever(self):
+        self.__server.serve_forever()
+
+    def start(self):
+        """
+        Start serving in a background thread.
+        """
+        self.__thread = threading.Thread(
+            target=self.serve_forever, name="WorkerServer")
+        self.__thread.daemon = True
+        self.__thread.start()
+
+    def close(self):
+        """
+        Stop serving and close the listening socket.
+        """
+        if self.__thread is not None:
+            self.__server.shutdown()
+            self.__thread.join()
+            self.__thread = None
+        self.__server.server_close()
+        self._executor.shutdown(wait=False)
+        if not isinstance(self.__server.server_address, tuple):
+            try:
+                os.remove(self.__server.server_address)
+            except OSError:
+                pass
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Run an orange canvas worker server.")
+    parser.add_argument("--host", default="127.0.0.1",
+                        help="Interface to listen on (default: %(default)s)")
+    parser.add_argument("--port", type=int, default=0,
+                        help="Port to listen on (default: any free port)")
+    parser.add_argument("--unix", metavar="PATH",
+                        help="Listen on a Unix socket instead")
+    parser.add_argument("--workers", type=int, default=multiprocessing.cpu_count(),
+                        help="Number of concurrently run tasks")
+    parser.add_argument("--authkey-file", metavar="PATH",
+                        help="Read the shared secret from a file (default: "
+                             "the {} environment variable or a random "
+                             "key printed on start)".format(AUTHKEY_ENV))
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO)
+    address = args.unix if args.unix else (args.host, args.port)
+    authkey = None
+    if args.authkey_file:
+        with open(args.authkey_file, "rb") as f:
+            authkey = f.read().strip()
+    elif os.environ.get(AUTHKEY_ENV):
+        authkey = os.environ[AUTHKEY_ENV].encode("utf-8")
+    generated = authkey is None
+    if generated:
+        authkey = binascii.hexlify(os.urandom(16))
+    server = WorkerServer(address, authkey=authkey, max_workers=args.workers)
+    if generated:
+        print("authkey: {}".format(authkey.decode("ascii")))
+        sys.stdout.flush()
+    log.info("Listening on %r", server.address())
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,250 @@
+"""
+Workflow Runner
+===============
+
+Drive a :class:`~.signalmanager.SignalManager` until the workflow is
+quiescent (i.e. no more signals are pending and no nodes are busy) and
+collect per node execution statistics.
+
+"""
+import time
+import logging
+
+from collections import OrderedDict
+
+from AnyQt.QtCore import QObject, QEventLoop, QTimer
+from AnyQt.QtCore import pyqtSignal as Signal, pyqtSlot as Slot
+
+try:
+    import tracemalloc
+except ImportError:  # Python 2
+    tracemalloc = None
+
+from .node import SchemeNode
+from .signalmanager import SignalManager
+
+log = logging.getLogger(__name__)
+
+
+class NodeStats(object):
+    """
+    Execution statistics for a single node.
+    """
+    __slots__ = ("node", "calls", "wall_time", "peak_memory")
+
+    def __init__(self, node):
+        #: The node
+        self.node = node
+        #: Number of times the node had its inputs updated
+        self.calls = 0
+        #: Total wall time (in seconds) spent updating the node's inputs
+        self.wall_time = 0.0
+        #: Peak memory (in bytes) allocated while updating the node's
+        #: inputs or None if not traced.
+        self.peak_memory = None
+
+    def as_dict(self):
+        return {
+            "title": self.node.title,
+            "qualified_name": self.node.description.qualified_name,
+            "calls": self.calls,
+            "wall_time": self.wall_time,
+            "peak_memory": self.peak_memory,
+        }
+
+
+class WorkflowRunner(QObject):
+    """
+    Run a workflow (scheme) until its signal manager becomes quiescent.
+
+    The workflow is quiescent when the signal manager has no pending
+    signals, is not processing, and no node is in a blocking state for
+    at least `settle` seconds.
+
+    .. note::
+        The time reported for a node only includes the time spent in
+        :func:`SignalManager.process_node`. Work that a node continues
+        asynchronously (while it is reported as blocking) is not included.
+
+    """
+    #: The run has finished (the workflow is quiescent)
+    Finished = "finished"
+    #: The run did not finish in the allotted time
+    Timeout = "timeout"
+    #: The signal manager entered an error state
+    Error = "error"
+
+    #: Emitted when the run has finished with the status
+    finished = Signal(str)
+
+    def __init__(self, scheme, manager, parent=None, trace_memory=False,
+                 settle=0.25, **kwargs):
+        QObject.__init__(self, parent, **kwargs)
+        assert isinstance(manager, SignalManager)
+        self.__scheme = scheme
+        self.__manager = manager
+        self.__trace_memory = trace_memory and tracemalloc is not None
+        self.__settle = settle
+        self.__stats = OrderedDict(
+            (node, NodeStats(node)) for node in scheme.nodes)
+        self.__started = {}
+        self.__last_activity = time.time()
+        self.__loop = None
+        self.__status = None
+        self.__run_time = 0.0
+        self.__poll_timer = QTimer(self, interval=20)
+        self.__poll_timer.timeout.connect(self.__check_finished)
+        self.__timeout_timer = QTimer(self, singleShot=True)
+        self.__timeout_timer.timeout.connect(self.__on_timeout)
+
+    def scheme(self):
+        """
+        Return the workflow.
+        """
+        return self.__scheme
+
+    def signal_manager(self):
+        """
+        Return the signal manager.
+        """
+        return self.__manager
+
+    def is_quiescent(self):
+        """
+        Is the signal manager idle (no pending signals, no busy nodes).
+        """
+        manager = self.__manager
+        return (manager.runtime_state() == SignalManager.Waiting and
+                not manager.pending_nodes() and
+                not manager.blocking_nodes())
+
+    def run(self, timeout=None):
+        """
+        Start the signal manager and run an event loop until the workflow
+        is quiescent or `timeout` (in seconds) elapses.
+
+        Return the status (`Finished`, `Timeout` or `Error`).
+        """
+        manager = self.__manager
+        manager.processingStarted[SchemeNode].connect(self.__on_started)
+        manager.processingFinished[SchemeNode].connect(self.__on_finished)
+        manager.updatesPending.connect(self.__on_activity)
+        manager.runtimeStateChanged.connect(self.__on_activity)
+
+        tracing = False
+        if self.__trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            tracing = True
+
+        self.__status = None
+        self.__last_activity = start = time.time()
+        loop = self.__loop = QEventLoop()
+        if timeout is not None:
+            self.__timeout_timer.start(int(timeout * 1000))
+
+        if manager.state() == SignalManager.Paused:
+            manager.resume()
+        else:
+            manager.start()
+
+        self.__poll_timer.start()
+        try:
+            loop.exec_()
+        finally:
+            self.__poll_timer.stop()
+            self.__timeout_timer.stop()
+            self.__loop = None
+            self.__run_time = time.time() - start
+            if tracing:
+                tracemalloc.stop()
+            manager.processingStarted[SchemeNode].disconnect(
+                self.__on_started)
+            manager.processingFinished[SchemeNode].disconnect(
+                self.__on_finished)
+            manager.updatesPending.disconnect(self.__on_activity)
+            manager.runtimeStateChanged.disconnect(self.__on_activity)
+
+        log.info("Workflow run %s in %.3f s", self.__status, self.__run_time)
+        self.finished.emit(self.__status)
+        return self.__status
+
+    def status(self):
+        """
+        Return the status of the last run (or None).
+        """
+        return self.__status
+
+    def run_time(self):
+        """
+        Return the wall time (in seconds) of the last run.
+        """
+        return self.__run_time
+
+    def node_stats(self):
+        """
+        Return a list of :class:`NodeStats` (in workflow node order).
+        """
+        return list(self.__stats.values())
+
+    def report(self):
+        """
+        Return a JSON serializable run report.
+        """
+        return {
+            "status": self.__status,
+            "run_time": self.__run_time,
+            "nodes": [dict(stats.as_dict(), id=i)
+                      for i, stats in enumerate(self.node_stats())],
+        }
+
+    def __stats_for(self, node):
+        stats = self.__stats.get(node)
+        if stats is None:
+            stats = self.__stats[node] = NodeStats(node)
+        return stats
+
+    @Slot(SchemeNode)
+    def __on_started(self, node):
+        self.__last_activity = time.time()
+        if self.__trace_memory:
+            if hasattr(tracemalloc, "reset_peak"):
+                tracemalloc.reset_peak()
+            else:
+                tracemalloc.clear_traces()
+            base = tracemalloc.get_traced_memory()[0]
+        else:
+            base = None
+        self.__started[node] = (time.time(), base)
+
+    @Slot(SchemeNode)
+    def __on_finished(self, node):
+        end = self.__last_activity = time.time()
+        start, base = self.__started.pop(node, (end, None))
+        stats = self.__stats_for(node)
+        stats.calls += 1
+        stats.wall_time += end - start
+        if base is not None:
+            peak = tracemalloc.get_traced_memory()[1] - base
+            stats.peak_memory = max(stats.peak_memory or 0, peak)
+
+    def __on_activity(self, *args):
+        self.__last_activity = time.time()
+
+    def __check_finished(self):
+        if self.__loop is None or self.__status is not None:
+            return
+        manager = self.__manager
+        if manager.state() == SignalManager.Error:
+            self.__exit(WorkflowRunner.Error)
+        elif not self.is_quiescent():
+            self.__last_activity = time.time()
+        elif time.time() - self.__last_activity >= self.__settle:
+            self.__exit(WorkflowRunner.Finished)
+
+    def __on_timeout(self):
+        if self.__loop is not None and self.__status is None:
+            self.__exit(WorkflowRunner.Timeout)
+
+    def __exit(self, status):
+        self.__status = status
+        self.__loop.exit(0)
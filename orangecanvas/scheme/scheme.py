@@ -421,7 +421,7 @@ class Scheme(QObject):
 
         """
         check_type(link, SchemeLink)
-        return compatible_channels(link.source_channel, link.sink_channel)
+        return link.compatible_channels()
 
     def can_connect(self, link):
         """
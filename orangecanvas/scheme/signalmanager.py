@@ -16,11 +16,15 @@ from collections import namedtuple, defaultdict, deque
 from operator import attrgetter
 from functools import partial
 
-from AnyQt.QtCore import QObject, QCoreApplication, QEvent, QTimer
+from AnyQt.QtCore import QObject, QCoreApplication, QEvent, QTimer, Qt
 from AnyQt.QtCore import pyqtSignal as Signal, pyqtSlot as Slot
 
 
 from .scheme import SchemeNode, SchemeLink
+from .node import UserMessage
+from . import tracing
+from .outputstore import OutputStore
+from . import outputcache
 from functools import reduce
 
 log = logging.getLogger(__name__)
@@ -33,6 +37,16 @@ _Signal = namedtuple(
      "id"])      # signal id
 
 
+#: A summary of a partial workflow re-execution (see
+#: :func:`SignalManager.rerun_from`)
+RerunReport = namedtuple(
+    "RerunReport",
+    ["node",        # the invalidated node
+     "dependents",  # all nodes downstream of `node`
+     "processed",   # nodes (of `dependents`) that were updated
+     "skipped"])    # nodes (of `dependents`) that did not need an update
+
+
 is_enabled = attrgetter("enabled")
 
 MAX_CONCURRENT = 1
@@ -71,6 +85,21 @@ class SignalManager(QObject):
     runtimeStateChanged = Signal(int)
     """Emitted when `SignalManager`'s runtime state changes."""
 
+    cacheHit = Signal(SchemeNode)
+    """Emitted when a node's outputs were restored from the output cache
+    (see :func:`set_output_cache`) instead of being recomputed."""
+
+    rerunFinished = Signal(object)
+    """Emitted with a :class:`RerunReport` when a partial re-execution
+    started with :func:`rerun_from` completes."""
+
+    # Emitted (from any thread) with (node, future) when an isolated
+    # node's task finishes
+    __taskFinished = Signal(object, object)
+    # Emitted (from any thread) with (node, kind, payload) for the progress
+    # and output events reported by an isolated node's task
+    __taskEvent = Signal(object, object, object)
+
     def __init__(self, scheme):
         assert(scheme)
         QObject.__init__(self, scheme)
@@ -78,16 +107,308 @@ class SignalManager(QObject):
 
         # mapping a node to it's current outputs
         # {node: {channel: {id: signal_value}}}
+        # (the innermost dicts are `ChannelOutputs` of the output store)
         self._node_outputs = {}
+        self.__output_store = OutputStore()
 
         self.__state = SignalManager.Running
         self.__runtime_state = SignalManager.Waiting
 
+        # State of the current partial re-execution (`rerun_from`)
+        # {"node": node, "dependents": [...], "affected": set(),
+        #  "processed": set()} or None. "affected" are the node and its
+        # dependents (the nodes whose unchanged outputs are not propagated)
+        self.__rerun = None
+
         # A flag indicating if UpdateRequest event should be rescheduled
         self.__reschedule = False
         self.__update_timer = QTimer(self, interval=100, singleShot=True)
         self.__update_timer.timeout.connect(self.__process_next)
 
+        # An optional SignalTracer instance
+        self.__tracer = None
+
+        # An optional persistent OutputCache and the nodes opting in
+        self.__output_cache = None
+        self.__cacheable = set()
+        # {(node, channel name, id): value cache key or None}
+        self.__value_keys = {}
+        # {node: cache key of the node's last input delivery}
+        self.__node_keys = {}
+        # {node: [(channel name, id, value key), ...] or None}
+        self.__recorded_outputs = {}
+        self.__replaying = None
+
+        # An optional ExecutionBackend, the nodes designated for isolated
+        # execution {node: task} and their running tasks {node: Future}
+        self.__execution_backend = None
+        self.__isolated = {}
+        self.__running = {}
+        self.__taskFinished.connect(self.__on_task_finished,
+                                    Qt.QueuedConnection)
+        self.__taskEvent.connect(self.__on_task_event, Qt.QueuedConnection)
+
+    def set_tracer(self, tracer):
+        """
+        Set a :class:`~.tracing.SignalTracer` instance to record the
+        runtime events (or None to disable tracing).
+        """
+        self.__tracer = tracer
+
+    def tracer(self):
+        """
+        Return the current :class:`~.tracing.SignalTracer` (or None).
+        """
+        return self.__tracer
+
+    def set_output_cache(self, cache):
+        """
+        Set a persistent :class:`~.outputcache.OutputCache` (or None to
+        disable caching).
+
+        When a cacheable node (see :func:`is_cacheable`) is scheduled for
+        an update and the cache contains its outputs for the same widget
+        version, node state and inputs the outputs are restored from the
+        cache and :func:`send_to_node` is not called.
+        """
+        self.__output_cache = cache
+
+    def output_cache(self):
+        """
+        Return the :class:`~.outputcache.OutputCache` (or None).
+        """
+        return self.__output_cache
+
+    def set_cacheable(self, node, cacheable=True):
+        """
+        Set the `node`'s outputs to be cached (by default nodes are not).
+
+        A cacheable node's outputs must be fully determined by its widget
+        version, state (see :func:`node_state_key`) and inputs.
+        """
+        if cacheable:
+            self.__cacheable.add(node)
+        else:
+            self.__cacheable.discard(node)
+
+    def is_cacheable(self, node):
+        """
+        Can the `node`'s outputs be cached.
+
+        The default implementation returns the state set by
+        :func:`set_cacheable`. Reimplement to opt in per widget type.
+        """
+        return node in self.__cacheable
+
+    def node_state_key(self, node):
+        """
+        Return a key (hash) of the node's state or None if not available.
+
+        The default implementation hashes the `node.properties`.
+        Implementations where the properties are not kept up to date
+        should reimplement this.
+        """
+        return outputcache.properties_hash(node.properties)
+
+    def node_cache_key(self, node):
+        """
+        Return the `node`'s current output cache key (a hash of its widget
+        version, state and the cache keys of its current inputs) or None
+        if its outputs can not be cached.
+        """
+        if self.__output_cache is None or not self.is_cacheable(node):
+            return None
+
+        input_keys = []
+        links = self.scheme().find_links(sink_node=node)
+        for link in filter(is_enabled, links):
+            source = link.source_node, link.source_channel.name
+            for id in self.link_contents(link):
+                key = self.__value_keys.get(source + (id,))
+                if key is None:
+                    return None
+                input_keys.append((link.sink_channel.name, key))
+
+        state = self.node_state_key(node)
+        if state is None:
+            return None
+        return outputcache.node_key(node.description, state, input_keys)
+
+    def node_cache_hit(self, node, signals):
+        """
+        Called when the `node`'s outputs were restored from the cache
+        instead of delivering the `signals` to the node.
+
+        The default implementation does nothing. Reimplement to e.g.
+        update the node's state.
+        """
+        pass
+
+    def __cached_outputs(self, node, key):
+        """
+        Return a list of (channel, id, value) restored from the cache for
+        `node` with `key` or None if not (fully) available.
+        """
+        cache = self.__output_cache
+        recorded = cache.get_outputs(key)
+        if not recorded:
+            return None
+        outputs = []
+        for channel, id, value_key in recorded:
+            if value_key is None:
+                return None
+            try:
+                channel = node.output_channel(channel)
+                value = cache.get(value_key)
+            except (ValueError, KeyError):
+                return None
+            outputs.append((channel, id, value))
+        return outputs
+
+    def __record_output(self, node, channel, value, id):
+        if node in self.__node_keys:
+            node_key = self.__node_keys[node]
+        else:
+            # a node without inputs (it is never processed)
+            node_key = self.__node_keys[node] = self.node_cache_key(node)
+
+        if node_key is None:
+            value_key = None
+        else:
+            value_key = outputcache.value_key(node_key, channel.name, id)
+            if self.__replaying is not node:
+                if not self.__output_cache.put(value_key, value):
+                    value_key = None
+                recorded = self.__recorded_outputs.setdefault(node, [])
+                recorded[:] = [rec for rec in recorded
+                               if rec[:2] != (channel.name, id)]
+                recorded.append((channel.name, id, value_key))
+                self.__output_cache.set_outputs(node_key, recorded)
+        self.__value_keys[(node, channel.name, id)] = value_key
+
+    def set_execution_backend(self, backend):
+        """
+        Set an :class:`~.execution.ExecutionBackend` computing the nodes
+        designated for isolated execution (see :func:`isolated_task`) or
+        None to deliver all inputs with :func:`send_to_node`.
+
+        The backend is not owned (shut down) by the signal manager.
+        """
+        self.__execution_backend = backend
+
+    def execution_backend(self):
+        """
+        Return the :class:`~.execution.ExecutionBackend` (or None).
+        """
+        return self.__execution_backend
+
+    def set_isolated(self, node, task):
+        """
+        Designate the `node` to be computed by `task` in the execution
+        backend (or None to deliver its inputs with :func:`send_to_node`).
+
+        `task` is a picklable function or its qualified name (see
+        :mod:`~.execution`).
+        """
+        if task is not None:
+            self.__isolated[node] = task
+        else:
+            self.__isolated.pop(node, None)
+
+    def isolated_task(self, node):
+        """
+        Return the task computing the `node` in the execution backend or
+        None if the node's inputs should be delivered with
+        :func:`send_to_node`.
+
+        The default implementation returns the task set by
+        :func:`set_isolated`. Reimplement to designate nodes per widget
+        type.
+        """
+        return self.__isolated.get(node)
+
+    def node_inputs(self, node):
+        """
+        Return the `node`'s current inputs as a `{channel name: value}`
+        dict. The value of a multiple input channel is a list of all
+        the (not None) values on its links.
+        """
+        inputs = {}
+        for channel in node.input_channels():
+            inputs[channel.name] = None if channel.single else []
+        links = self.scheme().find_links(sink_node=node)
+        for link in filter(is_enabled, links):
+            name = link.sink_channel.name
+            for value in self.link_contents(link).values():
+                if isinstance(inputs[name], list):
+                    if value is not None:
+                        inputs[name].append(value)
+                else:
+                    inputs[name] = value
+        return inputs
+
+    def is_running(self, node):
+        """
+        Is the `node`'s task currently running in the execution backend.
+        """
+        return node in self.__running
+
+    def __submit(self, node, task):
+        future = self.__execution_backend.submit_node(
+            node, task, self.node_inputs(node),
+            lambda kind, payload: self.__taskEvent.emit(node, kind, payload)
+        )
+        self.__running[node] = future
+        node.set_processing_state(1)
+        future.add_done_callback(
+            lambda f: self.__taskFinished.emit(node, f))
+
+    @Slot(object, object, object)
+    def __on_task_event(self, node, kind, payload):
+        if node not in self.__running:
+            return
+        if kind == "progress":
+            node.set_progress(payload)
+        elif kind == "output":
+            name, value = payload
+            self.send(node, node.output_channel(name), value, None)
+
+    @Slot(object, object)
+    def __on_task_finished(self, node, future):
+        if self.__running.get(node) is not future:
+            # The node was removed or its task superseded
+            return
+        del self.__running[node]
+        node.set_processing_state(0)
+        node.set_progress(-1)
+        message_id = "{}.execution".format(__name__)
+        if future.cancelled():
+            pass
+        elif future.exception() is not None:
+            error = future.exception()
+            log.error("%r failed: %s", node.title, error)
+            node.set_state_message(
+                UserMessage(u"Execution failed: {}".format(error),
+                            UserMessage.Error, message_id=message_id))
+        else:
+            if any(m.message_id == message_id
+                   for m in node.state_messages()):
+                node.set_state_message(
+                    UserMessage(u"", message_id=message_id))
+            for name, value in future.result().items():
+                self.send(node, node.output_channel(name), value, None)
+        self._update()
+
+    def output_store(self):
+        """
+        Return the :class:`~.outputstore.OutputStore` retaining the
+        current node outputs.
+
+        Use :func:`OutputStore.set_budget` to limit the memory used by
+        the retained outputs (the least recently used are spilled to disk).
+        """
+        return self.__output_store
+
     def _can_process(self):
         """
         Return a bool indicating if the manger can enter the main
@@ -174,6 +495,70 @@ class SignalManager(QObject):
         """
         return self.__runtime_state
 
+    def rerun_from(self, node):
+        """
+        Invalidate `node` and recompute it and (only) the part of the
+        workflow downstream of it that is affected by its new outputs.
+
+        The node's current inputs are re-delivered. While the re-execution
+        is in progress an output sent on a channel that is unchanged
+        (see :func:`is_output_unchanged`) is not propagated further, so
+        branches whose inputs do not change are not recomputed.
+        :attr:`rerunFinished` is emitted with a :class:`RerunReport` when
+        done.
+
+        .. note:: Nodes with no inputs have nothing to re-deliver. An
+                  implementation that can recompute these should
+                  reimplement :func:`invalidate_node`.
+
+        Parameters
+        ----------
+        node : SchemeNode
+        """
+        scheme = self.scheme()
+        if node not in scheme.nodes:
+            raise ValueError("{!r} is not in the scheme".format(node))
+
+        if self.__rerun is not None:
+            self.__finish_rerun()
+
+        dependents = dependent_nodes(scheme, node)
+        self.__rerun = {
+            "node": node,
+            "dependents": dependents,
+            "affected": set(dependents) | {node},
+            "processed": set(),
+        }
+        log.info("Re-running %r (%i dependent nodes)",
+                 node.title, len(self.__rerun["dependents"]))
+        self.invalidate_node(node)
+        self.__check_rerun_finished()
+
+    def invalidate_node(self, node):
+        """
+        Invalidate the `node`'s state and schedule it for an update.
+
+        The default implementation re-schedules all the current values
+        on the node's enabled input links.
+        """
+        links = self.scheme().find_links(sink_node=node)
+        signals = []
+        for link in filter(is_enabled, links):
+            signals.extend(self.signals_on_link(link))
+        self._schedule(signals)
+
+    def is_output_unchanged(self, node, channel, id, old, new):
+        """
+        Return `True` if the `new` output value for `node`'s `channel`
+        (and signal `id`) should be considered the same as the `old`
+        current value, in which case it is not propagated downstream
+        during a :func:`rerun_from` re-execution.
+
+        The default implementation compares the identity of the objects.
+        Reimplement to use e.g. content hashes.
+        """
+        return old is new
+
     def on_node_removed(self, node):
         # remove all pending input signals for node so we don't get
         # stale references in process_node.
@@ -183,11 +568,28 @@ class SignalManager(QObject):
         log.info("Node %r removed. Removing pending signals.",
                  node.title)
         self.remove_pending_signals(node)
-
-        del self._node_outputs[node]
+        node.processing_state_changed.disconnect(
+            self.__on_processing_state_changed)
+
+        outputs = self._node_outputs.pop(node)
+        for channel_outputs in outputs.values():
+            # Release the tracked sizes and spilled files
+            channel_outputs.clear()
+
+        self.__cacheable.discard(node)
+        self.__isolated.pop(node, None)
+        future = self.__running.pop(node, None)
+        if future is not None:
+            future.cancel()
+        self.__node_keys.pop(node, None)
+        self.__recorded_outputs.pop(node, None)
+        for key in [key for key in self.__value_keys if key[0] is node]:
+            del self.__value_keys[key]
 
     def on_node_added(self, node):
-        self._node_outputs[node] = defaultdict(dict)
+        self._node_outputs[node] = defaultdict(self.__output_store.new_outputs)
+        node.processing_state_changed.connect(
+            self.__on_processing_state_changed)
 
     def link_added(self, link):
         # push all current source values to the sink
@@ -249,7 +651,18 @@ class SignalManager(QObject):
 
         scheme = self.scheme()
 
-        self._node_outputs[node][channel][id] = value
+        outputs = self._node_outputs[node][channel]
+        if self.__rerun is not None and \
+                node in self.__rerun["affected"] and id in outputs and \
+                self.is_output_unchanged(node, channel, id,
+                                         outputs[id], value):
+            log.debug("%r output on %r is unchanged; not propagating.",
+                      node.title, channel.name)
+            return
+
+        outputs[id] = value
+        if self.__output_cache is not None:
+            self.__record_output(node, channel, value, id)
 
         links = scheme.find_links(source_node=node, source_channel=channel)
         links = filter(is_enabled, links)
@@ -275,11 +688,15 @@ class SignalManager(QObject):
         Schedule a list of :class:`_Signal` for delivery.
         """
         self._input_queue.extend(signals)
+        if self.__tracer is not None:
+            self.__tracer.scheduled(signals, len(self._input_queue))
 
         for link in {sig.link for sig in signals}:
             # update the SchemeLink's runtime state flags
             contents = self.link_contents(link)
-            if any(value is not None for value in contents.values()):
+            # NOTE: `dict.values` does not reload the spilled values
+            # (which are never None)
+            if any(value is not None for value in dict.values(contents)):
                 state = SchemeLink.Active
             else:
                 state = SchemeLink.Empty
@@ -346,14 +763,49 @@ class SignalManager(QObject):
 
         assert ({sig.link for sig in self._input_queue}
                 .intersection({sig.link for sig in signals_in}) == set([]))
+        if self.__rerun is not None:
+            self.__rerun["processed"].add(node)
+
+        cached = None
+        if self.__output_cache is not None:
+            key = self.__node_keys[node] = self.node_cache_key(node)
+            if key is not None:
+                cached = self.__cached_outputs(node, key)
+                # The outputs of a new computation are recorded anew
+                self.__recorded_outputs[node] = []
+
+        tracer = self.__tracer
+        if tracer is not None:
+            tracer.delivery_started(node, len(signals_in),
+                                    len(self._input_queue))
+
         self.processingStarted.emit()
         self.processingStarted[SchemeNode].emit(node)
         try:
-            self.send_to_node(node, signals_in)
+            if cached is not None:
+                log.debug("Restoring %r outputs from the cache", node.title)
+                self.__replay(node, signals_in, cached)
+            elif self.__execution_backend is not None and \
+                    self.isolated_task(node) is not None:
+                self.__submit(node, self.isolated_task(node))
+            else:
+                self.send_to_node(node, signals_in)
         finally:
+            if tracer is not None:
+                tracer.delivery_finished(node)
             self.processingFinished.emit()
             self.processingFinished[SchemeNode].emit(node)
 
+    def __replay(self, node, signals, outputs):
+        self.__replaying = node
+        try:
+            self.node_cache_hit(node, signals)
+            for channel, id, value in outputs:
+                self.send(node, channel, value, id)
+        finally:
+            self.__replaying = None
+        self.cacheHit.emit(node)
+
     def compress_signals(self, signals):
         """
         Compress a list of :class:`_Signal` instances to be delivered.
@@ -414,14 +866,34 @@ class SignalManager(QObject):
 
     def blocking_nodes(self):
         """
-        Return a list of nodes in a blocking state.
+        Return a list of nodes in a blocking state (including the nodes
+        with a task running in the execution backend).
         """
         scheme = self.scheme()
-        return [node for node in scheme.nodes if self.is_blocking(node)]
+        return [node for node in scheme.nodes
+                if node in self.__running or self.is_blocking(node)]
 
     def is_blocking(self, node):
         return False
 
+    def notify_blocking_state_changed(self, node):
+        """
+        Notify the signal manager that the `node`'s blocking state (see
+        :func:`is_blocking`) has changed.
+
+        Subclasses whose :func:`is_blocking` does not follow the node's
+        processing state should call this on every change so the
+        transition is recorded by the tracer.
+        """
+        if self.__tracer is not None:
+            self.__tracer.blocking(self.blocking_nodes())
+
+    @Slot(int)
+    def __on_processing_state_changed(self, state):
+        node = self.sender()
+        if node is not None:
+            self.notify_blocking_state_changed(node)
+
     def node_update_front(self):
         """
         Return a list of nodes on the update front, i.e. nodes scheduled for
@@ -432,6 +904,17 @@ class SignalManager(QObject):
             The node's ancestors are only computed over enabled links.
 
         """
+        tracer = self.__tracer
+        if tracer is not None:
+            start = tracing.clock()
+            try:
+                return self.__node_update_front()
+            finally:
+                tracer.update_front(start)
+        else:
+            return self.__node_update_front()
+
+    def __node_update_front(self):
         scheme = self.scheme()
 
         def expand(node):
@@ -474,6 +957,18 @@ class SignalManager(QObject):
 
     @Slot()
     def __process_next(self):
+        tracer = self.__tracer
+        if tracer is not None:
+            start = tracing.clock()
+            try:
+                self.__process_next_impl()
+            finally:
+                tracer.blocking(self.blocking_nodes())
+                tracer.tick(start)
+        else:
+            self.__process_next_impl()
+
+    def __process_next_impl(self):
         if not self.__state == SignalManager.Running:
             log.debug("Received 'UpdateRequest' while not in 'Running' state")
             return
@@ -489,7 +984,10 @@ class SignalManager(QObject):
             self.__reschedule = True
             return
 
-        nbusy = len(self.blocking_nodes())
+        # The isolated tasks run concurrently (they only block their
+        # dependents)
+        nbusy = len([node for node in self.blocking_nodes()
+                     if node not in self.__running])
         log.info("'UpdateRequest' event, queued signals: %i, nbusy: %i "
                  "(MAX_CONCURRENT: %i)",
                  len(self._input_queue), nbusy, MAX_CONCURRENT)
@@ -502,12 +1000,31 @@ class SignalManager(QObject):
             log.debug("Rescheduling signal update")
             self.__update_timer.start()
 
-        nbusy = len(self.blocking_nodes())
+        nbusy = len([node for node in self.blocking_nodes()
+                     if node not in self.__running])
         if self.node_update_front() and nbusy < MAX_CONCURRENT:
             log.debug("More nodes are eligible for an update. "
                       "Scheduling another update.")
             self._update()
 
+        self.__check_rerun_finished()
+
+    def __check_rerun_finished(self):
+        if self.__rerun is not None and not self._input_queue and \
+                not self.blocking_nodes():
+            self.__finish_rerun()
+
+    def __finish_rerun(self):
+        rerun, self.__rerun = self.__rerun, None
+        dependents = rerun["dependents"]
+        processed = [n for n in dependents if n in rerun["processed"]]
+        skipped = [n for n in dependents if n not in rerun["processed"]]
+        report = RerunReport(rerun["node"], dependents, processed, skipped)
+        log.info("Re-run of %r finished: updated %i, skipped %i of %i "
+                 "dependent nodes.", report.node.title, len(processed),
+                 len(skipped), len(dependents))
+        self.rerunFinished.emit(report)
+
     def _update(self):
         """
         Schedule processing at a later time.
@@ -521,7 +1038,7 @@ def can_enable_dynamic(link, value):
     """
     Can the a dynamic `link` (:class:`SchemeLink`) be enabled for`value`.
     """
-    return isinstance(value, link.sink_type())
+    return link.can_enable_dynamic(value)
 
 
 def compress_signals(signals):
@@ -0,0 +1,213 @@
+"""
+Tests for the node execution backends.
+
+"""
+import os
+import signal
+import time
+import shutil
+import tempfile
+import unittest
+
+import numpy
+
+from AnyQt.QtTest import QTest
+
+from ...gui import test
+from ...registry.tests import small_testing_registry
+from .. import Scheme
+from ..node import UserMessage
+from ..execution import (
+    InProcessBackend, ProcessBackend, TaskError, WorkerCrashedError,
+    encode, decode, current_context
+)
+from .test_signalmanager import EvalSignalManager
+
+
+# The tasks must be importable in the worker processes
+
+def add_task(inputs):
+    return {"result": (inputs["left"] or 0) + (inputs["right"] or 0)}
+
+
+def double_task(inputs):
+    return {"result": inputs["value"] * 2}
+
+
+def failing_task(inputs):
+    raise ValueError("bad input")
+
+
+def crashing_task(inputs):
+    os._exit(3)
+
+
+def pid_task(inputs):
+    return {"result": os.getpid()}
+
+
+def context_task(inputs):
+    context = current_context()
+    context.progress(50)
+    context.send("partial", inputs["value"])
+    return {"result": (context.node["title"], context.properties["factor"])}
+
+
+class TestEncode(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def test_encode(self):
+        array = numpy.arange(1000)
+        encoded = encode({"a": array, "b": 1, "c": None}, self.dir, 1000)
+        self.assertEqual(encoded["b"], 1)
+        self.assertEqual(len(os.listdir(self.dir)), 1)
+        decoded = decode(encoded)
+        numpy.testing.assert_array_equal(decoded["a"], array)
+        self.assertEqual(decoded["b"], 1)
+        self.assertIsNone(decoded["c"])
+        # The files are consumed
+        self.assertEqual(os.listdir(self.dir), [])
+        # Without a directory everything goes through the pipe
+        self.assertIs(encode({"a": array}, None, 0)["a"], array)
+
+
+class TestBackends(unittest.TestCase):
+    def test_in_process(self):
+        backend = InProcessBackend()
+        future = backend.submit(add_task, {"left": 1, "right": 2})
+        self.assertEqual(future.result(), {"result": 3})
+        future = backend.submit(failing_task, {})
+        self.assertIsInstance(future.exception(), ValueError)
+        future = backend.submit(__name__ + ".double_task", {"value": 2})
+        self.assertEqual(future.result(), {"result": 4})
+
+    def test_process(self):
+        backend = ProcessBackend(max_workers=1, min_shared_size=0)
+        self.addCleanup(backend.shutdown)
+        future = backend.submit(add_task, {"left": 1, "right": 2})
+        self.assertEqual(future.result(timeout=60), {"result": 3})
+        self.assertNotEqual(
+            backend.submit(pid_task, {}).result(timeout=60)["result"],
+            os.getpid())
+
+        # Large arrays are transferred through the shared directory
+        array = numpy.arange(100000, dtype=float)
+        future = backend.submit(double_task, {"value": array})
+        numpy.testing.assert_array_equal(
+            future.result(timeout=60)["result"], array * 2)
+
+        with self.assertRaises(TaskError) as cm:
+            backend.submit(failing_task, {}).result(timeout=60)
+        self.assertEqual(cm.exception.type_name, "ValueError")
+        self.assertIn("bad input", str(cm.exception))
+        self.assertIn("failing_task", cm.exception.traceback)
+        self.assertEqual(backend.restart_count(), 0)
+
+        # A crash fails the running task and the worker is restarted
+        pid = backend.worker_pids()
+        with self.assertRaises(WorkerCrashedError) as cm:
+            backend.submit(crashing_task, {}).result(timeout=60)
+        self.assertEqual(cm.exception.exitcode, 3)
+        self.assertEqual(backend.restart_count(), 1)
+        future = backend.submit(add_task, {"left": 2, "right": 2})
+        self.assertEqual(future.result(timeout=60), {"result": 4})
+        self.assertNotEqual(backend.worker_pids(), pid)
+
+        # A worker that died while idle is restarted and runs the task
+        pid = backend.worker_pids()
+        os.kill(pid[0], signal.SIGKILL)
+        time.sleep(0.2)
+        future = backend.submit(add_task, {"left": 3, "right": 2})
+        self.assertEqual(future.result(timeout=60), {"result": 5})
+        self.assertEqual(backend.restart_count(), 2)
+        self.assertNotEqual(backend.worker_pids(), pid)
+
+        backend.shutdown()
+        self.assertEqual(backend.worker_pids(), [])
+        with self.assertRaises(RuntimeError):
+            backend.submit(add_task, {})
+
+
+    def test_process_context(self):
+        reg = small_testing_registry()
+        node = Scheme().new_node(reg.widget("one"), title="src")
+        node.properties = {"factor": 3}
+        backend = ProcessBackend(max_workers=1, min_shared_size=0)
+        self.addCleanup(backend.shutdown)
+        events = []
+        array = numpy.arange(10000)
+        future = backend.submit_node(
+            node, context_task, {"value": array},
+            lambda kind, value: events.append((kind, value)))
+        self.assertEqual(future.result(timeout=60), {"result": ("src", 3)})
+        self.assertEqual([kind for kind, _ in events], ["progress", "output"])
+        self.assertEqual(events[0][1], 50)
+        name, value = events[1][1]
+        self.assertEqual(name, "partial")
+        numpy.testing.assert_array_equal(value, array)
+
+
+class TestIsolatedExecution(test.QCoreAppTestCase):
+    def wait(self, predicate, timeout=60):
+        deadline = time.time() + timeout
+        while not predicate() and time.time() < deadline:
+            QTest.qWait(10)
+
+    def _run(self, backend):
+        reg = small_testing_registry()
+        one, add, negate = \
+            reg.widget("one"), reg.widget("add"), reg.widget("negate")
+        funcs = {"src": lambda inputs: 1,
+                 "b": lambda inputs: inputs["value"]}
+        scheme = Scheme()
+        sm = EvalSignalManager(scheme, funcs)
+        sm.set_execution_backend(backend)
+        self.assertIs(sm.execution_backend(), backend)
+        src = scheme.new_node(one, title="src")
+        a = scheme.new_node(add, title="a")
+        b = scheme.new_node(negate, title="b")
+        sm.set_isolated(a, add_task)
+        self.assertIs(sm.isolated_task(a), add_task)
+        scheme.new_link(src, "value", a, "left")
+        scheme.new_link(a, "result", b, "value")
+
+        sm.send(src, src.output_channel("value"), 1, None)
+        self.wait(lambda: b in sm.processed)
+        self.assertNotIn(a, sm.processed)
+        self.assertEqual(sm.inputs[b]["value"], 1)
+        self.assertEqual(sm.node_inputs(a), {"left": 1, "right": None})
+
+        # A failure is reported on the node
+        sm.set_isolated(a, failing_task)
+        del sm.processed[:]
+        sm.send(src, src.output_channel("value"), 2, None)
+        self.wait(lambda: a.state_messages())
+        messages = list(a.state_messages())
+        self.assertEqual(len(messages), 1)
+        self.assertEqual(messages[0].severity, UserMessage.Error)
+        self.assertIn("bad input", messages[0].contents)
+        self.assertFalse(sm.is_running(a))
+        self.assertEqual(a.processing_state, 0)
+        self.assertEqual(sm.processed, [])
+
+        # Cleared on success
+        sm.set_isolated(a, add_task)
+        sm.send(src, src.output_channel("value"), 3, None)
+        self.wait(lambda: b in sm.processed)
+        self.assertEqual(sm.inputs[b]["value"], 3)
+        self.assertFalse(any(m.contents for m in a.state_messages()))
+
+        sm.set_isolated(a, None)
+        self.assertIsNone(sm.isolated_task(a))
+
+    def test_in_process(self):
+        self._run(InProcessBackend())
+
+    def test_process(self):
+        backend = ProcessBackend(max_workers=1)
+        self.addCleanup(backend.shutdown)
+        self._run(backend)
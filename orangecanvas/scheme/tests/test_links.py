@@ -31,3 +31,47 @@ class TestSchemeLink(test.QAppTestCase):
 
         with self.assertRaises(IncompatibleChannelTypeError):
             SchemeLink(unit_node, "value", add_node, "right")
+
+    def test_dynamic_link(self):
+        from ...registry.description import (
+            WidgetDescription, OutputSignal, InputSignal, Single, Dynamic
+        )
+        from .. import link as link_module
+        from ..signalmanager import can_enable_dynamic
+
+        source_desc = WidgetDescription(
+            "source", "source", qualified_name="source",
+            outputs=[OutputSignal("value", "object", flags=Single | Dynamic)])
+        sink_desc = WidgetDescription(
+            "sink", "sink", qualified_name="sink",
+            inputs=[InputSignal("value", "int", "set_value")])
+
+        lookups = []
+
+        def name_lookup(name):
+            lookups.append(name)
+            return lookup(name)
+
+        lookup = link_module.name_lookup
+        link_module.name_lookup = name_lookup
+        try:
+            link = SchemeLink(SchemeNode(source_desc), "value",
+                              SchemeNode(sink_desc), "value")
+            del lookups[:]
+            self.assertTrue(link.is_dynamic())
+            self.assertIs(link.source_type(), object)
+            self.assertIs(link.sink_type(), int)
+            self.assertTrue(can_enable_dynamic(link, 1))
+            self.assertTrue(can_enable_dynamic(link, True))
+            self.assertFalse(can_enable_dynamic(link, "1"))
+            self.assertFalse(can_enable_dynamic(link, None))
+            self.assertTrue(link.can_enable_dynamic(2))
+            # The types are resolved only once
+            self.assertEqual(lookups, ["object", "int"])
+
+            link_module.invalidate_type_cache()
+            self.assertTrue(link.is_dynamic())
+            self.assertTrue(can_enable_dynamic(link, 1))
+            self.assertEqual(lookups, ["object", "int"] * 2)
+        finally:
+            link_module.name_lookup = lookup
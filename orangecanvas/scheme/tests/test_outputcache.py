@@ -0,0 +1,105 @@
+import shutil
+import tempfile
+import unittest
+
+import numpy
+
+from AnyQt.QtTest import QTest
+
+from ...gui import test
+from ...registry.tests import small_testing_registry
+
+from .. import Scheme
+from ..outputcache import OutputCache
+
+from .test_signalmanager import EvalSignalManager
+
+
+class TestOutputCache(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def test_cache(self):
+        cache = OutputCache(self.dir, max_size=3000)
+        self.assertTrue(cache.put("a" * 40, numpy.arange(100.)))
+        self.assertIn("a" * 40, cache)
+        numpy.testing.assert_array_equal(cache.get("a" * 40),
+                                         numpy.arange(100.))
+        with self.assertRaises(KeyError):
+            cache.get("b" * 40)
+        self.assertTrue(cache.put("b" * 40, numpy.arange(100.)))
+        cache.get("a" * 40)
+        # "b" is the least recently used
+        self.assertTrue(cache.put("c" * 40, numpy.arange(200.)))
+        self.assertNotIn("b" * 40, cache)
+        self.assertLessEqual(cache.total_size(), 3000)
+
+        outputs = [("out", None, "a" * 40), ("out", (1, "x"), "c" * 40)]
+        cache.set_outputs("k" * 40, outputs)
+        self.assertEqual(cache.get_outputs("k" * 40), outputs)
+        self.assertIsNone(cache.get_outputs("l" * 40))
+
+        # persisted
+        cache = OutputCache(self.dir, max_size=3000)
+        self.assertIn("a" * 40, cache)
+        self.assertEqual(cache.get_outputs("k" * 40), outputs)
+        cache.clear()
+        self.assertNotIn("a" * 40, cache)
+        self.assertEqual(cache.total_size(), 0)
+
+
+class TestSignalManagerCache(test.QCoreAppTestCase):
+    def wait(self, predicate, timeout=0.8):
+        for _ in range(int(timeout * 100)):
+            if predicate():
+                break
+            QTest.qWait(10)
+
+    def test_cached_run(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        cache = OutputCache(directory)
+        reg = small_testing_registry()
+        one, negate = reg.widget("one"), reg.widget("negate")
+        funcs = {"src": None,
+                 "a": lambda inputs: inputs["value"] + 1,
+                 "b": lambda inputs: inputs["value"] * 2}
+
+        def session(a_properties):
+            scheme = Scheme()
+            sm = EvalSignalManager(scheme, funcs)
+            sm.set_output_cache(cache)
+            src = scheme.new_node(one, title="src")
+            a = scheme.new_node(negate, title="a")
+            b = scheme.new_node(negate, title="b")
+            c = scheme.new_node(negate, title="b")
+            a.properties = a_properties
+            for node in [src, a, b, c]:
+                sm.set_cacheable(node)
+            scheme.new_link(src, "value", a, "value")
+            scheme.new_link(a, "result", b, "value")
+            hits = []
+            sm.cacheHit.connect(hits.append)
+            sm.send(src, src.output_channel("value"), 1, None)
+            self.wait(lambda: len(sm.processed) + len(hits) == 2)
+            # new links are delivered the (restored) value
+            link = scheme.new_link(b, "result", c, "value")
+            self.wait(lambda: len(sm.processed) + len(hits) == 3)
+            self.assertEqual(sm.link_contents(link), {None: 4})
+            return [n.title for n in sm.processed], [n.title for n in hits]
+
+        processed, hits = session({"p": 1})
+        self.assertEqual(processed, ["a", "b", "b"])
+        self.assertEqual(hits, [])
+
+        processed, hits = session({"p": 1})
+        self.assertEqual(processed, [])
+        self.assertEqual(hits, ["a", "b", "b"])
+
+        # a's state changed; all downstream nodes are recomputed
+        processed, hits = session({"p": 2})
+        self.assertEqual(processed, ["a", "b", "b"])
+        self.assertEqual(hits, [])
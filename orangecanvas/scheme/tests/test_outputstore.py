@@ -0,0 +1,104 @@
+import os
+import unittest
+import tempfile
+import shutil
+
+import numpy
+
+from AnyQt.QtTest import QTest
+
+from ...gui import test
+from ...registry.tests import small_testing_registry
+
+from .. import Scheme
+from ..outputstore import OutputStore, dump, load, approx_sizeof
+
+from .test_signalmanager import EvalSignalManager
+
+
+class TestOutputStore(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def test_dump_load(self):
+        filename = os.path.join(self.dir, "a.out")
+        value = {"a": numpy.arange(1000.), "b": [1, "2"]}
+        dump(value, filename)
+        loaded = load(filename)
+        numpy.testing.assert_array_equal(loaded["a"], value["a"])
+        self.assertEqual(loaded["b"], [1, "2"])
+        # reloaded arrays are writable (copy on write)
+        loaded["a"][0] = 42
+        numpy.testing.assert_array_equal(load(filename)["a"], value["a"])
+
+    def test_store(self):
+        store = OutputStore(budget=35000, directory=self.dir, min_size=1000)
+        a, b = store.new_outputs(), store.new_outputs()
+        arr1, arr2, arr3 = (numpy.full(2000, i, dtype=float)
+                            for i in range(3))
+        a[1] = arr1
+        a[2] = "small"
+        self.assertEqual(store.resident_size(),
+                         approx_sizeof(arr1) + approx_sizeof("small"))
+        b[1] = arr2
+        self.assertEqual(store.spilled_count(), 0)
+        b[2] = arr3
+        # arr1 is the least recently used
+        self.assertTrue(a.is_spilled(1))
+        self.assertFalse(a.is_spilled(2))
+        self.assertEqual(store.spilled_count(), 1)
+        self.assertLessEqual(store.resident_size(), 35000)
+        self.assertEqual(len(os.listdir(self.dir)), 1)
+
+        # reload (spills arr2)
+        numpy.testing.assert_array_equal(a[1], arr1)
+        self.assertFalse(a.is_spilled(1))
+        self.assertTrue(b.is_spilled(1))
+        numpy.testing.assert_array_equal(dict(b.items())[1], arr2)
+
+        # replacing/removing values removes the files
+        a[1] = None
+        b.clear()
+        self.assertEqual(os.listdir(self.dir), [])
+        self.assertEqual(store.resident_size(),
+                         approx_sizeof("small") + approx_sizeof(None))
+
+
+class TestSignalManagerOutputs(test.QCoreAppTestCase):
+    def test_spilled_outputs(self):
+        reg = small_testing_registry()
+        one, negate = reg.widget("one"), reg.widget("negate")
+        funcs = {"src": None, "a": lambda inputs: None,
+                 "b": lambda inputs: None}
+        scheme = Scheme()
+        sm = EvalSignalManager(scheme, funcs)
+        store = sm.output_store()
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        store.set_directory(directory)
+        store.set_budget(200000)
+
+        src1 = scheme.new_node(one, title="src")
+        src2 = scheme.new_node(one, title="src")
+        a = scheme.new_node(negate, title="a")
+        value1 = numpy.arange(20000.)
+        sm.send(src1, src1.output_channel("value"), value1, None)
+        sm.send(src2, src2.output_channel("value"), numpy.ones(20000), None)
+        self.assertEqual(store.spilled_count(), 1)
+        self.assertEqual(len(os.listdir(directory)), 1)
+
+        scheme.new_link(src1, "value", a, "value")
+        deadline = 50
+        while not sm.processed and deadline:
+            QTest.qWait(10)
+            deadline -= 1
+        numpy.testing.assert_array_equal(sm.inputs[a]["value"], value1)
+
+        scheme.remove_node(src1)
+        scheme.remove_node(src2)
+        scheme.remove_node(a)
+        self.assertEqual(os.listdir(directory), [])
+        self.assertEqual(store.resident_size(), 0)
@@ -77,6 +77,24 @@ class TestReadWrite(test.QAppTestCase):
                 self.assertEqual(annot1.start_pos, annot2.start_pos)
                 self.assertEqual(annot1.end_pos, annot2.end_pos)
 
+        # The channel types are resolved (once) by the registry
+        from .. import link as link_module
+        lookups = []
+
+        def name_lookup(name):
+            lookups.append(name)
+            return lookup(name)
+
+        lookup = link_module.name_lookup
+        link_module.name_lookup = name_lookup
+        try:
+            stream.seek(0)
+            scheme_2 = readwrite.scheme_load(Scheme(), stream, reg)
+        finally:
+            link_module.name_lookup = lookup
+        self.assertEqual(len(scheme_2.links), len(scheme.links))
+        self.assertEqual(lookups, [])
+
     def test_safe_evals(self):
         s = readwrite.string_eval(r"'\x00\xff'")
         self.assertEqual(s, chr(0) + chr(255))
@@ -0,0 +1,222 @@
+"""
+Tests for the remote execution backend.
+
+"""
+import os
+import time
+import socket
+import shutil
+import tempfile
+import threading
+import unittest
+
+import numpy
+
+from AnyQt.QtTest import QTest
+
+from ...gui import test
+from ...registry.tests import small_testing_registry
+from .. import Scheme
+from ..execution import TaskError, current_context
+from ..remote import (
+    RemoteBackend, RemoteError, WorkerServer, send_message, recv_message,
+    connect
+)
+from .test_signalmanager import EvalSignalManager
+
+
+def add_task(inputs):
+    return {"result": (inputs["left"] or 0) + (inputs["right"] or 0)}
+
+
+def double_task(inputs):
+    return {"result": inputs["value"] * 2}
+
+
+def failing_task(inputs):
+    raise ValueError("bad input")
+
+
+def streaming_task(inputs):
+    context = current_context()
+    context.progress(50)
+    context.send("result", context.properties["offset"])
+    return {"result": context.properties["offset"] + (inputs["left"] or 0)}
+
+
+_release = threading.Event()
+
+_unpickled = []
+
+
+class _Evil(object):
+    def __reduce__(self):
+        return _unpickled.append, (True,)
+
+
+def blocking_task(inputs):
+    _release.wait(30)
+    return {"result": inputs["value"]}
+
+
+class TestProtocol(unittest.TestCase):
+    def test_messages(self):
+        a, b = socket.socketpair()
+        self.addCleanup(a.close)
+        self.addCleanup(b.close)
+        array = numpy.arange(10000, dtype=float)
+        send_message(a, ("run", 1, {"inputs": {"value": array}}))
+        kind, rid, payload = recv_message(b)
+        self.assertEqual((kind, rid), ("run", 1))
+        numpy.testing.assert_array_equal(payload["inputs"]["value"], array)
+        a.close()
+        with self.assertRaises(EOFError):
+            recv_message(b)
+
+    def test_max_size(self):
+        a, b = socket.socketpair()
+        self.addCleanup(a.close)
+        self.addCleanup(b.close)
+        send_message(a, ("run", 1, b"x" * 1000))
+        with self.assertRaises(RemoteError):
+            recv_message(b, max_size=100)
+
+
+class TestRemoteBackend(unittest.TestCase):
+    def setUp(self):
+        self.server = WorkerServer(max_workers=4)
+        self.server.start()
+
+    def tearDown(self):
+        self.server.close()
+
+    def test_remote(self):
+        backend = RemoteBackend(self.server.address(), self.server.authkey())
+        self.addCleanup(backend.shutdown)
+        future = backend.submit(add_task, {"left": 1, "right": 2})
+        self.assertEqual(future.result(timeout=10), {"result": 3})
+        array = numpy.arange(100000, dtype=float)
+        result = backend.submit(__name__ + ".double_task", {"value": array})
+        numpy.testing.assert_array_equal(
+            result.result(timeout=10)["result"], array * 2)
+        with self.assertRaises(TaskError) as cm:
+            backend.submit(failing_task, {}).result(timeout=10)
+        self.assertEqual(cm.exception.type_name, "ValueError")
+        self.assertEqual(backend.connection_count(), 1)
+
+    def test_pooling(self):
+        backend = RemoteBackend(self.server.address(), self.server.authkey(), max_connections=2,
+                                max_in_flight=2)
+        self.addCleanup(backend.shutdown)
+        _release.clear()
+        self.addCleanup(_release.set)
+        futures = [backend.submit(blocking_task, {"value": i})
+                   for i in range(10)]
+        deadline = time.time() + 10
+        while backend.in_flight_count() < 4 and time.time() < deadline:
+            time.sleep(0.01)
+        # At most 2 requests on each of the 2 connections, the rest waits
+        self.assertEqual(backend.connection_count(), 2)
+        self.assertEqual(backend.in_flight_count(), 4)
+        self.assertEqual(backend.queued_count(), 6)
+        futures[-1].cancel()
+        _release.set()
+        self.assertEqual([f.result(timeout=10)["result"]
+                          for f in futures[:-1]], list(range(9)))
+        self.assertTrue(futures[-1].cancelled())
+        self.assertEqual(backend.in_flight_count(), 0)
+
+    def test_connection_errors(self):
+        address = self.server.address()
+        self.server.close()
+        backend = RemoteBackend(address, b"secret", timeout=1)
+        self.addCleanup(backend.shutdown)
+        with self.assertRaises(RemoteError):
+            backend.submit(add_task, {}).result(timeout=10)
+
+    def test_connect_does_not_block(self):
+        # A server accepting connections but never answering
+        listener = socket.socket()
+        self.addCleanup(listener.close)
+        listener.bind(("127.0.0.1", 0))
+        listener.listen(5)
+        backend = RemoteBackend(listener.getsockname(), b"secret", timeout=1)
+        self.addCleanup(backend.shutdown)
+        start = time.time()
+        futures = [backend.submit(add_task, {}) for _ in range(3)]
+        self.assertLess(time.time() - start, 0.5)
+        self.assertEqual(backend.queued_count(), 3)
+        for future in futures:
+            with self.assertRaises(RemoteError):
+                future.result(timeout=10)
+        self.assertEqual(backend.queued_count(), 0)
+
+    def test_authentication(self):
+        backend = RemoteBackend(self.server.address(), b"wrong", timeout=5)
+        self.addCleanup(backend.shutdown)
+        with self.assertRaises(RemoteError):
+            backend.submit(add_task, {}).result(timeout=10)
+        self.assertEqual(backend.connection_count(), 0)
+        with self.assertRaises(RemoteError):
+            connect(self.server.address(), b"wrong", timeout=5)
+        sock = connect(self.server.address(), self.server.authkey())
+        sock.close()
+
+        # A client skipping the authentication is never unpickled
+        del _unpickled[:]
+        sock = socket.create_connection(self.server.address(), timeout=5)
+        self.addCleanup(sock.close)
+        try:
+            send_message(sock, ("hello", 0, _Evil()))
+            while sock.recv(1024):
+                pass
+        except OSError:
+            pass
+        self.assertEqual(_unpickled, [])
+
+    @unittest.skipIf(not hasattr(socket, "AF_UNIX"), "No Unix sockets")
+    def test_unix_socket(self):
+        dirname = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, dirname)
+        server = WorkerServer(os.path.join(dirname, "worker.sock"))
+        server.start()
+        self.addCleanup(server.close)
+        backend = RemoteBackend(server.address(), server.authkey())
+        self.addCleanup(backend.shutdown)
+        future = backend.submit(add_task, {"left": 2, "right": 2})
+        self.assertEqual(future.result(timeout=10), {"result": 4})
+
+
+class TestRemoteExecution(test.QCoreAppTestCase):
+    def test_signal_manager(self):
+        server = WorkerServer()
+        server.start()
+        self.addCleanup(server.close)
+        backend = RemoteBackend(server.address(), server.authkey())
+        self.addCleanup(backend.shutdown)
+
+        reg = small_testing_registry()
+        one, add, negate = \
+            reg.widget("one"), reg.widget("add"), reg.widget("negate")
+        scheme = Scheme()
+        sm = EvalSignalManager(scheme, {"b": lambda inputs: inputs["value"]})
+        sm.set_execution_backend(backend)
+        src = scheme.new_node(one, title="src")
+        a = scheme.new_node(add, title="a", properties={"offset": 10})
+        b = scheme.new_node(negate, title="b")
+        sm.set_isolated(a, streaming_task)
+        scheme.new_link(src, "value", a, "left")
+        scheme.new_link(a, "result", b, "value")
+        progress = []
+        a.progress_changed.connect(progress.append)
+
+        sm.send(src, src.output_channel("value"), 1, None)
+        deadline = time.time() + 10
+        while sm.inputs[b].get("value") != 11 and time.time() < deadline:
+            QTest.qWait(10)
+        self.assertEqual(sm.inputs[b]["value"], 11)
+        # b is blocked while a runs, the streamed and the final output
+        # are delivered together
+        self.assertEqual(sm.processed, [b])
+        self.assertEqual(progress, [50, -1])
+        self.assertFalse(sm.is_running(a))
@@ -0,0 +1,91 @@
+import io
+import os
+import json
+import tempfile
+
+from ...gui import test
+from ...registry.tests import small_testing_registry
+
+from .. import Scheme, readwrite
+from ..runner import WorkflowRunner
+from ... import run, config
+
+from .test_signalmanager import EvalSignalManager
+
+
+class TestWorkflowRunner(test.QCoreAppTestCase):
+    def test_run(self):
+        reg = small_testing_registry()
+        one, negate = reg.widget("one"), reg.widget("negate")
+        funcs = {
+            "src": lambda inputs: 1,
+            "a": lambda inputs: [0] * 10000,
+            "b": lambda inputs: -inputs["value"][0],
+        }
+        scheme = Scheme()
+        sm = EvalSignalManager(scheme, funcs)
+        src = scheme.new_node(one, title="src")
+        a = scheme.new_node(negate, title="a")
+        b = scheme.new_node(negate, title="b")
+        scheme.new_link(src, "value", a, "value")
+        scheme.new_link(a, "result", b, "value")
+        sm.pause()
+        sm.send(src, src.output_channel("value"), 1, None)
+
+        runner = WorkflowRunner(scheme, sm, trace_memory=True, settle=0.05)
+        status = runner.run(timeout=0.9)
+        self.assertEqual(status, WorkflowRunner.Finished)
+        self.assertEqual(sm.processed, [a, b])
+        self.assertTrue(runner.is_quiescent())
+
+        report = runner.report()
+        json.dumps(report)
+        self.assertEqual(report["status"], "finished")
+        nodes = {n["title"]: n for n in report["nodes"]}
+        self.assertEqual(nodes["src"]["calls"], 0)
+        self.assertEqual(nodes["a"]["calls"], 1)
+        self.assertEqual(nodes["b"]["calls"], 1)
+        self.assertGreaterEqual(nodes["a"]["peak_memory"], 10000 * 8)
+        self.assertGreater(nodes["a"]["wall_time"], 0)
+
+        # Blocked node never finishes
+        sm.is_blocking = lambda node: node is b
+        runner = WorkflowRunner(scheme, sm, settle=0.05)
+        self.assertEqual(runner.run(timeout=0.2), WorkflowRunner.Timeout)
+
+    def test_run_workflow(self):
+        reg = small_testing_registry()
+        scheme = Scheme()
+        scheme.new_node(reg.widget("one"), title="src")
+        fd, filename = tempfile.mkstemp(suffix=".ows")
+        os.close(fd)
+        self.addCleanup(os.remove, filename)
+        with io.open(filename, "wb") as f:
+            readwrite.scheme_to_ows_stream(scheme, f)
+
+        # The default configuration cannot execute workflows
+        self.assertFalse(run.can_execute_workflows())
+        report = run.run_workflow(filename, reg)
+        self.assertEqual(report["status"], WorkflowRunner.Error)
+        self.assertEqual(report["workflow"], filename)
+        self.assertEqual(report["errors"], [run.NO_SIGNAL_MANAGER_ERROR])
+        json.dumps(report)
+
+        class EvalConfig(config.default):
+            @staticmethod
+            def workflow_constructor(*args, **kwargs):
+                scheme = Scheme(*args, **kwargs)
+                scheme.signal_manager = EvalSignalManager(
+                    scheme, {"src": lambda inputs: 1})
+                return scheme
+
+        default = config.default
+        config.set_default(EvalConfig)
+        self.addCleanup(config.set_default, default)
+
+        self.assertTrue(run.can_execute_workflows())
+        report = run.run_workflow(filename, reg, timeout=5)
+        self.assertEqual(report["status"], WorkflowRunner.Finished)
+        self.assertEqual(report["errors"], [])
+        self.assertEqual([node["title"] for node in report["nodes"]], ["src"])
+        json.dumps(report)
@@ -1,6 +1,16 @@
 import unittest
+import time
+import json
 
-from .. import signalmanager
+from collections import defaultdict
+
+from AnyQt.QtTest import QTest
+
+from ...gui import test
+from ...registry.tests import small_testing_registry
+
+from .. import Scheme
+from .. import signalmanager, tracing
 
 
 class TestSCC(unittest.TestCase):
@@ -41,3 +51,150 @@ class TestSCC(unittest.TestCase):
               8: [8]}
         scc = signalmanager.strongly_connected_components(G3, G3.__getitem__)
         self.assertEqual(scc, [[1, 2, 3], [6, 7], [4, 5], [8]])
+
+
+class EvalSignalManager(signalmanager.SignalManager):
+    """
+    A signal manager evaluating `funcs[node.title](inputs)` for the nodes.
+    """
+    def __init__(self, scheme, funcs):
+        super(EvalSignalManager, self).__init__(scheme)
+        scheme.node_added.connect(self.on_node_added)
+        scheme.node_removed.connect(self.on_node_removed)
+        scheme.link_added.connect(self.link_added)
+        scheme.link_removed.connect(self.link_removed)
+        self.funcs = funcs
+        self.inputs = defaultdict(dict)
+        self.processed = []
+
+    def send_to_node(self, node, signals):
+        self.processed.append(node)
+        for sig in signals:
+            self.inputs[node][sig.link.sink_channel.name] = sig.value
+        value = self.funcs[node.title](self.inputs[node])
+        for channel in node.output_channels():
+            self.send(node, channel, value, None)
+
+
+class TestSignalManager(test.QCoreAppTestCase):
+    def wait(self, predicate, timeout=5):
+        deadline = time.time() + timeout
+        while not predicate() and time.time() < deadline:
+            QTest.qWait(10)
+
+    def test_rerun_from(self):
+        reg = small_testing_registry()
+        one, negate = reg.widget("one"), reg.widget("negate")
+        CONST = [0]
+        funcs = {
+            "src": lambda inputs: [1],
+            "a": lambda inputs: list(inputs["value"]),
+            "b": lambda inputs: list(inputs["value"]),
+            "c": lambda inputs: list(inputs["value"]),
+            # k's output does not depend on its input
+            "k": lambda inputs: CONST,
+            "d": lambda inputs: list(inputs["value"]),
+        }
+        scheme = Scheme()
+        sm = EvalSignalManager(scheme, funcs)
+        src = scheme.new_node(one, title="src")
+        a, b, c, k, d = [scheme.new_node(negate, title=title)
+                         for title in "abckd"]
+        scheme.new_link(src, "value", a, "value")
+        scheme.new_link(a, "result", b, "value")
+        scheme.new_link(b, "result", c, "value")
+        scheme.new_link(a, "result", k, "value")
+        scheme.new_link(k, "result", d, "value")
+
+        sm.send(src, src.output_channel("value"), funcs["src"]({}), None)
+        self.wait(lambda: len(sm.processed) == 5)
+        self.assertSetEqual(set(sm.processed), {a, b, c, k, d})
+
+        reports = []
+        sm.rerunFinished.connect(reports.append)
+        del sm.processed[:]
+        sm.rerun_from(a)
+        self.wait(lambda: reports)
+
+        self.assertEqual(len(reports), 1)
+        report = reports[0]
+        self.assertIs(report.node, a)
+        self.assertSetEqual(set(report.dependents), {b, c, k, d})
+        self.assertSetEqual(set(report.processed), {b, c, k})
+        self.assertSequenceEqual(report.skipped, [d])
+        self.assertSetEqual(set(sm.processed), {a, b, c, k})
+
+        # Outside of a re-run identical outputs are still propagated
+        del sm.processed[:]
+        sm.send(k, k.output_channel("result"), CONST, None)
+        self.wait(lambda: sm.processed)
+        self.assertEqual(sm.processed, [d])
+
+        # ... and so are the outputs of nodes outside the re-run
+        del sm.processed[:]
+        del reports[:]
+        sm.rerun_from(b)
+        sm.send(k, k.output_channel("result"), CONST, None)
+        self.wait(lambda: reports)
+        self.assertSetEqual(set(sm.processed), {b, c, d})
+        self.assertEqual(reports[0].dependents, [c])
+
+        # A node without inputs has nothing to recompute
+        del reports[:]
+        sm.rerun_from(src)
+        self.assertEqual(len(reports), 1)
+        self.assertEqual(reports[0].processed, [])
+
+    def test_tracing(self):
+        reg = small_testing_registry()
+        one, negate = reg.widget("one"), reg.widget("negate")
+        funcs = {"src": lambda inputs: 1,
+                 "a": lambda inputs: inputs["value"],
+                 "b": lambda inputs: inputs["value"]}
+        scheme = Scheme()
+        sm = EvalSignalManager(scheme, funcs)
+        tracer = tracing.SignalTracer(maxlen=5)
+        sm.set_tracer(tracer)
+        self.assertIs(sm.tracer(), tracer)
+        src = scheme.new_node(one, title="src")
+        a = scheme.new_node(negate, title="a")
+        b = scheme.new_node(negate, title="b")
+        scheme.new_link(src, "value", a, "value")
+        scheme.new_link(a, "result", b, "value")
+        sm.send(src, src.output_channel("value"), 1, None)
+        self.wait(lambda: len(sm.processed) == 2)
+        self.assertEqual(len(tracer.events()), 5)
+
+        stats = tracer.statistics()
+        self.assertEqual(stats["scheduled_signals"], 2)
+        self.assertEqual(stats["max_queue_length"], 1)
+        self.assertGreaterEqual(stats["ticks"], 2)
+        nodes = {n["title"]: n for n in stats["nodes"]}
+        self.assertEqual(nodes["a"]["deliveries"], 1)
+        self.assertEqual(nodes["b"]["signals"], 1)
+        self.assertGreater(nodes["b"]["max_latency"], 0)
+
+        trace = json.loads(json.dumps(tracer.chrome_trace()))
+        self.assertTrue(all("ph" in ev for ev in trace["traceEvents"]))
+
+        # The blocking state transitions are recorded when they happen
+        tracer.clear()
+        sm.is_blocking = lambda node: node.processing_state
+        a.set_processing_state(1)
+        self.assertEqual([(ev[1], ev[2]) for ev in tracer.events()],
+                         [(tracing.Blocked, a)])
+        blocked = set()
+        sm.is_blocking = lambda node: node in blocked
+        blocked.add(b)
+        sm.notify_blocking_state_changed(b)
+        self.assertEqual([(ev[1], ev[2]) for ev in tracer.events()[1:]],
+                         [(tracing.Blocked, b), (tracing.Unblocked, a)])
+        del sm.is_blocking
+        a.set_processing_state(0)
+
+        tracer.clear()
+        self.assertEqual(tracer.events(), [])
+        sm.set_tracer(None)
+        sm.send(src, src.output_channel("value"), 2, None)
+        self.wait(lambda: len(sm.processed) == 4)
+        self.assertEqual(tracer.events(), [])
@@ -0,0 +1,267 @@
+"""
+Signal Manager Tracing
+======================
+
+An opt-in instrumentation layer for :class:`~.signalmanager.SignalManager`.
+
+A :class:`SignalTracer` set on a signal manager (see
+:func:`SignalManager.set_tracer`) records timestamped events (signal
+scheduling, node input delivery, blocking state changes, update ticks,
+queue length) into a fixed size ring buffer and maintains aggregate
+statistics. The events can be exported in the Chrome Trace Event format
+(viewable in `chrome://tracing` or https://ui.perfetto.dev).
+
+Example::
+
+    tracer = SignalTracer()
+    scheme.signal_manager.set_tracer(tracer)
+    ...
+    tracer.save_chrome_trace("trace.json")
+    print(tracer.statistics())
+
+"""
+import os
+import io
+import json
+import time
+
+from collections import deque
+
+try:
+    clock = time.perf_counter
+except AttributeError:  # Python 2
+    clock = time.time
+
+#: Event kinds
+Schedule, DeliverStart, DeliverEnd, Blocked, Unblocked, Tick, UpdateFront, \
+    QueueLength = (
+        "schedule", "deliver-start", "deliver-end", "blocked", "unblocked",
+        "tick", "update-front", "queue-length"
+    )
+
+
+class _NodeStats(object):
+    __slots__ = ("deliveries", "signals", "deliver_time", "max_deliver_time",
+                 "latency", "max_latency", "blocked_time", "blocked_count")
+
+    def __init__(self):
+        self.deliveries = 0
+        self.signals = 0
+        self.deliver_time = 0.0
+        self.max_deliver_time = 0.0
+        self.latency = 0.0
+        self.max_latency = 0.0
+        self.blocked_time = 0.0
+        self.blocked_count = 0
+
+
+class SignalTracer(object):
+    """
+    Record signal manager events in a ring buffer of `maxlen` events.
+
+    Events are `(timestamp, kind, node, value)` tuples where timestamp
+    is in seconds (see :func:`clock`), `kind` is one of the event kinds
+    defined in this module, `node` is a :class:`SchemeNode` (or None) and
+    `value` an event specific value (e.g. number of signals, duration).
+
+    """
+    def __init__(self, maxlen=100000):
+        self.__events = deque(maxlen=maxlen)
+        self.__start = clock()
+        # node -> time when the node first had pending inputs
+        self.__enqueued = {}
+        # node -> delivery start time
+        self.__delivering = {}
+        # node -> time when the node entered a blocking state
+        self.__blocked = {}
+        self.__nodes = {}
+        self.__ticks = 0
+        self.__tick_time = 0.0
+        self.__max_tick_time = 0.0
+        self.__front_time = 0.0
+        self.__max_front_time = 0.0
+        self.__max_queue = 0
+        self.__scheduled = 0
+
+    def clear(self):
+        """
+        Clear all recorded events and statistics.
+        """
+        self.__init__(self.__events.maxlen)
+
+    def events(self):
+        """
+        Return a list of the recorded events (oldest first).
+        """
+        return list(self.__events)
+
+    def __stats(self, node):
+        stats = self.__nodes.get(node)
+        if stats is None:
+            stats = self.__nodes[node] = _NodeStats()
+        return stats
+
+    # Recording (called by the SignalManager)
+    def scheduled(self, signals, queue_length):
+        now = clock()
+        append = self.__events.append
+        enqueued = self.__enqueued
+        for sig in signals:
+            node = sig.link.sink_node
+            if node not in enqueued:
+                enqueued[node] = now
+            append((now, Schedule, node, sig.link.sink_channel.name))
+        append((now, QueueLength, None, queue_length))
+        self.__scheduled += len(signals)
+        self.__max_queue = max(self.__max_queue, queue_length)
+
+    def delivery_started(self, node, nsignals, queue_length):
+        now = clock()
+        self.__delivering[node] = now
+        stats = self.__stats(node)
+        stats.signals += nsignals
+        enqueued = self.__enqueued.pop(node, None)
+        if enqueued is not None:
+            latency = now - enqueued
+            stats.latency += latency
+            stats.max_latency = max(stats.max_latency, latency)
+        self.__events.append((now, DeliverStart, node, nsignals))
+        self.__events.append((now, QueueLength, None, queue_length))
+
+    def delivery_finished(self, node):
+        now = clock()
+        start = self.__delivering.pop(node, now)
+        duration = now - start
+        stats = self.__stats(node)
+        stats.deliveries += 1
+        stats.deliver_time += duration
+        stats.max_deliver_time = max(stats.max_deliver_time, duration)
+        self.__events.append((now, DeliverEnd, node, duration))
+
+    def blocking(self, nodes):
+        """
+        Record the current set of blocking `nodes`.
+        """
+        now = clock()
+        blocked = self.__blocked
+        nodes = set(nodes)
+        for node in nodes.difference(blocked):
+            blocked[node] = now
+            self.__stats(node).blocked_count += 1
+            self.__events.append((now, Blocked, node, None))
+        for node in set(blocked).difference(nodes):
+            duration = now - blocked.pop(node)
+            self.__stats(node).blocked_time += duration
+            self.__events.append((now, Unblocked, node, duration))
+
+    def update_front(self, start):
+        now = clock()
+        duration = now - start
+        self.__front_time += duration
+        self.__max_front_time = max(self.__max_front_time, duration)
+        self.__events.append((now, UpdateFront, None, duration))
+
+    def tick(self, start):
+        now = clock()
+        duration = now - start
+        self.__ticks += 1
+        self.__tick_time += duration
+        self.__max_tick_time = max(self.__max_tick_time, duration)
+        self.__events.append((now, Tick, None, duration))
+
+    # Export
+    def statistics(self):
+        """
+        Return the aggregate statistics (a JSON serializable dict).
+
+        The statistics are accumulated over all events since the last
+        :func:`clear` (including the events dropped from the ring buffer).
+        """
+        nodes = []
+        for node, stats in self.__nodes.items():
+            n = max(stats.deliveries, 1)
+            nodes.append({
+                "title": node.title,
+                "deliveries": stats.deliveries,
+                "signals": stats.signals,
+                "deliver_time": stats.deliver_time,
+                "mean_deliver_time": stats.deliver_time / n,
+                "max_deliver_time": stats.max_deliver_time,
+                "mean_latency": stats.latency / n,
+                "max_latency": stats.max_latency,
+                "blocked_count": stats.blocked_count,
+                "blocked_time": stats.blocked_time,
+            })
+        ticks = max(self.__ticks, 1)
+        return {
+            "ticks": self.__ticks,
+            "tick_time": self.__tick_time,
+            "mean_tick_time": self.__tick_time / ticks,
+            "max_tick_time": self.__max_tick_time,
+            "update_front_time": self.__front_time,
+            "max_update_front_time": self.__max_front_time,
+            "scheduled_signals": self.__scheduled,
+            "max_queue_length": self.__max_queue,
+            "nodes": nodes,
+        }
+
+    def chrome_trace(self):
+        """
+        Return the recorded events in the Chrome Trace Event format.
+        """
+        pid = os.getpid()
+        start = self.__start
+        tids = {}
+
+        def tid(node):
+            if node is None:
+                return 0
+            if node not in tids:
+                tids[node] = len(tids) + 1
+            return tids[node]
+
+        def us(t):
+            return (t - start) * 1e6
+
+        trace = []
+        for ts, kind, node, value in self.__events:
+            if kind == Schedule:
+                trace.append({"name": "schedule", "cat": "signal", "ph": "i",
+                              "s": "t", "ts": us(ts), "pid": pid,
+                              "tid": tid(node), "args": {"channel": value}})
+            elif kind == DeliverEnd:
+                # Complete events (so that a start dropped from the ring
+                # buffer does not leave an unmatched end)
+                trace.append({"name": node.title, "cat": "deliver",
+                              "ph": "X", "ts": us(ts - value),
+                              "dur": value * 1e6, "pid": pid,
+                              "tid": tid(node)})
+            elif kind in (Blocked, Unblocked):
+                # async events, these need not nest with the deliveries
+                trace.append({"name": "blocked", "cat": "blocking",
+                              "ph": "b" if kind == Blocked else "e",
+                              "id": tid(node), "ts": us(ts), "pid": pid,
+                              "tid": tid(node)})
+            elif kind in (Tick, UpdateFront):
+                trace.append({"name": kind, "cat": "manager", "ph": "X",
+                              "ts": us(ts - value), "dur": value * 1e6,
+                              "pid": pid, "tid": 0})
+            elif kind == QueueLength:
+                trace.append({"name": "queue", "cat": "manager", "ph": "C",
+                              "ts": us(ts), "pid": pid,
+                              "args": {"length": value}})
+
+        metadata = [{"name": "thread_name", "ph": "M", "pid": pid, "tid": 0,
+                     "args": {"name": "SignalManager"}}]
+        metadata += [{"name": "thread_name", "ph": "M", "pid": pid, "tid": t,
+                      "args": {"name": node.title}}
+                     for node, t in tids.items()]
+        return {"traceEvents": metadata + trace, "displayTimeUnit": "ms"}
+
+    def save_chrome_trace(self, filename):
+        """
+        Save the recorded events in the Chrome Trace Event format
+        to `filename`.
+        """
+        with io.open(filename, "w", encoding="utf-8") as f:
+            f.write(json.dumps(self.chrome_trace()))
@@ -1,3 +1,4 @@
+import re
 import sys
 
 from .qtcompat import sip_getapi, toPyObject
@@ -60,6 +61,44 @@ def check_subclass(cls, class_or_tuple):
         raise TypeError("Expected %r. Got %r" % (class_or_tuple, type(cls)))
 
 
+def version_parts(version):
+    """
+    Split a version string into its number and tag parts.
+
+    >>> version_parts("3.4.0.dev0")
+    [3, 4, 0, 'dev', 0]
+    """
+    return [int(part) if part.isdigit() else part
+            for part in re.findall(r"\d+|[a-zA-Z]+", version)]
+
+
+def version_key(version):
+    """
+    Return a key comparing (ordering) version strings.
+
+    Trailing zeros in the release part are not significant and tagged
+    (pre)releases order before the final release (except post releases).
+
+    >>> version_key("1.0") == version_key("1.0.0")
+    True
+    >>> version_key("1.0a1") < version_key("1.0") < version_key("1.0.1")
+    True
+    """
+    parts = version_parts(version)
+    release = []
+    while parts and isinstance(parts[0], int):
+        release.append(parts.pop(0))
+    while release and release[-1] == 0:
+        release.pop()
+    # (rank, number, tag): dev < pre-release tags < the final release
+    # < post releases
+    ranks = {"dev": -1, "post": 3, "r": 3, "rev": 3}
+    rest = [(2, part, "") if isinstance(part, int) else
+            (ranks.get(part.lower(), 0), 0, part.lower())
+            for part in parts]
+    return tuple(release), tuple(rest) + ((1, 0, ""),)
+
+
 def check_arg(pred, value):
     if not pred:
         raise ValueError(value)
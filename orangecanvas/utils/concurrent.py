@@ -0,0 +1,31 @@
+"""
+Concurrency utilities
+=====================
+
+Helpers for delivering the results of work done in other threads (for
+instance :class:`concurrent.futures.Future` done callbacks) back to a
+:class:`QObject`'s thread.
+
+"""
+from __future__ import absolute_import
+
+from AnyQt.QtCore import Qt, QObject, QMetaObject, Q_ARG
+
+
+def method_queued(method, sig, conntype=Qt.QueuedConnection):
+    """
+    Return a callable invoking the bound slot `method` through the
+    `QObject`'s meta object system (by default queued in the object's
+    thread).
+
+    `sig` is a tuple of the slot's argument types.
+    """
+    name = method.__name__
+    obj = method.__self__
+    assert isinstance(obj, QObject)
+
+    def call(*args):
+        args = [Q_ARG(atype, arg) for atype, arg in zip(sig, args)]
+        return QMetaObject.invokeMethod(obj, name, conntype, *args)
+
+    return call
@@ -0,0 +1,419 @@
+"""
+Entry point index
+=================
+
+A cached index of the installed distributions and their entry points.
+
+Scanning the installed distributions (e.g. building the
+`pkg_resources.working_set`) can take a significant amount of time in
+large environments. The index is built using `importlib.metadata` (or the
+`importlib_metadata` backport) and is cached on disk. The cache is keyed
+by the modification times of the `sys.path` entries (installing or
+removing a distribution modifies its `site-packages` directory), so it
+is rebuilt only when the environment changes.
+
+If neither `importlib.metadata` nor `importlib_metadata` is available
+the functions in this module fall back to `pkg_resources`.
+
+"""
+import os
+import io
+import re
+import sys
+import json
+import logging
+
+from functools import reduce
+
+log = logging.getLogger(__name__)
+
+#: Version of the on disk cache format
+CACHE_VERSION = 1
+
+
+_metadata = False
+
+
+def metadata_module():
+    """
+    Return the `importlib.metadata` (or `importlib_metadata`) module or
+    None if not available. The module is imported on first use (the
+    index is usually loaded from the cache without it).
+    """
+    global _metadata
+    if _metadata is False:
+        try:
+            import importlib.metadata as metadata
+        except ImportError:
+            try:
+                import importlib_metadata as metadata
+            except ImportError:
+                metadata = None
+        _metadata = metadata
+    return _metadata
+
+
+def safe_name(name):
+    """
+    Convert a project name to its canonical form (as `pkg_resources`).
+    """
+    return re.sub("[^A-Za-z0-9.]+", "-", name)
+
+
+def path_stamp(path):
+    """
+    Return a `((entry, modified time), ...)` tuple for all entries in
+    `path` (a list of directories as `sys.path`).
+    """
+    def mtime(entry):
+        try:
+            return os.stat(entry).st_mtime
+        except OSError:
+            return None
+    return tuple((entry, mtime(entry)) for entry in path)
+
+
+class Distribution(object):
+    """
+    An installed distribution.
+
+    Implements the subset of the `pkg_resources.Distribution` interface
+    used by the canvas.
+
+    Parameters
+    ----------
+    project_name : str
+        The project name.
+    version : str
+        The project version.
+    location : Optional[str]
+        The `sys.path` entry where the distribution is installed.
+    egg_info : Optional[str]
+        The distribution's metadata (`.egg-info` or `.dist-info`)
+        directory.
+
+    """
+    def __init__(self, project_name, version, location=None, egg_info=None):
+        self.project_name = project_name
+        self.version = version
+        self.location = location
+        self.egg_info = egg_info
+        self.key = safe_name(project_name).lower()
+        # {group: {name: EntryPoint}}
+        self.__entry_map = {}
+
+    def add_entry_point(self, entry_point):
+        entry_point.dist = self
+        group = self.__entry_map.setdefault(entry_point.group, {})
+        group.setdefault(entry_point.name, entry_point)
+
+    def get_entry_map(self, group=None):
+        """
+        Return the `{group: {name: EntryPoint}}` entry point map or the
+        `{name: EntryPoint}` map for a single `group`.
+        """
+        if group is not None:
+            return self.__entry_map.get(group, {})
+        return self.__entry_map
+
+    def get_entry_info(self, group, name):
+        return self.get_entry_map(group).get(name)
+
+    def has_metadata(self, name):
+        return self.egg_info is not None and \
+            os.path.isfile(os.path.join(self.egg_info, name))
+
+    def get_metadata(self, name):
+        with io.open(os.path.join(self.egg_info, name), "r",
+                     encoding="utf-8") as f:
+            return f.read()
+
+    def __str__(self):
+        return "{} {}".format(self.project_name, self.version)
+
+    def __repr__(self):
+        return "Distribution({!r}, {!r})".format(
+            self.project_name, self.version)
+
+
+class EntryPoint(object):
+    """
+    An entry point (`name = module:attrs [extras]`) in a `group`.
+
+    Implements the subset of the `pkg_resources.EntryPoint` interface
+    used by the canvas.
+    """
+    def __init__(self, name, group, value, dist=None):
+        self.name = name
+        self.group = group
+        self.value = value
+        self.dist = dist
+        target, _, extras = value.partition("[")
+        module_name, _, attrs = target.strip().partition(":")
+        self.module_name = module_name.strip()
+        self.attrs = tuple(a for a in attrs.strip().split(".") if a)
+        self.extras = tuple(e.strip() for e in extras.rstrip("] ").split(",")
+                            if e.strip())
+
+    def resolve(self):
+        """
+        Import and return the object referenced by the entry point.
+        """
+        module = __import__(self.module_name, fromlist=["__name__"], level=0)
+        try:
+            return reduce(getattr, self.attrs, module)
+        except AttributeError as err:
+            raise ImportError(str(err))
+
+    def load(self, *args, **kwargs):
+        return self.resolve()
+
+    def __str__(self):
+        return "{} = {}".format(self.name, self.value)
+
+    def __repr__(self):
+        return "EntryPoint.parse({!r})".format(str(self))
+
+
+class EntryPointIndex(object):
+    """
+    An index of the installed :class:`Distribution`\\s (in `path`) and
+    their entry points.
+    """
+    def __init__(self, distributions, stamp=None):
+        self.__distributions = list(distributions)
+        self.__stamp = stamp
+        self.__by_key = {}
+        # {group: [EntryPoint, ...]}
+        self.__groups = {}
+        for dist in self.__distributions:
+            self.__by_key.setdefault(dist.key, dist)
+            for group, entries in dist.get_entry_map().items():
+                self.__groups.setdefault(group, []).extend(entries.values())
+
+    def stamp(self):
+        """
+        Return the :func:`path_stamp` for which the index was built.
+        """
+        return self.__stamp
+
+    def distributions(self):
+        return list(self.__distributions)
+
+    def distribution(self, name):
+        """
+        Return the :class:`Distribution` for project `name` (or None).
+        """
+        return self.__by_key.get(safe_name(name).lower())
+
+    def iter_entry_points(self, group, name=None):
+        """
+        Return an iterator over the entry points in `group` (optionally
+        only the ones with `name`).
+        """
+        return (ep for ep in self.__groups.get(group, [])
+                if name is None or ep.name == name)
+
+    @classmethod
+    def build(cls, path=None):
+        """
+        Build the index of the distributions installed in `path`
+        (`sys.path` by default) using `importlib.metadata`.
+        """
+        metadata = metadata_module()
+        if metadata is None:
+            raise RuntimeError("importlib.metadata is not available")
+        if path is None:
+            path = sys.path
+        path = list(path)
+        seen = set()
+        dists = []
+        for mdist in metadata.distributions(path=path):
+            try:
+                name = mdist.metadata["Name"]
+            except Exception:
+                name = None
+            if not name:
+                continue
+            dist = Distribution(
+                name, mdist.version,
+                location=_location(mdist),
+                egg_info=_egg_info(mdist)
+            )
+            # Only the first distribution of the project on the path
+            # is importable
+            if dist.key in seen:
+                continue
+            seen.add(dist.key)
+            for mep in mdist.entry_points:
+                dist.add_entry_point(
+                    EntryPoint(mep.name, mep.group, mep.value))
+            dists.append(dist)
+        return cls(dists, stamp=path_stamp(path))
+
+    def to_dict(self):
+        """
+        Return the index as a JSON serializable dict.
+        """
+        return {
+            "version": CACHE_VERSION,
+            "stamp": self.__stamp,
+            "distributions": [
+                {"name": dist.project_name,
+                 "version": dist.version,
+                 "location": dist.location,
+                 "egg_info": dist.egg_info,
+                 "entry_points": [[ep.group, ep.name, ep.value]
+                                  for entries in dist.get_entry_map().values()
+                                  for ep in entries.values()]}
+                for dist in self.__distributions
+            ]
+        }
+
+    @classmethod
+    def from_dict(cls, state):
+        """
+        Restore the index from a :func:`to_dict` dict.
+        """
+        if state.get("version") != CACHE_VERSION:
+            raise ValueError("Unsupported cache version")
+        dists = []
+        for d in state["distributions"]:
+            dist = Distribution(d["name"], d["version"],
+                                location=d["location"],
+                                egg_info=d["egg_info"])
+            for group, name, value in d["entry_points"]:
+                dist.add_entry_point(EntryPoint(name, group, value))
+            dists.append(dist)
+        stamp = tuple(tuple(entry) for entry in state["stamp"])
+        return cls(dists, stamp=stamp)
+
+
+def _location(mdist):
+    try:
+        return os.path.normpath(str(mdist.locate_file("")))
+    except Exception:
+        return None
+
+
+def _egg_info(mdist):
+    path = getattr(mdist, "_path", None)
+    return str(path) if path is not None else None
+
+
+def default_cache_filename():
+    """
+    Return the default index cache filename (in `config.cache_dir()`).
+    """
+    from .. import config
+    return os.path.join(config.cache_dir(), "entry-points.json")
+
+
+def load_index(filename, stamp):
+    """
+    Load the index cached in `filename` if it was built for `stamp`
+    (return None otherwise).
+    """
+    try:
+        with io.open(filename, "r", encoding="utf-8") as f:
+            index = EntryPointIndex.from_dict(json.load(f))
+    except (OSError, IOError):
+        return None
+    except Exception:
+        log.warning("Could not load the entry point index from %r",
+                    filename, exc_info=True)
+        return None
+    if index.stamp() != stamp:
+        return None
+    return index
+
+
+def save_index(index, filename):
+    """
+    Save the `index` to `filename`. Return True on success.
+    """
+    try:
+        with io.open(filename + ".tmp", "w", encoding="utf-8") as f:
+            f.write(json.dumps(index.to_dict()))
+        os.replace(filename + ".tmp", filename)
+    except (OSError, IOError):
+        log.warning("Could not save the entry point index to %r",
+                    filename, exc_info=True)
+        return False
+    return True
+
+
+_index = None
+
+
+def entry_point_index(cache_filename=None):
+    """
+    Return the :class:`EntryPointIndex` of the distributions on
+    `sys.path`.
+
+    The index is loaded from (and saved to) `cache_filename`
+    (:func:`default_cache_filename` by default) and is rebuilt if any
+    `sys.path` entry was modified. Return None if `importlib.metadata`
+    is not available.
+    """
+    global _index
+    stamp = path_stamp(sys.path)
+    if _index is not None and _index.stamp() == stamp:
+        return _index
+    if cache_filename is None:
+        cache_filename = default_cache_filename()
+    index = load_index(cache_filename, stamp)
+    if index is None:
+        if metadata_module() is None:
+            return None
+        log.debug("Building the entry point index")
+        index = EntryPointIndex.build(sys.path)
+        save_index(index, cache_filename)
+    _index = index
+    return index
+
+
+def invalidate():
+    """
+    Invalidate the in process index (e.g. after (un)installing a
+    distribution).
+    """
+    global _index
+    _index = None
+
+
+def iter_entry_points(group, name=None):
+    """
+    Return an iterator over the installed entry points in `group`.
+    """
+    index = entry_point_index()
+    if index is None:
+        import pkg_resources
+        return pkg_resources.iter_entry_points(group, name)
+    return index.iter_entry_points(group, name)
+
+
+def get_distribution(name):
+    """
+    Return the installed distribution for project `name` (or None if
+    it is not installed).
+    """
+    index = entry_point_index()
+    if index is None:
+        import pkg_resources
+        try:
+            return pkg_resources.get_distribution(name)
+        except pkg_resources.ResolutionError:
+            return None
+    return index.distribution(name)
+
+
+def distributions():
+    """
+    Return a list of all the installed distributions.
+    """
+    index = entry_point_index()
+    if index is None:
+        import pkg_resources
+        return list(pkg_resources.WorkingSet())
+    return index.distributions()
@@ -0,0 +1,84 @@
+"""
+Lazy module imports
+===================
+
+Defer importing (heavy, optional) modules until they are first used.
+
+Example::
+
+    numpy = lazy_import("numpy")
+    addons = lazy_import(".addons", __package__)
+
+    def f():
+        return numpy.arange(10)  # numpy is imported here
+
+"""
+import sys
+import threading
+import importlib
+
+
+class LazyModule(object):
+    """
+    A proxy for a module which is imported on first attribute access.
+    """
+    def __init__(self, name, package=None):
+        if name.startswith("."):
+            name = _resolve_name(name, package)
+        object.__setattr__(self, "_LazyModule__name", name)
+        object.__setattr__(self, "_LazyModule__module", None)
+        object.__setattr__(self, "_LazyModule__lock", threading.Lock())
+
+    def _load(self):
+        """
+        Import and return the module.
+        """
+        module = self.__module
+        if module is None:
+            with self.__lock:
+                module = self.__module
+                if module is None:
+                    module = importlib.import_module(self.__name)
+                    object.__setattr__(self, "_LazyModule__module", module)
+        return module
+
+    def _is_loaded(self):
+        """
+        Was the module already imported (by this proxy or elsewhere).
+        """
+        return self.__module is not None or self.__name in sys.modules
+
+    def __getattr__(self, name):
+        return getattr(self._load(), name)
+
+    def __setattr__(self, name, value):
+        setattr(self._load(), name, value)
+
+    def __dir__(self):
+        return dir(self._load())
+
+    def __repr__(self):
+        if self.__module is not None:
+            return repr(self.__module)
+        return "<lazy module {!r}>".format(self.__name)
+
+
+def _resolve_name(name, package):
+    level = len(name) - len(name.lstrip("."))
+    base = package.rsplit(".", level - 1)[0] if level > 1 else package
+    rest = name[level:]
+    return base + "." + rest if rest else base
+
+
+def lazy_import(name, package=None):
+    """
+    Return a :class:`LazyModule` proxy for the module `name` (a relative
+    `name` is resolved against `package`).
+
+    If the module is already imported the module itself is returned.
+    """
+    proxy = LazyModule(name, package)
+    module = sys.modules.get(proxy._LazyModule__name)
+    if module is not None:
+        return module
+    return proxy
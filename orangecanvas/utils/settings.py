@@ -7,13 +7,22 @@ A more `dict` like interface for QSettings
 """
 
 import abc
+import copy
 import logging
 
-from collections import namedtuple, MutableMapping
+from collections import namedtuple
+from contextlib import contextmanager
+
+try:
+    from collections.abc import MutableMapping
+except ImportError:
+    from collections import MutableMapping
 
 import six
 
-from AnyQt.QtCore import QObject, QEvent, QCoreApplication, QSettings
+from AnyQt.QtCore import (
+    QObject, QEvent, QCoreApplication, QSettings, QTimer, QByteArray
+)
 from AnyQt.QtCore import pyqtSignal as Signal
 
 _QObjectType = type(QObject)
@@ -97,9 +106,112 @@ class _pickledvalue(object):
     def __init__(self, value):
         self.value = value
 
+
+#: Marker for a pending removal of a key from the store.
+_Removed = object()
+
+_immutable_types = (six.text_type, bytes, bool, float, type(None)) + \
+    six.integer_types
+
+
+def _copy(value):
+    """
+    Return a copy of a mutable `value` (so the cached values can not be
+    modified in place).
+    """
+    if isinstance(value, _immutable_types):
+        return value
+    elif isinstance(value, QByteArray):
+        return QByteArray(value)
+    else:
+        return copy.deepcopy(value)
+
+
+class _SettingsCache(QObject):
+    """
+    An in memory (typed) value cache and a write-behind buffer for
+    a QSettings store shared by a :class:`Settings` instance and its
+    groups.
+
+    Pending writes are flushed to the store after `interval` ms, when the
+    owning :class:`Settings` is destroyed, on application quit or
+    explicitly with `flush`.
+    """
+    def __init__(self, store, interval=1000, **kwargs):
+        QObject.__init__(self, **kwargs)
+        self.store = store
+        #: fullkey -> value for values read from or written to the store
+        self.values = {}
+        #: fullkey -> (value, value_type) | _Removed pending writes
+        self.pending = {}
+        #: Nesting level of batched (coalesced) event delivery
+        self.batchlevel = 0
+        #: (id(receiver), key) -> [receiver, etype, value, oldValue]
+        #: queued events
+        self.events = {}
+
+        self.__timer = QTimer(self, singleShot=True, interval=interval)
+        self.__timer.timeout.connect(self.flush)
+
+        app = QCoreApplication.instance()
+        if app is not None:
+            app.aboutToQuit.connect(self.flush)
+
+    def set(self, fullkey, value, value_type):
+        self.values[fullkey] = value
+        self.pending[fullkey] = (value, value_type)
+        self.__schedule()
+
+    def remove(self, fullkey):
+        self.values.pop(fullkey, None)
+        self.pending[fullkey] = _Removed
+        self.__schedule()
+
+    def __schedule(self):
+        if not self.__timer.isActive():
+            self.__timer.start()
+
+    def contains(self, fullkey):
+        """
+        Does the store (with the pending writes applied) contain `fullkey`.
+        """
+        if fullkey in self.pending:
+            return self.pending[fullkey] is not _Removed
+        else:
+            return fullkey in self.values or self.store.contains(fullkey)
+
+    def flush(self):
+        """
+        Write all pending changes to the store.
+        """
+        self.__timer.stop()
+        pending, self.pending = self.pending, {}
+        for fullkey, item in pending.items():
+            if item is _Removed:
+                self.store.remove(fullkey)
+            else:
+                value, value_type = item
+                if value_type is None:
+                    # value is stored in a _pickledvalue wrapper to force
+                    # PyQt to store it in a pickled format so we don't
+                    # lose the type
+                    # TODO: Could check if QSettings.Format stores type
+                    # info.
+                    value = _pickledvalue(value)
+                self.store.setValue(fullkey, value)
+
+    def clear(self):
+        self.__timer.stop()
+        self.values.clear()
+        self.pending.clear()
+
+
 class Settings(six.with_metaclass(QABCMeta, QObject, MutableMapping)):
     """
     A `dict` like interface to a QSettings store.
+
+    Values are cached in memory once read, and changes are buffered and
+    written to the store after a short delay (see :func:`flush`).
     """
     valueChanged = Signal(six.text_type, object)
     valueAdded = Signal(six.text_type, object)
@@ -116,6 +228,14 @@ class Settings(six.with_metaclass(QABCMeta, QObject, MutableMapping)):
         self.__path = path
         self.__defaults = dict([(slot.key, slot) for slot in defaults])
         self.__store = store
+        if isinstance(parent, Settings) and parent.__store is store:
+            # A settings group shares the cache with its parent
+            self.__cache = parent.__cache
+        else:
+            self.__cache = _SettingsCache(store, parent=self)
+            # Do not lose the pending writes (the cache is a child and is
+            # still alive when `destroyed` is emitted).
+            self.destroyed.connect(self.__cache.flush)
 
     def __key(self, key):
         """
@@ -148,8 +268,8 @@ class Settings(six.with_metaclass(QABCMeta, QObject, MutableMapping)):
 
             oldValue = self.get(key)
 
-            if self.__store.contains(fullkey):
-                self.__store.remove(fullkey)
+            if self.__cache.contains(fullkey):
+                self.__cache.remove(fullkey)
 
             newValue = None
             if fullkey in self.__defaults:
@@ -158,9 +278,7 @@ class Settings(six.with_metaclass(QABCMeta, QObject, MutableMapping)):
             else:
                 etype = SettingChangedEvent.SettingRemoved
 
-            QCoreApplication.sendEvent(
-                self, SettingChangedEvent(etype, key, newValue, oldValue)
-            )
+            self.__sendEvent(etype, key, newValue, oldValue)
 
     def __value(self, fullkey, value_type):
         typesafe = value_type is not None
@@ -186,35 +304,51 @@ class Settings(six.with_metaclass(QABCMeta, QObject, MutableMapping)):
 
         return value
 
-    def __setValue(self, fullkey, value, value_type=None):
-        typesafe = value_type is not None
-        if not typesafe:
-            # value is stored in a _pickledvalue wrapper to force PyQt
-            # to store it in a pickled format so we don't lose the type
-            # TODO: Could check if QSettings.Format stores type info.
-            value = _pickledvalue(value)
-
-        self.__store.setValue(fullkey, value)
-
     def __getitem__(self, key):
         """
         Get the setting for key.
         """
+        fullkey = self.__key(key)
+        cache = self.__cache
+        if fullkey in cache.values:
+            return _copy(cache.values[fullkey])
+
         if key not in self:
             raise KeyError(key)
 
         if self.isgroup(key):
             raise KeyError("{0!r} is a group".format(key))
 
-        fullkey = self.__key(key)
         slot = self.__defaults.get(fullkey, None)
 
-        if self.__store.contains(fullkey):
+        if cache.contains(fullkey):
             value = self.__value(fullkey, slot.value_type if slot else None)
+            cache.values[fullkey] = value
         else:
             value = slot.default_value
 
-        return value
+        return _copy(value)
+
+    def value(self, key, defaultValue=None, type=None):
+        """
+        Return the value for `key` converted to `type` or `defaultValue`
+        if not set.
+
+        A :func:`QSettings.value` like accessor for keys without a default
+        slot (including values written by other QSettings instances).
+        """
+        fullkey = self.__key(key)
+        cache = self.__cache
+        if fullkey in cache.values:
+            value = cache.values[fullkey]
+        elif cache.contains(fullkey):
+            value = self.__value(fullkey, type)
+            cache.values[fullkey] = value
+        else:
+            return defaultValue
+        if type is not None and not isinstance(value, type):
+            return defaultValue
+        return _copy(value)
 
     def __setitem__(self, key, value):
         """
@@ -239,26 +373,106 @@ class Settings(six.with_metaclass(QABCMeta, QObject, MutableMapping)):
         if key in self:
             oldValue = self.get(key)
             etype = SettingChangedEvent.SettingChanged
+            if self.__cache.contains(fullkey) and \
+                    type(oldValue) is type(value) and oldValue == value:
+                # Nothing changed; no notification. The value is still
+                # written (unless already pending) in case the store was
+                # changed by an other QSettings instance.
+                if fullkey not in self.__cache.pending:
+                    self.__cache.set(fullkey, _copy(value), value_type)
+                return
         else:
             oldValue = None
             etype = SettingChangedEvent.SettingAdded
 
-        self.__setValue(fullkey, value, value_type)
+        self.__cache.set(fullkey, _copy(value), value_type)
+        self.__sendEvent(etype, key, value, oldValue)
+
+    def __sendEvent(self, etype, key, value, oldValue):
+        cache = self.__cache
+        if cache.batchlevel:
+            # Settings is not hashable (MutableMapping)
+            queued = cache.events.get((id(self), key))
+            if queued is None:
+                cache.events[(id(self), key)] = \
+                    [self, etype, value, oldValue]
+            else:
+                queued[2] = value
+                if queued[1] == SettingChangedEvent.SettingRemoved and \
+                        etype == SettingChangedEvent.SettingAdded:
+                    queued[1] = SettingChangedEvent.SettingChanged
+                elif queued[1] != SettingChangedEvent.SettingAdded:
+                    queued[1] = etype
+                elif etype == SettingChangedEvent.SettingRemoved:
+                    # Added and removed in the same batch.
+                    del cache.events[(id(self), key)]
+        else:
+            QCoreApplication.sendEvent(
+                self, SettingChangedEvent(etype, key, value, oldValue)
+            )
+
+    @contextmanager
+    def batch_updates(self):
+        """
+        A context manager coalescing the change notifications.
+
+        All the changes made in the context are delivered at its exit,
+        with at most one notification per key.
+
+        Example
+        -------
+        >>> with settings.batch_updates():
+        ...     settings["a"] = 1
+        ...     settings["a"] = 2  # only a single `valueChanged` is emitted
+        """
+        cache = self.__cache
+        cache.batchlevel += 1
+        try:
+            yield
+        finally:
+            cache.batchlevel -= 1
+            if not cache.batchlevel:
+                events, cache.events = cache.events, {}
+                for (_, key), (receiver, etype, value, old) in \
+                        events.items():
+                    QCoreApplication.sendEvent(
+                        receiver, SettingChangedEvent(etype, key, value, old)
+                    )
+
+    def flush(self):
+        """
+        Write all pending (buffered) changes to the underlying store.
+
+        .. note:: Changes are written to the store after a short delay,
+                  and are not visible to other QSettings instances before
+                  that (or before this method is called).
+        """
+        self.__cache.flush()
 
-        QCoreApplication.sendEvent(
-            self, SettingChangedEvent(etype, key, value, oldValue)
-        )
+    def sync(self):
+        """
+        Flush all pending changes, sync the underlying store and discard
+        the cached values.
+
+        Call this to see the changes made through other QSettings
+        instances.
+        """
+        self.__cache.flush()
+        self.__store.sync()
+        self.__cache.values.clear()
 
     def __contains__(self, key):
         """
         Return `True` if settings contain the `key`, False otherwise.
         """
         fullkey = self.__key(key)
-        return self.__store.contains(fullkey) or (fullkey in self.__defaults)
+        return self.__cache.contains(fullkey) or \
+            (fullkey in self.__defaults)
 
     def __iter__(self):
         """Return an iterator over over all keys.
         """
+        self.__cache.flush()
         keys = list(map(six.text_type, self.__store.allKeys())) + \
                list(self.__defaults.keys())
 
@@ -293,12 +507,13 @@ class Settings(six.with_metaclass(QABCMeta, QObject, MutableMapping)):
         """
         if key not in self:
             raise KeyError(key)
-        return not self.__store.contains(self.__key(key))
+        return not self.__cache.contains(self.__key(key))
 
     def clear(self):
         """
         Clear the settings and restore the defaults.
         """
+        self.__cache.clear()
         self.__store.clear()
 
     def add_default_slot(self, default):
@@ -317,11 +532,10 @@ class Settings(six.with_metaclass(QABCMeta, QObject, MutableMapping)):
             etype = SettingChangedEvent.SettingChanged
             if not self.isdefault(key):
                 # Replacing a default value.
-                self.__store.remove(self.__key(key))
+                self.__cache.remove(self.__key(key))
 
         self.__defaults[key] = default
-        event = SettingChangedEvent(etype, key, value, oldValue)
-        QCoreApplication.sendEvent(self, event)
+        self.__sendEvent(etype, key, value, oldValue)
 
     def get_default_slot(self, key):
         return self.__defaults[self.__key(key)]
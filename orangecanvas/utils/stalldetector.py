@@ -0,0 +1,210 @@
+"""
+GUI event loop stall detector
+=============================
+
+A watchdog measuring the (GUI thread) event loop latency with a heartbeat
+timer. When the event loop does not respond for longer then a threshold
+the watchdog thread samples the GUI thread's Python stack and, when the
+stall ends, writes a stall report with a histogram of the sampled stacks.
+
+"""
+import os
+import io
+import sys
+import json
+import time
+import logging
+import threading
+
+from collections import Counter
+
+from AnyQt.QtCore import QObject, QTimer
+
+try:
+    clock = time.perf_counter
+except AttributeError:  # Python 2
+    clock = time.time
+
+try:
+    from threading import get_ident
+except ImportError:  # Python 2
+    from thread import get_ident
+
+log = logging.getLogger(__name__)
+
+
+def frame_stack(frame, limit=64):
+    """
+    Return the stack of `frame` as a tuple of `(filename, lineno, name)`
+    (innermost frame last).
+    """
+    stack = []
+    while frame is not None and len(stack) < limit:
+        code = frame.f_code
+        stack.append((code.co_filename, frame.f_lineno, code.co_name))
+        frame = frame.f_back
+    stack.reverse()
+    return tuple(stack)
+
+
+def format_stack(stack):
+    return ["{}:{} ({})".format(*entry) for entry in stack]
+
+
+class StallDetector(QObject):
+    """
+    Detect stalls of the event loop in the thread this object lives in.
+
+    Parameters
+    ----------
+    threshold : float
+        A stall is reported when the event loop does not process the
+        heartbeat timer for longer then this (in seconds).
+    interval : float
+        The heartbeat timer interval (in seconds).
+    sample_interval : float
+        The stack sampling interval during a stall (in seconds).
+    filename : Optional[str]
+        A file where stall reports are appended (as JSON lines).
+
+    """
+    def __init__(self, parent=None, threshold=0.5, interval=0.1,
+                 sample_interval=0.01, filename=None, **kwargs):
+        QObject.__init__(self, parent, **kwargs)
+        self.__threshold = threshold
+        self.__interval = interval
+        self.__sample_interval = sample_interval
+        self.__filename = filename
+        self.__lock = threading.Lock()
+        self.__stop = threading.Event()
+        self.__thread = None
+        self.__thread_id = None
+        self.__last_beat = clock()
+        self.__beats = 0
+        self.__latency = 0.0
+        self.__max_latency = 0.0
+        self.__stalls = []
+        self.__histogram = Counter()
+        self.__heartbeat = QTimer(self, interval=int(interval * 1000))
+        self.__heartbeat.timeout.connect(self.__beat)
+
+    def start(self):
+        """
+        Start the heartbeat timer and the watchdog thread.
+        """
+        if self.__thread is not None:
+            return
+        self.__thread_id = get_ident()
+        self.__last_beat = clock()
+        self.__stop.clear()
+        self.__heartbeat.start()
+        self.__thread = threading.Thread(
+            target=self.__watch, name="stall-detector")
+        self.__thread.daemon = True
+        self.__thread.start()
+
+    def stop(self):
+        """
+        Stop the watchdog.
+
+        If any stalls were recorded, the aggregated statistics are
+        appended to the report file.
+        """
+        if self.__thread is None:
+            return
+        self.__heartbeat.stop()
+        self.__stop.set()
+        self.__thread.join()
+        self.__thread = None
+        if self.__filename is not None and self.__stalls:
+            self.__write({"summary": self.statistics()})
+
+    def isRunning(self):
+        return self.__thread is not None
+
+    def stalls(self):
+        """
+        Return a list of the stall reports (dicts) recorded so far.
+        """
+        with self.__lock:
+            return list(self.__stalls)
+
+    def statistics(self):
+        """
+        Return the event loop latency and aggregated stall statistics.
+        """
+        with self.__lock:
+            histogram = self.__histogram.most_common(20)
+            return {
+                "heartbeats": self.__beats,
+                "mean_latency": self.__latency / max(self.__beats, 1),
+                "max_latency": self.__max_latency,
+                "stalls": len(self.__stalls),
+                "stall_time": sum(s["duration"] for s in self.__stalls),
+                "stacks": [{"count": count, "stack": format_stack(stack)}
+                           for stack, count in histogram],
+            }
+
+    def __beat(self):
+        now = clock()
+        latency = max(now - self.__last_beat - self.__interval, 0.0)
+        with self.__lock:
+            self.__last_beat = now
+            self.__beats += 1
+            self.__latency += latency
+            self.__max_latency = max(self.__max_latency, latency)
+
+    def __watch(self):
+        # Runs in the watchdog thread
+        threshold = self.__threshold + self.__interval
+        stall = None
+        while not self.__stop.is_set():
+            with self.__lock:
+                last_beat = self.__last_beat
+            now = clock()
+            if now - last_beat > threshold:
+                if stall is None:
+                    stall = {"beat": last_beat, "samples": Counter()}
+                frame = sys._current_frames().get(self.__thread_id)
+                if frame is not None:
+                    stall["samples"][frame_stack(frame)] += 1
+                del frame
+                self.__stop.wait(self.__sample_interval)
+            else:
+                if stall is not None:
+                    self.__stall_finished(stall["beat"], last_beat,
+                                          stall["samples"])
+                    stall = None
+                self.__stop.wait(self.__interval / 2)
+
+    def __stall_finished(self, start, end, samples):
+        duration = end - start - self.__interval
+        report = {
+            "time": time.time() - (clock() - start),
+            "duration": duration,
+            "samples": sum(samples.values()),
+            "stacks": [{"count": count, "stack": format_stack(stack)}
+                       for stack, count in samples.most_common(10)],
+        }
+        with self.__lock:
+            self.__stalls.append(report)
+            self.__histogram.update(samples)
+
+        log.warning("Event loop stalled for %.3f s", duration)
+        if self.__filename is not None:
+            self.__write(report)
+
+    def __write(self, report):
+        try:
+            with io.open(self.__filename, "a", encoding="utf-8") as f:
+                f.write(json.dumps(report) + "\n")
+        except (IOError, OSError):
+            log.error("Could not write the stall report", exc_info=True)
+
+
+def default_report_filename():
+    """
+    Return the default stall reports filename (in `config.log_dir()`).
+    """
+    from .. import config
+    return os.path.join(config.log_dir(), "stalls.jsonl")
@@ -0,0 +1,42 @@
+"""
+Tests for the concurrency utilities.
+
+"""
+import threading
+import concurrent.futures
+
+from AnyQt.QtCore import QObject, QThread
+from AnyQt.QtCore import pyqtSlot as Slot
+from AnyQt.QtTest import QTest
+
+from ..concurrent import method_queued
+
+from ...gui import test
+
+
+class Receiver(QObject):
+    def __init__(self, parent=None):
+        super(Receiver, self).__init__(parent)
+        self.received = []
+
+    @Slot(object)
+    def receive(self, value):
+        self.received.append((value, QThread.currentThread()))
+
+
+class TestMethodQueued(test.QCoreAppTestCase):
+    def test_method_queued(self):
+        receiver = Receiver()
+        call = method_queued(receiver.receive, (object,))
+        executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+        self.addCleanup(executor.shutdown)
+
+        future = executor.submit(threading.current_thread)
+        future.add_done_callback(call)
+        future.result()
+        # The call is queued in the receiver's thread
+        QTest.qWait(50)
+        self.assertEqual(len(receiver.received), 1)
+        value, thread = receiver.received[0]
+        self.assertIs(value, future)
+        self.assertIs(thread, self.app.thread())
@@ -0,0 +1,110 @@
+"""
+Tests for the entry point index.
+
+"""
+import os
+import io
+import sys
+import json
+import shutil
+import tempfile
+import unittest
+
+from .. import entrypoints
+from ..entrypoints import EntryPoint, EntryPointIndex
+
+
+def write(path, contents):
+    with io.open(path, "w", encoding="utf-8") as f:
+        f.write(contents)
+
+
+@unittest.skipIf(entrypoints.metadata_module() is None,
+                 "importlib.metadata is not available")
+class TestEntryPointIndex(unittest.TestCase):
+    def setUp(self):
+        self.path = tempfile.mkdtemp()
+        info = os.path.join(self.path, "Foo_Bar-1.0.dist-info")
+        os.makedirs(info)
+        write(os.path.join(info, "METADATA"),
+              u"Metadata-Version: 2.1\nName: Foo_Bar\nVersion: 1.0\n")
+        write(os.path.join(info, "entry_points.txt"),
+              u"[orangecanvas.widgets]\n"
+              u"Foo = foo_widgets\n"
+              u"[orange.canvas.help]\n"
+              u"html-index = foo_widgets:HELP [docs]\n")
+        write(os.path.join(self.path, "foo_widgets.py"),
+              u"HELP = ['help']\n")
+
+    def tearDown(self):
+        shutil.rmtree(self.path)
+        sys.modules.pop("foo_widgets", None)
+
+    def test_index(self):
+        index = EntryPointIndex.build([self.path])
+        dist = index.distribution("foo-bar")
+        self.assertIsNotNone(dist)
+        self.assertEqual(dist.project_name, "Foo_Bar")
+        self.assertEqual(dist.key, "foo-bar")
+        self.assertEqual(dist.version, "1.0")
+        self.assertTrue(dist.has_metadata("METADATA"))
+        self.assertIn("Version: 1.0", dist.get_metadata("METADATA"))
+        self.assertIsNone(index.distribution("bar"))
+
+        eps = list(index.iter_entry_points("orangecanvas.widgets"))
+        self.assertEqual([ep.name for ep in eps], ["Foo"])
+        self.assertIs(eps[0].dist, dist)
+        self.assertEqual(list(index.iter_entry_points("orangecanvas.none")),
+                         [])
+
+        help_ep = dist.get_entry_map("orange.canvas.help")["html-index"]
+        self.assertEqual(help_ep.module_name, "foo_widgets")
+        self.assertEqual(help_ep.attrs, ("HELP",))
+        self.assertEqual(help_ep.extras, ("docs",))
+
+        sys.path.insert(0, self.path)
+        try:
+            self.assertEqual(help_ep.resolve(), ["help"])
+            self.assertEqual(eps[0].resolve().__name__, "foo_widgets")
+        finally:
+            sys.path.remove(self.path)
+
+        with self.assertRaises(ImportError):
+            EntryPoint("a", "g", "foo_widgets:MISSING").resolve()
+
+    def test_cache(self):
+        index = EntryPointIndex.build([self.path])
+        filename = os.path.join(self.path, "entry-points.json")
+        self.assertTrue(entrypoints.save_index(index, filename))
+
+        loaded = entrypoints.load_index(filename, index.stamp())
+        self.assertIsNotNone(loaded)
+        self.assertEqual(json.dumps(loaded.to_dict()),
+                         json.dumps(index.to_dict()))
+        dist = loaded.distribution("Foo_Bar")
+        self.assertEqual(
+            [str(ep) for ep in loaded.iter_entry_points("orange.canvas.help")],
+            ["html-index = foo_widgets:HELP [docs]"])
+        self.assertIs(dist.get_entry_info("orangecanvas.widgets", "Foo").dist,
+                      dist)
+
+        # A changed path invalidates the cache
+        stamp = entrypoints.path_stamp([self.path, self.path + "-other"])
+        self.assertIsNone(entrypoints.load_index(filename, stamp))
+
+    def test_entry_point_index(self):
+        filename = os.path.join(self.path, "entry-points.json")
+        entrypoints.invalidate()
+        self.addCleanup(entrypoints.invalidate)
+        index = entrypoints.entry_point_index(cache_filename=filename)
+        self.assertTrue(os.path.exists(filename))
+        self.assertIs(entrypoints.entry_point_index(cache_filename=filename),
+                      index)
+        self.assertIsNotNone(entrypoints.get_distribution("six"))
+        self.assertIsNone(entrypoints.get_distribution("not-a-distribution"))
+
+        # restored from the cache
+        entrypoints.invalidate()
+        restored = entrypoints.entry_point_index(cache_filename=filename)
+        self.assertIsNot(restored, index)
+        self.assertEqual(restored.stamp(), index.stamp())
@@ -2,14 +2,18 @@
 Tests for settings utility module.
 
 """
+import gc
 import logging
 import tempfile
+import time
 
 from AnyQt.QtCore import QSettings
 from ..settings import Settings, config_slot
 
 from ...gui import test
 
+log = logging.getLogger(__name__)
+
 
 class TestUserSettings(test.QAppTestCase):
     def setUp(self):
@@ -118,3 +122,200 @@ class TestUserSettings(test.QAppTestCase):
             settings = QSettings(f.name, QSettings.IniFormat)
             self.assertEqual(settings.value("bar", type=str), "foo")
             self.assertEqual(settings.value("frob", type=int), 4)
+
+    def test_settings_write_behind(self):
+        spec = [config_slot("foo", bool, True, "foo doc"),
+                config_slot("bar", int, 0, "bar doc")]
+        with tempfile.NamedTemporaryFile("w+b", suffix=".ini",
+                                         delete=False) as f:
+            store = QSettings(f.name, QSettings.IniFormat)
+            settings = Settings(defaults=spec, store=store)
+
+            settings["bar"] = 2
+            settings["baz"] = [1, 2]
+            self.assertEqual(settings["bar"], 2)
+            self.assertFalse(settings.isdefault("bar"))
+            self.assertIn("baz", settings)
+            # Not yet written to the store
+            self.assertFalse(store.contains("bar"))
+
+            settings.flush()
+            self.assertEqual(store.value("bar", type=int), 2)
+            self.assertTrue(store.contains("baz"))
+
+            del settings["baz"]
+            self.assertNotIn("baz", settings)
+            self.assertTrue(store.contains("baz"))
+            # Pending writes are flushed after a short delay
+            test.QTest.qWait(1500)
+            self.assertFalse(store.contains("baz"))
+
+            # Values written by an other Settings instance are read back
+            # with the right type
+            settings = Settings(defaults=spec,
+                                store=QSettings(f.name, QSettings.IniFormat))
+            self.assertEqual(settings["bar"], 2)
+            group = settings.group("group")
+            group["a"] = 1
+            self.assertEqual(settings["group/a"], 1)
+
+    def test_settings_batch_updates(self):
+        spec = [config_slot("foo", bool, True, "foo doc"),
+                config_slot("bar", int, 0, "bar doc")]
+        with tempfile.NamedTemporaryFile("w+b", suffix=".ini",
+                                         delete=False) as f:
+            store = QSettings(f.name, QSettings.IniFormat)
+            settings = Settings(defaults=spec, store=store)
+            changed, added, removed = [], [], []
+            settings.valueChanged.connect(
+                lambda key, value: changed.append((key, value)))
+            settings.valueAdded.connect(
+                lambda key, value: added.append((key, value)))
+            settings.keyRemoved.connect(removed.append)
+
+            with settings.batch_updates():
+                settings["bar"] = 1
+                settings["bar"] = 2
+                settings["foo"] = False
+                settings["new"] = "a"
+                settings["new"] = "b"
+                settings["tmp"] = 1
+                del settings["tmp"]
+                self.assertEqual(changed, [])
+
+            self.assertEqual(changed, [("bar", 2), ("foo", False)])
+            self.assertEqual(added, [("new", "b")])
+            self.assertEqual(removed, [])
+
+            # Setting the same value again is a no op
+            settings["bar"] = 2
+            self.assertEqual(len(changed), 2)
+
+    def test_settings_flush_on_destroy(self):
+        with tempfile.NamedTemporaryFile("w+b", suffix=".ini",
+                                         delete=False) as f:
+            settings = Settings(store=QSettings(f.name, QSettings.IniFormat))
+            settings["a"] = 1
+            settings.group("group")["b"] = 2
+            del settings
+            gc.collect()
+            settings = Settings(store=QSettings(f.name, QSettings.IniFormat))
+            self.assertEqual(settings["a"], 1)
+            self.assertEqual(settings["group/b"], 2)
+
+    def test_settings_external_writes(self):
+        spec = [config_slot("foo", bool, True, "foo doc")]
+        with tempfile.NamedTemporaryFile("w+b", suffix=".ini",
+                                         delete=False) as f:
+            store = QSettings(f.name, QSettings.IniFormat)
+            settings = Settings(defaults=spec, store=store)
+            settings["foo"] = True
+            settings.flush()
+            other = QSettings(f.name, QSettings.IniFormat)
+            other.setValue("foo", False)
+            # The cached value is still used ...
+            self.assertIs(settings["foo"], True)
+            # ... but setting it is not lost
+            settings["foo"] = True
+            settings.flush()
+            other.sync()
+            self.assertIs(other.value("foo", type=bool), True)
+
+            other.setValue("foo", False)
+            other.sync()
+            settings.sync()
+            self.assertIs(settings["foo"], False)
+            self.assertIs(settings.value("foo", type=bool), False)
+
+    def test_settings_copy(self):
+        with tempfile.NamedTemporaryFile("w+b", suffix=".ini",
+                                         delete=False) as f:
+            settings = Settings(store=QSettings(f.name, QSettings.IniFormat))
+            value = [1, {"a": 2}]
+            settings["list"] = value
+            value.append(3)
+            self.assertEqual(settings["list"], [1, {"a": 2}])
+            settings["list"][1]["a"] = 3
+            self.assertEqual(settings["list"], [1, {"a": 2}])
+            self.assertEqual(settings.value("list", type=list), [1, {"a": 2}])
+            self.assertEqual(settings.value("nothere", 5, type=int), 5)
+
+    def test_settings_benchmark(self):
+        """
+        Compare the read/write throughput with a raw QSettings store.
+        """
+        spec = [config_slot("group/key{}".format(i), int, i, "")
+                for i in range(20)]
+        keys = [slot.key for slot in spec]
+        N = 50
+        with tempfile.NamedTemporaryFile("w+b", suffix=".ini",
+                                         delete=False) as f:
+            store = _CountingSettings(f.name, QSettings.IniFormat)
+            settings = Settings(defaults=spec, store=store)
+            for i, key in enumerate(keys):
+                settings[key] = i + 1
+
+            def timeit(func):
+                start = time.perf_counter()
+                for _ in range(N):
+                    func()
+                return time.perf_counter() - start
+
+            def read_raw():
+                for key in keys:
+                    QSettings.value(store, key, type=int)
+
+            def read_cached():
+                for key in keys:
+                    settings[key]
+
+            def write_raw():
+                for i, key in enumerate(keys):
+                    QSettings.setValue(store, key, i)
+
+            def write_cached():
+                for i, key in enumerate(keys):
+                    settings[key] = i
+
+            settings.flush()
+            store.reset()
+            t_read_raw, t_read = timeit(read_raw), timeit(read_cached)
+            # All the reads are served from the cache
+            self.assertEqual(store.reads, 0)
+            t_write_raw, t_write = timeit(write_raw), timeit(write_cached)
+            self.assertEqual(store.writes, 0)
+            settings.flush()
+            # Repeated writes to a key are stored once
+            self.assertEqual(store.writes, len(keys))
+            log.info("QSettings: read %.2f us, write %.2f us",
+                     1e6 * t_read_raw / (N * len(keys)),
+                     1e6 * t_write_raw / (N * len(keys)))
+            log.info("Settings:  read %.2f us, write %.2f us",
+                     1e6 * t_read / (N * len(keys)),
+                     1e6 * t_write / (N * len(keys)))
+            self.assertEqual(settings["group/key3"], 3)
+            self.assertEqual(store.value("group/key3", type=int), 3)
+
+
+class _CountingSettings(QSettings):
+    """
+    A QSettings store counting the value accesses.
+    """
+    def __init__(self, *args):
+        QSettings.__init__(self, *args)
+        self.reset()
+
+    def reset(self):
+        self.reads = self.writes = 0
+
+    def value(self, *args, **kwargs):
+        self.reads += 1
+        return QSettings.value(self, *args, **kwargs)
+
+    def contains(self, key):
+        self.reads += 1
+        return QSettings.contains(self, key)
+
+    def setValue(self, key, value):
+        self.writes += 1
+        QSettings.setValue(self, key, value)
@@ -0,0 +1,57 @@
+"""
+Tests for the event loop stall detector.
+
+"""
+import os
+import io
+import json
+import time
+import tempfile
+
+from AnyQt.QtTest import QTest
+
+from ..stalldetector import StallDetector
+
+from ...gui import test
+
+
+def blocking_handler(duration):
+    time.sleep(duration)
+
+
+class TestStallDetector(test.QCoreAppTestCase):
+    def test_stall(self):
+        fd, filename = tempfile.mkstemp(suffix=".jsonl")
+        os.close(fd)
+        self.addCleanup(os.remove, filename)
+
+        detector = StallDetector(threshold=0.1, interval=0.02,
+                                 sample_interval=0.005, filename=filename)
+        detector.start()
+        self.assertTrue(detector.isRunning())
+        QTest.qWait(50)
+        self.assertEqual(detector.stalls(), [])
+
+        blocking_handler(0.3)
+        deadline = time.time() + 0.5
+        while not detector.stalls() and time.time() < deadline:
+            QTest.qWait(10)
+        detector.stop()
+        self.assertFalse(detector.isRunning())
+
+        stalls = detector.stalls()
+        self.assertEqual(len(stalls), 1)
+        self.assertGreater(stalls[0]["duration"], 0.15)
+        self.assertGreater(stalls[0]["samples"], 0)
+        top = stalls[0]["stacks"][0]["stack"]
+        self.assertTrue(any("blocking_handler" in s for s in top))
+
+        stats = detector.statistics()
+        self.assertEqual(stats["stalls"], 1)
+        self.assertGreater(stats["max_latency"], 0.15)
+
+        with io.open(filename, "r", encoding="utf-8") as f:
+            lines = [json.loads(line) for line in f]
+        self.assertEqual(len(lines), 2)
+        self.assertEqual(lines[0]["samples"], stalls[0]["samples"])
+        self.assertEqual(lines[1]["summary"]["stalls"], 1)